@@ -135,6 +135,9 @@ export default function NotificationsLoading() {
 ''',
 }
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = list(PAGES)
+
 def run():
     for path, content in PAGES.items():
         dirpath = os.path.dirname(path)
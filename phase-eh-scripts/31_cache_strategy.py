@@ -17,6 +17,9 @@ PAGES_TO_ADD = {
     "src/app/(main)/terms/page.tsx": 86400,
 }
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = list(PAGES_TO_ADD)
+
 def run():
     for path, seconds in PAGES_TO_ADD.items():
         if not os.path.exists(path):
@@ -5,7 +5,10 @@ Task #33: 画像最適化
 - 対象: CommentItem, FollowList, TimelineItem, RankingList
 """
 
-import os, re
+import os, re, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from patchkit.codemod import FileRule
 
 TARGETS = [
     "src/components/comments/CommentItem.tsx",
@@ -14,6 +17,61 @@ TARGETS = [
     "src/components/rankings/RankingList.tsx",
 ]
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = TARGETS
+
+def _tailwind_size(class_name, axis):
+    """className の w-N / h-N（Tailwind の 1単位 = 4px）。無ければ None"""
+    m = re.search(rf'(?<![\w-]){axis}-(\d+)(?![\w-])', class_name)
+    return int(m.group(1)) * 4 if m else None
+
+def replace_img(match):
+    full = match.group(0)
+    class_name = match.group("cls")
+    # サイズは className から。分からない（w-full など）タグは触らない
+    w = _tailwind_size(class_name, "w")
+    h = _tailwind_size(class_name, "h") or w
+    if w is None:
+        return full
+
+    # <img を <Image に（src が次の行にある複数行のタグも）
+    result = re.sub(r"^<img(\s+)", rf"<Image width={{{w}}} height={{{h}}}\1", full, count=1)
+    # /> の前に unoptimized がなければ追加（外部URLの場合用）
+    if "unoptimized" not in result:
+        result = re.sub(r"\s*/>$", " unoptimized />", result)
+    return result
+
+IMG_PATTERN = re.compile(r'<img\s+src=\{[^}]+\}\s+alt="[^"]*"\s+className="(?P<cls>[^"]*)"\s*/>')
+
+def convert_to_next_image(content):
+    """<img src={...} alt="" className="..." /> を next/image の <Image> に置換する"""
+    if "next/image" in content or not IMG_PATTERN.search(content):
+        return content
+
+    # <img src={...avatar_url} alt="" className="w-8 h-8 rounded-full" />
+    # → <Image width={32} height={32} src={...avatar_url} alt="" className="w-8 h-8 rounded-full" unoptimized />
+    converted = IMG_PATTERN.sub(replace_img, content)
+    if converted == content:
+        return content
+
+    # import Link があればその横に追加、なければ先頭に追加
+    if 'import Link from "next/link"' in converted:
+        return converted.replace(
+            'import Link from "next/link"',
+            'import Link from "next/link";\nimport Image from "next/image"',
+            1,
+        )
+    return 'import Image from "next/image";\n' + converted
+
+# scripts/codemod.py から適用するためのルール。サイズ推定は TARGETS のアバター画像前提なので対象を絞る
+CODEMOD_RULES = [
+    FileRule(
+        "<img>→next/image",
+        convert_to_next_image,
+        include=tuple(path.removeprefix("src/") for path in TARGETS),
+    )
+]
+
 def run():
     for path in TARGETS:
         if not os.path.exists(path):
@@ -28,43 +86,7 @@ def run():
             continue
 
         original = content
-
-        # import Link があればその横に追加、なければ先頭に追加
-        if 'import Link from "next/link"' in content:
-            content = content.replace(
-                'import Link from "next/link"',
-                'import Link from "next/link";\nimport Image from "next/image"'
-            )
-        elif "import " in content:
-            # 最初のimportの前に追加
-            content = 'import Image from "next/image";\n' + content
-        else:
-            content = 'import Image from "next/image";\n' + content
-
-        # <img src={...avatar_url} alt="" className="w-8 h-8 rounded-full" />
-        # → <Image src={...avatar_url} alt="" width={32} height={32} className="w-8 h-8 rounded-full" />
-        def replace_img(match):
-            full = match.group(0)
-            # サイズを推定
-            if "w-10" in full:
-                w, h = 40, 40
-            elif "w-8" in full:
-                w, h = 32, 32
-            elif "w-7" in full:
-                w, h = 28, 28
-            elif "w-12" in full:
-                w, h = 48, 48
-            else:
-                w, h = 32, 32
-
-            # <img を <Image に
-            result = full.replace("<img ", f"<Image width={{{w}}} height={{{h}}} ")
-            # /> の前に unoptimized がなければ追加（外部URLの場合用）
-            if "unoptimized" not in result:
-                result = result.replace(" />", " unoptimized />")
-            return result
-
-        content = re.sub(r'<img\s+src=\{[^}]+\}\s+alt="[^"]*"\s+className="[^"]*"\s*/>', replace_img, content)
+        content = convert_to_next_image(content)
 
         if content != original:
             with open(path, "w") as f:
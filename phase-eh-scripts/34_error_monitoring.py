@@ -2,13 +2,20 @@
 """
 Task #34: エラー監視の導入
 - src/lib/error-logger.ts: エラーログ収集ユーティリティ
-- src/app/api/error-report/route.ts: クライアントエラー受信API
+- src/app/api/error-report/route.ts: クライアントエラー受信API（fingerprint ごとに集計して error_events へまとめて加算）
 - src/app/error.tsx を改善してエラーをAPIに送信
 - Vercel Analytics (Speed Insights) をlayout.tsxに追加
 """
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/lib/error-logger.ts",
+    "src/app/api/error-report/route.ts",
+    "src/app/error.tsx",
+]
+
 # ============================================================
 # 1. エラーログユーティリティ
 # ============================================================
@@ -16,44 +23,179 @@ ERROR_LOGGER = '''\
 /**
  * エラーログ収集ユーティリティ
  * Sentryなど外部サービス導入時はここを差し替え
+ *
+ * 同じエラーは fingerprint（正規化したメッセージ＋先頭スタックフレームのハッシュ）でまとめる。
+ *   - サーバー: logError は fingerprint ごとに初回と100回ごとだけ console.error
+ *   - クライアント: reportClientError はキューに積んで件数を数え、5秒ごと／ページを離れるときに
+ *     まとめて /api/error-report へ送る（離脱時は sendBeacon）。NEXT_PUBLIC_ERROR_SAMPLE_RATE で間引く
+ * 受け側の集計・保存は src/lib/error-ingest.ts
  */
 
 type ErrorContext = {
   page?: string;
   action?: string;
   userId?: string;
+  digest?: string;
   extra?: Record<string, any>;
 };
 
+export type ErrorReport = {
+  /** クライアント側のキューのキー。受け側は message / stack から計算し直す */
+  fingerprint: string;
+  message: string;
+  stack?: string;
+  page?: string;
+  digest?: string;
+  userAgent?: string;
+  action?: string;
+  /** この fingerprint を何回見たか（間引き後。受け側で ERROR_SAMPLE_RATE で割り戻す） */
+  count: number;
+};
+
+/** クライアントの間引き率。受け側もリクエストの値ではなくこれで件数を割り戻す */
+export const ERROR_SAMPLE_RATE = Math.min(1, Math.max(0, Number(process.env.NEXT_PUBLIC_ERROR_SAMPLE_RATE ?? "1")));
+
+/** 可変部分（数値・ID・行番号）を潰してから FNV-1a でハッシュ */
+export function errorFingerprint(message: string, stack?: string): string {
+  const msg = message.replace(/[0-9a-f]{8,}(-[0-9a-f]{4,})*/gi, "#").replace(/\\d+/g, "#");
+  const frame = (stack ?? "")
+    .split("\\n")
+    .map((l) => l.trim())
+    .find((l) => l.startsWith("at ") || l.includes("@"))
+    ?.replace(/\\?[^:)]*/g, "")
+    .replace(/:\\d+(:\\d+)?/g, "") ?? "";
+
+  let h = 0x811c9dc5;
+  for (const ch of `${msg}|${frame}`) {
+    h ^= ch.codePointAt(0)!;
+    h = Math.imul(h, 0x01000193) >>> 0;
+  }
+  return h.toString(16).padStart(8, "0");
+}
+
+function describe(error: unknown) {
+  return {
+    message: error instanceof Error ? error.message : String(error),
+    stack: error instanceof Error ? error.stack : undefined,
+  };
+}
+
+// ============================================================
+// サーバー
+// ============================================================
+
+const LOG_EVERY = 100;
+const LOG_MAX_KEYS = 1_000;
+const logCounts = new Map<string, number>();
+
 export function logError(error: unknown, context?: ErrorContext) {
-  const message = error instanceof Error ? error.message : String(error);
-  const stack = error instanceof Error ? error.stack : undefined;
+  const { message, stack } = describe(error);
+  const fingerprint = errorFingerprint(message, stack);
+
+  const n = (logCounts.get(fingerprint) ?? 0) + 1;
+  logCounts.delete(fingerprint);
+  logCounts.set(fingerprint, n);
+  if (logCounts.size > LOG_MAX_KEYS) logCounts.delete(logCounts.keys().next().value as string);
+
+  // 同じエラーの連発はログを埋めないよう初回と100回ごとだけ
+  if (n !== 1 && n % LOG_EVERY !== 0) return;
 
   // サーバーサイドログ
   console.error("[ERROR]", {
     message,
     stack,
+    fingerprint,
+    count: n,
     ...context,
     timestamp: new Date().toISOString(),
   });
 }
 
+// ============================================================
+// クライアント
+// ============================================================
+
+const FLUSH_DELAY_MS = 5_000;
+const MAX_BATCH = 20;
+// 1ページセッションで送る fingerprint 数の上限（壊れたデプロイで送り続けない）
+const SESSION_MAX_FINGERPRINTS = 50;
+
+const queue = new Map<string, ErrorReport>();
+const seen = new Set<string>();
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+let listening = false;
+
+function flushClientErrors(useBeacon: boolean) {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  if (queue.size === 0) return;
+
+  const reports = [...queue.values()].slice(0, MAX_BATCH);
+  for (const r of reports) queue.delete(r.fingerprint);
+  const body = JSON.stringify({ reports });
+
+  try {
+    if (useBeacon && typeof navigator.sendBeacon === "function") {
+      navigator.sendBeacon("/api/error-report", new Blob([body], { type: "application/json" }));
+    } else {
+      fetch("/api/error-report", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body,
+        keepalive: true,
+      }).catch(() => {});
+    }
+  } catch {
+    // エラー送信自体のエラーは無視
+  }
+
+  if (queue.size > 0) scheduleFlush();
+}
+
+function scheduleFlush() {
+  if (flushTimer) return;
+  flushTimer = setTimeout(() => flushClientErrors(false), FLUSH_DELAY_MS);
+
+  if (!listening) {
+    listening = true;
+    // タブを閉じる・裏に回るときは残りをビーコンで
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "hidden") flushClientErrors(true);
+    });
+    window.addEventListener("pagehide", () => flushClientErrors(true));
+  }
+}
+
 export async function reportClientError(error: unknown, context?: ErrorContext) {
   try {
-    const message = error instanceof Error ? error.message : String(error);
-    const stack = error instanceof Error ? error.stack : undefined;
-
-    await fetch("/api/error-report", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        message,
-        stack,
-        page: context?.page ?? window.location.pathname,
-        userAgent: navigator.userAgent,
-        ...context,
-      }),
+    if (ERROR_SAMPLE_RATE <= 0 || Math.random() >= ERROR_SAMPLE_RATE) return;
+
+    const { message, stack } = describe(error);
+    const fingerprint = errorFingerprint(message, stack);
+
+    const queued = queue.get(fingerprint);
+    if (queued) {
+      queued.count++;
+      return;
+    }
+    if (!seen.has(fingerprint)) {
+      if (seen.size >= SESSION_MAX_FINGERPRINTS) return;
+      seen.add(fingerprint);
+    }
+
+    queue.set(fingerprint, {
+      fingerprint,
+      message: message.slice(0, 1000),
+      stack: stack?.slice(0, 4000),
+      page: context?.page ?? window.location.pathname,
+      digest: context?.digest,
+      action: context?.action,
+      userAgent: navigator.userAgent,
+      count: 1,
     });
+    scheduleFlush();
   } catch {
     // エラー送信自体のエラーは無視
   }
@@ -64,20 +206,28 @@ export async function reportClientError(error: unknown, context?: ErrorContext)
 # 2. クライアントエラー受信API
 # ============================================================
 ERROR_REPORT_API = '''\
-import { NextResponse } from "next/server";
+import { NextResponse, after } from "next/server";
+import { recordErrorReports, flushErrorReports } from "@/lib/error-ingest";
+import { rateLimit, rateLimitResponse } from "@/lib/rate-limit";
+
+// 1リクエストで受け付けるレポート数（クライアントは fingerprint ごとにまとめて送る）
+const MAX_REPORTS = 50;
 
 export async function POST(request: Request) {
   try {
-    const body = await request.json();
-
-    // サーバーログに出力（Vercel Logsで閲覧可能）
-    console.error("[CLIENT_ERROR]", {
-      message: body.message,
-      stack: body.stack,
-      page: body.page,
-      userAgent: body.userAgent,
-      timestamp: new Date().toISOString(),
-    });
+    // sendBeacon の Content-Type に依らず読めるよう text で受ける
+    const body = JSON.parse(await request.text());
+    // { reports: [...] }（まとめ送信）と旧形式の単発 { message, ... } の両方を受ける
+    const reports = Array.isArray(body.reports) ? body.reports : [body];
+
+    const ip = request.headers.get("x-forwarded-for")?.split(",")[0]?.trim() || "unknown";
+    const rl = await rateLimit(`error-report:${ip}`, { limit: 30, windowMs: 60_000 });
+    if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
+
+    // fingerprint ごとに件数を足し込み、DB への書き込みはレスポンス後にまとめて
+    if (recordErrorReports(reports.slice(0, MAX_REPORTS))) {
+      after(flushErrorReports);
+    }
 
     return NextResponse.json({ received: true });
   } catch {
@@ -93,6 +243,7 @@ ERROR_PAGE = '''\
 "use client";
 
 import { useEffect } from "react";
+import { reportClientError } from "@/lib/error-logger";
 
 export default function Error({
   error,
@@ -103,18 +254,8 @@ export default function Error({
 }) {
   useEffect(() => {
     console.error("App error:", error);
-    // エラーをAPIに送信（Vercel Logsで閲覧可能）
-    fetch("/api/error-report", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        message: error.message,
-        stack: error.stack,
-        digest: error.digest,
-        page: window.location.pathname,
-        userAgent: navigator.userAgent,
-      }),
-    }).catch(() => {});
+    // エラーをAPIに送信（同じエラーはまとめて数えて送る。Vercel Logs・error_events で閲覧可能）
+    reportClientError(error, { digest: error.digest });
   }, [error]);
 
   return (
@@ -8,6 +8,14 @@ Task #36: 入力値バリデーション強化
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/lib/validation.ts",
+    "src/app/api/follows/route.ts",
+    "src/app/api/profile/route.ts",
+    "src/app/api/timeline/route.ts",
+]
+
 # ============================================================
 # 1. validation.ts に追加関数
 # ============================================================
@@ -82,8 +90,8 @@ def run():
             # POST関数内の認証チェック後にレート制限追加
             old = '  const { following_id } = await request.json();'
             new = '''  // レート制限
-  const rl = rateLimit(`follows:${user.id}`, { limit: 30, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`follows:${user.id}`, { limit: 30, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const { following_id } = await request.json();
 
@@ -112,8 +120,8 @@ def run():
 
             old = "  const body = await request.json();"
             new = """  // レート制限
-  const rl = rateLimit(`profile:${user.id}`, { limit: 10, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`profile:${user.id}`, { limit: 10, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const body = await request.json();"""
 
@@ -137,8 +145,8 @@ def run():
 
             old = '  const { searchParams } = new URL(request.url);'
             new = '''  // レート制限
-  const rl = rateLimit(`timeline:${user.id}`, { limit: 60, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`timeline:${user.id}`, { limit: 60, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const { searchParams } = new URL(request.url);'''
 
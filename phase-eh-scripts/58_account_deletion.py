@@ -1,21 +1,39 @@
 #!/usr/bin/env python3
 """
 Task #58: 退会/アカウント削除機能
-- src/app/api/account/delete/route.ts: 退会API
+- src/app/api/account/delete/route.ts: 退会API（ジョブを積んで 202 を返す / GET で進捗）
+- src/lib/account-deletion.ts: 退会ジョブをステップ単位で進める
+- src/app/api/cron/account-deletion/route.ts: 残ったジョブを再開する Cron（vercel.json に登録）
 - src/app/(main)/mypage/delete/page.tsx: 退会確認ページ
 - マイページメニューに退会リンク追加
 """
 
+import json
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/app/api/account/delete/route.ts",
+    "src/lib/account-deletion.ts",
+    "src/app/api/cron/account-deletion/route.ts",
+    "vercel.json",
+    "src/app/(main)/mypage/delete/page.tsx",
+    "src/app/(main)/mypage/page.tsx",
+]
+
 # ============================================================
 # 1. 退会API
 # ============================================================
 DELETE_API = '''\
 import { createClient } from "@/lib/supabase/server";
-import { createAdminClient } from "@/lib/admin";
-import { NextResponse } from "next/server";
-
+import { enqueueAccountDeletion, getAccountDeletionJob, runAccountDeletion } from "@/lib/account-deletion";
+import { NextResponse, after } from "next/server";
+
+/**
+ * 退会リクエスト
+ * ジョブを積んでログアウトさせたら即返す。削除本体はレスポンス後（after）に始め、
+ * 終わらなかった分は /api/cron/account-deletion が続きから処理する。
+ */
 export async function POST(request: Request) {
   const supabase = await createClient();
   const { data: { user } } = await supabase.auth.getUser();
@@ -29,55 +47,203 @@ export async function POST(request: Request) {
     return NextResponse.json({ error: "確認テキストが一致しません" }, { status: 400 });
   }
 
-  const admin = createAdminClient();
-
   try {
-    // 1. ユーザーのデータを匿名化/削除
-    // コメントは匿名化（削除すると会話が壊れるため）
-    await admin
-      .from("comments")
-      .update({ is_deleted: true })
-      .eq("user_id", user.id);
-
-    // 2. 投票データは統計用に保持（user_idのみ匿名化）
-    // vote_picks, votesはそのまま（集計精度維持）
-
-    // 3. フォロー関係を削除
-    await admin.from("follows").delete().eq("follower_id", user.id);
-    await admin.from("follows").delete().eq("following_id", user.id);
-
-    // 4. 通知を削除
-    await admin.from("notifications").delete().eq("user_id", user.id);
-
-    // 5. ユーザーバッジを削除
-    await admin.from("user_badges").delete().eq("user_id", user.id);
-
-    // 6. 大会エントリーを削除
-    await admin.from("contest_entries").delete().eq("user_id", user.id);
-
-    // 7. プロフィールを匿名化
-    await admin
-      .from("profiles")
-      .update({
-        display_name: "退会済みユーザー",
-        bio: null,
-        avatar_url: null,
-        is_admin: false,
-      })
-      .eq("id", user.id);
-
-    // 8. Supabase Auth からユーザーを削除
-    const { error: deleteError } = await admin.auth.admin.deleteUser(user.id);
-    if (deleteError) {
-      console.error("Auth user deletion failed:", deleteError);
-      // Auth削除に失敗してもプロフィール匿名化は済んでいるので続行
-    }
-
-    return NextResponse.json({ success: true });
+    // 何度押されても同じジョブ1件
+    await enqueueAccountDeletion(user.id);
   } catch (err: any) {
     console.error("Account deletion error:", err);
     return NextResponse.json({ error: "退会処理に失敗しました" }, { status: 500 });
   }
+
+  await supabase.auth.signOut();
+
+  after(async () => {
+    try {
+      await runAccountDeletion(user.id);
+    } catch (err) {
+      // 続きは Cron が拾う
+      console.error("Account deletion error:", err);
+    }
+  });
+
+  return NextResponse.json({ success: true, status: "queued" }, { status: 202 });
+}
+
+/** 自分の退会ジョブの進み具合 */
+export async function GET() {
+  const supabase = await createClient();
+  const { data: { user } } = await supabase.auth.getUser();
+
+  if (!user) {
+    return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
+  }
+
+  const job = await getAccountDeletionJob(user.id);
+  if (!job) return NextResponse.json({ status: "none" });
+  return NextResponse.json({
+    status: job.status,
+    step: job.step,
+    progress: job.progress,
+    requested_at: job.requested_at,
+    finished_at: job.finished_at,
+  });
+}
+'''
+
+# ============================================================
+# 1b. 退会ジョブ本体と再開用 Cron
+# ============================================================
+DELETION_LIB = '''\
+import { createAdminClient } from "@/lib/admin";
+
+/**
+ * 退会ジョブ（supabase/migrations/20261017_account_deletion_jobs.sql）
+ *
+ * enqueueAccountDeletion で積み、runAccountDeletion が時間予算の中で
+ * DB 関数 account_deletion_step を繰り返し呼んで進める。最後に Supabase Auth のユーザーを消して done。
+ * 予算切れ・失敗で止まっても、/api/cron/account-deletion が続きから再開する。
+ */
+
+export type AccountDeletionJob = {
+  user_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  step: string;
+  progress: Record<string, number>;
+  attempts: number;
+  last_error: string | null;
+  requested_at: string;
+  updated_at: string;
+  finished_at: string | null;
+  busy?: boolean;
+};
+
+const BATCH_SIZE = 1000;
+// Auth 削除がこれだけ続けて失敗したら failed にして Cron の対象から外す
+const MAX_AUTH_ATTEMPTS = 5;
+
+/** ジョブを積む（既にあれば何もしない） */
+export async function enqueueAccountDeletion(userId: string) {
+  const admin = createAdminClient();
+  const { error } = await admin
+    .from("account_deletion_jobs")
+    .upsert({ user_id: userId }, { onConflict: "user_id", ignoreDuplicates: true });
+  if (error) throw new Error(`退会ジョブの登録に失敗: ${error.message}`);
+}
+
+export async function getAccountDeletionJob(userId: string): Promise<AccountDeletionJob | null> {
+  const { data } = await createAdminClient()
+    .from("account_deletion_jobs")
+    .select("*")
+    .eq("user_id", userId)
+    .maybeSingle();
+  return data;
+}
+
+/** 予算（ミリ秒）の範囲でジョブを進め、最後の状態を返す */
+export async function runAccountDeletion(userId: string, budgetMs = 20_000): Promise<AccountDeletionJob | null> {
+  const admin = createAdminClient();
+  const deadline = Date.now() + budgetMs;
+  let job: AccountDeletionJob | null = null;
+
+  while (Date.now() < deadline) {
+    const { data, error } = await admin.rpc("account_deletion_step", {
+      p_user_id: userId,
+      p_batch: BATCH_SIZE,
+    });
+    if (error) throw new Error(`退会ジョブの処理に失敗: ${error.message}`);
+    job = data as AccountDeletionJob | null;
+
+    // 無い・終わっている・別の実行が処理中
+    if (!job || job.status === "done" || job.status === "failed" || job.busy) return job;
+
+    if (job.step === "auth") {
+      const { error: deleteError } = await admin.auth.admin.deleteUser(userId);
+      // 既に消えている（再実行）なら成功扱い
+      if (deleteError && deleteError.status !== 404) {
+        console.error("Auth user deletion failed:", deleteError);
+        const attempts = job.attempts + 1;
+        const { data: updated } = await admin
+          .from("account_deletion_jobs")
+          .update({
+            attempts,
+            last_error: deleteError.message,
+            status: attempts >= MAX_AUTH_ATTEMPTS ? "failed" : "running",
+            updated_at: new Date().toISOString(),
+          })
+          .eq("user_id", userId)
+          .select("*")
+          .single();
+        return updated;
+      }
+
+      const now = new Date().toISOString();
+      const { data: done } = await admin
+        .from("account_deletion_jobs")
+        .update({ status: "done", step: "done", last_error: null, updated_at: now, finished_at: now })
+        .eq("user_id", userId)
+        .select("*")
+        .single();
+      return done;
+    }
+  }
+
+  return job;
+}
+'''
+
+DELETION_CRON = '''\
+import { NextResponse } from "next/server";
+import { createAdminClient } from "@/lib/admin";
+import { runAccountDeletion } from "@/lib/account-deletion";
+
+export const maxDuration = 60;
+
+// 1回の実行で使う時間（maxDuration に余裕を残す）
+const BUDGET_MS = 45_000;
+
+/**
+ * 退会ジョブの続き
+ * 5分おきに実行（Vercel Cron: "*\\/5 * * * *"）
+ * after() で終わりきらなかった・失敗したジョブを古い順に予算いっぱいまで進める。
+ */
+export async function GET(request: Request) {
+  const authHeader = request.headers.get("authorization");
+  if (authHeader !== `Bearer ${process.env.CRON_SECRET}`) {
+    return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+  }
+
+  const startedAt = Date.now();
+  const admin = createAdminClient();
+
+  const { data: jobs, error } = await admin
+    .from("account_deletion_jobs")
+    .select("user_id")
+    .in("status", ["queued", "running"])
+    .order("requested_at", { ascending: true })
+    .limit(50);
+
+  if (error) {
+    return NextResponse.json({ error: error.message }, { status: 500 });
+  }
+
+  const results: { user_id: string; status: string | null; step: string | null }[] = [];
+  for (const { user_id } of jobs ?? []) {
+    const remaining = BUDGET_MS - (Date.now() - startedAt);
+    if (remaining <= 0) break;
+    try {
+      const job = await runAccountDeletion(user_id, remaining);
+      results.push({ user_id, status: job?.status ?? null, step: job?.step ?? null });
+    } catch (err: any) {
+      console.error(`[account-deletion] ${user_id}:`, err.message);
+      results.push({ user_id, status: "error", step: null });
+    }
+  }
+
+  return NextResponse.json({
+    pending: jobs?.length ?? 0,
+    processed: results,
+    elapsed_ms: Date.now() - startedAt,
+  });
 }
 '''
 
@@ -191,6 +357,34 @@ def run():
         f.write(DELETE_API)
     print("  ✅ src/app/api/account/delete/route.ts")
 
+    os.makedirs("src/lib", exist_ok=True)
+    with open("src/lib/account-deletion.ts", "w") as f:
+        f.write(DELETION_LIB)
+    print("  ✅ src/lib/account-deletion.ts")
+
+    os.makedirs("src/app/api/cron/account-deletion", exist_ok=True)
+    with open("src/app/api/cron/account-deletion/route.ts", "w") as f:
+        f.write(DELETION_CRON)
+    print("  ✅ src/app/api/cron/account-deletion/route.ts")
+
+    # vercel.json に再開用 Cron を登録
+    vercel_json = "vercel.json"
+    cron_entry = {"path": "/api/cron/account-deletion", "schedule": "*/5 * * * *"}
+    if os.path.exists(vercel_json):
+        with open(vercel_json, "r") as f:
+            config = json.load(f)
+    else:
+        config = {}
+    crons = config.setdefault("crons", [])
+    existing = next((c for c in crons if c.get("path") == cron_entry["path"]), None)
+    if existing is None:
+        crons.append(cron_entry)
+    else:
+        existing["schedule"] = cron_entry["schedule"]
+    with open(vercel_json, "w") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    print(f"  ✅ {vercel_json} に account-deletion cron 追加")
+
     # 2. ページ
     os.makedirs("src/app/(main)/mypage/delete", exist_ok=True)
     with open("src/app/(main)/mypage/delete/page.tsx", "w") as f:
@@ -219,6 +413,7 @@ def run():
             print("  ⏭️  既にリンクあり")
 
     print("\n🏁 Task #58 完了")
+    print("📌 次のステップ: Supabase SQL Editor で supabase/migrations/20261017_account_deletion_jobs.sql を実行")
 
 if __name__ == "__main__":
     run()
@@ -7,6 +7,10 @@ Task #59: お問い合わせページ
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+READS = ["src/components/layout/Footer.tsx"]
+WRITES = ["src/app/(main)/contact/page.tsx"]
+
 CONTACT_PAGE = '''\
 import type { Metadata } from "next";
 import Link from "next/link";
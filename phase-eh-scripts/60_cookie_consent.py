@@ -8,6 +8,13 @@ Task #60: Cookie同意バナー
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/components/CookieConsent.tsx",
+    "src/components/GoogleAnalytics.tsx",
+    "src/app/layout.tsx",
+]
+
 # ============================================================
 # 1. Cookie同意バナー
 # ============================================================
@@ -8,6 +8,14 @@ Task #61: 通知設定ページ
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "supabase/migrations/add_notification_settings.sql",
+    "src/app/api/notification-settings/route.ts",
+    "src/app/(main)/mypage/notification-settings/page.tsx",
+    "src/app/(main)/mypage/page.tsx",
+]
+
 # ============================================================
 # 1. マイグレーション
 # ============================================================
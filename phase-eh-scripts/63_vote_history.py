@@ -7,6 +7,12 @@ Task #63: 予想履歴ページ
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/app/(main)/mypage/votes/page.tsx",
+    "src/app/(main)/mypage/page.tsx",
+]
+
 VOTES_PAGE = '''\
 import { createClient } from "@/lib/supabase/server";
 import { redirect } from "next/navigation";
@@ -18,8 +24,18 @@ export const metadata: Metadata = {
 };
 
 type Props = {
-  searchParams: Promise<{ page?: string }>;
+  searchParams: Promise<{ page?: string; before?: string; after?: string; total?: string }>;
+};
+
+const PER_PAGE = 20;
+
+// ページ送りのカーソル "<created_at>_<id>"（(created_at, id) のキーセット）
+type Cursor = { ts: string; id: string };
+const parseCursor = (c?: string): Cursor | null => {
+  const [ts, id] = (c ?? "").split("_");
+  return ts && id ? { ts, id } : null;
 };
+const cursorOf = (v: { created_at: string; id: string }) => `${v.created_at}_${v.id}`;
 
 export default async function VoteHistoryPage({ searchParams }: Props) {
   const params = await searchParams;
@@ -28,25 +44,51 @@ export default async function VoteHistoryPage({ searchParams }: Props) {
 
   if (!user) redirect("/login");
 
-  const page = parseInt(params.page ?? "1");
-  const perPage = 20;
-  const offset = (page - 1) * perPage;
-
-  // 全件数
-  const { count: totalCount } = await supabase
-    .from("votes")
-    .select("*", { count: "exact", head: true })
-    .eq("user_id", user.id);
-
-  // 投票一覧
-  const { data: votes } = await supabase
+  const before = parseCursor(params.before); // 次へ: これより古いもの
+  const after = parseCursor(params.after);   // 前へ: これより新しいもの
+  const requestedPage = Math.max(1, parseInt(params.page ?? "1") || 1);
+
+  // 件数は最初のページでだけ数え、以降はリンクで引き継ぐ
+  // （estimated: max-rows の 1000 件を超えるとプランナーの推定値になり、件数によらず一定コスト）
+  let totalCount = parseInt(params.total ?? "");
+  if (isNaN(totalCount)) {
+    const { count } = await supabase
+      .from("votes")
+      .select("id", { count: "estimated", head: true })
+      .eq("user_id", user.id);
+    totalCount = count ?? 0;
+  }
+  const approx = totalCount > 1000;
+
+  // 投票一覧（offset を使わずカーソルから索引を範囲走査。1件多く取って続きの有無を判定）
+  const edge = after ?? before;
+  let query = supabase
     .from("votes")
     .select("id, race_id, status, earned_points, is_perfect, created_at, settled_at, races(name, grade, course_name, race_number, race_date), vote_picks(pick_type, is_hit, points_earned, race_entries(post_number, horses(name)))")
     .eq("user_id", user.id)
-    .order("created_at", { ascending: false })
-    .range(offset, offset + perPage - 1);
-
-  const totalPages = Math.ceil((totalCount ?? 0) / perPage);
+    .order("created_at", { ascending: !!after })
+    .order("id", { ascending: !!after })
+    .limit(PER_PAGE + 1);
+  if (edge) {
+    const op = after ? "gt" : "lt";
+    query = query.or(`created_at.${op}."${edge.ts}",and(created_at.eq."${edge.ts}",id.${op}.${edge.id})`);
+  }
+  const { data: rows } = await query;
+
+  const hasMore = (rows?.length ?? 0) > PER_PAGE;
+  const votes = (rows ?? []).slice(0, PER_PAGE);
+  if (after) votes.reverse();
+  const hasPrev = after ? hasMore : !!before;
+  const hasNext = after ? votes.length > 0 : hasMore;
+  const page = hasPrev ? requestedPage : 1;
+  const totalPages = Math.max(page, Math.ceil(totalCount / PER_PAGE));
+
+  const pageHref = (p: number, cursor: Record<string, string>) =>
+    `/mypage/votes?${new URLSearchParams({ page: String(p), ...cursor, total: String(totalCount) })}`;
+  const prevHref = page - 1 <= 1
+    ? `/mypage/votes?total=${totalCount}`
+    : pageHref(page - 1, { after: cursorOf(votes[0]) });
+  const nextHref = votes.length > 0 ? pageHref(page + 1, { before: cursorOf(votes[votes.length - 1]) }) : "";
 
   const statusLabel = (s: string) => {
     switch (s) {
@@ -67,7 +109,7 @@ export default async function VoteHistoryPage({ searchParams }: Props) {
 
       <div className="flex items-center justify-between">
         <h1 className="text-xl font-bold text-gray-800">📋 予想履歴</h1>
-        <span className="text-sm text-gray-500">全{totalCount ?? 0}件</span>
+        <span className="text-sm text-gray-500">全{approx ? "約" : ""}{totalCount}件</span>
       </div>
 
       {(!votes || votes.length === 0) ? (
@@ -147,22 +189,24 @@ export default async function VoteHistoryPage({ searchParams }: Props) {
       )}
 
       {/* ページネーション */}
-      {totalPages > 1 && (
+      {(hasPrev || hasNext) && (
         <div className="flex items-center justify-center gap-2 pt-2">
-          {page > 1 && (
+          {hasPrev && (
             <Link
-              href={`/mypage/votes?page=${page - 1}`}
+              href={prevHref}
               className="px-3 py-1.5 text-sm border border-gray-200 rounded-lg hover:bg-gray-50 transition-colors"
             >
               ← 前
             </Link>
           )}
           <span className="text-sm text-gray-500">
-            {page} / {totalPages}
+            {page} / {approx ? "約" : ""}{totalPages}
           </span>
-          {page < totalPages && (
+          {/* 次ページは表示中に先読み（カーソル方式なので深いページも1ページ目と同じコスト） */}
+          {hasNext && (
             <Link
-              href={`/mypage/votes?page=${page + 1}`}
+              href={nextHref}
+              prefetch
               className="px-3 py-1.5 text-sm border border-gray-200 rounded-lg hover:bg-gray-50 transition-colors"
             >
               次 →
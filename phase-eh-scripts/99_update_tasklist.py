@@ -4,6 +4,9 @@ Task #99: TASKLIST.md 更新
 """
 
 import os
+
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = ["TASKLIST.md"]
 from datetime import date
 
 def run():
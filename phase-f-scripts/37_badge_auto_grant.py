@@ -7,7 +7,20 @@ Task #37: バッジ自動付与ロジック
 - マイページ badges ページを強化
 """
 
-import os, re
+import os, re, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from patchkit.fingerprint import FingerprintCache
+
+cache = FingerprintCache(__file__)
+
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "supabase/migrations/add_badge_master.sql",
+    "src/lib/badges.ts",
+    "src/app/api/admin/races/settle/route.ts",
+    "src/app/(main)/mypage/badges/page.tsx",
+]
 
 # ============================================================
 # 1. バッジマスタ SQL マイグレーション
@@ -62,56 +75,77 @@ print("✅ supabase/migrations/add_badge_master.sql")
 BADGES_LIB = '''\
 import { createAdminClient } from "@/lib/admin";
 
+type Admin = ReturnType<typeof createAdminClient>;
+
+export type BadgeExtra = {
+  isPerfect?: boolean;
+  isUpset?: boolean;       // 10番人気以下的中
+  isG1Win?: boolean;       // G1で1着的中
+  // 馬券系（オッズ）
+  winOdds?: number;        // 単勝オッズ（的中時）
+  quinellaOdds?: number;   // 馬連オッズ（的中時）
+  wideCount?: number;      // 今回のワイド的中回数
+  trioOdds?: number;       // 三連複オッズ（的中時）
+};
+
 type ProfileStats = {
-  user_id: string;
+  id: string;
   total_votes: number;
   win_hits: number;
   place_hits: number;
   current_streak: number;
   best_streak: number;
-  rank_id: string;
+  rank_id: string | null;
   cumulative_points: number;
 };
 
+// PostgREST の max-rows（既定1000）に収まるページ幅
+const PAGE_SIZE = 1000;
+// .in() に渡すユーザー数（URL長の上限対策）
+const IN_CHUNK = 200;
+
 /**
- * バッジ自動付与チェック
- * 投票精算後に呼び出し、条件を満たしたバッジを付与する
+ * user_id IN (...) の行を全件取得（IN はチャンク、max-rows はページングで回避）。
+ * orderBy は行を一意に並べる列（主キーなど）。順序が無いとページの境目で行が重複・欠落する。
  */
-export async function checkAndGrantBadges(
-  userId: string,
-  extra?: {
-    isPerfect?: boolean;
-    isUpset?: boolean;       // 10番人気以下的中
-    isG1Win?: boolean;       // G1で1着的中
+async function selectByUsers<T>(
+  admin: Admin,
+  table: string,
+  columns: string,
+  userColumn: string,
+  userIds: string[],
+  orderBy: string[],
+  filter: (q: any) => any = (q) => q,
+): Promise<T[]> {
+  const rows: T[] = [];
+  for (let i = 0; i < userIds.length; i += IN_CHUNK) {
+    const ids = userIds.slice(i, i + IN_CHUNK);
+    for (let from = 0; ; from += PAGE_SIZE) {
+      let query = filter(admin.from(table).select(columns).in(userColumn, ids));
+      for (const column of orderBy) query = query.order(column);
+      const { data, error } = await query.range(from, from + PAGE_SIZE - 1);
+      if (error) throw error;
+      rows.push(...((data ?? []) as T[]));
+      if (!data || data.length < PAGE_SIZE) break;
+    }
   }
-): Promise<string[]> {
-  const admin = createAdminClient();
-
-  // プロフィール取得
-  const { data: profile } = await admin
-    .from("profiles")
-    .select("total_votes, win_hits, place_hits, current_streak, best_streak, rank_id, cumulative_points")
-    .eq("id", userId)
-    .single();
-
-  if (!profile) return [];
-
-  // 既存バッジ取得
-  const { data: existingBadges } = await admin
-    .from("user_badges")
-    .select("badge_id")
-    .eq("user_id", userId);
-
-  const owned = new Set((existingBadges ?? []).map((b) => b.badge_id));
+  return rows;
+}
 
-  // パーフェクト回数を集計
-  const { count: perfectCount } = await admin
-    .from("votes")
-    .select("*", { count: "exact", head: true })
-    .eq("user_id", userId)
-    .eq("is_perfect", true);
+const countBy = (rows: { user_id: string }[]) => {
+  const counts = new Map<string, number>();
+  for (const r of rows) counts.set(r.user_id, (counts.get(r.user_id) ?? 0) + 1);
+  return counts;
+};
 
-  // 付与対象を判定
+/** 1ユーザーぶんの付与対象を判定する（DBアクセスなし）。 */
+function evaluateBadges(
+  profile: ProfileStats,
+  owned: Set<string>,
+  perfectCount: number,
+  wideHitCount: number,
+  extra?: BadgeExtra,
+): string[] {
   const toGrant: string[] = [];
 
   const check = (badgeId: string, condition: boolean) => {
@@ -130,8 +164,8 @@ export async function checkAndGrantBadges(
   check("win_50",      profile.win_hits >= 50);
 
   // パーフェクト系
-  check("perfect_1",   (perfectCount ?? 0) >= 1);
-  check("perfect_5",   (perfectCount ?? 0) >= 5);
+  check("perfect_1",   perfectCount >= 1);
+  check("perfect_5",   perfectCount >= 5);
 
   // 連続的中系
   check("streak_3",    profile.current_streak >= 3 || profile.best_streak >= 3);
@@ -149,33 +183,162 @@ export async function checkAndGrantBadges(
   if (extra?.isUpset)  check("big_upset",  true);
   if (extra?.isG1Win)  check("g1_winner",  true);
 
-  // 一括挿入
-  if (toGrant.length > 0) {
-    const rows = toGrant.map((badge_id) => ({
-      user_id: userId,
-      badge_id,
-      earned_at: new Date().toISOString(),
-    }));
-    await admin.from("user_badges").insert(rows);
+  // === 馬券バッジ ===
+  // 単勝30倍以上
+  if (extra?.winOdds && extra.winOdds >= 30) {
+    check("odds_30", true);
+  }
+
+  // 馬連100倍以上
+  if (extra?.quinellaOdds && extra.quinellaOdds >= 100) {
+    check("quinella_100", true);
+  }
 
-    // 通知作成
+  // 馬連300倍以上
+  if (extra?.quinellaOdds && extra.quinellaOdds >= 300) {
+    check("quinella_300", true);
+  }
+
+  // 三連複100倍以上
+  if (extra?.trioOdds && extra.trioOdds >= 100) {
+    check("trio_100", true);
+  }
+
+  // 三連複1000倍以上
+  if (extra?.trioOdds && extra.trioOdds >= 1000) {
+    check("trio_1000", true);
+  }
+
+  // ワイド10回的中
+  const totalWideHits = wideHitCount + (extra?.wideCount ?? 0);
+  check("wide_10", totalWideHits >= 10);
+
+  return toGrant;
+}
+
+/**
+ * バッジ自動付与チェック（まとめて）
+ * レース精算後に投票者全員ぶんを呼び出す。
+ * プロフィール・所持バッジ・パーフェクト回数・ワイド的中回数をユーザー集合ごとに一括取得し、
+ * 判定はメモリ上で行い、user_badges と notifications は一括挿入する。
+ * 戻り値は ユーザーID → 実際に挿入されたバッジID（並行して付与済みだったものは含まない）。
+ * user_badges の挿入に失敗したチャンクがあれば、入った分を通知してから例外を投げる。
+ */
+export async function checkAndGrantBadgesBatch(
+  userIds: string[],
+  extras: Map<string, BadgeExtra> = new Map(),
+): Promise<Map<string, string[]>> {
+  const admin = createAdminClient();
+  const granted = new Map<string, string[]>();
+  const ids = [...new Set(userIds)];
+  if (ids.length === 0) return granted;
+
+  // プロフィール取得
+  const profiles = await selectByUsers<ProfileStats>(
+    admin, "profiles",
+    "id, total_votes, win_hits, place_hits, current_streak, best_streak, rank_id, cumulative_points",
+    "id", ids, ["id"],
+  );
+
+  // 既存バッジ取得
+  const ownedRows = await selectByUsers<{ user_id: string; badge_id: string }>(
+    admin, "user_badges", "user_id, badge_id", "user_id", ids, ["user_id", "badge_id"],
+  );
+  const owned = new Map<string, Set<string>>();
+  for (const r of ownedRows) {
+    if (!owned.has(r.user_id)) owned.set(r.user_id, new Set());
+    owned.get(r.user_id)!.add(r.badge_id);
+  }
+
+  // パーフェクト回数を集計
+  const perfectCounts = countBy(await selectByUsers<{ user_id: string }>(
+    admin, "votes", "user_id", "user_id", ids, ["id"],
+    (q) => q.eq("is_perfect", true),
+  ));
+
+  // ワイド的中回数を集計（points_transactionsから、wide_10 未所持のユーザーのみ）
+  const wideIds = ids.filter((id) => !owned.get(id)?.has("wide_10"));
+  const wideCounts = countBy(await selectByUsers<{ user_id: string }>(
+    admin, "points_transactions", "user_id", "user_id", wideIds, ["id"],
+    (q) => q.eq("reason", "wide_hit"),
+  ));
+
+  // 付与対象を判定
+  const now = new Date().toISOString();
+  const badgeRows: { user_id: string; badge_id: string; earned_at: string }[] = [];
+  for (const profile of profiles) {
+    const toGrant = evaluateBadges(
+      profile,
+      owned.get(profile.id) ?? new Set(),
+      perfectCounts.get(profile.id) ?? 0,
+      wideCounts.get(profile.id) ?? 0,
+      extras.get(profile.id),
+    );
+    for (const badge_id of toGrant) badgeRows.push({ user_id: profile.id, badge_id, earned_at: now });
+  }
+
+  // 一括挿入。同時に付与された（既に持っている）行は無視し、実際に入った行だけを通知・返却する
+  const inserted: { user_id: string; badge_id: string }[] = [];
+  let insertError: Error | null = null;
+  for (let i = 0; i < badgeRows.length; i += PAGE_SIZE) {
+    const { data, error } = await admin
+      .from("user_badges")
+      .upsert(badgeRows.slice(i, i + PAGE_SIZE), { onConflict: "user_id,badge_id", ignoreDuplicates: true })
+      .select("user_id, badge_id");
+    if (error) {
+      console.error("user_badges insert error:", error.message);
+      insertError ??= new Error(error.message);
+      continue;
+    }
+    inserted.push(...(data ?? []));
+  }
+  for (const { user_id, badge_id } of inserted) {
+    if (!granted.has(user_id)) granted.set(user_id, []);
+    granted.get(user_id)!.push(badge_id);
+  }
+
+  // 通知作成
+  if (inserted.length > 0) {
+    const badgeIds = [...new Set(inserted.map((r) => r.badge_id))];
     const { data: badges } = await admin
       .from("badges")
       .select("id, name, icon")
-      .in("id", toGrant);
-
-    for (const badge of badges ?? []) {
-      await admin.from("notifications").insert({
-        user_id: userId,
+      .in("id", badgeIds);
+    const badgeById = new Map((badges ?? []).map((b) => [b.id, b]));
+
+    const notifications = inserted.flatMap(({ user_id, badge_id }) => {
+      const badge = badgeById.get(badge_id);
+      if (!badge) return [];
+      return [{
+        user_id,
         type: "badge",
         title: "バッジ獲得！",
         body: `${badge.icon} ${badge.name} を獲得しました！`,
         is_read: false,
-      });
+      }];
+    });
+    for (let i = 0; i < notifications.length; i += PAGE_SIZE) {
+      await admin.from("notifications").insert(notifications.slice(i, i + PAGE_SIZE));
     }
   }
 
-  return toGrant;
+  if (insertError) throw insertError;
+  return granted;
+}
+
+/**
+ * バッジ自動付与チェック
+ * 投票精算後に呼び出し、条件を満たしたバッジを付与する
+ */
+export async function checkAndGrantBadges(
+  userId: string,
+  extra?: BadgeExtra
+): Promise<string[]> {
+  const granted = await checkAndGrantBadgesBatch(
+    [userId],
+    extra ? new Map([[userId, extra]]) : undefined,
+  );
+  return granted.get(userId) ?? [];
 }
 '''
 
@@ -188,7 +351,9 @@ print("✅ src/lib/badges.ts")
 # 3. 投票精算APIにバッジチェックを統合
 # ============================================================
 settle_path = "src/app/api/admin/races/settle/route.ts"
-if os.path.exists(settle_path):
+if cache.is_applied(settle_path):
+    print(f"⏭️  {settle_path}: 適用済み（キャッシュ）")
+elif os.path.exists(settle_path):
     with open(settle_path, "r") as f:
         content = f.read()
 
@@ -230,8 +395,10 @@ if os.path.exists(settle_path):
         else:
             with open(settle_path, "w") as f:
                 f.write(content)
+            cache.mark_applied(settle_path, content)
             print(f"✅ {settle_path} にバッジチェック統合")
     else:
+        cache.mark_applied(settle_path, content)
         print(f"⏭️  {settle_path}: 既にバッジチェック済み")
 else:
     print(f"⚠️  {settle_path} が見つかりません。手動でバッジチェックを統合してください。")
@@ -339,6 +506,7 @@ with open(f"{badge_dir}/page.tsx", "w") as f:
     f.write(BADGE_PAGE)
 print(f"✅ {badge_dir}/page.tsx")
 
+cache.save()
 print("\n🏁 Task #37 完了")
 print("📌 次のステップ:")
 print("   1. Supabase SQL Editor で supabase/migrations/add_badge_master.sql を実行")
@@ -7,6 +7,12 @@ Task #38: ポイントシステム説明ページ
 
 import os, re
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/app/(main)/guide/points/page.tsx",
+    "src/app/(main)/races/[raceId]/page.tsx",
+]
+
 # ============================================================
 # 1. ポイントシステム説明ページ
 # ============================================================
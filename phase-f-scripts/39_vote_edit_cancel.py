@@ -8,6 +8,13 @@ Task #39: 投票変更・取り消し機能
 
 import os, re
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/app/api/races/[raceId]/votes/route.ts",
+    "src/components/races/VoteEditForm.tsx",
+    "src/app/(main)/races/[raceId]/page.tsx",
+]
+
 # ============================================================
 # 1. 投票 API に DELETE（取消）と PUT（変更）を追加
 # ============================================================
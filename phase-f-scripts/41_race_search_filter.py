@@ -2,12 +2,19 @@
 """
 Task #41: レース検索・フィルター強化
 - グレードフィルター追加 (GradeFilter コンポーネント)
-- レース名キーワード検索追加
+- レース名キーワード検索追加（全期間・DB 関数 search_races）
 - races/page.tsx を更新
 """
 
 import os, re
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/components/races/GradeFilter.tsx",
+    "src/components/races/RaceSearchBar.tsx",
+    "src/app/(main)/races/page.tsx",
+]
+
 # ============================================================
 # 1. GradeFilter コンポーネント
 # ============================================================
@@ -195,16 +202,26 @@ export default async function RaceListPage({ searchParams }: Props) {
     query = query.eq("grade", params.grade);
   }
 
-  const { data: races } = await query;
-
-  // キーワード検索（レース名でフィルター）
-  let filteredRaces = races ?? [];
+  // キーワード検索は日付に関係なく全期間が対象
+  // （DB 関数 search_races: 正規化済み search_text の pg_trgm 索引で関連度順。
+  //   supabase/migrations/20261017_race_search.sql）
+  let filteredRaces: any[] = [];
   if (params.q) {
-    const q = params.q.toLowerCase();
-    filteredRaces = filteredRaces.filter((r) =>
-      r.name.toLowerCase().includes(q) ||
-      (r.course_name ?? "").toLowerCase().includes(q)
-    );
+    const { data: hits } = await supabase.rpc("search_races", {
+      p_query: params.q,
+      p_course: params.course || null,
+      p_grade: params.grade || null,
+      p_limit: 50,
+    });
+    const ids = (hits ?? []).map((h: any) => h.id);
+    if (ids.length > 0) {
+      const { data: hitRaces } = await supabase.from("races").select("*").in("id", ids);
+      const byId = new Map((hitRaces ?? []).map((r) => [r.id, r]));
+      filteredRaces = ids.map((id: string) => byId.get(id)).filter(Boolean);
+    }
+  } else {
+    const { data: races } = await query;
+    filteredRaces = races ?? [];
   }
 
   // その日の競馬場一覧
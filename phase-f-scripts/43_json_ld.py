@@ -7,6 +7,13 @@ Task #43: 構造化データ（JSON-LD）
 
 import os, re
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/components/seo/JsonLd.tsx",
+    "src/app/(main)/races/[raceId]/page.tsx",
+    "src/app/layout.tsx",
+]
+
 # ============================================================
 # 1. JSON-LD コンポーネント
 # ============================================================
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 """
 Task #44: 月次大会の自動作成
-- /api/cron/monthly-contest/route.ts: 毎月1日に contest を自動作成
+- /api/cron/monthly-contest/route.ts: 毎月1日に contest を自動作成、前月の大会をクローズ
+  （月間TOP3バッジは 45 の monthly_rollover でスナップショット後に付与）
 - Vercel Cron Job 設定 (vercel.json)
 """
 
 import os, re, json
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/app/api/cron/monthly-contest/route.ts",
+    "vercel.json",
+]
+
 # ============================================================
 # 1. 月次大会自動作成 API
 # ============================================================
@@ -76,43 +83,8 @@ export async function GET(request: Request) {
     .eq("month", prevMonth)
     .eq("status", "active");
 
-  // 前月の月間TOP3にバッジ付与
-  const { data: topEntries } = await admin
-    .from("contest_entries")
-    .select("user_id, total_points, contests!inner(year, month, status)")
-    .eq("contests.year", prevYear)
-    .eq("contests.month", prevMonth)
-    .order("total_points", { ascending: false })
-    .limit(3);
-
-  if (topEntries && topEntries.length > 0) {
-    for (const entry of topEntries) {
-      // monthly_top3 バッジ付与
-      const { data: existing } = await admin
-        .from("user_badges")
-        .select("id")
-        .eq("user_id", entry.user_id)
-        .eq("badge_id", "monthly_top3")
-        .maybeSingle();
-
-      if (!existing) {
-        await admin.from("user_badges").insert({
-          user_id: entry.user_id,
-          badge_id: "monthly_top3",
-          earned_at: new Date().toISOString(),
-        });
-      }
-
-      // 通知
-      await admin.from("notifications").insert({
-        user_id: entry.user_id,
-        type: "contest_result",
-        title: "月間大会結果 🏆",
-        body: `${prevYear}年${prevMonth}月の月間大会でTOP3に入りました！おめでとうございます！`,
-        is_read: false,
-      });
-    }
-  }
+  // 前月の月間TOP3（バッジ・通知）は 0:10 の monthly-reset が
+  // monthly_points のスナップショット確定後に DB 関数 monthly_rollover 内で付与する
 
   return NextResponse.json({
     message: `${contestName} を作成しました`,
@@ -5,6 +5,9 @@ TASKLIST.md をPhase F完了に更新
 """
 
 import os, re
+
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = ["TASKLIST.md"]
 from datetime import date
 
 today = date.today().isoformat()
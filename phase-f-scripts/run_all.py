@@ -3,11 +3,15 @@
 Phase F 全タスク一括実行スクリプト
 プロジェクトルート (~/gate-in/) で実行してください
 
+各タスクの READS / WRITES 宣言から競合を判定し、競合しないタスクは並列実行する
+（scripts/patchkit/runner.py）。
+
 使い方:
-  python3 phase-f-scripts/run_all.py
+  python3 phase-f-scripts/run_all.py          # CPU数ぶん並列
+  python3 phase-f-scripts/run_all.py -j 1     # 従来どおり直列
 """
 
-import subprocess
+import argparse
 import sys
 import os
 
@@ -25,43 +29,40 @@ SCRIPTS = [
 ]
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, "..", "scripts"))
+
 
-print("=" * 60)
-print("🏇 ゲートイン！ Phase F 全タスク一括実行")
-print("=" * 60)
+def main():
+    from patchkit.runner import run_phase
 
-failed = []
-for num, filename, desc in SCRIPTS:
-    print(f"\n{'─' * 60}")
-    print(f"▶ #{num} {desc}")
-    print(f"{'─' * 60}")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="並列数（省略時はCPU数）")
+    args = parser.parse_args()
 
-    script_path = os.path.join(script_dir, filename)
-    result = subprocess.run(
-        [sys.executable, script_path],
-        cwd=os.getcwd(),
-        capture_output=False
-    )
+    print("=" * 60)
+    print("🏇 ゲートイン！ Phase F 全タスク一括実行")
+    print("=" * 60)
 
-    if result.returncode != 0:
-        failed.append((num, desc))
-        print(f"❌ #{num} 失敗（エラーコード: {result.returncode}）")
+    results = run_phase(script_dir, SCRIPTS, jobs=args.jobs)
+    failed = [(r.task.num, r.task.desc) for r in results if not r.ok]
+
+    print(f"\n{'=' * 60}")
+    if failed:
+        print(f"⚠️  {len(failed)}件失敗:")
+        for num, desc in failed:
+            print(f"   #{num} {desc}")
     else:
-        print(f"✅ #{num} 完了")
+        print("🎉 Phase F 全9件 + TASKLIST更新 完了！")
+
+    print(f"\n📌 残りの手動作業:")
+    print("   1. Supabase SQL Editor で以下を実行:")
+    print("      - supabase/migrations/add_badge_master.sql")
+    print("      - supabase/migrations/add_contest_unique_and_pt_reason.sql")
+    print("   2. Vercel に CRON_SECRET 環境変数を設定")
+    print("   3. npx next build でビルド確認")
+    print("   4. git add -A && git commit -m 'Phase F: 機能追加 全9件完了' && git push")
+    print(f"{'=' * 60}")
 
-print(f"\n{'=' * 60}")
-if failed:
-    print(f"⚠️  {len(failed)}件失敗:")
-    for num, desc in failed:
-        print(f"   #{num} {desc}")
-else:
-    print("🎉 Phase F 全9件 + TASKLIST更新 完了！")
 
-print(f"\n📌 残りの手動作業:")
-print("   1. Supabase SQL Editor で以下を実行:")
-print("      - supabase/migrations/add_badge_master.sql")
-print("      - supabase/migrations/add_contest_unique_and_pt_reason.sql")
-print("   2. Vercel に CRON_SECRET 環境変数を設定")
-print("   3. npx next build でビルド確認")
-print("   4. git add -A && git commit -m 'Phase F: 機能追加 全9件完了' && git push")
-print(f"{'=' * 60}")
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,17 @@ Task #73: 管理画面 お問い合わせ対応GUI
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "supabase/migrations/add_contact_inquiries.sql",
+    "src/app/api/contact/route.ts",
+    "src/app/api/admin/inquiries/route.ts",
+    "src/app/(main)/contact/page.tsx",
+    "src/components/admin/AdminInquiries.tsx",
+    "src/components/admin/AdminTabs.tsx",
+    "src/app/(main)/admin/page.tsx",
+]
+
 # ============================================================
 # 1. マイグレーション
 # ============================================================
@@ -69,8 +80,8 @@ export async function POST(request: Request) {
 
   // レート制限（未ログインはIP、ログイン済みはuser_id）
   const key = user ? `contact:${user.id}` : `contact:anon`;
-  const rl = rateLimit(key, { limit: 5, windowMs: 3600_000 }); // 1時間5件
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(key, { limit: 5, windowMs: 3600_000 }); // 1時間5件
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const body = await request.json();
 
@@ -9,6 +9,15 @@ Task #74: 会員登録時のプロフィール拡充
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "supabase/migrations/add_profile_demographics.sql",
+    "src/app/(main)/mypage/setup/page.tsx",
+    "src/app/api/profile/setup/route.ts",
+    "src/app/auth/callback/route.ts",
+    "src/app/api/profile/route.ts",
+]
+
 # ============================================================
 # 1. マイグレーション
 # ============================================================
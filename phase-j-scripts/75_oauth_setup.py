@@ -7,6 +7,12 @@ Task #75: Google/Xログイン設定
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = [
+    "src/app/auth/callback/route.ts",
+    "OAUTH_SETUP.md",
+]
+
 AUTH_CALLBACK = '''\
 import { NextResponse } from "next/server";
 import { createClient } from "@/lib/supabase/server";
@@ -9,6 +9,9 @@ Task #76: ログイン画面の最適化
 
 import os
 
+# run_all の並列実行用: このタスクが読み書きするファイル
+WRITES = ["src/app/login/page.tsx"]
+
 LOGIN_PAGE = '''\
 "use client";
 
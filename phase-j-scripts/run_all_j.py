@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 """
 Phase J: 追加タスク4件 全スクリプト実行
+
+各タスクの READS / WRITES 宣言から競合を判定し、競合しないタスクは並列実行する
+（scripts/patchkit/runner.py）。
+
+使い方:
+  python3 phase-j-scripts/run_all_j.py          # CPU数ぶん並列
+  python3 phase-j-scripts/run_all_j.py -j 1     # 従来どおり直列
 """
 
-import importlib, sys, os
+import argparse, sys, os
 
 SCRIPTS = [
     ("73", "73_admin_contact",       "管理画面 お問い合わせ対応"),
@@ -13,27 +20,21 @@ SCRIPTS = [
 ]
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="並列数（省略時はCPU数）")
+    args = parser.parse_args()
+
+    from patchkit.runner import run_phase
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(os.path.expanduser("~/gate-in"))
     print("=" * 60)
     print("🏇 Phase J: 追加タスク 4件実行")
     print("=" * 60)
 
-    ok = 0
-    fail = 0
-
-    for num, module_name, desc in SCRIPTS:
-        print(f"\n{'─'*50}")
-        print(f"📦 Task #{num}: {desc}")
-        print(f"{'─'*50}")
-        try:
-            mod = importlib.import_module(module_name)
-            mod.run()
-            ok += 1
-        except Exception as e:
-            print(f"  ❌ エラー: {e}")
-            import traceback
-            traceback.print_exc()
-            fail += 1
+    results = run_phase(script_dir, SCRIPTS, jobs=args.jobs)
+    ok = sum(1 for r in results if r.ok)
+    fail = len(results) - ok
 
     print(f"\n{'='*60}")
     print(f"📊 結果: {ok}件成功 / {fail}件失敗")
@@ -52,5 +53,6 @@ def main():
         print("  4. git add -A && git commit -m 'Phase J: 問い合わせ管理+プロフィール+OAuth+ログイン改善' && git push")
 
 if __name__ == "__main__":
-    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    # 共通ランナー (scripts/patchkit) をパスに追加
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
     main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+ツリー一括コードモッド
+
+各スクリプトの CODEMOD_RULES を集め、src/**/*.tsx を1回だけ walk して
+全ルールを適用する（1ファイルの読み書きは最大1回、書き込みはアトミック）。
+最後にどのルールがどのファイルで発火したかを表示する。
+
+使用方法:
+  cd ~/gate-in
+  python3 scripts/codemod.py --list                          # ルールを持つスクリプト一覧
+  python3 scripts/codemod.py --all                           # 全スクリプトのルールを適用
+  python3 scripts/codemod.py fix_danger_mark 33_image_optimization
+  python3 scripts/codemod.py --all --ext .tsx --ext .ts -j 4
+  python3 scripts/codemod.py --all --check                   # 書き込まず、対象外ファイルを変更するルールを検出
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from patchkit.codemod import discover_scripts, load_rules, out_of_scope, print_summary, run_codemods
+
+
+def main():
+    project_root = Path(__file__).resolve().parent.parent
+
+    parser = argparse.ArgumentParser(description="src/ 全体にコードモッドを一括適用")
+    parser.add_argument("scripts", nargs="*", help="有効にするスクリプト名（拡張子なし）")
+    parser.add_argument("--all", action="store_true", help="CODEMOD_RULES を持つ全スクリプトを有効にする")
+    parser.add_argument("--list", action="store_true", help="対象スクリプトを一覧表示して終了")
+    parser.add_argument("--ext", action="append", help="対象拡張子（既定: .tsx）")
+    parser.add_argument("--root", default="src", help="走査するディレクトリ（既定: src）")
+    parser.add_argument("--check", action="store_true", help="書き込まずに実行し、TARGET_FILES 外のファイルが変わるなら失敗する")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="並列数（省略時はCPU数）")
+    args = parser.parse_args()
+
+    available = discover_scripts(project_root)
+
+    if args.list:
+        for name, path in available.items():
+            rules = load_rules([path])
+            print(f"{name} ({path.relative_to(project_root)})")
+            for r in rules:
+                print(f"   - {r.rule.name}")
+        return
+
+    if args.all:
+        names = list(available)
+    else:
+        names = args.scripts
+    unknown = [n for n in names if n not in available]
+    if unknown or not names:
+        print(f"❌ 不明なスクリプト: {', '.join(unknown)}" if unknown else "❌ スクリプトを指定してください（--all / --list）")
+        sys.exit(1)
+
+    script_paths = [available[n] for n in names]
+    rules = load_rules(script_paths)
+    suffixes = tuple(args.ext or [".tsx"])
+
+    print(f"🔧 {len(rules)}ルール（{len(names)}スクリプト）を {args.root}/**/*{'|'.join(suffixes)} に適用します")
+    results, scanned = run_codemods(
+        script_paths, project_root / args.root, suffixes, jobs=args.jobs, write=not args.check
+    )
+    print_summary(results, rules, scanned)
+
+    if args.check:
+        violations = out_of_scope(results, rules, src_prefix=f"{args.root}/")
+        if violations:
+            print(f"\n❌ 対象外のファイルを変更するルールがあります（{len(violations)}件）")
+            for rel_path, key in violations:
+                print(f"   - {key}: {args.root}/{rel_path}")
+            sys.exit(1)
+        print("\n✅ 対象外のファイルは変更されません")
+
+
+if __name__ == "__main__":
+    main()
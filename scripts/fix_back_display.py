@@ -17,13 +17,19 @@
 
 from pathlib import Path
 
-def update_timeline_item(project_root: Path) -> bool:
+from patchkit.fingerprint import FingerprintCache
+
+def update_timeline_item(project_root: Path, cache: FingerprintCache) -> bool:
     file_path = project_root / "src" / "components" / "social" / "TimelineItem.tsx"
     
     if not file_path.exists():
         print(f"⚠️  TimelineItem.tsx が見つかりません")
         return False
     
+    if cache.is_applied(file_path):
+        print("⏭️  TimelineItem.tsx: 適用済み")
+        return True
+    
     content = file_path.read_text(encoding="utf-8")
     
     # picksの表示部分を修正（vote_submitted内）
@@ -75,16 +81,21 @@ def update_timeline_item(project_root: Path) -> bool:
         print("✅ TimelineItem.tsx: 追加のpicks表示を修正")
     
     file_path.write_text(content, encoding="utf-8")
+    cache.mark_applied(file_path, content)
     return True
 
 
-def update_user_activity_feed(project_root: Path) -> bool:
+def update_user_activity_feed(project_root: Path, cache: FingerprintCache) -> bool:
     file_path = project_root / "src" / "components" / "social" / "UserActivityFeed.tsx"
     
     if not file_path.exists():
         print(f"⚠️  UserActivityFeed.tsx が見つかりません")
         return False
     
+    if cache.is_applied(file_path):
+        print("⏭️  UserActivityFeed.tsx: 適用済み")
+        return True
+    
     content = file_path.read_text(encoding="utf-8")
     
     # picksの表示部分を修正
@@ -130,16 +141,21 @@ def update_user_activity_feed(project_root: Path) -> bool:
         print("⚠️  UserActivityFeed.tsx: 修正パターンが見つかりません")
     
     file_path.write_text(content, encoding="utf-8")
+    cache.mark_applied(file_path, content)
     return True
 
 
-def update_votes_page(project_root: Path) -> bool:
+def update_votes_page(project_root: Path, cache: FingerprintCache) -> bool:
     file_path = project_root / "src" / "app" / "(main)" / "mypage" / "votes" / "page.tsx"
     
     if not file_path.exists():
         print(f"⚠️  votes/page.tsx が見つかりません")
         return False
     
+    if cache.is_applied(file_path):
+        print("⏭️  votes/page.tsx: 適用済み")
+        return True
+    
     content = file_path.read_text(encoding="utf-8")
     
     # 1. backPicksの取得を追加
@@ -183,6 +199,7 @@ def update_votes_page(project_root: Path) -> bool:
         print("⚠️  votes/page.tsx: dangerPick表示パターンが見つかりません")
     
     file_path.write_text(content, encoding="utf-8")
+    cache.mark_applied(file_path, content)
     return True
 
 
@@ -195,11 +212,13 @@ def main():
     
     print("=== △抑え表示の統一修正 ===\n")
     
-    update_timeline_item(project_root)
+    cache = FingerprintCache(__file__, root=project_root)
+    update_timeline_item(project_root, cache)
     print("")
-    update_user_activity_feed(project_root)
+    update_user_activity_feed(project_root, cache)
     print("")
-    update_votes_page(project_root)
+    update_votes_page(project_root, cache)
+    cache.save()
     
     print("")
     print("🎉 3ファイルの修正が完了しました")
@@ -12,6 +12,8 @@
 from pathlib import Path
 import re
 
+from patchkit.codemod import FileRule
+
 # 置換対象ファイルと置換ルール
 TARGET_FILES = [
     "src/app/(main)/guide/points/page.tsx",
@@ -63,6 +65,16 @@ def replace_danger_mark(content: str) -> str:
     return content
 
 
+# scripts/codemod.py から適用するためのルール。抑え（△）と区別できないので TARGET_FILES に絞る
+CODEMOD_RULES = [
+    FileRule(
+        "△→⚠️",
+        replace_danger_mark,
+        include=tuple(path.removeprefix("src/") for path in TARGET_FILES),
+    )
+]
+
+
 def main():
     script_dir = Path(__file__).parent
     if script_dir.name == "scripts":
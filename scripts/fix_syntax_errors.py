@@ -13,50 +13,27 @@
 """
 
 from pathlib import Path
-import re
 
-def fix_file(file_path: Path) -> tuple[int, list[str]]:
-    """ファイルの構文エラーを修正。修正数と修正内容を返す"""
-    if not file_path.exists():
-        return 0, [f"ファイルなし: {file_path}"]
-    
-    content = file_path.read_text(encoding="utf-8")
-    original = content
-    fixes = []
-    
+from patchkit.rewrite import Rule, RewriteEngine, sweep
+
+# 全ルールを1つの正規表現にまとめ、1ファイル1回の走査で適用する
+RULES = [
     # パターン1: href=`...`} → href={`...`}
-    pattern1 = re.compile(r'href=`([^`]+)`\}')
-    matches1 = pattern1.findall(content)
-    if matches1:
-        content = pattern1.sub(r'href={`\1`}', content)
-        fixes.append(f"href: {len(matches1)}箇所")
-    
+    Rule("href", r'href=`([^`]+)`\}', r'href={`\1`}'),
     # パターン2: className=`...`} → className={`...`}
-    pattern2 = re.compile(r'className=`([^`]+)`\}')
-    matches2 = pattern2.findall(content)
-    if matches2:
-        content = pattern2.sub(r'className={`\1`}', content)
-        fixes.append(f"className: {len(matches2)}箇所")
-    
+    Rule("className", r'className=`([^`]+)`\}', r'className={`\1`}'),
     # パターン3: fetch`...`, → fetch(`...`,
-    pattern3 = re.compile(r'fetch`([^`]+)`,')
-    matches3 = pattern3.findall(content)
-    if matches3:
-        content = pattern3.sub(r'fetch(`\1`,', content)
-        fixes.append(f"fetch: {len(matches3)}箇所")
-    
+    Rule("fetch", r'fetch`([^`]+)`,', r'fetch(`\1`,'),
     # パターン4: fetch`...`) → fetch(`...`)
-    pattern4 = re.compile(r'fetch`([^`]+)`\)')
-    matches4 = pattern4.findall(content)
-    if matches4:
-        content = pattern4.sub(r'fetch(`\1`)', content)
-        fixes.append(f"fetch(終端): {len(matches4)}箇所")
-    
-    if content != original:
-        file_path.write_text(content, encoding="utf-8")
-        return len(matches1) + len(matches2) + len(matches3) + len(matches4), fixes
-    
-    return 0, []
+    Rule("fetch(終端)", r'fetch`([^`]+)`\)', r'fetch(`\1`)'),
+]
+
+ENGINE = RewriteEngine(RULES)
+
+
+def describe(hits) -> list[str]:
+    """ルール別ヒット数を表示用の文字列にする"""
+    return [f"{rule.name}: {hits[rule.name]}箇所" for rule in RULES if hits[rule.name]]
 
 
 def main():
@@ -77,16 +54,19 @@ def main():
     
     print("=== 構文エラー一括修正 ===\n")
     
+    # src 以下の全 tsx/ts を1回の walk で並列に処理する
+    results = sweep(ENGINE, project_root / "src")
+    
     total_fixes = 0
     for rel_path in target_files:
         file_path = project_root / rel_path
-        count, fixes = fix_file(file_path)
+        hits = results.pop(file_path, None)
         
-        if count > 0:
+        if hits:
             print(f"✅ {rel_path}")
-            for fix in fixes:
+            for fix in describe(hits):
                 print(f"   - {fix}")
-            total_fixes += count
+            total_fixes += sum(hits.values())
         elif file_path.exists():
             print(f"⚪ {rel_path} (変更なし)")
         else:
@@ -98,30 +78,15 @@ def main():
     else:
         print("⚠️  修正対象が見つかりませんでした")
     
-    # 追加: srcディレクトリ内の全tsx/tsファイルをスキャン
+    # 追加: 対象リスト以外で修正されたファイル
     print("\n--- 追加スキャン（src内の全ファイル）---")
-    src_dir = project_root / "src"
     additional_fixes = 0
     
-    for file_path in src_dir.rglob("*.tsx"):
-        if any(t in str(file_path) for t in target_files):
-            continue  # 既に処理済み
-        count, fixes = fix_file(file_path)
-        if count > 0:
-            print(f"✅ {file_path.relative_to(project_root)}")
-            for fix in fixes:
-                print(f"   - {fix}")
-            additional_fixes += count
-    
-    for file_path in src_dir.rglob("*.ts"):
-        if any(t in str(file_path) for t in target_files):
-            continue
-        count, fixes = fix_file(file_path)
-        if count > 0:
-            print(f"✅ {file_path.relative_to(project_root)}")
-            for fix in fixes:
-                print(f"   - {fix}")
-            additional_fixes += count
+    for file_path, hits in sorted(results.items()):
+        print(f"✅ {file_path.relative_to(project_root)}")
+        for fix in describe(hits):
+            print(f"   - {fix}")
+        additional_fixes += sum(hits.values())
     
     if additional_fixes > 0:
         print(f"\n🎉 追加で {additional_fixes} 箇所を修正しました")
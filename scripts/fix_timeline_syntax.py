@@ -11,7 +11,20 @@ TimelineItem.tsxの構文エラーを修正するスクリプト
 """
 
 from pathlib import Path
-import re
+
+from patchkit.rewrite import Rule, RewriteEngine
+
+# 3パターンを1つの正規表現にまとめ、1回の走査で修正する
+ENGINE = RewriteEngine([
+    # 1. href=`...`} を href={`...`} に修正
+    # パターン: href=`/path/${var}`}
+    Rule("href", r'href=`([^`]+)`\}', r'href={`\1`}'),
+    # 2. fetch`...`, を fetch(`...`), に修正
+    # パターン: fetch`/path/${var}`,
+    Rule("fetch", r'fetch`([^`]+)`,', r'fetch(`\1`,'),
+    # 3. 念のため fetch`...`) も修正
+    Rule("fetch(終端)", r'fetch`([^`]+)`\)', r'fetch(`\1`)'),
+])
 
 def main():
     script_dir = Path(__file__).parent
@@ -26,44 +39,14 @@ def main():
         print(f"❌ TimelineItem.tsx が見つかりません: {file_path}")
         return False
     
-    content = file_path.read_text(encoding="utf-8")
-    original = content
-    
-    # 1. href=`...`} を href={`...`} に修正
-    # パターン: href=`/path/${var}`}
-    content = re.sub(
-        r'href=`([^`]+)`\}',
-        r'href={`\1`}',
-        content
-    )
-    
-    # 2. fetch`...`, を fetch(`...`), に修正
-    # パターン: fetch`/path/${var}`,
-    content = re.sub(
-        r'fetch`([^`]+)`,',
-        r'fetch(`\1`,',
-        content
-    )
-    
-    # 3. await fetch(`...)` の後に続くものも確認
-    # 念のため fetch`...`) も修正
-    content = re.sub(
-        r'fetch`([^`]+)`\)',
-        r'fetch(`\1`)',
-        content
-    )
+    hits = ENGINE.apply_file(file_path)
     
-    if content == original:
+    if not hits:
         print("⚠️  変更なし（既に修正済みか、パターンが異なる）")
     else:
-        file_path.write_text(content, encoding="utf-8")
         print("✅ TimelineItem.tsx を修正しました")
-        
-        # 修正された箇所をカウント
-        href_fixed = original.count("href=`") - content.count("href=`")
-        fetch_fixed = original.count("fetch`") - content.count("fetch`")
-        print(f"   - href: {href_fixed}箇所修正")
-        print(f"   - fetch: {fetch_fixed}箇所修正")
+        print(f"   - href: {hits['href']}箇所修正")
+        print(f"   - fetch: {hits['fetch'] + hits['fetch(終端)']}箇所修正")
     
     return True
 
@@ -6,24 +6,54 @@
  *   node bulk-download.mjs --type datapack    # データパック(KYG,UKC等)のみ
  *   node bulk-download.mjs --type result      # 成績(SEC)のみ
  *   node bulk-download.mjs --year 2024        # 指定年のみ
+ *   node bulk-download.mjs --concurrency 4 --rate 2   # 同時接続数 / 1秒あたりのリクエスト数
+ *   node bulk-download.mjs --revalidate       # 取得済みのファイルも条件付きリクエストで更新確認
  *
  * 環境変数:
  *   JRDB_USER   — JRDBログインID
  *   JRDB_PASS   — JRDBパスワード
  *   JRDB_DIR    — 保存先ディレクトリ (default: ./jrdb-data)
+ *   JRDB_BASE_URL — 接続先 (default: http://www.jrdb.com。fixture-server.mjs で試すとき用)
+ *
+ * ダウンロード・解凍済みのファイルと開催なし(404)の日は manifest.json（manifest.mjs）に記録し、
+ * 次回からは JRDB に問い合わせずにスキップする（途中で止めても続きから再開できる）。
+ * ディスク上のファイルは manifest の sha256 と照合し、壊れていれば取り直す。
+ *
+ * 取得の流れ:
+ *   - keep-alive の Agent を全リクエストで共有し、--concurrency 本のワーカーで並行に取る
+ *   - リクエストはトークンバケット（--rate 件/秒）を通すので、並行にしても JRDB への負荷は一定
+ *   - 取得済みのファイルを確かめ直すとき（直近 MISSING_AFTER_DAYS 日分と --revalidate）は
+ *     ETag / Last-Modified で条件付きリクエストし、304 なら取り直さない
+ *   - 通信エラー・429・5xx は指数バックオフ（Retry-After があれば従う）で再試行
  *
  * 前提:
- *   npm install node-fetch cheerio
  *   lha コマンドがインストール済み (brew install lha / apt install lha)
  */
 
 import fs from 'fs';
 import path from 'path';
-import { execSync } from 'child_process';
+import http from 'http';
+import https from 'https';
+import crypto from 'crypto';
+import { execFile } from 'child_process';
+import { promisify } from 'util';
+import { Manifest, manifestPath, sha256File } from './manifest.mjs';
 
 const JRDB_USER = process.env.JRDB_USER;
 const JRDB_PASS = process.env.JRDB_PASS;
 const BASE_DIR = process.env.JRDB_DIR || './jrdb-data';
+const BASE_URL = (process.env.JRDB_BASE_URL || 'http://www.jrdb.com').replace(/\/$/, '');
+// これより新しい日の 404 は「まだ公開前」かもしれないので開催なしとして記録しない
+// （取得済みでもこの期間は差し替えがありうるので条件付きリクエストで確かめる）
+const MISSING_AFTER_DAYS = 7;
+
+const DEFAULT_CONCURRENCY = 4;
+const DEFAULT_RATE = 2;            // 件/秒（従来の 0.5 秒間隔と同じ）
+const MAX_ATTEMPTS = 4;
+const REQUEST_TIMEOUT_MS = 60_000;
+const MAX_REDIRECTS = 5;
+
+const execFileAsync = promisify(execFile);
 
 // JRA開催日 = 基本は土日 + 祝日開催
 // データパック: JRDB{YYMMDD}.lzh
@@ -55,84 +85,196 @@ function generateRaceDates(fromDate, toDate) {
   return dates;
 }
 
-// ─── ダウンロード ───────────────────────────────────────
-async function downloadFile(url, dest, authHeader) {
-  const fetch = (await import('node-fetch')).default;
+const sleep = (ms) => new Promise(r => setTimeout(r, ms));
 
-  if (fs.existsSync(dest)) {
-    console.log(`  ⏭️  既存: ${path.basename(dest)}`);
-    return true;
+// ─── トークンバケット（JRDB への礼儀としての上限）────────────
+class TokenBucket {
+  constructor(ratePerSec, burst = Math.max(1, Math.ceil(ratePerSec))) {
+    this.rate = ratePerSec;
+    this.capacity = burst;
+    this.tokens = burst;
+    this.updatedAt = Date.now();
+    this.queue = Promise.resolve();
   }
 
-  try {
-    const res = await fetch(url, {
-      headers: { Authorization: authHeader },
-      redirect: 'follow',
+  // 1トークン取れるまで待つ（待ちは到着順）
+  take() {
+    const next = this.queue.then(async () => {
+      for (;;) {
+        const now = Date.now();
+        this.tokens = Math.min(this.capacity, this.tokens + ((now - this.updatedAt) / 1000) * this.rate);
+        this.updatedAt = now;
+        if (this.tokens >= 1) {
+          this.tokens -= 1;
+          return;
+        }
+        await sleep(((1 - this.tokens) / this.rate) * 1000);
+      }
+    });
+    this.queue = next;
+    return next;
+  }
+}
+
+// ─── HTTP ──────────────────────────────────────────────
+class HttpClient {
+  constructor({ concurrency, rate, authHeader }) {
+    // keep-alive の接続を全ワーカーで使い回す
+    this.agents = {
+      'http:': new http.Agent({ keepAlive: true, maxSockets: concurrency }),
+      'https:': new https.Agent({ keepAlive: true, maxSockets: concurrency }),
+    };
+    this.bucket = new TokenBucket(rate);
+    this.authHeader = authHeader;
+    this.requests = 0;
+    this.retries = 0;
+  }
+
+  close() {
+    for (const agent of Object.values(this.agents)) agent.destroy();
+  }
+
+  // 1回分のリクエスト（本文はメモリに読む。LZH は数 MB 以下）
+  once(url, headers, redirects = 0) {
+    const u = new URL(url);
+    const lib = u.protocol === 'https:' ? https : http;
+    return new Promise((resolve, reject) => {
+      const req = lib.get(u, { agent: this.agents[u.protocol], headers, timeout: REQUEST_TIMEOUT_MS }, res => {
+        const { statusCode: status } = res;
+        if (status >= 300 && status < 400 && status !== 304 && res.headers.location) {
+          res.resume();
+          if (redirects >= MAX_REDIRECTS) return reject(new Error(`リダイレクトが多すぎます: ${url}`));
+          return resolve(this.once(new URL(res.headers.location, u).href, headers, redirects + 1));
+        }
+        const chunks = [];
+        res.on('data', c => chunks.push(c));
+        res.on('end', () => resolve({ status, headers: res.headers, body: Buffer.concat(chunks) }));
+        res.on('error', reject);
+      });
+      req.on('timeout', () => req.destroy(new Error(`タイムアウト: ${url}`)));
+      req.on('error', reject);
     });
+  }
 
-    if (!res.ok) {
-      if (res.status === 404) {
-        // 開催なしの日はファイルが存在しない → スキップ
-        return false;
+  // トークンを取ってから送り、通信エラー・429・5xx はバックオフして再試行
+  async get(url, extraHeaders = {}) {
+    const headers = { Authorization: this.authHeader, ...extraHeaders };
+    for (let attempt = 1; ; attempt++) {
+      await this.bucket.take();
+      this.requests++;
+      let res;
+      try {
+        res = await this.once(url, headers);
+      } catch (err) {
+        if (attempt >= MAX_ATTEMPTS) throw err;
+        this.retries++;
+        await sleep(backoff(attempt));
+        continue;
       }
+      if ((res.status === 429 || res.status >= 500) && attempt < MAX_ATTEMPTS) {
+        this.retries++;
+        await sleep(retryAfterMs(res) ?? backoff(attempt));
+        continue;
+      }
+      return res;
+    }
+  }
+}
+
+// 1秒, 2秒, 4秒 … に ±50% の揺らぎ（上限30秒）
+function backoff(attempt) {
+  const base = Math.min(30_000, 1000 * 2 ** (attempt - 1));
+  return base * (0.5 + Math.random());
+}
+
+function retryAfterMs(res) {
+  const v = res.headers['retry-after'];
+  if (!v) return null;
+  const sec = Number(v);
+  if (Number.isFinite(sec)) return Math.min(60_000, sec * 1000);
+  const at = Date.parse(v);
+  return Number.isFinite(at) ? Math.min(60_000, Math.max(0, at - Date.now())) : null;
+}
+
+// ─── ダウンロード ───────────────────────────────────────
+// 戻り値: { result, meta }。result は 'ok' (新しい内容を保存) / 'unchanged' (手元と同じ) / 'missing' (開催なし) / 'error'
+async function downloadFile(client, url, dest, known) {
+  // 手元のファイルが manifest の sha256 と一致するときだけ条件付きリクエストにする
+  const intact = known?.status === 'ok' && fs.existsSync(dest) && sha256File(dest) === known.sha256;
+  const conditional = {};
+  if (intact && known.etag) conditional['If-None-Match'] = known.etag;
+  if (intact && known.last_modified) conditional['If-Modified-Since'] = known.last_modified;
+
+  try {
+    const res = await client.get(url, conditional);
+
+    if (res.status === 304 && intact) return { result: 'unchanged' };
+    if (res.status === 404) {
+      // 開催なしの日はファイルが存在しない → スキップ
+      return { result: 'missing' };
+    }
+    if (res.status < 200 || res.status >= 300) {
       console.warn(`  ⚠️  HTTP ${res.status}: ${url}`);
-      return false;
+      return { result: 'error' };
     }
 
-    const contentType = res.headers.get('content-type') || '';
+    const contentType = res.headers['content-type'] || '';
     if (contentType.includes('text/html')) {
       // ログインページにリダイレクトされた場合
       console.warn('  ⚠️  ログインセッション切れ');
-      return false;
+      return { result: 'error' };
     }
 
-    const buf = Buffer.from(await res.arrayBuffer());
-    if (buf.length < 100) {
-      return false; // 空ファイル
+    if (res.body.length < 100) {
+      return { result: 'missing' }; // 空ファイル
     }
 
-    fs.writeFileSync(dest, buf);
-    console.log(`  ✅ DL: ${path.basename(dest)} (${(buf.length / 1024).toFixed(0)}KB)`);
-    return true;
+    const meta = {
+      sha256: crypto.createHash('sha256').update(res.body).digest('hex'),
+      etag: res.headers.etag ?? null,
+      last_modified: res.headers['last-modified'] ?? null,
+    };
+    // 条件付きリクエストを無視するサーバーでも、中身が同じなら書き直さない
+    if (intact && meta.sha256 === known.sha256) return { result: 'unchanged', meta };
+
+    // 途中で落ちても壊れたファイルを残さない
+    const tmp = `${dest}.part`;
+    fs.writeFileSync(tmp, res.body);
+    fs.renameSync(tmp, dest);
+    console.log(`  ✅ DL: ${path.basename(dest)} (${(res.body.length / 1024).toFixed(0)}KB)`);
+    return { result: 'ok', meta };
   } catch (err) {
-    console.error(`  ❌ Error: ${err.message}`);
-    return false;
+    console.error(`  ❌ Error: ${path.basename(dest)}: ${err.message}`);
+    return { result: 'error' };
   }
 }
 
 // ─── JRDBログイン ───────────────────────────────────────
-async function login() {
+async function login(client) {
   if (!JRDB_USER || !JRDB_PASS) {
     throw new Error('JRDB_USER と JRDB_PASS を環境変数で指定してください');
   }
 
-  const authHeader = 'Basic ' + Buffer.from(`${JRDB_USER}:${JRDB_PASS}`).toString('base64');
-
   // 接続テスト
-  const fetch = (await import('node-fetch')).default;
-  const res = await fetch('http://www.jrdb.com/member/n_index.html', {
-    headers: { Authorization: authHeader },
-  });
+  const res = await client.get(`${BASE_URL}/member/n_index.html`);
 
-  if (!res.ok) {
+  if (res.status < 200 || res.status >= 300) {
     throw new Error(`JRDBログイン失敗: HTTP ${res.status}`);
   }
 
   console.log('🔑 JRDBログイン確認OK');
-  return authHeader;
 }
 
 // ─── LZH解凍 ───────────────────────────────────────────
-function extractLZH(lzhPath, outputDir) {
+async function extractLZH(lzhPath, outputDir) {
   try {
     // lha コマンドで解凍
-    const absPath = path.resolve(lzhPath);
-    execSync(`cd "${outputDir}" && lha e "${absPath}"`, { stdio: "pipe" });
+    await execFileAsync('lha', ['e', path.resolve(lzhPath)], { cwd: outputDir });
     return true;
   } catch {
     try {
       // 代替: 7z で解凍
-      execSync(`7z x -y -o"${outputDir}" "${lzhPath}" 2>/dev/null`, { stdio: 'pipe' });
+      await execFileAsync('7z', ['x', '-y', `-o${outputDir}`, lzhPath]);
       return true;
     } catch {
       console.warn(`  ⚠️  解凍失敗: ${path.basename(lzhPath)} (lha/7zが必要)`);
@@ -141,6 +283,18 @@ function extractLZH(lzhPath, outputDir) {
   }
 }
 
+// ─── 並行実行 ──────────────────────────────────────────
+async function runPool(items, concurrency, worker) {
+  let next = 0;
+  const workers = Array.from({ length: Math.min(concurrency, items.length) }, async () => {
+    while (next < items.length) {
+      const item = items[next++];
+      await worker(item);
+    }
+  });
+  await Promise.all(workers);
+}
+
 // ─── メイン処理 ─────────────────────────────────────────
 async function main() {
   const args = process.argv.slice(2);
@@ -153,11 +307,15 @@ async function main() {
   const toDate = getArg('--to') || new Date().toISOString().slice(0, 10);
   const typeFilter = getArg('--type') || 'all'; // datapack, result, all
   const yearFilter = getArg('--year');
+  const concurrency = Math.max(1, Number(getArg('--concurrency')) || DEFAULT_CONCURRENCY);
+  const rate = Math.max(0.1, Number(getArg('--rate')) || DEFAULT_RATE);
+  const revalidateAll = args.includes('--revalidate');
 
   console.log('🏇 JRDB一括ダウンローダー');
   console.log(`   期間: ${fromDate} → ${toDate}`);
   console.log(`   種別: ${typeFilter}`);
   console.log(`   保存先: ${BASE_DIR}`);
+  console.log(`   並行: ${concurrency} / 上限: ${rate}件/秒`);
   console.log('');
 
   // ディレクトリ準備
@@ -165,9 +323,10 @@ async function main() {
   const extractedDir = path.join(BASE_DIR, 'extracted');
   fs.mkdirSync(lzhDir, { recursive: true });
   fs.mkdirSync(extractedDir, { recursive: true });
+  const manifest = Manifest.load(manifestPath(BASE_DIR));
 
-  // ログイン
-  const auth = await login();
+  const authHeader = 'Basic ' + Buffer.from(`${JRDB_USER}:${JRDB_PASS}`).toString('base64');
+  const client = new HttpClient({ concurrency, rate, authHeader });
 
   // 開催日リスト生成
   let dates = generateRaceDates(fromDate, toDate);
@@ -180,51 +339,101 @@ async function main() {
   let dlCount = 0;
   let skipCount = 0;
   let failCount = 0;
+  let knownCount = 0;
+  const recentFrom = new Date(Date.now() - MISSING_AFTER_DAYS * 86_400_000).toISOString().slice(0, 10);
 
-  for (const date of dates) {
-    const { short, full } = date;
-    console.log(`📆 ${full}`);
-
-    const tasks = [];
-
+  const tasks = [];
+  for (const { short, full } of dates) {
     if (typeFilter === 'all' || typeFilter === 'datapack') {
       tasks.push({
+        date: full,
         filename: `JRDB${short}.lzh`,
-        url: `http://www.jrdb.com/member/data/Jrdb/JRDB${short}.lzh`,
+        url: `${BASE_URL}/member/data/Jrdb/JRDB${short}.lzh`,
+        dateDir: path.join(extractedDir, short),
+        extracts: 'KYG',
       });
     }
-
     if (typeFilter === 'all' || typeFilter === 'result') {
       tasks.push({
+        date: full,
         filename: `SEC${short}.lzh`,
-        url: `http://www.jrdb.com/member/data/Sec/SEC${short}.lzh`,
+        url: `${BASE_URL}/member/data/Sec/SEC${short}.lzh`,
+        dateDir: path.join(extractedDir, short),
+        extracts: 'SEC',
       });
     }
+  }
+
+  const hasExtracted = (task) => fs.existsSync(task.dateDir)
+    && fs.readdirSync(task.dateDir).some(f => f.toUpperCase().startsWith(task.extracts));
 
-    for (const task of tasks) {
+  async function extract(task, lzhPath) {
+    fs.mkdirSync(task.dateDir, { recursive: true });
+    if (await extractLZH(lzhPath, task.dateDir)) manifest.recordExtracted(task.filename);
+  }
+
+  const started = Date.now();
+  try {
+    // ログイン（ここで認証が通らなければ何も取らない）
+    await login(client);
+
+    await runPool(tasks, concurrency, async (task) => {
       const lzhPath = path.join(lzhDir, task.filename);
-      const success = await downloadFile(task.url, lzhPath, auth);
+      const known = manifest.download(task.filename);
+      const recent = task.date >= recentFrom;
 
-      if (success) {
+      // 開催なしとわかっている日は問い合わせない
+      if (known?.status === 'missing') {
+        skipCount++;
+        return;
+      }
+
+      if (fs.existsSync(lzhPath) && !recent && !revalidateAll) {
+        // manifest 導入前に取得済みのファイルはそのまま記録する
+        if (!known) manifest.recordDownload(task.filename, lzhPath);
+        const entry = manifest.download(task.filename);
+        // 手元のファイルが記録と同じ（チェックサム一致）なら問い合わせない
+        if (known && sha256File(lzhPath) !== entry.sha256) {
+          console.warn(`  ⚠️  チェックサム不一致: ${task.filename} — 取り直します`);
+        } else {
+          knownCount++;
+          if (!entry.extracted_at) {
+            if (hasExtracted(task)) manifest.recordExtracted(task.filename);
+            else await extract(task, lzhPath);
+          }
+          return;
+        }
+      }
+
+      const { result, meta } = await downloadFile(client, task.url, lzhPath, known);
+
+      if (result === 'ok') {
         dlCount++;
-        // 解凍
-        const dateDir = path.join(extractedDir, short);
-        fs.mkdirSync(dateDir, { recursive: true });
-        extractLZH(lzhPath, dateDir);
-      } else {
+        manifest.recordDownload(task.filename, lzhPath, meta);
+        await extract(task, lzhPath);
+      } else if (result === 'unchanged') {
+        knownCount++;
+        if (meta) manifest.recordDownload(task.filename, lzhPath, meta);
+        if (!manifest.download(task.filename).extracted_at) await extract(task, lzhPath);
+      } else if (result === 'missing') {
         // 開催なしの日はスキップ（月曜祝日開催が土日リストに含まれない等）
         skipCount++;
+        if (!recent) manifest.recordMissing(task.filename);
+      } else {
+        failCount++;
       }
-
-      // レート制限: 0.5秒間隔
-      await new Promise(r => setTimeout(r, 500));
-    }
+    });
+  } finally {
+    manifest.save();
+    client.close();
   }
 
   console.log('\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
   console.log(`✅ DL完了: ${dlCount}件`);
+  console.log(`📁 処理済み: ${knownCount}件`);
   console.log(`⏭️  スキップ: ${skipCount}件`);
   console.log(`❌ 失敗: ${failCount}件`);
+  console.log(`🌐 リクエスト: ${client.requests}件 (再試行 ${client.retries}件) / ${((Date.now() - started) / 1000).toFixed(1)}s`);
   console.log(`📂 保存先: ${BASE_DIR}`);
 
   // ファイル一覧出力
@@ -0,0 +1,84 @@
+/**
+ * bulk-download.mjs 確認用の JRDB もどき（ローカル HTTP サーバー）
+ *
+ * 使い方:
+ *   node fixture-server.mjs --dir ./fixtures --port 8787              # fixtures/ の *.lzh を配る
+ *   node fixture-server.mjs --dir ./fixtures --fail-rate 0.2          # 2割を 503 にする（再試行の確認）
+ *   JRDB_BASE_URL=http://localhost:8787 JRDB_USER=u JRDB_PASS=p JRDB_DIR=/tmp/jrdb \
+ *     node bulk-download.mjs --from 2026-04-01 --to 2026-04-30
+ *
+ * /member/data/Jrdb/<名前> と /member/data/Sec/<名前> は --dir 直下の同名ファイルを返す（無ければ 404）。
+ * ETag（sha1）と Last-Modified（mtime）を付け、If-None-Match / If-Modified-Since が合えば 304。
+ * JRDB_USER / JRDB_PASS があれば Basic 認証を確かめる。
+ * 終了時（Ctrl+C）に リクエスト数・TCP 接続数・同時処理数の最大 を出す（keep-alive と並行数の確認用）。
+ */
+
+import fs from 'fs';
+import http from 'http';
+import path from 'path';
+import crypto from 'crypto';
+
+const args = process.argv.slice(2);
+const getArg = (flag) => {
+  const idx = args.indexOf(flag);
+  return idx >= 0 ? args[idx + 1] : null;
+};
+
+const dir = path.resolve(getArg('--dir') || './fixtures');
+const port = Number(getArg('--port')) || 8787;
+const failRate = Number(getArg('--fail-rate')) || 0;
+const delayMs = Number(getArg('--delay')) || 50;
+const expectedAuth = process.env.JRDB_USER
+  ? 'Basic ' + Buffer.from(`${process.env.JRDB_USER}:${process.env.JRDB_PASS}`).toString('base64')
+  : null;
+
+const stats = { requests: 0, connections: 0, inFlight: 0, maxInFlight: 0, byStatus: {} };
+
+function send(res, status, headers = {}, body = '') {
+  stats.byStatus[status] = (stats.byStatus[status] || 0) + 1;
+  res.writeHead(status, headers);
+  res.end(body);
+}
+
+const server = http.createServer(async (req, res) => {
+  stats.requests++;
+  stats.inFlight++;
+  stats.maxInFlight = Math.max(stats.maxInFlight, stats.inFlight);
+  res.on('finish', () => stats.inFlight--);
+  await new Promise(r => setTimeout(r, delayMs));
+
+  if (expectedAuth && req.headers.authorization !== expectedAuth) {
+    return send(res, 401, { 'WWW-Authenticate': 'Basic realm="jrdb"' });
+  }
+  if (failRate && Math.random() < failRate) {
+    return send(res, 503, { 'Retry-After': '1' });
+  }
+
+  const url = new URL(req.url, `http://localhost:${port}`);
+  if (url.pathname === '/member/n_index.html') {
+    return send(res, 200, { 'Content-Type': 'text/html' }, '<html>member</html>');
+  }
+
+  const m = url.pathname.match(/^\/member\/data\/(?:Jrdb|Sec)\/([\w.]+)$/);
+  const file = m && path.join(dir, m[1]);
+  if (!file || !fs.existsSync(file)) return send(res, 404);
+
+  const body = fs.readFileSync(file);
+  const etag = `"${crypto.createHash('sha1').update(body).digest('hex')}"`;
+  const lastModified = fs.statSync(file).mtime.toUTCString();
+  if (req.headers['if-none-match'] === etag
+    || (!req.headers['if-none-match'] && req.headers['if-modified-since'] === lastModified)) {
+    return send(res, 304, { ETag: etag, 'Last-Modified': lastModified });
+  }
+  send(res, 200, { 'Content-Type': 'application/octet-stream', ETag: etag, 'Last-Modified': lastModified }, body);
+});
+
+server.on('connection', () => stats.connections++);
+server.listen(port, () => console.log(`🧪 JRDB fixture: http://localhost:${port} (${dir})`));
+
+function report() {
+  console.log(`\nリクエスト ${stats.requests} / 接続 ${stats.connections} / 同時最大 ${stats.maxInFlight}`);
+  console.log('ステータス:', stats.byStatus);
+}
+process.on('SIGINT', () => { report(); process.exit(0); });
+process.on('SIGTERM', () => { report(); process.exit(0); });
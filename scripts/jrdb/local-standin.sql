@@ -0,0 +1,63 @@
+-- scripts/jrdb/local-standin.sql
+-- supabase-import.mjs --copy をローカルの素の Postgres で試すためのテーブル（本番には流さない）。
+-- 列とキーは取り込み先と同じ（jrdb_horses / jrdb_race_results は sql/migration-bloodline-and-columns.sql、
+-- jrdb_race_entries は importKYG が書く列）。
+--
+--   docker run -d --name jrdb-pg -e POSTGRES_PASSWORD=pg -p 54329:5432 postgres:16
+--   psql postgres://postgres:pg@localhost:54329/postgres -f scripts/jrdb/local-standin.sql
+--   SUPABASE_DB_URL=postgres://postgres:pg@localhost:54329/postgres \
+--     node scripts/jrdb/supabase-import.mjs --dir ./jrdb-data/extracted --copy --manifest /tmp/jrdb-manifest.json
+
+create table if not exists jrdb_race_entries (
+  race_key        text    not null,
+  umaban          integer not null,
+  horse_code      text,
+  horse_name      text,
+  idm             numeric(6,1),
+  jockey_index    numeric(6,1),
+  info_index      numeric(6,1),
+  pace_index      numeric(6,1),
+  composite_index numeric(6,1),
+  running_style   integer,
+  base_odds       numeric(8,1),
+  base_popularity integer,
+  training_index  numeric(6,1),
+  stable_index    numeric(6,1),
+  jockey_name     text,
+  ten_index       numeric(6,1),
+  agari_index     numeric(6,1),
+  position_index  numeric(6,1),
+  pace_prediction text,
+  created_at      timestamptz default now(),
+  primary key (race_key, umaban)
+);
+
+create table if not exists jrdb_race_results (
+  race_key        text    not null,
+  umaban          integer not null,
+  horse_code      text,
+  finish_position integer,
+  abnormal_code   text,
+  odds            numeric(8,1),
+  popularity      integer,
+  agari_3f        numeric(4,1),
+  weight          integer,
+  weight_diff     integer,
+  idm             numeric(6,1),
+  created_at      timestamptz default now(),
+  primary key (race_key, umaban)
+);
+
+create table if not exists jrdb_horses (
+  horse_code        text primary key,
+  horse_name        text,
+  sex_code          text,
+  sire_name         text,
+  dam_sire_name     text,
+  sire_lineage_code text,
+  dam_lineage_code  text,
+  trainer_name      text,
+  birth_year        integer,
+  created_at        timestamptz default now(),
+  updated_at        timestamptz default now()
+);
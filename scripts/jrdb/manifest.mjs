@@ -0,0 +1,132 @@
+/**
+ * JRDB 取り込みマニフェスト
+ *
+ * ${JRDB_DIR}/manifest.json に「どのファイルをいつ・どの内容で処理したか」を残し、
+ * download / import が新規・変更ファイルだけを処理できるようにする。
+ *
+ *   downloads[ファイル名]         { status: 'ok', size, sha256, etag, last_modified, downloaded_at, extracted_at }
+ *                                 { status: 'missing', checked_at }   — 開催なし(404)。十分古い日付だけ記録
+ *   imports[extracted からの相対パス] { type, size, mtime_ms, sha256, rows, imported_at }
+ *
+ * 変更判定はサイズ + mtime が同じなら未変更、違えばハッシュを取り直して比べる
+ * （解凍し直しで mtime だけ変わったファイルは取り込み直さない）。
+ * 保存は一時ファイル → rename。処理中も数秒おきに保存するので、途中で落ちても続きから再開できる。
+ */
+
+import fs from 'fs';
+import path from 'path';
+import crypto from 'crypto';
+
+const VERSION = 1;
+const SAVE_INTERVAL_MS = 3000;
+
+export function manifestPath(baseDir) {
+  return path.join(baseDir, 'manifest.json');
+}
+
+export function sha256File(filePath) {
+  return crypto.createHash('sha256').update(fs.readFileSync(filePath)).digest('hex');
+}
+
+export class Manifest {
+  constructor(filePath, data) {
+    this.filePath = filePath;
+    this.data = data;
+    this.dirty = false;
+    this.savedAt = Date.now();
+  }
+
+  static load(filePath) {
+    let data = { version: VERSION, downloads: {}, imports: {} };
+    if (fs.existsSync(filePath)) {
+      try {
+        const parsed = JSON.parse(fs.readFileSync(filePath, 'utf8'));
+        if (parsed.version === VERSION) data = { ...data, ...parsed };
+        else console.warn(`  ⚠️  manifest のバージョン違い (${parsed.version}) — 作り直します`);
+      } catch (err) {
+        console.warn(`  ⚠️  manifest を読めませんでした (${err.message}) — 作り直します`);
+      }
+    }
+    return new Manifest(filePath, data);
+  }
+
+  // ─── download ───
+  download(name) {
+    return this.data.downloads[name] ?? null;
+  }
+
+  /**
+   * meta: { sha256, etag, last_modified }（省略時は sha256 をファイルから計算し、etag などは前回の値）
+   * 内容が前回と同じなら downloaded_at / extracted_at を引き継ぐ
+   */
+  recordDownload(name, filePath, meta = {}) {
+    const prev = this.data.downloads[name];
+    const sha256 = meta.sha256 ?? sha256File(filePath);
+    const same = prev?.status === 'ok' && prev.sha256 === sha256;
+    this.data.downloads[name] = {
+      status: 'ok',
+      size: fs.statSync(filePath).size,
+      sha256,
+      etag: meta.etag ?? prev?.etag ?? null,
+      last_modified: meta.last_modified ?? prev?.last_modified ?? null,
+      downloaded_at: same ? prev.downloaded_at : new Date().toISOString(),
+      extracted_at: same ? prev.extracted_at ?? null : null,
+    };
+    this.touch();
+  }
+
+  recordExtracted(name) {
+    const entry = this.data.downloads[name];
+    if (entry) {
+      entry.extracted_at = new Date().toISOString();
+      this.touch();
+    }
+  }
+
+  recordMissing(name) {
+    this.data.downloads[name] = { status: 'missing', checked_at: new Date().toISOString() };
+    this.touch();
+  }
+
+  // ─── import ───
+  /**
+   * 取り込み済みと同じ内容なら null、新規・変更なら記録用の情報（size / mtime_ms / sha256）を返す
+   * force: 取り込み済みでも常に返す（--full）
+   */
+  importChange(key, filePath, { force = false } = {}) {
+    const stat = fs.statSync(filePath);
+    const prev = this.data.imports[key];
+    if (!force && prev && prev.size === stat.size && prev.mtime_ms === stat.mtimeMs) return null;
+
+    const sha256 = sha256File(filePath);
+    if (!force && prev && prev.sha256 === sha256) {
+      // 内容は同じ（解凍し直しなど）。次回はハッシュを取らずに済むよう mtime だけ更新
+      prev.size = stat.size;
+      prev.mtime_ms = stat.mtimeMs;
+      this.touch();
+      return null;
+    }
+    return { size: stat.size, mtime_ms: stat.mtimeMs, sha256 };
+  }
+
+  recordImport(key, type, change, rows) {
+    this.data.imports[key] = { type, ...change, rows, imported_at: new Date().toISOString() };
+    this.touch();
+  }
+
+  // ─── 保存 ───
+  touch() {
+    this.dirty = true;
+    if (Date.now() - this.savedAt >= SAVE_INTERVAL_MS) this.save();
+  }
+
+  save() {
+    if (!this.dirty) return;
+    fs.mkdirSync(path.dirname(this.filePath), { recursive: true });
+    const tmp = `${this.filePath}.${process.pid}.tmp`;
+    fs.writeFileSync(tmp, JSON.stringify(this.data, null, 1));
+    fs.renameSync(tmp, this.filePath);
+    this.dirty = false;
+    this.savedAt = Date.now();
+  }
+}
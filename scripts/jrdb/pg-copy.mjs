@@ -0,0 +1,129 @@
+/**
+ * JRDB の COPY ローダー（supabase-import.mjs --copy）
+ *
+ * PostgREST の 500行ずつの upsert の代わりに、Postgres に直接つないで
+ *   1. 一時テーブル（対象テーブルと同じ列型。コミットで消える）を作り
+ *   2. パース済みの行を CSV で COPY FROM STDIN に流し込み
+ *   3. INSERT ... SELECT DISTINCT ON ... ON CONFLICT DO UPDATE の1文で本テーブルへマージする
+ * 同じキーが複数ファイルにあれば後の行（新しいファイル）が勝つ。値が変わらない行は更新しない。
+ *
+ * 接続先は SUPABASE_DB_URL（docs/DB_BACKUP.md の pg_dump と同じ。Supabase の「Direct connection」か
+ * Session pooler。Transaction pooler は COPY 非対応）。素の Postgres でも動くので、
+ * ローカル検証は local-standin.sql でテーブルを作ったコンテナに向ければよい。
+ *
+ * 前提:
+ *   npm install pg pg-copy-streams
+ */
+
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
+
+// 取り込み先ごとの列とキー（supabase-import.mjs の行の形と同じ）
+export const COPY_TARGETS = {
+  jrdb_race_entries: {
+    key: ['race_key', 'umaban'],
+    columns: [
+      'race_key', 'umaban', 'horse_code', 'horse_name', 'idm', 'jockey_index', 'info_index',
+      'pace_index', 'composite_index', 'running_style', 'base_odds', 'base_popularity',
+      'training_index', 'stable_index', 'jockey_name', 'ten_index', 'agari_index',
+      'position_index', 'pace_prediction',
+    ],
+  },
+  jrdb_race_results: {
+    key: ['race_key', 'umaban'],
+    columns: [
+      'race_key', 'umaban', 'horse_code', 'finish_position', 'abnormal_code', 'odds',
+      'popularity', 'agari_3f', 'weight', 'weight_diff', 'idm',
+    ],
+  },
+  jrdb_horses: {
+    key: ['horse_code'],
+    columns: [
+      'horse_code', 'horse_name', 'sex_code', 'sire_name', 'dam_sire_name',
+      'sire_lineage_code', 'dam_lineage_code', 'trainer_name', 'birth_year',
+    ],
+  },
+};
+
+const STAGE = '_jrdb_stage';
+
+export async function connect(dbUrl = process.env.SUPABASE_DB_URL) {
+  if (!dbUrl) throw new Error('SUPABASE_DB_URL を環境変数か --db-url で指定してください');
+  let pg;
+  try {
+    pg = (await import('pg')).default;
+  } catch {
+    throw new Error('--copy には pg と pg-copy-streams が必要です (npm install pg pg-copy-streams)');
+  }
+  const client = new pg.Client({ connectionString: dbUrl, application_name: 'jrdb-copy' });
+  await client.connect();
+  return client;
+}
+
+// ─── CSV ───────────────────────────────────────────────
+// null / undefined は引用なしの空欄（COPY の CSV では NULL）、文字列は常に引用（空文字と区別する）
+function csvValue(v) {
+  if (v === null || v === undefined || (typeof v === 'number' && !Number.isFinite(v))) return '';
+  if (typeof v === 'number') return String(v);
+  return `"${String(v).replace(/"/g, '""')}"`;
+}
+
+export function csvLine(row, columns) {
+  return columns.map(c => csvValue(row[c])).join(',') + '\n';
+}
+
+// ─── COPY → マージ ─────────────────────────────────────
+/**
+ * batches（行の配列を順に返す iterable / async iterable。1ファイル = 1配列を想定）を
+ * 1トランザクションで COPY してマージする。{ copied, merged } を返す
+ */
+export async function copyMerge(client, table, batches) {
+  const target = COPY_TARGETS[table];
+  if (!target) throw new Error(`COPY 対象外のテーブル: ${table}`);
+  const { from: copyFrom } = await import('pg-copy-streams');
+  const cols = target.columns.join(', ');
+  const nonKey = target.columns.filter(c => !target.key.includes(c));
+
+  let copied = 0;
+  async function* csv() {
+    for await (const rows of batches) {
+      if (!rows.length) continue;
+      copied += rows.length;
+      yield rows.map(r => csvLine(r, target.columns)).join('');
+    }
+  }
+
+  await client.query('BEGIN');
+  try {
+    // seq: 後から COPY した行ほど大きい（DISTINCT ON で新しいファイルを残す）
+    await client.query(
+      `CREATE TEMP TABLE ${STAGE} ON COMMIT DROP AS SELECT ${cols} FROM ${table} WITH NO DATA`,
+    );
+    await client.query(`ALTER TABLE ${STAGE} ADD COLUMN seq bigserial`);
+
+    await pipeline(
+      Readable.from(csv()),
+      client.query(copyFrom(`COPY ${STAGE} (${cols}) FROM STDIN WITH (FORMAT csv)`)),
+    );
+
+    const key = target.key.join(', ');
+    const notNull = target.key.map(c => `${c} IS NOT NULL`).join(' AND ');
+    const { rowCount } = await client.query(`
+      INSERT INTO ${table} AS t (${cols})
+      SELECT DISTINCT ON (${key}) ${cols}
+      FROM ${STAGE}
+      WHERE ${notNull}
+      ORDER BY ${key}, seq DESC
+      ON CONFLICT (${key}) DO UPDATE SET
+        ${nonKey.map(c => `${c} = EXCLUDED.${c}`).join(',\n        ')}
+      WHERE (${nonKey.map(c => `t.${c}`).join(', ')})
+        IS DISTINCT FROM (${nonKey.map(c => `EXCLUDED.${c}`).join(', ')})
+    `);
+
+    await client.query('COMMIT');
+    return { copied, merged: rowCount };
+  } catch (err) {
+    await client.query('ROLLBACK').catch(() => {});
+    throw err;
+  }
+}
@@ -6,14 +6,23 @@
  *   node pipeline.mjs download --year 2024  # 指定年のみ
  *   node pipeline.mjs import                # 全データをSupabaseにインポート
  *   node pipeline.mjs import --type ukc     # UKCのみインポート
+ *   node pipeline.mjs import --copy         # Postgres 直結の COPY でインポート (初回の全件ロード向け)
  *   node pipeline.mjs aggregate             # 種牡馬集計テーブル更新
+ *   node pipeline.mjs export                # 分析用の列キャッシュ (種別×年の npz) を更新
+ *   node pipeline.mjs export --year 2025    # 指定年のみ
  *   node pipeline.mjs all                   # DL → インポート → 集計 を全実行
- *   node pipeline.mjs weekly                # 今週分のDL → インポート (Cron用)
+ *   node pipeline.mjs weekly                # 直近分のDL → 新規ファイルだけインポート (Cron用)
+ *
+ * download / import は ${JRDB_DIR}/manifest.json (manifest.mjs) を見て、
+ * 処理済みのファイルを飛ばす (新規・変更分だけ)。import --full で全ファイルを取り込み直す。
  *
  * 環境変数:
  *   JRDB_USER / JRDB_PASS          — JRDBログイン
  *   SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY — Supabase
+ *   SUPABASE_DB_URL                 — import --copy の接続先 (pg-copy.mjs)
  *   JRDB_DIR                        — データ保存先 (default: ./jrdb-data)
+ *
+ * export は python3 + numpy が必要 (../jrdb_export.py)
  */
 
 import { execSync } from 'child_process';
@@ -27,8 +36,13 @@ function run(cmd) {
   execSync(cmd, { stdio: 'inherit', cwd: __dirname });
 }
 
+const WEEKLY_LOOKBACK_DAYS = 14;
+
 const command = process.argv[2] || 'help';
 const extraArgs = process.argv.slice(3).join(' ');
+// python 側は cwd (scripts/jrdb) からの相対パスになるので絶対パスで渡す
+const extractedDir = path.resolve(__dirname, process.env.JRDB_DIR || './jrdb-data', 'extracted');
+const columnarDir = path.resolve(__dirname, process.env.JRDB_DIR || './jrdb-data', 'columnar');
 
 switch (command) {
   case 'download': {
@@ -46,31 +60,40 @@ switch (command) {
     break;
   }
 
+  case 'export': {
+    run(`python3 ../jrdb_export.py --dir ${extractedDir} --out ${columnarDir} ${extraArgs}`);
+    break;
+  }
+
   case 'all': {
     console.log('🏇 === JRDB フルパイプライン ===');
     console.log('');
-    console.log('Step 1/3: ダウンロード');
+    console.log('Step 1/4: ダウンロード');
     run(`node bulk-download.mjs ${extraArgs}`);
 
-    console.log('\nStep 2/3: Supabaseインポート');
+    console.log('\nStep 2/4: Supabaseインポート');
     run(`node supabase-import.mjs --dir ${process.env.JRDB_DIR || './jrdb-data'}/extracted`);
 
-    console.log('\nStep 3/3: 種牡馬集計');
+    console.log('\nStep 3/4: 種牡馬集計');
     run(`node supabase-import.mjs --dir ${process.env.JRDB_DIR || './jrdb-data'}/extracted --aggregate --type none`);
 
+    console.log('\nStep 4/4: 列キャッシュ');
+    run(`python3 ../jrdb_export.py --dir ${extractedDir} --out ${columnarDir}`);
+
     console.log('\n✅ フルパイプライン完了');
     break;
   }
 
   case 'weekly': {
-    // 今週分のみ処理（Cron用）
+    // 直近分のみ処理（Cron用）
+    // 取得済みの日は manifest で飛ばすので、公開が遅れた成績や1回飛んだ週も拾えるよう2週間分見る
     const today = new Date();
-    const lastSaturday = new Date(today);
-    lastSaturday.setDate(today.getDate() - ((today.getDay() + 1) % 7));
-    const from = lastSaturday.toISOString().slice(0, 10);
+    const since = new Date(today);
+    since.setDate(today.getDate() - WEEKLY_LOOKBACK_DAYS);
+    const from = since.toISOString().slice(0, 10);
     const to = today.toISOString().slice(0, 10);
 
-    console.log(`🏇 今週分パイプライン: ${from} → ${to}`);
+    console.log(`🏇 週次パイプライン: ${from} → ${to}`);
     run(`node bulk-download.mjs --from ${from} --to ${to}`);
     run(`node supabase-import.mjs --dir ${process.env.JRDB_DIR || './jrdb-data'}/extracted`);
     console.log('\n✅ 週次パイプライン完了');
@@ -92,14 +115,21 @@ switch (command) {
     --year YYYY          指定年のみ
     --type datapack|result  データ種別
 
-  import                Supabaseへインポート
+  import                Supabaseへインポート (新規・変更ファイルのみ)
     --type kyg|sec|ukc   指定種別のみ
+    --full               取り込み済みも含めて全ファイル
+    --copy               REST の upsert ではなく COPY + 1文マージ (要 SUPABASE_DB_URL)
 
   aggregate             種牡馬×コース×距離の集計テーブル更新
 
-  all                   download → import → aggregate を全実行
+  export                分析用の列キャッシュ (種別×年の npz) を更新
+    --type kyg|sec|ukc   指定種別のみ
+    --year YYYY          指定年のみ
+    --force              更新が無くても作り直す
+
+  all                   download → import → aggregate → export を全実行
 
-  weekly                今週分のみ処理 (Cron用)
+  weekly                直近2週間の未取得分をDL → 新規ファイルだけインポート (Cron用)
 
 環境変数:
   JRDB_USER             JRDBログインID
@@ -107,5 +137,6 @@ switch (command) {
   JRDB_DIR              保存先 (default: ./jrdb-data)
   SUPABASE_URL          Supabase URL
   SUPABASE_SERVICE_ROLE_KEY  Supabase Service Role Key
+  SUPABASE_DB_URL       Postgres 接続文字列 (import --copy)
 `);
 }
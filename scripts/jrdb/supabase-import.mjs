@@ -7,23 +7,38 @@
  *   node supabase-import.mjs --dir ./jrdb-data/extracted --type ukc    # UKCのみ
  *   node supabase-import.mjs --dir ./jrdb-data/extracted --type sec    # SECのみ
  *   node supabase-import.mjs --dir ./jrdb-data/extracted --aggregate   # 集計テーブル更新
+ *   node supabase-import.mjs --dir ./jrdb-data/extracted --full        # 取り込み済みも含めて全ファイル
+ *   node supabase-import.mjs --dir ./jrdb-data/extracted --copy        # Postgres 直結の COPY で取り込む（初回の全件ロード向け）
+ *
+ * 取り込んだファイルは manifest.json（manifest.mjs。既定は --dir の親ディレクトリ）に記録し、
+ * 次回からは新規・内容が変わったファイルだけを取り込む。バッチが1つでも失敗したファイルは記録せず、次回やり直す。
  *
  * 環境変数:
  *   SUPABASE_URL
  *   SUPABASE_SERVICE_ROLE_KEY
+ *   SUPABASE_DB_URL              — --copy のときの接続先（pg-copy.mjs 参照）
  */
 
 import fs from 'fs';
 import path from 'path';
 import { createClient } from '@supabase/supabase-js';
 import { parseKYG, parseSEC, parseUKC } from './parsers.mjs';
+import { Manifest, manifestPath } from './manifest.mjs';
+import { connect, copyMerge } from './pg-copy.mjs';
 
-const supabase = createClient(
-  process.env.SUPABASE_URL || process.env.NEXT_PUBLIC_SUPABASE_URL,
-  process.env.SUPABASE_SERVICE_ROLE_KEY,
-);
+// --copy のときは使わないので、必要になってから作る
+let supabase = null;
+function rest() {
+  supabase ??= createClient(
+    process.env.SUPABASE_URL || process.env.NEXT_PUBLIC_SUPABASE_URL,
+    process.env.SUPABASE_SERVICE_ROLE_KEY,
+  );
+  return supabase;
+}
 
 const BATCH_SIZE = 500;
+// --copy で1トランザクションにまとめるファイル数（コミットごとに manifest に記録する）
+const COPY_CHUNK_FILES = 200;
 
 // ─── ファイル探索 ────────────────────────────────────────
 function findFiles(dir, prefix) {
@@ -48,7 +63,7 @@ async function batchUpsert(table, rows, conflictColumns, label) {
   let inserted = 0;
   for (let i = 0; i < rows.length; i += BATCH_SIZE) {
     const batch = rows.slice(i, i + BATCH_SIZE);
-    const { error } = await supabase
+    const { error } = await rest()
       .from(table)
       .upsert(batch, { onConflict: conflictColumns, ignoreDuplicates: false });
 
@@ -61,36 +76,86 @@ async function batchUpsert(table, rows, conflictColumns, label) {
   return inserted;
 }
 
+// ─── 行の形（REST と --copy で共通）────────────────────────
+function kygRows(entries) {
+  return entries.map(e => ({
+    race_key: e.race_key,
+    umaban: e.umaban,
+    horse_code: e.horse_code,
+    horse_name: e.horse_name,
+    idm: e.idm,
+    jockey_index: e.jockey_index,
+    info_index: e.info_index,
+    pace_index: e.pace_index,
+    composite_index: e.composite_index,
+    running_style: e.running_style,
+    base_odds: e.base_odds,
+    base_popularity: e.base_popularity,
+    training_index: e.training_index,
+    stable_index: e.stable_index,
+    jockey_name: e.jockey_name,
+    ten_index: e.ten_index,
+    agari_index: e.agari_index,
+    position_index: e.position_index,
+    pace_prediction: e.pace_prediction,
+  }));
+}
+
+function secRows(entries) {
+  return entries
+    .filter(e => e.finish_position && e.finish_position > 0)
+    .map(e => ({
+      race_key: e.race_key,
+      umaban: e.umaban,
+      horse_code: e.horse_code,
+      finish_position: e.finish_position,
+      abnormal_code: e.abnormal_code,
+      odds: e.odds,
+      popularity: e.popularity,
+      agari_3f: e.agari_3f,
+      weight: e.weight,
+      weight_diff: e.weight_diff,
+      idm: e.idm,
+    }));
+}
+
+function ukcRow(e) {
+  return {
+    horse_code: e.horse_code,
+    horse_name: e.horse_name,
+    sex_code: e.sex_code,
+    sire_name: e.sire_name,
+    dam_sire_name: e.dam_sire_name,
+    sire_lineage_code: e.sire_lineage_code,
+    dam_lineage_code: e.dam_lineage_code,
+    trainer_name: e.trainer_name,
+    birth_year: e.birth_year,
+  };
+}
+
+// ─── 新規・変更ファイルの抽出 ─────────────────────────────
+function pendingFiles(dir, prefix, manifest, full) {
+  const files = findFiles(dir, prefix);
+  const pending = [];
+  for (const file of files) {
+    const key = path.relative(dir, file);
+    const change = manifest.importChange(key, file, { force: full });
+    if (change) pending.push({ file, key, change });
+  }
+  console.log(`   ${files.length}ファイル中 ${pending.length}件が新規・変更（${files.length - pending.length}件は取り込み済み）`);
+  return pending;
+}
+
 // ─── KYGインポート → jrdb_race_entries ──────────────────
-async function importKYG(dir) {
-  const files = findFiles(dir, 'KYG');
-  console.log(`\n🏇 KYG: ${files.length}ファイル → jrdb_race_entries`);
+async function importKYG(dir, manifest, full) {
+  console.log(`\n🏇 KYG → jrdb_race_entries`);
+  const files = pendingFiles(dir, 'KYG', manifest, full);
 
   let total = 0;
-  for (const file of files) {
+  for (const { file, key, change } of files) {
     try {
       const entries = parseKYG(file);
-      const rows = entries.map(e => ({
-        race_key: e.race_key,
-        umaban: e.umaban,
-        horse_code: e.horse_code,
-        horse_name: e.horse_name,
-        idm: e.idm,
-        jockey_index: e.jockey_index,
-        info_index: e.info_index,
-        pace_index: e.pace_index,
-        composite_index: e.composite_index,
-        running_style: e.running_style,
-        base_odds: e.base_odds,
-        base_popularity: e.base_popularity,
-        training_index: e.training_index,
-        stable_index: e.stable_index,
-        jockey_name: e.jockey_name,
-        ten_index: e.ten_index,
-        agari_index: e.agari_index,
-        position_index: e.position_index,
-        pace_prediction: e.pace_prediction,
-      }));
+      const rows = kygRows(entries);
 
       const count = await batchUpsert(
         'jrdb_race_entries',
@@ -99,6 +164,7 @@ async function importKYG(dir) {
         path.basename(file),
       );
       total += count;
+      if (count === rows.length) manifest.recordImport(key, 'KYG', change, rows.length);
       process.stdout.write(`  ✅ ${path.basename(file)}: ${entries.length}件\r`);
     } catch (err) {
       console.error(`  ❌ ${path.basename(file)}: ${err.message}`);
@@ -109,29 +175,15 @@ async function importKYG(dir) {
 }
 
 // ─── SECインポート → jrdb_race_results ──────────────────
-async function importSEC(dir) {
-  const files = findFiles(dir, 'SEC');
-  console.log(`\n📊 SEC: ${files.length}ファイル → jrdb_race_results`);
+async function importSEC(dir, manifest, full) {
+  console.log(`\n📊 SEC → jrdb_race_results`);
+  const files = pendingFiles(dir, 'SEC', manifest, full);
 
   let total = 0;
-  for (const file of files) {
+  for (const { file, key, change } of files) {
     try {
       const entries = parseSEC(file);
-      const rows = entries
-        .filter(e => e.finish_position && e.finish_position > 0)
-        .map(e => ({
-          race_key: e.race_key,
-          umaban: e.umaban,
-          horse_code: e.horse_code,
-          finish_position: e.finish_position,
-          abnormal_code: e.abnormal_code,
-          odds: e.odds,
-          popularity: e.popularity,
-          agari_3f: e.agari_3f,
-          weight: e.weight,
-          weight_diff: e.weight_diff,
-          idm: e.idm,
-        }));
+      const rows = secRows(entries);
 
       const count = await batchUpsert(
         'jrdb_race_results',
@@ -140,6 +192,7 @@ async function importSEC(dir) {
         path.basename(file),
       );
       total += count;
+      if (count === rows.length) manifest.recordImport(key, 'SEC', change, rows.length);
       process.stdout.write(`  ✅ ${path.basename(file)}: ${rows.length}件\r`);
     } catch (err) {
       console.error(`  ❌ ${path.basename(file)}: ${err.message}`);
@@ -150,28 +203,20 @@ async function importSEC(dir) {
 }
 
 // ─── UKCインポート → jrdb_horses ────────────────────────
-async function importUKC(dir) {
-  const files = findFiles(dir, 'UKC');
-  console.log(`\n🧬 UKC: ${files.length}ファイル → jrdb_horses`);
+async function importUKC(dir, manifest, full) {
+  console.log(`\n🧬 UKC → jrdb_horses`);
+  const files = pendingFiles(dir, 'UKC', manifest, full);
 
-  // 全ファイルから馬データを集めて重複排除
+  // 新規・変更ファイルから馬データを集めて重複排除（日付順なので新しいファイルが勝つ）
   const horseMap = new Map();
-  for (const file of files) {
+  const parsed = [];
+  for (const { file, key, change } of files) {
     try {
       const entries = parseUKC(file);
+      parsed.push({ key, change, rows: entries.length });
       for (const e of entries) {
         if (e.horse_code && e.horse_code.trim()) {
-          horseMap.set(e.horse_code, {
-            horse_code: e.horse_code,
-            horse_name: e.horse_name,
-            sex_code: e.sex_code,
-            sire_name: e.sire_name,
-            dam_sire_name: e.dam_sire_name,
-            sire_lineage_code: e.sire_lineage_code,
-            dam_lineage_code: e.dam_lineage_code,
-            trainer_name: e.trainer_name,
-            birth_year: e.birth_year,
-          });
+          horseMap.set(e.horse_code, ukcRow(e));
         }
       }
       process.stdout.write(`  📖 ${path.basename(file)}: ${entries.length}頭\r`);
@@ -184,16 +229,66 @@ async function importUKC(dir) {
   console.log(`\n  🐴 ユニーク馬: ${rows.length}頭`);
 
   const count = await batchUpsert('jrdb_horses', rows, 'horse_code', 'UKC');
+  if (count === rows.length) {
+    for (const p of parsed) manifest.recordImport(p.key, 'UKC', p.change, p.rows);
+  }
   console.log(`  📊 UKC合計: ${count}件インポート`);
   return count;
 }
 
+// ─── COPY インポート（--copy）────────────────────────────
+// ファイルをパースしながら CSV で COPY し、COPY_CHUNK_FILES ごとに1文でマージ・コミットする
+async function copyImport(client, dir, prefix, table, toRows, manifest, full) {
+  console.log(`\n🚚 ${prefix} → ${table} (COPY)`);
+  const parse = { KYG: parseKYG, SEC: parseSEC, UKC: parseUKC }[prefix];
+  const files = pendingFiles(dir, prefix, manifest, full);
+
+  let total = 0;
+  for (let i = 0; i < files.length; i += COPY_CHUNK_FILES) {
+    const chunk = files.slice(i, i + COPY_CHUNK_FILES);
+    const parsed = [];
+    function* batches() {
+      for (const { file, key, change } of chunk) {
+        try {
+          const rows = toRows(parse(file));
+          parsed.push({ key, change, rows: rows.length });
+          yield rows;
+        } catch (err) {
+          console.error(`  ❌ ${path.basename(file)}: ${err.message}`);
+        }
+      }
+    }
+
+    const started = Date.now();
+    const { copied, merged } = await copyMerge(client, table, batches());
+    for (const p of parsed) manifest.recordImport(p.key, prefix, p.change, p.rows);
+    manifest.save();
+    total += copied;
+    console.log(
+      `  ✅ ${i + chunk.length}/${files.length}ファイル: ${copied}行 COPY → ${merged}行 反映 (${((Date.now() - started) / 1000).toFixed(1)}s)`,
+    );
+  }
+  console.log(`  📊 ${prefix}合計: ${total}件インポート`);
+  return total;
+}
+
 // ─── 種牡馬×コース×距離 集計 ─────────────────────────────
-async function aggregateSireStats() {
+async function aggregateSireStats(pgClient) {
   console.log('\n📈 種牡馬×コース×距離 集計...');
 
+  if (pgClient) {
+    try {
+      await pgClient.query('SELECT refresh_sire_course_distance_stats()');
+      const { rows } = await pgClient.query('SELECT count(*)::int AS count FROM sire_course_distance_stats');
+      console.log(`  ✅ 集計完了: ${rows[0].count}件`);
+    } catch (err) {
+      console.error(`  ❌ 集計エラー: ${err.message}`);
+    }
+    return;
+  }
+
   // Supabase RPC で集計（大量データのためサーバーサイドで実行）
-  const { error } = await supabase.rpc('refresh_sire_course_distance_stats');
+  const { error } = await rest().rpc('refresh_sire_course_distance_stats');
 
   if (error) {
     console.error(`  ❌ 集計エラー: ${error.message}`);
@@ -202,7 +297,7 @@ async function aggregateSireStats() {
   }
 
   // 件数確認
-  const { count } = await supabase
+  const { count } = await rest()
     .from('sire_course_distance_stats')
     .select('*', { count: 'exact', head: true });
 
@@ -220,29 +315,52 @@ async function main() {
   const dir = getArg('--dir') || './jrdb-data/extracted';
   const typeFilter = getArg('--type') || 'all';
   const doAggregate = args.includes('--aggregate');
+  const full = args.includes('--full');
+  const useCopy = args.includes('--copy');
+  const manifest = Manifest.load(getArg('--manifest') || manifestPath(path.dirname(path.resolve(dir))));
 
   console.log('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
   console.log('🏇 JRDB → Supabase インポーター');
   console.log(`   ディレクトリ: ${dir}`);
-  console.log(`   種別: ${typeFilter}`);
+  console.log(`   種別: ${typeFilter}${full ? '（全ファイル）' : '（新規・変更のみ）'}`);
+  console.log(`   manifest: ${manifest.filePath}`);
+  console.log(`   方式: ${useCopy ? 'COPY (Postgres 直結)' : 'REST upsert'}`);
   console.log('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
 
   const results = {};
+  const pgClient = useCopy ? await connect(getArg('--db-url') || process.env.SUPABASE_DB_URL) : null;
 
-  if (typeFilter === 'all' || typeFilter === 'kyg') {
-    results.kyg = await importKYG(dir);
-  }
+  try {
+    try {
+      if (typeFilter === 'all' || typeFilter === 'kyg') {
+        results.kyg = pgClient
+          ? await copyImport(pgClient, dir, 'KYG', 'jrdb_race_entries', kygRows, manifest, full)
+          : await importKYG(dir, manifest, full);
+      }
 
-  if (typeFilter === 'all' || typeFilter === 'sec') {
-    results.sec = await importSEC(dir);
-  }
+      if (typeFilter === 'all' || typeFilter === 'sec') {
+        results.sec = pgClient
+          ? await copyImport(pgClient, dir, 'SEC', 'jrdb_race_results', secRows, manifest, full)
+          : await importSEC(dir, manifest, full);
+      }
 
-  if (typeFilter === 'all' || typeFilter === 'ukc') {
-    results.ukc = await importUKC(dir);
-  }
+      if (typeFilter === 'all' || typeFilter === 'ukc') {
+        const horses = entries => entries.filter(e => e.horse_code && e.horse_code.trim()).map(ukcRow);
+        results.ukc = pgClient
+          ? await copyImport(pgClient, dir, 'UKC', 'jrdb_horses', horses, manifest, full)
+          : await importUKC(dir, manifest, full);
+      }
+    } finally {
+      manifest.save();
+    }
 
-  if (doAggregate || typeFilter === 'all') {
-    await aggregateSireStats();
+    // 何も取り込まなかったときは集計し直さない（--aggregate 指定時は常に）
+    const imported = (results.kyg || 0) + (results.sec || 0) + (results.ukc || 0);
+    if (doAggregate || (typeFilter === 'all' && imported > 0)) {
+      await aggregateSireStats(pgClient);
+    }
+  } finally {
+    await pgClient?.end();
   }
 
   console.log('\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━');
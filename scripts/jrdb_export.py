@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+JRDB 列キャッシュの書き出し
+
+展開済みの KYG / SEC / UKC を種別 × 年の圧縮 npz（scripts/jrdbio/columnar.py）にまとめる。
+バックテスト・分析は Supabase や生ファイルを読み直さず、ここから要る列・年だけ読む。
+元ファイルの一覧（追加・削除・更新）が変わった年だけ作り直すので、毎回全年を指定してよい。
+
+使用方法:
+  cd ~/gate-in
+  python3 scripts/jrdb_export.py --dir jrdb-data/extracted --out jrdb-data/columnar
+  python3 scripts/jrdb_export.py --dir jrdb-data/extracted --out jrdb-data/columnar --type kyg --year 2025
+  python3 scripts/jrdb_export.py ... --force                                # 全年作り直し
+
+  （scripts/jrdb/pipeline.mjs export からも呼ばれる）
+
+必要: numpy
+"""
+
+import argparse
+import time
+
+from jrdbio.columnar import FILE_TYPES, export_columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JRDB の列キャッシュを書き出す")
+    parser.add_argument("--dir", required=True, help="展開済みファイルのディレクトリ")
+    parser.add_argument("--out", required=True, help="書き出し先（<種別>/<年>.npz）")
+    parser.add_argument("--type", choices=[t.lower() for t in FILE_TYPES], help="指定種別のみ")
+    parser.add_argument("--year", type=int, action="append", help="指定年のみ（複数可）")
+    parser.add_argument("--force", action="store_true", help="更新が無くても作り直す")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    print(f"📦 JRDB 列キャッシュ: {args.dir} → {args.out}")
+    written = export_columns(
+        args.dir,
+        args.out,
+        file_types=[args.type.upper()] if args.type else FILE_TYPES,
+        years=args.year,
+        force=args.force,
+    )
+    rows = sum(n for by_year in written.values() for n in by_year.values())
+    parts = sum(len(by_year) for by_year in written.values())
+    print(f"\n✅ {parts}パーティション {rows:,}行（{time.perf_counter() - t0:.1f}s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+JRDB 固定長ファイルの高速読み込み
+
+KYG / SEC / UKC のファイルを mmap し、レコードを NumPy の構造化 dtype として
+コピーせずに見る。数値列は列ごとにまとめて NumPy で変換し、CP932 の文字列は
+要求された列だけ（しかも異なる値ごとに1回だけ）デコードする。
+
+レイアウトは TS / JS 側の定義をそのまま読む:
+  KYG  src/lib/jrdb/kyg-parser.ts の KYG_FIELDS
+  SEC  scripts/jrdb/parsers.mjs の parseSEC
+  UKC  scripts/jrdb/parsers.mjs の parseUKC
+
+  from jrdbio import open_jrdb
+  with open_jrdb("jrdb-data/extracted/KYG260426.txt") as kyg:
+      idm = kyg.column("IDM")            # float64（null は NaN）
+      names = kyg.column("馬名")          # object（str）
+
+バックテスト用には種別 × 年の列キャッシュ（columnar.py）を作っておき、要る列・年だけ読む:
+
+  python3 scripts/jrdb_export.py --dir jrdb-data/extracted --out jrdb-data/columnar
+  cols = load_columns("jrdb-data/columnar", "KYG", ["raceKey", "IDM"], years=[2024, 2025])
+
+依存: numpy（pip install numpy）
+"""
+
+from .columnar import export_columns, load_columns
+from .layouts import Field, Layout, load_layout
+from .reader import JrdbFile, open_jrdb
+
+__all__ = ["Field", "JrdbFile", "Layout", "export_columns", "load_columns", "load_layout", "open_jrdb"]
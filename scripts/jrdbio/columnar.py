@@ -0,0 +1,188 @@
+"""
+パース済み JRDB の列キャッシュ
+
+展開済みファイル（KYG260426.txt など）を種別 × 年ごとに1つの圧縮 npz にまとめる:
+
+  <out>/KYG/2025.npz
+  <out>/SEC/2025.npz
+
+npz の中身は列ごとの配列（numpy の npz は読むときもメンバー単位なので、要る列だけ展開される）:
+
+  <列名>          int / float 列は float64（null は NaN）
+  <列名>          text 列は値の番号（int32）＋ <列名>@values に異なる値の一覧（辞書圧縮）
+  file_date       元ファイルの日付（YYYYMMDD の int32）
+  @sources        作ったときの元ファイル一覧（"名前:サイズ:mtime_ns"）
+
+年はファイル名の日付（KYG260426 → 2026）。元ファイルの一覧が @sources と変わった年
+（追加・削除・サイズや mtime の変化）だけ作り直す。lha / 7z は書庫の日付で展開するので、
+後から足したファイルが npz より古い mtime になることがあり、日付の比較だけでは足りない。
+
+  cols = load_columns("jrdb-data/columnar", "KYG", ["raceKey", "IDM", "騎手名"], years=range(2019, 2026))
+"""
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from .layouts import load_layout
+from .reader import JrdbFile
+
+FILE_TYPES = ("KYG", "SEC", "UKC")
+VALUES_SUFFIX = "@values"
+SOURCES_MEMBER = "@sources"
+
+_FILE_NAME = re.compile(r"^(KYG|SEC|UKC)(\d{2})(\d{2})(\d{2})", re.I)
+
+
+def find_sources(src_dir: Union[str, Path], file_type: str) -> dict[int, list[Path]]:
+    """展開ディレクトリ以下の file_type のファイルを年ごとに（日付順）"""
+    by_year: dict[int, list[Path]] = {}
+    for path in Path(src_dir).rglob("*"):
+        m = _FILE_NAME.match(path.name)
+        if not m or m.group(1).upper() != file_type or path.suffix.lower() == ".lzh" or not path.is_file():
+            continue
+        by_year.setdefault(2000 + int(m.group(2)), []).append(path)
+    return {year: sorted(paths, key=lambda p: p.name.upper()) for year, paths in sorted(by_year.items())}
+
+
+def _file_date(path: Path) -> int:
+    m = _FILE_NAME.match(path.name)
+    return (2000 + int(m.group(2))) * 10000 + int(m.group(3)) * 100 + int(m.group(4))
+
+
+def partition_path(out_dir: Union[str, Path], file_type: str, year: int) -> Path:
+    return Path(out_dir) / file_type / f"{year}.npz"
+
+
+def source_fingerprint(sources: list[Path]) -> np.ndarray:
+    """元ファイルの一覧（名前・サイズ・mtime）。npz の @sources と比べて変化を見る"""
+    entries = []
+    for path in sources:
+        stat = path.stat()
+        entries.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return np.array(sorted(entries), dtype=str)
+
+
+def is_stale(partition: Path, sources: list[Path]) -> bool:
+    if not partition.exists():
+        return True
+    with np.load(partition, allow_pickle=False) as z:
+        if SOURCES_MEMBER not in z.files:
+            return True
+        built_from = z[SOURCES_MEMBER]
+    return not np.array_equal(built_from, source_fingerprint(sources))
+
+
+def build_partition(file_type: str, sources: list[Path], partition: Path) -> int:
+    """sources をまとめて1つの npz に書く（一時ファイルに書いてから置き換える）。行数を返す"""
+    layout = load_layout(file_type)
+    parts: dict[str, list[np.ndarray]] = {name: [] for name in layout.names}
+    dates: list[np.ndarray] = []
+
+    for path in sources:
+        with JrdbFile(path, layout) as f:
+            for name, values in f.columns().items():
+                parts[name].append(values)
+            dates.append(np.full(len(f), _file_date(path), dtype=np.int32))
+
+    arrays: dict[str, np.ndarray] = {
+        "file_date": np.concatenate(dates) if dates else np.zeros(0, np.int32),
+        SOURCES_MEMBER: source_fingerprint(sources),
+    }
+    for field in layout.fields:
+        kind_empty = np.zeros(0, dtype=object if field.kind == "text" else np.float64)
+        values = np.concatenate(parts[field.name]) if parts[field.name] else kind_empty
+        if field.kind == "text":
+            unique, codes = np.unique(values.astype(str), return_inverse=True)
+            arrays[field.name] = codes.astype(np.int32)
+            arrays[field.name + VALUES_SUFFIX] = unique
+        else:
+            arrays[field.name] = values
+
+    partition.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{partition.stem}.", suffix=".npz", dir=partition.parent)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            np.savez_compressed(out, **arrays)
+        os.chmod(tmp, 0o644)        # mkstemp は 0600
+        os.replace(tmp, partition)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(arrays["file_date"])
+
+
+def export_columns(
+    src_dir: Union[str, Path],
+    out_dir: Union[str, Path],
+    file_types: Iterable[str] = FILE_TYPES,
+    years: Optional[Iterable[int]] = None,
+    force: bool = False,
+    log=print,
+) -> dict[str, dict[int, int]]:
+    """種別 × 年の npz を作る（元ファイルの一覧が変わった年だけ）。書いた行数を返す"""
+    wanted = set(years) if years is not None else None
+    written: dict[str, dict[int, int]] = {}
+    for file_type in file_types:
+        file_type = file_type.upper()
+        found = find_sources(src_dir, file_type)
+        # 元ファイルが全部消えた年の npz は消す
+        for year in available_years(out_dir, file_type):
+            if year not in found and (wanted is None or year in wanted):
+                partition_path(out_dir, file_type, year).unlink()
+                log(f"  🗑 {file_type} {year}: 元ファイルなし → 削除")
+        for year, sources in found.items():
+            if wanted is not None and year not in wanted:
+                continue
+            partition = partition_path(out_dir, file_type, year)
+            if not force and not is_stale(partition, sources):
+                log(f"  ⏭ {file_type} {year}: 変更なし")
+                continue
+            rows = build_partition(file_type, sources, partition)
+            written.setdefault(file_type, {})[year] = rows
+            log(f"  ✅ {file_type} {year}: {len(sources)}ファイル {rows}行 → {partition}")
+    return written
+
+
+def available_years(root: Union[str, Path], file_type: str) -> list[int]:
+    return sorted(int(p.stem) for p in (Path(root) / file_type.upper()).glob("*.npz") if p.stem.isdigit())
+
+
+def load_columns(
+    root: Union[str, Path],
+    file_type: str,
+    columns: Optional[Iterable[str]] = None,
+    years: Optional[Iterable[int]] = None,
+) -> dict[str, np.ndarray]:
+    """
+    npz から要る列・要る年だけ読んで年順に連結する
+
+    int / float 列は float64（null は NaN）、text 列は str の配列。
+    columns を省略すると全列（file_date 込み）。
+    """
+    file_type = file_type.upper()
+    years = sorted(years) if years is not None else available_years(root, file_type)
+    names = list(columns) if columns is not None else None
+    parts: dict[str, list[np.ndarray]] = {}
+
+    for year in years:
+        partition = partition_path(root, file_type, year)
+        if not partition.exists():
+            continue
+        with np.load(partition, allow_pickle=False) as z:
+            members = [m for m in z.files if not m.endswith(VALUES_SUFFIX) and m != SOURCES_MEMBER]
+            for name in names if names is not None else members:
+                if name not in members:
+                    raise KeyError(f"{partition} に {name} という列はありません")
+                values = z[name]
+                if name + VALUES_SUFFIX in z.files:
+                    values = z[name + VALUES_SUFFIX][values]
+                parts.setdefault(name, []).append(values)
+
+    if not parts:
+        return {name: np.zeros(0) for name in names or []}
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
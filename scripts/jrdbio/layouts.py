@@ -0,0 +1,129 @@
+"""
+レコードレイアウトの読み込み
+
+フィールド定義は Python 側に持たず、TS / JS のソースから読む（仕様の修正は1か所で済む）。
+
+  KYG  kyg-parser.ts の KYG_FIELDS（string / hex → 文字列、number → parseInt、decimal → parseFloat）
+       TS の KYGRecord と同じく raceKey（先頭8バイト）も引ける
+  SEC / UKC  parsers.mjs の parseSEC / parseUKC（s → 文字列、i → parseInt、n → parseFloat）
+
+BAB は行ごとに長さが違い、parsers.mjs もデコード後の文字位置で切っているので対象外。
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+KYG_PARSER_TS = PROJECT_ROOT / "src/lib/jrdb/kyg-parser.ts"
+PARSERS_MJS = PROJECT_ROOT / "scripts/jrdb/parsers.mjs"
+
+# 値の種類: text（CP932 文字列）/ int（parseInt 相当）/ float（parseFloat 相当）
+KINDS = ("text", "int", "float")
+
+_KYG_LENGTH = re.compile(r"export const KYG_RECORD_LENGTH = (\d+);")
+_KYG_BLOCK = re.compile(r"export const KYG_FIELDS: KYGField\[\] = \[(.*?)\n\];", re.S)
+_KYG_FIELD = re.compile(
+    r'\{\s*name:\s*"([^"]+)",\s*start:\s*(\d+),\s*length:\s*(\d+),\s*type:\s*"(\w+)"'
+)
+_KYG_KINDS = {"string": "text", "hex": "text", "number": "int", "decimal": "float"}
+
+_MJS_FUNC = re.compile(r"export function (parse[A-Z]+)\(filePath\) \{(.*?)\n\}", re.S)
+_MJS_LENGTH = re.compile(r"const RECORD_LEN = (\d+);")
+_MJS_FIELD = re.compile(r"(\w+):\s*([sni])\((\d+),\s*(\d+)\)")
+_MJS_KINDS = {"s": "text", "i": "int", "n": "float"}
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    start: int      # 1始まり（仕様書どおり）
+    length: int
+    kind: str       # KINDS のどれか
+
+    @property
+    def offset(self) -> int:
+        return self.start - 1
+
+
+@dataclass(frozen=True)
+class Layout:
+    file_type: str
+    record_length: int      # 改行を除くバイト数
+    fields: tuple
+
+    def field(self, name: str) -> Field:
+        for f in self.fields:
+            if f.name == name:
+                return f
+        raise KeyError(f"{self.file_type} に {name} というフィールドはありません")
+
+    @property
+    def names(self) -> list[str]:
+        return [f.name for f in self.fields]
+
+    def dtype(self) -> np.dtype:
+        """
+        1レコード（改行を除く）を表す構造化 dtype。各フィールドは S<length>
+
+        KYG_FIELDS には位置が重なるフィールドがあるので（テン指数と激走順位など）、
+        offsets を明示した dict 形式で作る。
+        """
+        return np.dtype({
+            "names": self.names,
+            "formats": [f"S{f.length}" for f in self.fields],
+            "offsets": [f.offset for f in self.fields],
+            "itemsize": self.record_length,
+        })
+
+
+def parse_kyg_fields(source: str) -> Layout:
+    """kyg-parser.ts のソースから KYG のレイアウトを作る"""
+    length = _KYG_LENGTH.search(source)
+    block = _KYG_BLOCK.search(source)
+    if not length or not block:
+        raise ValueError("KYG_RECORD_LENGTH / KYG_FIELDS が見つかりません")
+    fields = [Field("raceKey", 1, 8, "text")]
+    for name, start, size, typ in _KYG_FIELD.findall(block.group(1)):
+        fields.append(Field(name, int(start), int(size), _KYG_KINDS[typ]))
+    return Layout("KYG", int(length.group(1)), tuple(fields))
+
+
+def parse_mjs_layout(source: str, file_type: str) -> Layout:
+    """parsers.mjs のソースから parse<file_type> のレイアウトを作る"""
+    for func, body in _MJS_FUNC.findall(source):
+        if func != f"parse{file_type}":
+            continue
+        length = _MJS_LENGTH.search(body)
+        if not length:
+            raise ValueError(f"{func} は固定長ではありません")
+        fields = tuple(
+            Field(name, int(start), int(size), _MJS_KINDS[kind])
+            for name, kind, start, size in _MJS_FIELD.findall(body)
+        )
+        return Layout(file_type, int(length.group(1)), fields)
+    raise ValueError(f"parse{file_type} が見つかりません")
+
+
+_cache: dict[str, Layout] = {}
+
+
+def load_layout(file_type: str, source: Union[str, Path, None] = None) -> Layout:
+    """KYG / SEC / UKC のレイアウト（source を省略するとリポジトリ内の定義を読む）"""
+    file_type = file_type.upper()
+    if source is None and file_type in _cache:
+        return _cache[file_type]
+
+    if file_type == "KYG":
+        layout = parse_kyg_fields(Path(source or KYG_PARSER_TS).read_text(encoding="utf-8"))
+    elif file_type in ("SEC", "UKC"):
+        layout = parse_mjs_layout(Path(source or PARSERS_MJS).read_text(encoding="utf-8"), file_type)
+    else:
+        raise ValueError(f"未対応のファイル種別: {file_type}")
+
+    if source is None:
+        _cache[file_type] = layout
+    return layout
@@ -0,0 +1,191 @@
+"""
+mmap した JRDB ファイルの列単位デコード
+
+ファイル全体を mmap し、改行込みのレコード長を stride にした構造化配列として見る
+（読み込み時のコピー・デコードはなし）。列を要求されたときに初めて変換する:
+
+  int / float  そのフィールドのバイト列を (レコード数, 桁数) の uint8 配列として見て、
+               桁ごとに NumPy で一括変換する（JS の parseInt / parseFloat と同じ結果。null は NaN）
+  text         np.unique で異なる値だけを CP932 デコードして配り直す（騎手名・馬名などは重複が多い）
+
+変換した列はファイルを閉じるまでキャッシュする。
+"""
+
+import mmap
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from .layouts import Layout, load_layout
+
+_SPACE, _TAB, _PLUS, _MINUS, _DOT, _ZERO = (ord(c) for c in " \t+-.0")
+
+# 数値パースの状態
+_LEAD, _SIGN, _INT, _FRAC, _DONE = range(5)
+
+
+def parse_numbers(mat: np.ndarray, allow_fraction: bool) -> np.ndarray:
+    """
+    (N, 桁数) の uint8 配列を数値にする（null は NaN）
+
+    前後の空白を無視し、符号・数字・（allow_fraction なら）小数点を読んで、
+    それ以外の文字が来たらそこで打ち切る。数字が1つも無ければ NaN。
+    parseInt（allow_fraction=False）/ parseFloat と同じ挙動。
+    """
+    n = mat.shape[0]
+    value = np.zeros(n, dtype=np.float64)
+    state = np.full(n, _LEAD, dtype=np.int8)
+    negative = np.zeros(n, dtype=bool)
+    digits = np.zeros(n, dtype=np.int16)
+    scale = np.ones(n, dtype=np.float64)
+
+    for j in range(mat.shape[1]):
+        b = mat[:, j]
+        d = b - np.uint8(_ZERO)                 # 数字以外は桁あふれで 10 以上になる
+        is_digit = d < 10
+        lead = state == _LEAD
+        before_int = lead | (state == _SIGN)
+        in_number = before_int | (state == _INT)
+
+        take = is_digit & (in_number | (state == _FRAC))
+        value[take] = value[take] * 10 + d[take]
+        digits[take] += 1
+        frac = take & (state == _FRAC)
+        scale[frac] *= 10
+
+        skip = lead & ((b == _SPACE) | (b == _TAB))
+        sign = lead & ((b == _PLUS) | (b == _MINUS))
+        negative |= sign & (b == _MINUS)
+        dot = in_number & (b == _DOT) if allow_fraction else np.zeros(n, dtype=bool)
+
+        nxt = np.full(n, _DONE, dtype=np.int8)
+        nxt[skip] = _LEAD
+        nxt[sign] = _SIGN
+        nxt[take & in_number] = _INT
+        nxt[frac] = _FRAC
+        nxt[dot] = _FRAC
+        state = np.where(state == _DONE, _DONE, nxt).astype(np.int8)
+
+    out = np.where(negative, -value, value) / scale
+    out[digits == 0] = np.nan
+    return out
+
+
+def _detect_stride(mm, record_length: int) -> int:
+    """改行込みの1レコードのバイト数（CRLF / LF / 改行なし）"""
+    tail = mm[record_length:record_length + 2]
+    if tail == b"\r\n":
+        return record_length + 2
+    if tail[:1] in (b"\r", b"\n"):
+        return record_length + 1
+    return record_length
+
+
+def _file_type(path: Path) -> str:
+    name = path.name.upper()
+    for file_type in ("KYG", "SEC", "UKC"):
+        if name.startswith(file_type):
+            return file_type
+    raise ValueError(f"Unknown file type: {path.name}")
+
+
+class JrdbFile:
+    """1ファイル分の読み取り専用ビュー（with で閉じる）"""
+
+    def __init__(self, path: Union[str, Path], layout: Optional[Layout] = None):
+        self.path = Path(path)
+        self.layout = layout or load_layout(_file_type(self.path))
+        self._columns: dict[str, np.ndarray] = {}
+        self._mm = None
+
+        size = self.path.stat().st_size
+        rec_len = self.layout.record_length
+        if size < rec_len:
+            self.stride = rec_len
+            self.records = np.zeros(0, dtype=self.layout.dtype())
+            return
+
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.stride = _detect_stride(self._mm, rec_len)
+
+        # 最終行に改行が無くても1レコードとして数える（末尾の EOF 記号などの端数は捨てる）
+        count = size // self.stride + (1 if size % self.stride >= rec_len else 0)
+        self.records = np.ndarray(
+            (count,), dtype=self.layout.dtype(), buffer=self._mm, strides=(self.stride,)
+        )
+        self._check_line_breaks(count)
+
+    def _check_line_breaks(self, count: int) -> None:
+        gap = self.stride - self.layout.record_length
+        if gap == 0 or count < 2:
+            return
+        breaks = self._bytes(self.layout.record_length, gap, count - 1)
+        expected = np.frombuffer(b"\r\n"[-gap:], dtype=np.uint8)
+        bad = np.flatnonzero((breaks != expected).any(axis=1))
+        if len(bad):
+            raise ValueError(
+                f"{self.path.name}: {bad[0] + 1}件目のレコードの後ろが改行ではありません"
+                f"（レコード長 {self.layout.record_length} と合っていない可能性）"
+            )
+
+    def _bytes(self, offset: int, length: int, count: Optional[int] = None) -> np.ndarray:
+        """各レコードの offset から length バイトを (レコード数, length) の uint8 で（コピーなし）"""
+        count = len(self.records) if count is None else count
+        return np.ndarray(
+            (count, length), dtype=np.uint8, buffer=self._mm, offset=offset, strides=(self.stride, 1)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._columns.clear()
+        self.records = self.records[:0].copy()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # raw() の戻り値などがまだ参照している。参照が消えれば GC で解放される
+                pass
+            self._mm = None
+
+    def raw(self, name: str) -> np.ndarray:
+        """フィールドのバイト列（S<length>。ファイルを閉じるまで有効なビュー）"""
+        return self.records[name]
+
+    def column(self, name: str) -> np.ndarray:
+        """int / float は float64（null は NaN）、text は str の object 配列"""
+        if name in self._columns:
+            return self._columns[name]
+
+        field = self.layout.field(name)
+        if len(self.records) == 0:
+            values = np.zeros(0, dtype=object if field.kind == "text" else np.float64)
+        elif field.kind == "text":
+            unique, inverse = np.unique(self.records[name], return_inverse=True)
+            decoded = np.array(
+                [u.decode("cp932", errors="replace").strip() for u in unique], dtype=object
+            )
+            values = decoded[inverse]
+        else:
+            values = parse_numbers(self._bytes(field.offset, field.length), field.kind == "float")
+
+        self._columns[name] = values
+        return values
+
+    def columns(self, names: Optional[Iterable[str]] = None) -> dict[str, np.ndarray]:
+        """複数列をまとめて（省略時は全フィールド）"""
+        return {name: self.column(name) for name in (names or self.layout.names)}
+
+
+def open_jrdb(path: Union[str, Path], file_type: Optional[str] = None) -> JrdbFile:
+    """ファイル名の先頭（KYG / SEC / UKC）からレイアウトを選んで開く"""
+    return JrdbFile(path, load_layout(file_type) if file_type else None)
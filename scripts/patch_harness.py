@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+パッチスクリプトの dry-run / ベンチマーク
+
+scripts/ と phase-*-scripts/ のパッチスクリプトを、インメモリのオーバーレイ
+ファイルシステム上で実行する（実ファイルには一切書き込まない）。
+
+  --dry-run  : 実行して、書き込まれるはずだった変更を unified diff で表示
+  --bench N  : src/ のスナップショット（メモリ上）に対して各スクリプトを N 回再生し、
+               スクリプト別・ファイル別の所要時間を表示
+
+実行中は PATCHKIT_NO_CACHE=1 になり、適用済みキャッシュによるスキップは起きない。
+
+使用方法:
+  cd ~/gate-in
+  python3 scripts/patch_harness.py --dry-run scripts/fix_danger_mark.py
+  python3 scripts/patch_harness.py --dry-run phase-f-scripts/37_badge_auto_grant.py > /tmp/37.diff
+  python3 scripts/patch_harness.py --bench 5                 # 全パッチスクリプト
+  python3 scripts/patch_harness.py --bench 10 scripts/fix_syntax_errors.py
+"""
+
+import argparse
+import io
+import os
+import runpy
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from patchkit.overlay import OverlayFS, load_snapshot
+
+SCRIPT_DIRS = ("scripts", "phase-eh-scripts", "phase-f-scripts", "phase-j-scripts")
+
+# 他のスクリプトを起動するだけのもの・このハーネス自身・src/ を書き換えない CLI は対象外
+EXCLUDE = {
+    "run_all.py", "run_all_j.py", "codemod.py", "patch_harness.py",
+    "jrdb_export.py", "simulate_season.py",
+}
+
+
+def default_scripts(project_root: Path) -> list[Path]:
+    scripts = []
+    for d in SCRIPT_DIRS:
+        scripts.extend(p for p in sorted((project_root / d).glob("*.py")) if p.name not in EXCLUDE)
+    return scripts
+
+
+def run_script(path: Path, project_root: Path, quiet: bool) -> tuple[bool, str]:
+    """スクリプトを __main__ として実行する（cwd はプロジェクトルート）"""
+    saved_argv, saved_path, saved_cwd = sys.argv, list(sys.path), os.getcwd()
+    sys.argv = [str(path)]
+    sys.path.insert(0, str(path.parent))
+    os.chdir(project_root)
+    buf = io.StringIO()
+    ok = True
+    try:
+        if quiet:
+            with redirect_stdout(buf), redirect_stderr(buf):
+                runpy.run_path(str(path), run_name="__main__")
+        else:
+            runpy.run_path(str(path), run_name="__main__")
+    except SystemExit as e:
+        ok = e.code in (None, 0)
+    except Exception as e:
+        ok = False
+        buf.write(f"{type(e).__name__}: {e}\n")
+    finally:
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        os.chdir(saved_cwd)
+    return ok, buf.getvalue()
+
+
+def dry_run(scripts: list[Path], project_root: Path):
+    for path in scripts:
+        print(f"{'─' * 60}", file=sys.stderr)
+        print(f"🔍 {path.relative_to(project_root)} (dry-run)", file=sys.stderr)
+        print(f"{'─' * 60}", file=sys.stderr)
+        with OverlayFS(project_root) as fs:
+            # スクリプトの出力は stderr へ、diff だけを stdout に出す
+            with redirect_stdout(sys.stderr):
+                ok, output = run_script(path, project_root, quiet=False)
+        if not ok:
+            print(f"❌ 実行失敗 {output}", file=sys.stderr)
+        changed = [p for p in fs.changed_files() if "/.patchkit/" not in p]
+        print(f"📝 {len(changed)}ファイルに変更", file=sys.stderr)
+        for p in changed:
+            print(f"   - {os.path.relpath(p, project_root)}", file=sys.stderr)
+        sys.stdout.write(fs.diff())
+
+
+def bench(scripts: list[Path], project_root: Path, repeat: int, top: int):
+    snapshot = load_snapshot(project_root, "src")
+    print(f"📸 src/ スナップショット: {len(snapshot)}ファイル / {sum(map(len, snapshot.values())) // 1024}KB")
+    print(f"⏱️  {len(scripts)}スクリプト × {repeat}回\n")
+
+    rows = []
+    for path in scripts:
+        times = []
+        per_file: dict[str, float] = {}
+        ok = True
+        for _ in range(repeat):
+            with OverlayFS(project_root, snapshot) as fs:
+                start = time.perf_counter()
+                ok, _ = run_script(path, project_root, quiet=True)
+                end = time.perf_counter()
+            times.append(end - start)
+            for rel, t in fs.time_per_file(start, end).items():
+                per_file[rel] = per_file.get(rel, 0.0) + t / repeat
+        rows.append((path, ok, min(times), sum(times) / len(times), per_file))
+
+    rows.sort(key=lambda r: r[3], reverse=True)
+    print(f"{'平均(ms)':>10} {'最小(ms)':>10}  スクリプト")
+    for path, ok, best, mean, per_file in rows:
+        mark = "" if ok else "  ❌ 失敗"
+        print(f"{mean * 1000:10.2f} {best * 1000:10.2f}  {path.relative_to(project_root)}{mark}")
+        for rel, t in sorted(per_file.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+            print(f"{'':>22}    {t * 1000:8.2f}ms  {rel}")
+
+
+def main():
+    project_root = Path(__file__).resolve().parent.parent
+
+    parser = argparse.ArgumentParser(description="パッチスクリプトの dry-run / ベンチマーク")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--dry-run", action="store_true", help="書き込まずに unified diff を表示")
+    mode.add_argument("--bench", type=int, metavar="N", help="各スクリプトを N 回再生して計測")
+    parser.add_argument("scripts", nargs="*", help="対象スクリプト（省略時は全パッチスクリプト）")
+    parser.add_argument("--top", type=int, default=3, help="bench でスクリプトごとに表示するファイル数")
+    args = parser.parse_args()
+
+    scripts = [Path(s).resolve() for s in args.scripts] or default_scripts(project_root)
+    os.environ["PATCHKIT_NO_CACHE"] = "1"
+
+    if args.dry_run:
+        dry_run(scripts, project_root)
+    else:
+        bench(scripts, project_root, args.bench, args.top)
+
+
+if __name__ == "__main__":
+    main()
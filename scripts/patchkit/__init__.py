@@ -0,0 +1,5 @@
+"""
+パッチスクリプト共通ユーティリティ
+
+phase-*-scripts/ と scripts/ 配下のパッチスクリプトから共有して使う。
+"""
@@ -0,0 +1,181 @@
+"""
+ツリー一括コードモッド
+
+各スクリプトがモジュール定数 CODEMOD_RULES で公開した書き換えルールを集め、
+src/ 以下を1回だけ walk して全ファイルに全ルールを順に適用する。
+1ファイルにつき読み込み・書き込みは最大1回ずつで、書き込みはアトミック。
+TARGET_FILES の列挙ではなくツリー全体が対象になる（path 制限が必要なルールは include で絞る）。
+
+ルールの公開（スクリプト側）:
+  from patchkit.codemod import FileRule
+
+  def replace_danger_mark(content: str) -> str: ...
+
+  CODEMOD_RULES = [FileRule("△→⚠️", replace_danger_mark)]
+
+CODEMOD_RULES を持つスクリプトは import されるため、
+モジュール直下で処理を実行しない（main()/run() を __main__ ガードで呼ぶ）こと。
+
+実行は scripts/codemod.py から。
+"""
+
+import importlib.util
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Optional
+
+from .files import atomic_write, iter_source_files
+from .overlay import current_overlay
+
+# CODEMOD_RULES を探すディレクトリ（プロジェクトルートからの相対）
+SCRIPT_DIRS = ("scripts", "phase-eh-scripts", "phase-f-scripts", "phase-j-scripts")
+
+_DECLARES_RULES = re.compile(r"^CODEMOD_RULES\s*=", re.M)
+
+
+@dataclass(frozen=True)
+class FileRule:
+    name: str
+    transform: Callable[[str], str]
+    # 対象を絞る glob（src/ からの相対パス）。空なら全ファイル
+    include: tuple = ()
+
+    def matches(self, rel_path: str) -> bool:
+        # [raceId] のようなディレクトリ名は glob の文字クラスになるので、完全一致も見る
+        return not self.include or any(rel_path == pat or fnmatch(rel_path, pat) for pat in self.include)
+
+
+@dataclass(frozen=True)
+class RegisteredRule:
+    script: str
+    rule: FileRule
+    # スクリプトの TARGET_FILES / TARGETS（プロジェクトルートからの相対）。宣言が無ければ空
+    targets: tuple = ()
+
+    @property
+    def key(self) -> str:
+        return f"{self.script}:{self.rule.name}"
+
+
+# ============================================================
+# スクリプトの検出と読み込み
+# ============================================================
+def discover_scripts(project_root: Path) -> dict[str, Path]:
+    """CODEMOD_RULES を定義しているスクリプトを {名前: パス} で返す（import はしない）"""
+    found = {}
+    for d in SCRIPT_DIRS:
+        for path in sorted((project_root / d).glob("*.py")):
+            if _DECLARES_RULES.search(path.read_text(encoding="utf-8")):
+                found[path.stem] = path
+    return found
+
+
+def load_rules(script_paths: list[Path]) -> list[RegisteredRule]:
+    """スクリプトを import して CODEMOD_RULES を登録順に集める"""
+    rules = []
+    for path in script_paths:
+        module_name = "codemod_" + re.sub(r"\W", "_", path.stem)
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        targets = tuple(getattr(module, "TARGET_FILES", None) or getattr(module, "TARGETS", None) or ())
+        for rule in getattr(module, "CODEMOD_RULES", []):
+            rules.append(RegisteredRule(path.stem, rule, targets))
+    return rules
+
+
+# ============================================================
+# 適用
+# ============================================================
+def apply_rules(rules: list[RegisteredRule], path: Path, rel_path: str, write: bool = True) -> list[str]:
+    """1ファイルを1回読み、該当する全ルールを順に通し、変更があれば1回だけ書き戻す"""
+    applicable = [r for r in rules if r.rule.matches(rel_path)]
+    if not applicable:
+        return []
+
+    original = path.read_text(encoding="utf-8")
+    content = original
+    fired = []
+    for r in applicable:
+        new_content = r.rule.transform(content)
+        if new_content != content:
+            fired.append(r.key)
+            content = new_content
+
+    if write and content != original:
+        atomic_write(path, content.encode("utf-8"))
+    return fired
+
+
+_worker_rules: Optional[list[RegisteredRule]] = None
+
+
+def _init_worker(script_paths: list[Path]):
+    # ルール関数は動的 import したモジュールにあるので、ワーカー側で読み込み直す
+    global _worker_rules
+    _worker_rules = load_rules(script_paths)
+
+
+def _apply_one(args: tuple[str, str, bool]) -> tuple[str, list[str]]:
+    path, rel_path, write = args
+    return rel_path, apply_rules(_worker_rules, Path(path), rel_path, write)
+
+
+def run_codemods(
+    script_paths: list[Path],
+    src_root: Path,
+    suffixes=(".tsx",),
+    jobs: Optional[int] = None,
+    write: bool = True,
+) -> tuple[dict[str, list[str]], int]:
+    """src_root を1回 walk して全ルールを適用する。({相対パス: 発火したルール}, 走査ファイル数) を返す"""
+    files = iter_source_files(src_root, suffixes)
+    args = [(str(p), p.relative_to(src_root).as_posix(), write) for p in files]
+    results: dict[str, list[str]] = {}
+
+    # オーバーレイ（dry-run / bench）中はワーカーに書き込みが見えないので直列で処理する
+    if jobs == 1 or current_overlay() is not None:
+        rules = load_rules(script_paths)
+        for path, rel_path, w in args:
+            fired = apply_rules(rules, Path(path), rel_path, w)
+            if fired:
+                results[rel_path] = fired
+        return results, len(files)
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(script_paths,)) as pool:
+        for rel_path, fired in pool.map(_apply_one, args, chunksize=16):
+            if fired:
+                results[rel_path] = fired
+    return results, len(files)
+
+
+def out_of_scope(results: dict[str, list[str]], rules: list[RegisteredRule], src_prefix: str = "src/") -> list[tuple[str, str]]:
+    """TARGET_FILES / TARGETS を宣言したスクリプトのルールが、対象外のファイルを変更したものを返す"""
+    by_key = {r.key: r for r in rules}
+    violations = []
+    for rel_path, fired in sorted(results.items()):
+        for key in fired:
+            targets = by_key[key].targets
+            if targets and src_prefix + rel_path not in targets:
+                violations.append((rel_path, key))
+    return violations
+
+
+def print_summary(results: dict[str, list[str]], rules: list[RegisteredRule], scanned: int):
+    """ルールごとにどのファイルで発火したかを表示する"""
+    by_rule: dict[str, list[str]] = {r.key: [] for r in rules}
+    for rel_path, fired in sorted(results.items()):
+        for key in fired:
+            by_rule[key].append(rel_path)
+
+    print(f"\n{'=' * 60}")
+    print(f"📊 {scanned}ファイルを走査 / {len(results)}ファイルを更新")
+    print(f"{'=' * 60}")
+    for key, paths in by_rule.items():
+        mark = "✅" if paths else "⚪"
+        print(f"{mark} {key} ({len(paths)}ファイル)")
+        for p in paths:
+            print(f"   - {p}")
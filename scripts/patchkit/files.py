@@ -0,0 +1,47 @@
+"""
+ファイル書き込み・ツリー走査の共通処理
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+# ツリー走査で常に除外するディレクトリ
+SKIP_DIRS = ("node_modules", ".next", ".git", ".patchkit")
+
+
+def atomic_write(path: Union[str, Path], data: bytes):
+    """一時ファイルに書いてから os.replace で差し替える（途中で落ちても壊れたファイルを残さない）"""
+    from .overlay import current_overlay
+
+    overlay = current_overlay()
+    if overlay is not None:
+        overlay.write_bytes(path, data)
+        return
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def iter_source_files(root: Union[str, Path], suffixes=(".ts", ".tsx")) -> list[Path]:
+    """root 以下の対象ファイルを1回の walk で列挙する（SKIP_DIRS は除外）"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            if name.endswith(tuple(suffixes)):
+                found.append(Path(dirpath) / name)
+    found.sort()
+    return found
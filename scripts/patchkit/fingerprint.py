@@ -0,0 +1,135 @@
+"""
+パッチ適用済みフィンガープリントキャッシュ
+
+(スクリプト, 対象ファイル, 内容ハッシュ) の組を「適用済み」として記録し、
+再実行時は対象ファイルを開かずにスキップできるようにする。
+
+- mtime/size が記録時と同じ → ファイルを開かずに適用済みと判定
+- mtime/size が変わった → 読み込んでハッシュを比較（touch だけなら適用済みのまま）
+- 内容が変わった → エントリを破棄して再適用
+- スクリプト自体を書き換えた → そのスクリプトのキャッシュを全破棄
+
+キャッシュは <root>/.patchkit/fingerprints/<スクリプト名>.json にスクリプトごとに保存する
+（run_all の並列実行でも書き込みが衝突しない）。
+PATCHKIT_NO_CACHE=1 で常に再適用する。
+
+使い方:
+  from patchkit.fingerprint import FingerprintCache
+
+  cache = FingerprintCache(__file__, root=project_root)
+  if cache.is_applied(path):
+      print(f"⏭️  {path} (適用済み)")
+  else:
+      ...  # パッチ適用
+      cache.mark_applied(path)
+  cache.save()
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+from .files import atomic_write
+
+CACHE_DIR = ".patchkit/fingerprints"
+
+PathLike = Union[str, Path]
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class FingerprintCache:
+    def __init__(self, script_path: PathLike, root: Optional[PathLike] = None):
+        self.root = Path(root) if root is not None else Path.cwd()
+        script_path = Path(script_path)
+        self.script = script_path.stem
+        self.script_hash = _sha256(script_path.read_bytes())
+        self.cache_path = self.root / CACHE_DIR / f"{self.script}.json"
+        self.disabled = os.environ.get("PATCHKIT_NO_CACHE") == "1"
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if self.disabled or not self.cache_path.exists():
+            return
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        # スクリプトが変わっていれば過去の記録は使えない
+        if data.get("script_hash") == self.script_hash:
+            self.entries = data.get("targets", {})
+        else:
+            self.dirty = True
+
+    def _key(self, path: PathLike) -> str:
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.root / path
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def is_applied(self, path: PathLike) -> bool:
+        """対象ファイルが前回適用後から変わっていなければ True"""
+        if self.disabled:
+            return False
+        key = self._key(path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        full = self.root / key
+        try:
+            st = full.stat()
+        except OSError:
+            return False
+        if st.st_mtime_ns == entry["mtime_ns"] and st.st_size == entry["size"]:
+            return True
+
+        # mtime/size が変わっただけなら内容で判定する
+        if _sha256(full.read_bytes()) == entry["sha256"]:
+            entry["mtime_ns"] = st.st_mtime_ns
+            entry["size"] = st.st_size
+            self.dirty = True
+            return True
+
+        del self.entries[key]
+        self.dirty = True
+        return False
+
+    def mark_applied(self, path: PathLike, content: Optional[Union[str, bytes]] = None):
+        """現在の内容を「適用済み」として記録する（content を渡せば再読込しない）"""
+        if self.disabled:
+            return
+        key = self._key(path)
+        full = self.root / key
+        if content is None:
+            data = full.read_bytes()
+        elif isinstance(content, str):
+            data = content.encode("utf-8")
+        else:
+            data = content
+        st = full.stat()
+        self.entries[key] = {
+            "sha256": _sha256(data),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+        }
+        self.dirty = True
+
+    def save(self):
+        if self.disabled or not self.dirty:
+            return
+        payload = {"script_hash": self.script_hash, "targets": self.entries}
+        atomic_write(
+            self.cache_path,
+            json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8"),
+        )
+        self.dirty = False
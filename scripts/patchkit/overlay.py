@@ -0,0 +1,271 @@
+"""
+インメモリ・オーバーレイファイルシステム
+
+with OverlayFS(root): の間、open / io.open / os.stat / os.mkdir / os.replace / os.remove を
+差し替え、書き込みをすべてメモリ上に留める。読み込みはオーバーレイ → スナップショット → 実ディスクの順。
+pathlib.Path の read_text / write_text / exists / mkdir もこれらを経由するので同じく捕捉される。
+
+用途:
+  - --dry-run: スクリプトを実行し、ディスクに書かずに unified diff を出す
+  - --bench:   src/ のスナップショット（メモリ上）に対して同じスクリプトを何度も再生する
+
+制限:
+  - os.listdir / os.walk / glob には新規作成ファイルは現れない（既存ファイルの走査は可）
+  - サブプロセスには効かない（patchkit の並列処理はオーバーレイ中は自動で直列になる）
+"""
+
+import builtins
+import difflib
+import io
+import os
+import stat
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+_real_open = io.open
+_real_stat = os.stat
+_real_mkdir = os.mkdir
+_real_replace = os.replace
+_real_rename = os.rename
+_real_remove = os.remove
+_real_unlink = os.unlink
+
+_active: Optional["OverlayFS"] = None
+
+
+def current_overlay() -> Optional["OverlayFS"]:
+    """有効なオーバーレイ（なければ None）"""
+    return _active
+
+
+class _Writer:
+    """close 時に内容をオーバーレイへ保存するファイルオブジェクトのラッパー"""
+
+    def __init__(self, fs: "OverlayFS", path: str, buf, binary: bool, encoding: str):
+        self._fs = fs
+        self._path = path
+        self._buf = buf
+        self._binary = binary
+        self._encoding = encoding
+        self.name = path
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._buf, name)
+
+    def write(self, data):
+        return self._buf.write(data)
+
+    def close(self):
+        if self.closed:
+            return
+        value = self._buf.getvalue()
+        self._fs._store(self._path, value if self._binary else value.encode(self._encoding))
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self._buf)
+
+
+class OverlayFS:
+    def __init__(self, root: Union[str, Path], snapshot: Optional[dict[str, bytes]] = None):
+        self.root = os.path.abspath(root)
+        self.snapshot = snapshot or {}
+        self.files: dict[str, Optional[bytes]] = {}  # None = 削除済み
+        self.dirs: set[str] = set()
+        # (時刻, パス) のアクセスログ。bench でファイルごとの所要時間を按分するのに使う
+        self.accesses: list[tuple[float, str]] = []
+
+    # --------------------------------------------------------
+    # 内部状態
+    # --------------------------------------------------------
+    @staticmethod
+    def _abs(path) -> Optional[str]:
+        if isinstance(path, int):
+            return None  # fd は素通し
+        return os.path.abspath(os.fspath(path))
+
+    def _store(self, path: str, data: bytes):
+        self.files[path] = data
+        self.accesses.append((time.perf_counter(), path))
+
+    def _lookup(self, path: str) -> Optional[bytes]:
+        """オーバーレイ / スナップショット上の内容。どちらにもなければ KeyError"""
+        if path in self.files:
+            data = self.files[path]
+            if data is None:
+                raise FileNotFoundError(path)
+            return data
+        return self.snapshot[path]
+
+    def read_bytes(self, path) -> bytes:
+        path = self._abs(path)
+        try:
+            return self._lookup(path)
+        except KeyError:
+            with _real_open(path, "rb") as f:
+                return f.read()
+
+    def write_bytes(self, path, data: bytes):
+        self._store(self._abs(path), data)
+
+    # --------------------------------------------------------
+    # 差し替え関数
+    # --------------------------------------------------------
+    def _open(self, file, mode="r", buffering=-1, encoding=None, errors=None, newline=None, closefd=True, opener=None):
+        path = self._abs(file)
+        if path is None:
+            return _real_open(file, mode, buffering, encoding, errors, newline, closefd, opener)
+
+        binary = "b" in mode
+        enc = encoding or "utf-8"
+        writing = any(c in mode for c in "wax+")
+        self.accesses.append((time.perf_counter(), path))
+
+        if not writing:
+            try:
+                data = self._lookup(path)
+            except KeyError:
+                return _real_open(file, mode, buffering, encoding, errors, newline, closefd, opener)
+            return io.BytesIO(data) if binary else io.StringIO(data.decode(enc, errors or "strict"), newline=None)
+
+        if "x" in mode and self._exists(path):
+            raise FileExistsError(path)
+        initial = b""
+        if "a" in mode or ("+" in mode and "w" not in mode):
+            try:
+                initial = self.read_bytes(path)
+            except FileNotFoundError:
+                initial = b""
+        if binary:
+            buf = io.BytesIO(initial)
+        else:
+            buf = io.StringIO(initial.decode(enc), newline=newline if newline is not None else "")
+        if "a" in mode:
+            buf.seek(0, io.SEEK_END)
+        return _Writer(self, path, buf, binary, enc)
+
+    def _exists(self, path: str) -> bool:
+        try:
+            self._stat(path)
+            return True
+        except OSError:
+            return False
+
+    def _stat(self, path, *args, **kwargs):
+        abs_path = self._abs(path)
+        if abs_path is not None:
+            try:
+                data = self._lookup(abs_path)
+                return os.stat_result((stat.S_IFREG | 0o644, 0, 0, 1, 0, 0, len(data), 0, 0, 0))
+            except KeyError:
+                pass
+            if abs_path in self.dirs:
+                return os.stat_result((stat.S_IFDIR | 0o755, 0, 0, 1, 0, 0, 0, 0, 0, 0))
+        return _real_stat(path, *args, **kwargs)
+
+    def _mkdir(self, path, mode=0o777, *args, **kwargs):
+        abs_path = self._abs(path)
+        if self._exists(abs_path):
+            raise FileExistsError(abs_path)
+        self.dirs.add(abs_path)
+
+    def _replace(self, src, dst, *args, **kwargs):
+        src_abs, dst_abs = self._abs(src), self._abs(dst)
+        self._store(dst_abs, self.read_bytes(src_abs))
+        self.files[src_abs] = None
+
+    def _remove(self, path, *args, **kwargs):
+        abs_path = self._abs(path)
+        if not self._exists(abs_path):
+            raise FileNotFoundError(abs_path)
+        self.files[abs_path] = None
+
+    # --------------------------------------------------------
+    # コンテキストマネージャ
+    # --------------------------------------------------------
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("OverlayFS は入れ子にできません")
+        _active = self
+        builtins.open = io.open = self._open
+        os.stat = self._stat
+        os.mkdir = self._mkdir
+        os.replace = os.rename = self._replace
+        os.remove = os.unlink = self._remove
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        builtins.open = io.open = _real_open
+        os.stat = _real_stat
+        os.mkdir = _real_mkdir
+        os.replace = _real_replace
+        os.rename = _real_rename
+        os.remove = _real_remove
+        os.unlink = _real_unlink
+        _active = None
+
+    # --------------------------------------------------------
+    # 結果
+    # --------------------------------------------------------
+    def _original(self, path: str) -> Optional[bytes]:
+        if path in self.snapshot:
+            return self.snapshot[path]
+        try:
+            with _real_open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def changed_files(self) -> list[str]:
+        return sorted(p for p, data in self.files.items() if data != self._original(p))
+
+    def diff(self) -> str:
+        """変更されたファイルの unified diff（root からの相対パス）"""
+        chunks = []
+        for path in self.changed_files():
+            rel = os.path.relpath(path, self.root)
+            old = self._original(path)
+            new = self.files[path]
+            old_lines = [] if old is None else old.decode("utf-8", "replace").splitlines(keepends=True)
+            new_lines = [] if new is None else new.decode("utf-8", "replace").splitlines(keepends=True)
+            chunks.extend(difflib.unified_diff(
+                old_lines,
+                new_lines,
+                fromfile="/dev/null" if old is None else f"a/{rel}",
+                tofile="/dev/null" if new is None else f"b/{rel}",
+            ))
+        return "".join(line if line.endswith("\n") else line + "\n" for line in chunks)
+
+    def time_per_file(self, start: float, end: float) -> dict[str, float]:
+        """アクセスログから、各ファイルに費やした時間を按分する（次のファイルに触るまでを前のファイルに計上）"""
+        totals: dict[str, float] = {}
+        events = [(t, p) for t, p in self.accesses if start <= t <= end]
+        for (t, path), (t_next, _) in zip(events, events[1:] + [(end, "")]):
+            rel = os.path.relpath(path, self.root)
+            totals[rel] = totals.get(rel, 0.0) + (t_next - t)
+        return totals
+
+
+def load_snapshot(root: Union[str, Path], subdir: str = "src") -> dict[str, bytes]:
+    """root/subdir 以下の全ファイルをメモリに読み込む（bench の再生元）"""
+    from .files import SKIP_DIRS
+
+    snapshot = {}
+    base = os.path.join(os.path.abspath(root), subdir)
+    for dirpath, dirnames, filenames in os.walk(base):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with _real_open(path, "rb") as f:
+                snapshot[path] = f.read()
+    return snapshot
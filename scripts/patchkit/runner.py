@@ -0,0 +1,243 @@
+"""
+フェーズスクリプト共通ランナー
+
+各タスクスクリプトのモジュール先頭で宣言された READS / WRITES を
+（スクリプトを実行せずに）ASTから読み取り、ファイル競合グラフを作る。
+競合しないタスクはプロセスプールで並列に、競合するタスクは
+SCRIPTS の並び順どおりに実行する。
+
+宣言の書き方:
+  READS  = ["src/lib/ranks.ts"]                  # 読むだけのファイル
+  WRITES = ["src/lib/badges.ts", "vercel.json"]  # 作成・書き換えるファイル
+  WRITES = list(PAGES)                           # モジュール定数の dict/list も可
+
+WRITES を宣言していないタスク・宣言を解決できないタスクは「全ファイルに触る」とみなし、
+前後のタスクと直列に実行する。スクリプトが無い・構文エラーのタスクは実行せず失敗として記録し、
+残りのタスクはそのまま続ける。
+
+使い方（run_all.py から）:
+  from patchkit.runner import run_phase
+  results = run_phase(script_dir, SCRIPTS, jobs=args.jobs)
+"""
+
+import ast
+import io
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Task:
+    num: str
+    desc: str
+    path: str
+    reads: frozenset
+    writes: Optional[frozenset]  # None = 未宣言（排他実行）
+    error: Optional[str] = None  # 読み込めなかった理由（実行せず失敗扱い）
+
+    @property
+    def exclusive(self) -> bool:
+        return self.writes is None
+
+
+@dataclass
+class TaskResult:
+    task: Task
+    ok: bool
+    seconds: float
+    output: str
+
+
+# ============================================================
+# 宣言の読み取り
+# ============================================================
+def _resolve(expr: ast.expr, consts: dict) -> list[str]:
+    """READS / WRITES の式をパス一覧に解決する（リテラル・定数名・list(定数名)のみ対応）"""
+    if isinstance(expr, ast.Name):
+        return list(consts[expr.id])
+    if (
+        isinstance(expr, ast.Call)
+        and isinstance(expr.func, ast.Name)
+        and expr.func.id in ("list", "sorted", "tuple")
+        and len(expr.args) == 1
+    ):
+        return _resolve(expr.args[0], consts)
+    if isinstance(expr, (ast.List, ast.Tuple)):
+        paths = []
+        for elt in expr.elts:
+            if isinstance(elt, ast.Starred):
+                paths.extend(_resolve(elt.value, consts))
+            elif isinstance(elt, ast.Name):
+                paths.append(consts[elt.id])
+            else:
+                paths.append(ast.literal_eval(elt))
+        return paths
+    return list(ast.literal_eval(expr))
+
+
+def read_declarations(path: str) -> tuple[frozenset, Optional[frozenset]]:
+    """スクリプトを実行せずに READS / WRITES を取り出す"""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    consts = {}
+    decl = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1):
+            continue
+        target = node.targets[0]
+        if not isinstance(target, ast.Name):
+            continue
+        if target.id in ("READS", "WRITES"):
+            decl[target.id] = node.value
+            continue
+        try:
+            consts[target.id] = ast.literal_eval(node.value)
+        except ValueError:
+            pass
+
+    def norm(expr):
+        return frozenset(os.path.normpath(p) for p in _resolve(expr, consts))
+
+    reads = norm(decl["READS"]) if "READS" in decl else frozenset()
+    writes = norm(decl["WRITES"]) if "WRITES" in decl else None
+    return reads, writes
+
+
+def load_tasks(script_dir: str, scripts) -> list[Task]:
+    """run_all の SCRIPTS テーブル (番号, モジュール名 or ファイル名, 説明) から Task を作る
+
+    読めないスクリプトは error 付きの Task に、解決できない宣言は未宣言（排他実行）にする。
+    1つのスクリプトの不備でフェーズ全体を止めない。
+    """
+    tasks = []
+    for num, name, desc in scripts:
+        filename = name if name.endswith(".py") else f"{name}.py"
+        path = os.path.join(script_dir, filename)
+        try:
+            reads, writes = read_declarations(path)
+        except OSError as e:
+            tasks.append(Task(num, desc, path, frozenset(), None, f"スクリプトを読めません: {e}"))
+            continue
+        except SyntaxError as e:
+            tasks.append(Task(num, desc, path, frozenset(), None, f"構文エラー: {e}"))
+            continue
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"⚠️  #{num} の READS / WRITES を解決できないため直列実行: {type(e).__name__}: {e}")
+            reads, writes = frozenset(), None
+        tasks.append(Task(num, desc, path, reads, writes))
+    return tasks
+
+
+# ============================================================
+# 競合グラフ
+# ============================================================
+def conflicts(a: Task, b: Task) -> bool:
+    if a.exclusive or b.exclusive:
+        return True
+    return bool(a.writes & (b.reads | b.writes)) or bool(b.writes & a.reads)
+
+
+def build_dependencies(tasks: list[Task]) -> list[set[int]]:
+    """deps[j] = j より前にあって j と競合するタスクの index 集合"""
+    return [
+        {i for i in range(j) if conflicts(tasks[i], tasks[j])}
+        for j in range(len(tasks))
+    ]
+
+
+# ============================================================
+# 実行
+# ============================================================
+def _execute(path: str) -> tuple[bool, float, str]:
+    """ワーカープロセス内で1スクリプトを __main__ として実行し、出力をまとめて返す"""
+    script_dir = os.path.dirname(path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    buf = io.StringIO()
+    ok = True
+    start = time.perf_counter()
+    with redirect_stdout(buf), redirect_stderr(buf):
+        try:
+            runpy.run_path(path, run_name="__main__")
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+        except Exception:
+            traceback.print_exc()
+            ok = False
+    return ok, time.perf_counter() - start, buf.getvalue()
+
+
+def _print_result(result: TaskResult):
+    mark = "✅" if result.ok else "❌"
+    print(f"\n{'─' * 50}")
+    print(f"📦 Task #{result.task.num}: {result.task.desc}  ({result.seconds:.2f}s)")
+    print(f"{'─' * 50}")
+    if result.output:
+        print(result.output, end="" if result.output.endswith("\n") else "\n")
+    print(f"{mark} #{result.task.num} {'完了' if result.ok else '失敗'}")
+
+
+def run_tasks(tasks: list[Task], jobs: Optional[int] = None) -> list[TaskResult]:
+    """依存関係を守りながらタスクを並列実行する。結果は SCRIPTS の順で返す"""
+    deps = build_dependencies(tasks)
+    results: list[Optional[TaskResult]] = [None] * len(tasks)
+    done: set[int] = set()
+    waiting = set(range(len(tasks)))
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while waiting or running:
+            ready = sorted(i for i in waiting if deps[i] <= done)
+            for i in ready:
+                waiting.discard(i)
+                if tasks[i].error is not None:
+                    results[i] = TaskResult(tasks[i], False, 0.0, tasks[i].error)
+                    done.add(i)
+                    _print_result(results[i])
+                    continue
+                running[pool.submit(_execute, tasks[i].path)] = i
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                ok, seconds, output = future.result()
+                results[i] = TaskResult(tasks[i], ok, seconds, output)
+                done.add(i)
+                _print_result(results[i])
+
+    return results
+
+
+def print_timings(results: list[TaskResult], wall: float):
+    """タスクごとの所要時間と、直列実行との比較を表示する"""
+    print(f"\n{'=' * 60}")
+    print("⏱️  タスク別所要時間")
+    for r in results:
+        mark = "✅" if r.ok else "❌"
+        print(f"   {mark} #{r.task.num:<3} {r.seconds:7.2f}s  {r.task.desc}")
+    serial = sum(r.seconds for r in results)
+    print(f"   合計 {serial:.2f}s（直列相当） → 実時間 {wall:.2f}s")
+
+
+def run_phase(script_dir: str, scripts, jobs: Optional[int] = None) -> list[TaskResult]:
+    """SCRIPTS テーブルを読み込み、並列実行して所要時間を表示する"""
+    tasks = load_tasks(script_dir, scripts)
+    exclusive = [t.num for t in tasks if t.exclusive and t.error is None]
+    if exclusive:
+        print(f"ℹ️  WRITES 未宣言のため直列実行: #{', #'.join(exclusive)}")
+
+    start = time.perf_counter()
+    results = run_tasks(tasks, jobs=jobs)
+    print_timings(results, time.perf_counter() - start)
+    return results
@@ -0,0 +1,12 @@
+"""
+オフライン精算シミュレータ
+
+エクスポートした races / race_entries / race_results / payouts / votes / vote_picks を
+NumPy 配列に読み込み、src/lib/services/settle-scoring.ts と同じ採点ルールを
+全馬券に対してベクトル演算で適用する。POINT_RULES を変えたら1シーズンがどう変わるかを
+本番の settleRace を回さずに確かめるためのもの。
+
+依存: numpy（pip install numpy）
+
+実行は scripts/simulate_season.py から。
+"""
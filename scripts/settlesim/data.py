@@ -0,0 +1,152 @@
+"""
+エクスポートしたテーブルの読み込み
+
+ディレクトリに <テーブル名>.csv か <テーブル名>.json（行の配列）を置く。
+Supabase の Table Editor の「Export to CSV」をそのまま使える。
+
+  races         id, grade, race_date, post_time
+  race_entries  id, race_id, post_number, odds, popularity
+  race_results  race_id, race_entry_id, finish_position
+  payouts       race_id, bet_type, combination, payout_amount
+  votes         id, race_id, user_id, created_at
+  vote_picks    id, vote_id, pick_type, race_entry_id
+
+ID はすべて整数インデックスに振り直し、行は列ごとの NumPy 配列（Season）にする。
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+TABLES = ("races", "race_entries", "race_results", "payouts", "votes", "vote_picks")
+
+# vote_picks.pick_type → コード（それ以外は -1）
+PICK_TYPES = {"win": 0, "place": 1, "back": 2, "danger": 3}
+
+
+def read_table(data_dir: Union[str, Path], name: str) -> list[dict]:
+    data_dir = Path(data_dir)
+    json_path = data_dir / f"{name}.json"
+    if json_path.exists():
+        return json.loads(json_path.read_text(encoding="utf-8"))
+    csv_path = data_dir / f"{name}.csv"
+    if csv_path.exists():
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    raise FileNotFoundError(f"{name}.csv / {name}.json が見つかりません: {data_dir}")
+
+
+def _col(rows: list[dict], key: str) -> list:
+    return [r.get(key) for r in rows]
+
+
+def _nums(values: list, dtype=np.float64) -> np.ndarray:
+    """null / 空文字は NaN"""
+    return np.array([np.nan if v is None or v == "" else float(v) for v in values], dtype=dtype)
+
+
+def _ids(values: list) -> np.ndarray:
+    return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+
+def _lookup(ids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """keys の各要素が ids の何番目か（無ければ -1）"""
+    if len(ids) == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+    order = np.argsort(ids)
+    sorted_ids = ids[order]
+    pos = np.searchsorted(sorted_ids, keys)
+    pos = np.clip(pos, 0, len(ids) - 1)
+    return np.where((sorted_ids[pos] == keys) & (keys != ""), order[pos], -1)
+
+
+@dataclass
+class Season:
+    # races
+    race_id: np.ndarray         # str[R]
+    race_grade: list            # [R] str | None
+    race_time: np.ndarray       # str[R]（race_date + post_time。並べ替え用）
+    # race_entries（race_results の有無は result_* 側で持つ）
+    entry_id: np.ndarray        # str[E]
+    entry_race: np.ndarray      # int[E]
+    entry_post: np.ndarray      # float[E]（NaN = null）
+    entry_odds: np.ndarray      # float[E]
+    entry_popularity: np.ndarray  # float[E]
+    # race_results（エクスポート順）
+    result_race: np.ndarray     # int[N]
+    result_entry: np.ndarray    # int[N]
+    result_finish: np.ndarray   # float[N]（NaN = null）
+    # payouts
+    payout_race: np.ndarray     # int[M]
+    payout_bet_type: list       # [M] str
+    payout_combination: list    # [M] str
+    payout_amount: np.ndarray   # float[M]
+    # votes
+    vote_id: np.ndarray         # str[V]
+    vote_race: np.ndarray       # int[V]
+    vote_user: np.ndarray       # str[V]
+    vote_created_at: np.ndarray  # str[V]
+    # vote_picks（エクスポート順）
+    pick_id: np.ndarray         # str[P]
+    pick_vote: np.ndarray       # int[P]
+    pick_type: np.ndarray       # int[P]（PICK_TYPES、その他 -1）
+    pick_entry: np.ndarray      # int[P]（-1 = 不明なエントリー）
+
+    @property
+    def sizes(self) -> dict:
+        return {
+            "races": len(self.race_id),
+            "race_entries": len(self.entry_id),
+            "race_results": len(self.result_race),
+            "payouts": len(self.payout_race),
+            "votes": len(self.vote_id),
+            "vote_picks": len(self.pick_id),
+        }
+
+
+def build_season(tables: dict[str, list[dict]]) -> Season:
+    races, entries, results = tables["races"], tables["race_entries"], tables["race_results"]
+    payouts, votes, picks = tables["payouts"], tables["votes"], tables["vote_picks"]
+
+    race_id = _ids(_col(races, "id"))
+    entry_id = _ids(_col(entries, "id"))
+    vote_id = _ids(_col(votes, "id"))
+
+    return Season(
+        race_id=race_id,
+        race_grade=[g or None for g in _col(races, "grade")],
+        race_time=np.array(
+            [f"{r.get('race_date') or ''} {r.get('post_time') or ''}" for r in races], dtype=str
+        ),
+        entry_id=entry_id,
+        entry_race=_lookup(race_id, _ids(_col(entries, "race_id"))),
+        entry_post=_nums(_col(entries, "post_number")),
+        entry_odds=_nums(_col(entries, "odds")),
+        entry_popularity=_nums(_col(entries, "popularity")),
+        result_race=_lookup(race_id, _ids(_col(results, "race_id"))),
+        result_entry=_lookup(entry_id, _ids(_col(results, "race_entry_id"))),
+        result_finish=_nums(_col(results, "finish_position")),
+        payout_race=_lookup(race_id, _ids(_col(payouts, "race_id"))),
+        payout_bet_type=[str(b) for b in _col(payouts, "bet_type")],
+        payout_combination=["" if c is None else str(c) for c in _col(payouts, "combination")],
+        payout_amount=_nums(_col(payouts, "payout_amount")),
+        vote_id=vote_id,
+        vote_race=_lookup(race_id, _ids(_col(votes, "race_id"))),
+        vote_user=_ids(_col(votes, "user_id")),
+        vote_created_at=_ids(_col(votes, "created_at")),
+        pick_id=_ids(_col(picks, "id")),
+        pick_vote=_lookup(vote_id, _ids(_col(picks, "vote_id"))),
+        pick_type=np.array([PICK_TYPES.get(t, -1) for t in _col(picks, "pick_type")], dtype=np.int64),
+        pick_entry=_lookup(entry_id, _ids(_col(picks, "race_entry_id"))),
+    )
+
+
+def load_season(data_dir: Union[str, Path], tables: Optional[dict[str, list[dict]]] = None) -> Season:
+    """data_dir のエクスポートを読み込む（tables を渡した場合はそれを使う）"""
+    if tables is None:
+        tables = {name: read_table(data_dir, name) for name in TABLES}
+    return build_season(tables)
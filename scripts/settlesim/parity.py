@@ -0,0 +1,165 @@
+"""
+TS 実装とのパリティ用フィクスチャ
+
+乱数で作った合成シーズン（境界ケース込み）を NumPy 版で採点し、
+入力テーブルと投票ごとの期待値を fixtures/parity.json に書き出す。
+src/lib/services/settle-scoring.test.ts が同じ入力を scoreVote で採点して突き合わせる。
+
+点数表は ranks.ts の POINT_RULES。ルールや採点を変えたらフィクスチャを作り直すこと:
+  python3 scripts/simulate_season.py --write-parity-fixture
+"""
+
+import json
+import random
+from pathlib import Path
+
+from .data import build_season
+from .score import score_season
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "parity.json"
+
+GRADES = [None, None, "G1", "G2", "G3", "L", "OP", "1勝クラス"]
+
+
+def _combo(posts: list[int], rng: random.Random, ordered: bool = True) -> str:
+    """組番の表記ゆれ（逆順・全角ダッシュ・ゼロ埋め）を混ぜる"""
+    posts = sorted(posts) if ordered or rng.random() < 0.8 else list(reversed(sorted(posts)))
+    if rng.random() < 0.15:
+        posts = rng.sample(posts, len(posts))
+    sep = rng.choice(["-"] * 8 + ["ー", "－"])
+    parts = [f"0{p}" if p < 10 and rng.random() < 0.05 else str(p) for p in posts]
+    return sep.join(parts)
+
+
+def make_tables(seed: int = 20261017, n_races: int = 40, max_votes: int = 12) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    tables: dict[str, list[dict]] = {k: [] for k in ("races", "race_entries", "race_results", "payouts", "votes", "vote_picks")}
+    all_entries: list[str] = []
+    pick_seq = 0
+
+    for r in range(n_races):
+        race_id = f"race-{r:03d}"
+        tables["races"].append({
+            "id": race_id,
+            "grade": rng.choice(GRADES),
+            "race_date": f"2026-{1 + r // 20:02d}-{1 + r % 20:02d}",
+            "post_time": f"{10 + r % 7}:30",
+        })
+
+        n = rng.randint(5, 18)
+        odds = sorted(round(rng.lognormvariate(2.0, 1.0) + 1.0, 1) for _ in range(n))
+        entry_ids = []
+        order = rng.sample(range(n), n)
+        for i in range(n):
+            entry_id = f"{race_id}-e{i + 1:02d}"
+            entry_ids.append(entry_id)
+            all_entries.append(entry_id)
+            tables["race_entries"].append({
+                "id": entry_id,
+                "race_id": race_id,
+                "post_number": i + 1,
+                "odds": None if rng.random() < 0.03 else odds[order[i]],
+                "popularity": None if rng.random() < 0.05 else order[i] + 1,
+            })
+
+        # 着順（一部は null・結果なし・同着・1着なし）
+        finishes = list(range(1, n + 1))
+        rng.shuffle(finishes)
+        no_winner = rng.random() < 0.04
+        for i, entry_id in enumerate(entry_ids):
+            f = finishes[i]
+            if no_winner and f == 1:
+                continue
+            if rng.random() < 0.05:
+                continue  # 結果なし（取消など）
+            if f > 3 and rng.random() < 0.05:
+                f = None
+            tables["race_results"].append({"race_id": race_id, "race_entry_id": entry_id, "finish_position": f})
+        if rng.random() < 0.05:
+            tables["race_results"].append({"race_id": race_id, "race_entry_id": entry_ids[finishes.index(2)], "finish_position": 1})
+
+        top = [entry_ids[finishes.index(k)] for k in (1, 2, 3)]
+        top_posts = [entry_ids.index(e) + 1 for e in top]
+
+        # 払戻（欠落・重複・表記ゆれ込み）
+        def payout(bet: str, combination: str, amount: int):
+            if rng.random() < 0.1:
+                return
+            tables["payouts"].append({"race_id": race_id, "bet_type": bet, "combination": combination, "payout_amount": amount})
+            if rng.random() < 0.05:
+                tables["payouts"].append({"race_id": race_id, "bet_type": bet, "combination": combination, "payout_amount": amount + 500})
+
+        for p in top_posts:
+            payout("place", f"0{p}" if p < 10 and rng.random() < 0.05 else str(p), rng.randint(100, 1500))
+        payout("quinella", _combo(top_posts[:2], rng, ordered=False), rng.randint(200, 40000))
+        for a, b in ((0, 1), (0, 2), (1, 2)):
+            payout("wide", _combo([top_posts[a], top_posts[b]], rng, ordered=False), rng.randint(110, 8000))
+        payout("trio", _combo(top_posts, rng, ordered=False), rng.randint(300, 300000))
+
+        # 投票（上位馬に寄せて的中を作る）
+        weights = [5 if e in top else 1 for e in entry_ids]
+        for v in range(rng.randint(0, max_votes)):
+            vote_id = f"{race_id}-v{v:02d}"
+            tables["votes"].append({
+                "id": vote_id,
+                "race_id": race_id,
+                "user_id": f"user-{rng.randint(0, 30):02d}",
+                "created_at": f"2026-01-01T00:{v:02d}:00Z",
+            })
+            picked = rng.choices(entry_ids, weights=weights, k=10)
+            kinds = (["win"] if rng.random() < 0.95 else []) + (["win"] if rng.random() < 0.03 else [])
+            kinds += ["place"] * rng.choice([0, 1, 1, 2, 2, 3])
+            kinds += ["back"] * rng.choice([0, 0, 1, 2, 3, 4, 5, 6])
+            kinds += ["danger"] if rng.random() < 0.8 else []
+            kinds += ["other"] if rng.random() < 0.03 else []
+            for kind, entry_id in zip(kinds, picked):
+                if rng.random() < 0.02:
+                    entry_id = rng.choice(all_entries)  # 別レースの馬
+                pick_seq += 1
+                tables["vote_picks"].append({
+                    "id": f"pick-{pick_seq:05d}",
+                    "vote_id": vote_id,
+                    "pick_type": kind,
+                    "race_entry_id": entry_id,
+                })
+
+    return tables
+
+
+def expected_rows(tables: dict[str, list[dict]], rules: dict) -> list[dict]:
+    """精算対象の投票ごとの期待値（連続的中ボーナスは scoreVote の外なので含めない）"""
+    season = build_season(tables)
+    score = score_season(season, rules)
+    base = score.base
+    rows = []
+    for i in map(int, score.settled.nonzero()[0]):
+        rows.append({
+            "vote_id": str(season.vote_id[i]),
+            "points": int(base[i]),
+            "any_hit": bool(score.any_hit[i]),
+            "win_hit": bool(score.win_hit[i]),
+            "danger_hit": bool(score.danger_hit[i]),
+            "is_perfect": bool(score.is_perfect[i]),
+            "place_hit_count": int(score.place_hit_count[i]),
+            "wide_count": int(score.wide_count[i]),
+        })
+    return rows
+
+
+def write_fixture(rules: dict, path: Path = FIXTURE_PATH, seed: int = 20261017) -> int:
+    tables = make_tables(seed)
+    expected = expected_rows(tables, rules)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"seed": seed, "tables": tables, "expected": expected}
+    path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n", encoding="utf-8")
+    return len(expected)
+
+
+def check_fixture(rules: dict, path: Path = FIXTURE_PATH) -> list[str]:
+    """フィクスチャを読み直して NumPy 版で再採点し、期待値とずれた投票を返す"""
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    actual = {r["vote_id"]: r for r in expected_rows(payload["tables"], rules)}
+    return [
+        e["vote_id"] for e in payload["expected"]
+        if actual.get(e["vote_id"]) != e
+    ] + [v for v in actual if v not in {e["vote_id"] for e in payload["expected"]}]
@@ -0,0 +1,45 @@
+"""
+点数表（POINT_RULES）の読み込み
+
+src/lib/constants/ranks.ts の POINT_RULES オブジェクトリテラルをそのまま読み、
+JSON で渡した差分を上書きする（キー単位で置き換え）。
+
+  rules = load_point_rules(project_root / "src/lib/constants/ranks.ts")
+  candidate = merge_rules(rules, json.loads(Path("candidate.json").read_text()))
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Union
+
+_BLOCK = re.compile(r"export const POINT_RULES = (\{.*?\n\}) as const;", re.S)
+
+
+def parse_point_rules(source: str) -> dict:
+    """ranks.ts のソースから POINT_RULES を dict にする"""
+    m = _BLOCK.search(source)
+    if not m:
+        raise ValueError("POINT_RULES が見つかりません")
+    text = m.group(1)
+    text = re.sub(r"//[^\n]*", "", text)                      # 行コメント
+    text = re.sub(r"\s+as\s+Record<[^>]*>", "", text)         # 型アサーション
+    text = re.sub(r"\bInfinity\b", "1e999", text)             # json では inf
+    text = re.sub(r"([{,]\s*)([A-Za-z_0-9]+)\s*:", r'\1"\2":', text)  # キーを引用
+    text = re.sub(r",(\s*[}\]])", r"\1", text)                # 末尾カンマ
+    return json.loads(text)
+
+
+def load_point_rules(ranks_ts: Union[str, Path]) -> dict:
+    return parse_point_rules(Path(ranks_ts).read_text(encoding="utf-8"))
+
+
+def merge_rules(base: dict, override: dict) -> dict:
+    """トップレベルのキー単位で上書きした新しい dict（dict 同士は1段だけマージ）"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = {**base[key], **value}
+        else:
+            merged[key] = value
+    return merged
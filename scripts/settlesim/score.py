@@ -0,0 +1,367 @@
+"""
+シーズン一括採点（settle-scoring.ts の scoreVote をベクトル化したもの）
+
+レース単位の確定情報（1〜3着・払戻倍率）を配列で作り、馬券（vote_picks）単位で
+的中判定 → 投票単位に np.bincount で集計する。Python のループはレースと払戻の行だけ。
+
+TS 側と挙動を合わせている点:
+  - 着順 null の結果は「3着以内」に数える（r.finish_position <= 3 が true になるため）
+  - 三連複の払戻は組番を文字列ソートして引く（"10-2-5" と "2-5-10" は一致しない）
+  - 払戻が見つからないときの既定倍率: 複勝1.5 / 馬連10 / ワイド3 / 三連複30
+  - 同じ組番の払戻が複数あれば先の行を使う
+
+連続的中ボーナス（streak3）はユーザーごとにレース順（race_date, post_time）で数える。
+シーズン開始時点の current_streak は 0 とみなす。週間大会のボーナスは対象外。
+"""
+
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .data import PICK_TYPES, Season
+
+WIN, PLACE, BACK, DANGER = (PICK_TYPES[k] for k in ("win", "place", "back", "danger"))
+
+COMPONENTS = ("win", "place", "quinella", "wide", "trio", "danger", "perfect", "streak")
+
+# 払戻が見つからないときの倍率（settle-scoring.ts と同じ）
+DEFAULT_ODDS = {"place": 1.5, "quinella": 10.0, "wide": 3.0, "trio": 30.0}
+
+_PAIR = re.compile(r"(\d+)-(\d+)")
+
+
+@dataclass
+class SeasonScore:
+    settled: np.ndarray                 # bool[V]（1着が確定したレースの投票）
+    points: dict = field(default_factory=dict)  # 種別 → int[V]
+    win_hit: np.ndarray = None
+    any_hit: np.ndarray = None
+    danger_hit: np.ndarray = None
+    is_perfect: np.ndarray = None
+    place_hit_count: np.ndarray = None
+    wide_count: np.ndarray = None
+
+    @property
+    def base(self) -> np.ndarray:
+        """連続的中ボーナスを除いた投票ごとのポイント（scoreVote の points に相当）"""
+        return sum(self.points[k] for k in COMPONENTS if k != "streak")
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.base + self.points["streak"]
+
+
+# ============================================================
+# 点数表
+# ============================================================
+def _tiers(table: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    return (
+        np.array([t["max"] for t in table], dtype=np.float64),
+        np.array([t["points"] for t in table], dtype=np.int64),
+    )
+
+
+def odds_points(table: list[dict], odds: np.ndarray) -> np.ndarray:
+    """odds <= max となる最初の tier のポイント（範囲外・NaN は最後の tier）"""
+    maxes, points = _tiers(table)
+    idx = np.searchsorted(maxes, odds, side="left")
+    return points[np.minimum(idx, len(points) - 1)]
+
+
+def back_multiplier(rules: dict, back_count: np.ndarray) -> np.ndarray:
+    by_count = {t["count"]: t["multiplier"] for t in rules["back_multiplier"]}
+    size = max(by_count, default=0) + 2
+    table = np.full(size, 0.2)
+    table[0] = 1.0
+    for count, multiplier in by_count.items():
+        if count > 0:
+            table[count] = multiplier
+    return np.where(back_count <= 0, 1.0, table[np.minimum(back_count, size - 1)])
+
+
+def danger_points(rules: dict, popularity: np.ndarray) -> np.ndarray:
+    danger = rules["danger"]
+    default = danger["default"]
+    numeric = {int(k): v for k, v in danger.items() if str(k).isdigit()}
+    size = max(numeric, default=0) + 2
+    table = np.full(size, default, dtype=np.int64)
+    for k, v in numeric.items():
+        table[k] = v
+    integral = (popularity == np.floor(popularity)) & (popularity >= 0) & (popularity < size)
+    return np.where(integral, table[np.where(integral, popularity, 0).astype(np.int64)], default)
+
+
+# ============================================================
+# 集計ヘルパー
+# ============================================================
+def _first_pick(season: Season, mask: np.ndarray, n_votes: int) -> np.ndarray:
+    """各投票で mask を満たす最初の馬券の添字（なければ -1）"""
+    idx = np.flatnonzero(mask)
+    out = np.full(n_votes, -1, dtype=np.int64)
+    votes, first = np.unique(season.pick_vote[idx], return_index=True)
+    out[votes] = idx[first]
+    return out
+
+
+def _per_vote(pick_vote: np.ndarray, mask: np.ndarray, values, n_votes: int) -> np.ndarray:
+    weights = np.broadcast_to(values, mask.shape)[mask]
+    return np.bincount(pick_vote[mask], weights=weights, minlength=n_votes)
+
+
+def _take(arr: np.ndarray, idx: np.ndarray, fill):
+    """idx < 0 の位置は fill"""
+    return np.where(idx >= 0, arr[np.maximum(idx, 0)], fill)
+
+
+def _int_key(race: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    return race.astype(np.int64) * 1_000_000 + lo.astype(np.int64) * 1_000 + hi.astype(np.int64)
+
+
+class _KeyedOdds:
+    """整数キー → 倍率（先勝ち）。searchsorted で一括参照する"""
+
+    def __init__(self, keys: list[int], odds: list[float]):
+        keys_arr = np.array(keys, dtype=np.int64)
+        uniq, first = np.unique(keys_arr, return_index=True)
+        self.keys = uniq
+        self.odds = np.array(odds, dtype=np.float64)[first] if len(keys) else np.zeros(0)
+
+    def get(self, keys: np.ndarray, default: float) -> np.ndarray:
+        if len(self.keys) == 0:
+            return np.full(keys.shape, default)
+        pos = np.clip(np.searchsorted(self.keys, keys), 0, len(self.keys) - 1)
+        return np.where(self.keys[pos] == keys, self.odds[pos], default)
+
+
+def _canonical_int(s: str):
+    """String(n) と一致する数字列なら n"""
+    return int(s) if s.isdigit() and str(int(s)) == s else None
+
+
+# ============================================================
+# 採点
+# ============================================================
+def score_season(season: Season, rules: dict) -> SeasonScore:
+    n_races, n_entries, n_votes = len(season.race_id), len(season.entry_id), len(season.vote_id)
+
+    # --- エントリーの確定情報（race_results から。後の行が勝つ = TS の Map と同じ） ---
+    ok = (season.result_entry >= 0) & (season.result_race >= 0)
+    res_entry, res_race, res_finish = season.result_entry[ok], season.result_race[ok], season.result_finish[ok]
+    entry_result_race = np.full(n_entries, -1, dtype=np.int64)
+    entry_finish = np.full(n_entries, np.nan)
+    entry_result_race[res_entry] = res_race
+    entry_finish[res_entry] = res_finish
+    entry_post = np.nan_to_num(season.entry_post, nan=0.0).astype(np.int64)
+    entry_top3 = ~(entry_finish > 3)  # null も3着以内扱い
+
+    # --- レースの1〜3着 ---
+    def nth(k: int) -> np.ndarray:
+        out = np.full(n_races, -1, dtype=np.int64)
+        rows = np.flatnonzero(res_finish == k)
+        races, first = np.unique(res_race[rows], return_index=True)
+        out[races] = res_entry[rows[first]]
+        return out
+
+    first_e, second_e, third_e = nth(1), nth(2), nth(3)
+    has_winner = first_e >= 0
+    winner_odds = np.nan_to_num(_take(season.entry_odds, first_e, np.nan), nan=1.0)
+    first_post = _take(entry_post, first_e, 0)
+    second_post = _take(entry_post, second_e, 0)
+    grade_bonus = np.array([rules["grade_bonus"].get(g, 0) if g else 0 for g in season.race_grade], dtype=np.int64)
+
+    # 3着以内の馬番（null・0 を除き数値順）
+    top3_rows = ~(res_finish > 3) & (entry_post[res_entry] > 0)
+    top3_posts: dict[int, list[int]] = {}
+    for r, p in zip(res_race[top3_rows].tolist(), entry_post[res_entry[top3_rows]].tolist()):
+        top3_posts.setdefault(r, []).append(p)
+    top3_count = np.zeros(n_races, dtype=np.int64)
+    for r, posts in top3_posts.items():
+        top3_count[r] = len(posts)
+
+    # --- 払戻 ---
+    place_keys, place_odds = [], []
+    pair_keys: dict[str, tuple[list, list]] = {"quinella": ([], []), "wide": ([], [])}
+    trio: dict[tuple[int, str], float] = {}
+    for r, bet, combo, amount in zip(
+        season.payout_race.tolist(), season.payout_bet_type, season.payout_combination, season.payout_amount.tolist()
+    ):
+        if r < 0:
+            continue
+        odds = amount / 100
+        if bet == "place":
+            n = _canonical_int(combo)
+            if n is not None:
+                place_keys.append(r * 1_000 + n)
+                place_odds.append(odds)
+        elif bet in pair_keys:
+            m = _PAIR.fullmatch(re.sub("[ー－]", "-", combo))
+            if m:
+                a, b = _canonical_int(m.group(1)), _canonical_int(m.group(2))
+                if a is not None and b is not None:
+                    pair_keys[bet][0].append(r * 1_000_000 + a * 1_000 + b)
+                    pair_keys[bet][1].append(odds)
+        elif bet == "trio":
+            key = "-".join(sorted(re.sub("[ー－]", "-", combo).split("-")))
+            trio.setdefault((r, key), odds)
+    place_lookup = _KeyedOdds(place_keys, place_odds)
+    quinella_lookup = _KeyedOdds(*pair_keys["quinella"])
+    wide_lookup = _KeyedOdds(*pair_keys["wide"])
+
+    # 1-2着の馬連倍率と三連複倍率はレースごとに1つ
+    lo, hi = np.minimum(first_post, second_post), np.maximum(first_post, second_post)
+    race_quinella_odds = quinella_lookup.get(_int_key(np.arange(n_races), lo, hi), DEFAULT_ODDS["quinella"])
+    race_trio_odds = np.full(n_races, DEFAULT_ODDS["trio"])
+    for r, posts in top3_posts.items():
+        if len(posts) == 3:
+            race_trio_odds[r] = trio.get((r, "-".join(map(str, sorted(posts)))), DEFAULT_ODDS["trio"])
+
+    # --- 投票・馬券 ---
+    v_race = season.vote_race
+    settled = (v_race >= 0) & _take(has_winner, v_race, False)
+    vr = np.maximum(v_race, 0)
+
+    p_ok = (season.pick_vote >= 0)
+    p_ok[p_ok] = settled[season.pick_vote[p_ok]]
+    pv = np.where(p_ok, season.pick_vote, 0)
+    pr = vr[pv]
+    pe = season.pick_entry
+    # このレースの結果にあるエントリーか（entryMap / top3 / finish を引ける条件）
+    in_race = p_ok & (pe >= 0) & (_take(entry_result_race, pe, -2) == pr)
+    p_post = np.where(in_race, _take(entry_post, pe, 0), 0)
+    p_top3 = in_race & _take(entry_top3, pe, False)
+    p_finish = np.where(in_race, _take(entry_finish, pe, np.nan), np.nan)
+    p_pop = np.where(in_race, _take(season.entry_popularity, pe, np.nan), np.nan)
+    p_pop = np.where(np.isnan(p_pop), 99.0, p_pop)
+
+    is_place = p_ok & (season.pick_type == PLACE)
+    is_back = p_ok & (season.pick_type == BACK)
+
+    win_pick = _first_pick(season, p_ok & (season.pick_type == WIN), n_votes)
+    danger_pick = _first_pick(season, p_ok & (season.pick_type == DANGER), n_votes)
+    has_win = win_pick >= 0
+    win_entry = _take(pe, win_pick, -1)
+    win_post = _take(p_post, win_pick, 0)
+    win_top3 = _take(p_top3, win_pick, False)
+    grade = grade_bonus[vr]
+    fp, sp = first_post[vr], second_post[vr]
+
+    points = {k: np.zeros(n_votes, dtype=np.int64) for k in COMPONENTS}
+
+    # 単勝
+    win_hit = has_win & (win_entry >= 0) & (win_entry == first_e[vr])
+    points["win"] = np.where(win_hit, odds_points(rules["win_odds"], winner_odds[vr]) + grade, 0)
+
+    # 複勝（◎が3着以内だが1着ではない）
+    place_hit = has_win & win_top3 & ~win_hit
+    fukusho_odds = np.where(
+        win_post > 0, place_lookup.get(vr.astype(np.int64) * 1_000 + win_post, DEFAULT_ODDS["place"]), DEFAULT_ODDS["place"]
+    )
+    points["place"] = np.where(place_hit, odds_points(rules["place_odds"], fukusho_odds) + grade, 0)
+
+    # ○の的中
+    n_place = _per_vote(pv, is_place, 1, n_votes).astype(np.int64)
+    place_hit_count = _per_vote(pv, is_place & p_top3, 1, n_votes).astype(np.int64)
+    all_place_hit = (n_place > 0) & (place_hit_count == n_place)
+
+    # 馬連・馬単
+    pick_win_post = win_post[pv]
+    q_pick = is_place & (
+        ((pick_win_post == fp[pv]) & (p_post == sp[pv])) | ((pick_win_post == sp[pv]) & (p_post == fp[pv]))
+    )
+    quinella_hit = has_win & (n_place > 0) & (fp > 0) & (sp > 0) & (_per_vote(pv, q_pick, 1, n_votes) > 0)
+    exacta_hit = quinella_hit & (win_post == fp)
+    q_base = odds_points(rules["quinella_odds"], race_quinella_odds[vr])
+    q_base = np.where(exacta_hit, np.floor(q_base * rules["exacta_bonus"]).astype(np.int64), q_base)
+    points["quinella"] = np.where(quinella_hit, q_base + grade, 0)
+
+    # ワイド（○ごと）
+    wide_pick = is_place & p_top3 & (p_post > 0) & (has_win & win_top3 & (win_post > 0))[pv]
+    w_lo, w_hi = np.minimum(pick_win_post, p_post), np.maximum(pick_win_post, p_post)
+    wide_odds = wide_lookup.get(_int_key(pr, w_lo, w_hi), DEFAULT_ODDS["wide"])
+    wide_pts = odds_points(rules["wide_odds"], wide_odds) + grade_bonus[pr]
+    points["wide"] = _per_vote(pv, wide_pick, wide_pts, n_votes).astype(np.int64)
+    wide_count = _per_vote(pv, wide_pick, 1, n_votes).astype(np.int64)
+
+    # 三連複・三連単
+    other_top3 = p_top3 & (pe != win_entry[pv])
+    place_in_top3 = _per_vote(pv, is_place & other_top3, 1, n_votes)
+    back_in_top3 = _per_vote(pv, is_back & other_top3, 1, n_votes)
+    back_count = _per_vote(pv, is_back, 1, n_votes).astype(np.int64)
+    trio_hit = has_win & win_top3 & (top3_count[vr] == 3) & (place_in_top3 + back_in_top3 >= 2)
+
+    def picks_on(kind: np.ndarray, target: np.ndarray) -> np.ndarray:
+        t = target[pr]
+        return _per_vote(pv, kind & (t >= 0) & (pe == t), 1, n_votes) > 0
+
+    win_first = win_entry == first_e[vr]
+    second_is_place = picks_on(is_place, second_e)
+    third_is_place = picks_on(is_place, third_e)
+    third_is_back = picks_on(is_back, third_e)
+    tb = rules["trifecta_bonus"]
+    trifecta = np.where(
+        win_first & second_is_place & third_is_place, tb["place_3rd"],
+        np.where(win_first & second_is_place & third_is_back, tb["back_3rd"], 1.0),
+    )
+    t_base = odds_points(rules["trio_odds"], race_trio_odds[vr])
+    t_base = np.where(
+        trifecta > 1.0, np.floor(t_base * trifecta),
+        np.where(back_in_top3 > 0, np.floor(t_base * back_multiplier(rules, back_count)), t_base),
+    ).astype(np.int64)
+    points["trio"] = np.where(trio_hit, t_base + grade, 0)
+
+    # 危険馬（4着以下）
+    danger_hit = (danger_pick >= 0) & (_take(p_finish, danger_pick, np.nan) > 3)
+    d_base = danger_points(rules, _take(p_pop, danger_pick, 99.0))
+    points["danger"] = np.where(danger_hit, d_base + grade, 0)
+
+    # 完全的中
+    is_perfect = win_hit & all_place_hit & danger_hit
+    points["perfect"] = np.where(is_perfect, rules["perfect"], 0)
+
+    # 連続的中（ユーザーごとにレース順）
+    points["streak"] = _streak_points(season, settled, win_hit, rules["streak3"])
+
+    for k in COMPONENTS:
+        points[k] = np.where(settled, points[k], 0).astype(np.int64)
+
+    any_hit = settled & (win_hit | place_hit | quinella_hit | (wide_count > 0) | trio_hit | danger_hit)
+    return SeasonScore(
+        settled=settled,
+        points=points,
+        win_hit=settled & win_hit,
+        any_hit=any_hit,
+        danger_hit=settled & danger_hit,
+        is_perfect=settled & is_perfect,
+        place_hit_count=np.where(settled, place_hit_count, 0),
+        wide_count=np.where(settled, wide_count, 0),
+    )
+
+
+def _streak_points(season: Season, settled: np.ndarray, win_hit: np.ndarray, bonus: int) -> np.ndarray:
+    """単勝的中の連続数を数え、3の倍数に達した投票に bonus を付ける"""
+    out = np.zeros(len(settled), dtype=np.int64)
+    idx = np.flatnonzero(settled)
+    if len(idx) == 0:
+        return out
+    race = season.vote_race[idx]
+    order = np.lexsort((
+        season.vote_created_at[idx],
+        season.race_id[race],
+        season.race_time[race],
+        season.vote_user[idx],
+    ))
+    idx = idx[order]
+    user = season.vote_user[idx]
+    hit = win_hit[idx].astype(np.int64)
+
+    # 連続数 = 累積的中数 − 直近の「途切れ」地点（外れ or ユーザーの先頭）での累積数
+    cum = np.cumsum(hit)
+    start = np.r_[True, user[1:] != user[:-1]]
+    marker = start | (hit == 0)
+    base_at = np.where(hit == 0, cum, cum - hit)
+    last_marker = np.maximum.accumulate(np.where(marker, np.arange(len(idx)), 0))
+    streak = cum - base_at[last_marker]
+
+    out[idx] = np.where((hit == 1) & (streak > 0) & (streak % 3 == 0), bonus, 0)
+    return out
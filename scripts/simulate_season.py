@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+シーズン精算シミュレータ
+
+エクスポートした races / race_entries / race_results / payouts / votes / vote_picks を
+読み込み、settle-race と同じ採点をシーズン丸ごと NumPy で再計算する。
+--rules で点数表の差分（JSON）を渡すと、現行の POINT_RULES との差を種別・ユーザー別に出す。
+DB には一切書き込まない。
+
+使用方法:
+  cd ~/gate-in
+  python3 scripts/simulate_season.py --data exports/2026                      # 現行ルールで再採点
+  python3 scripts/simulate_season.py --data exports/2026 --rules candidate.json --top 30
+  python3 scripts/simulate_season.py --write-parity-fixture                  # TS とのパリティ用フィクスチャを更新
+  python3 scripts/simulate_season.py --check-parity                          # フィクスチャと NumPy 版の突き合わせ
+
+candidate.json の例（キー単位で上書き）:
+  {"perfect": 300, "danger": {"1": 40}, "trio_odds": [{"max": 10, "points": 60}, {"max": 1e999, "points": 500}]}
+
+必要: numpy
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from settlesim.data import load_season
+from settlesim.parity import FIXTURE_PATH, check_fixture, write_fixture
+from settlesim.rules import load_point_rules, merge_rules
+from settlesim.score import COMPONENTS, score_season
+
+
+def user_totals(season, total: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    users, inverse = np.unique(season.vote_user, return_inverse=True)
+    return users, np.bincount(inverse, weights=total, minlength=len(users)).astype(np.int64)
+
+
+def print_components(baseline, candidate=None):
+    print(f"\n{'種別':<10}{'現行':>14}" + (f"{'候補':>14}{'差分':>12}" if candidate else ""))
+    for k in COMPONENTS + ("total",):
+        base = int(baseline.total.sum()) if k == "total" else int(baseline.points[k].sum())
+        line = f"{k:<10}{base:>14,}"
+        if candidate:
+            cand = int(candidate.total.sum()) if k == "total" else int(candidate.points[k].sum())
+            line += f"{cand:>14,}{cand - base:>+12,}"
+        print(line)
+
+
+def print_ranking(season, baseline, candidate, top: int):
+    users, base_total = user_totals(season, baseline.total)
+    if candidate is None:
+        order = np.argsort(-base_total, kind="stable")[:top]
+        print(f"\n上位 {top} ユーザー")
+        for i, u in enumerate(order, 1):
+            print(f"  {i:>3}. {users[u]}  {base_total[u]:,}P")
+        return
+
+    _, cand_total = user_totals(season, candidate.total)
+    base_rank = np.empty(len(users), dtype=np.int64)
+    base_rank[np.argsort(-base_total, kind="stable")] = np.arange(1, len(users) + 1)
+    order = np.argsort(-cand_total, kind="stable")[:top]
+    print(f"\n上位 {top} ユーザー（候補ルール）")
+    for i, u in enumerate(order, 1):
+        move = base_rank[u] - i
+        mark = f"↑{move}" if move > 0 else (f"↓{-move}" if move < 0 else "→")
+        print(f"  {i:>3}. {users[u]}  {cand_total[u]:,}P ({cand_total[u] - base_total[u]:+,})  現行{base_rank[u]}位 {mark}")
+
+
+def main():
+    project_root = Path(__file__).resolve().parent.parent
+
+    parser = argparse.ArgumentParser(description="シーズンをオフラインで再採点")
+    parser.add_argument("--data", help="エクスポートのディレクトリ（<テーブル名>.csv / .json）")
+    parser.add_argument("--rules", help="POINT_RULES への上書き（JSON ファイル）")
+    parser.add_argument("--ranks", default="src/lib/constants/ranks.ts", help="現行ルールの読み込み元")
+    parser.add_argument("--top", type=int, default=20, help="表示するユーザー数")
+    parser.add_argument("--write-parity-fixture", action="store_true", help="パリティ用フィクスチャを書き出して終了")
+    parser.add_argument("--check-parity", action="store_true", help="フィクスチャと NumPy 版を突き合わせて終了")
+    args = parser.parse_args()
+
+    rules = load_point_rules(project_root / args.ranks)
+
+    if args.write_parity_fixture:
+        n = write_fixture(rules)
+        print(f"✅ {FIXTURE_PATH.relative_to(project_root)}（精算対象 {n} 票）")
+        return
+    if args.check_parity:
+        mismatched = check_fixture(rules)
+        if mismatched:
+            print(f"❌ {len(mismatched)} 票が不一致: {', '.join(mismatched[:10])}")
+            sys.exit(1)
+        print("✅ フィクスチャと一致")
+        return
+    if not args.data:
+        parser.error("--data が必要です")
+
+    t0 = time.perf_counter()
+    season = load_season(args.data)
+    t1 = time.perf_counter()
+    baseline = score_season(season, rules)
+    candidate = None
+    if args.rules:
+        override = json.loads(Path(args.rules).read_text(encoding="utf-8"))
+        candidate = score_season(season, merge_rules(rules, override))
+    t2 = time.perf_counter()
+
+    sizes = season.sizes
+    print("📦 " + " / ".join(f"{k} {v:,}" for k, v in sizes.items()))
+    print(f"   精算対象 {int(baseline.settled.sum()):,} 票"
+          f"（的中 {int(baseline.any_hit.sum()):,} / 単勝 {int(baseline.win_hit.sum()):,}"
+          f" / 完全 {int(baseline.is_perfect.sum()):,}）")
+    print(f"⏱  読み込み {t1 - t0:.2f}s / 採点 {t2 - t1:.2f}s")
+
+    print_components(baseline, candidate)
+    print_ranking(season, baseline, candidate, args.top)
+
+
+if __name__ == "__main__":
+    main()
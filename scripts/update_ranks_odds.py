@@ -166,41 +166,108 @@ export const POINT_RULES = {
   streak3: 50,
 } as const;
 
+// ====================================================
+// オッズ→ポイント参照表（二分探索）
+// ====================================================
+
+export type OddsTier = { max: number; points: number };
+
+/** tier 表を「上限（昇順）」と「ポイント」の配列に展開したもの。 */
+export type OddsLookup = {
+  readonly maxes: Float64Array;
+  readonly points: Int32Array;
+};
+
+export function buildOddsLookup(table: readonly OddsTier[]): OddsLookup {
+  return {
+    maxes: Float64Array.from(table, (t) => t.max),
+    points: Int32Array.from(table, (t) => t.points),
+  };
+}
+
+/** odds <= max となる最初の tier のポイント（どれにも入らなければ最後の tier）。 */
+export function lookupPoints(lookup: OddsLookup, odds: number): number {
+  const { maxes, points } = lookup;
+  let hi = maxes.length - 1;
+  if (!(odds <= maxes[hi])) return points[hi];
+  let lo = 0;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (odds <= maxes[mid]) hi = mid;
+    else lo = mid + 1;
+  }
+  return points[lo];
+}
+
+export const ODDS_LOOKUP = {
+  win: buildOddsLookup(POINT_RULES.win_odds),
+  place: buildOddsLookup(POINT_RULES.place_odds),
+  quinella: buildOddsLookup(POINT_RULES.quinella_odds),
+  wide: buildOddsLookup(POINT_RULES.wide_odds),
+  trio: buildOddsLookup(POINT_RULES.trio_odds),
+} as const;
+
+export type OddsBetType = keyof typeof ODDS_LOOKUP;
+
+// 任意の tier 表（引数で渡された点数表）も初回に展開してキャッシュする
+const lookupCache = new WeakMap<readonly OddsTier[], OddsLookup>();
+
+function lookupFor(table: OddsBetType | readonly OddsTier[]): OddsLookup {
+  if (typeof table === "string") return ODDS_LOOKUP[table];
+  let lookup = lookupCache.get(table);
+  if (!lookup) {
+    lookup = buildOddsLookup(table);
+    lookupCache.set(table, lookup);
+  }
+  return lookup;
+}
+
+/**
+ * オッズ配列をまとめてポイントに変換する。
+ * 例: scoreMany(winOddsOfAllPicks, "win") / scoreMany(odds, POINT_RULES.trio_odds)
+ */
+export function scoreMany(
+  odds: ArrayLike<number>,
+  table: OddsBetType | readonly OddsTier[],
+): Int32Array {
+  const lookup = lookupFor(table);
+  const out = new Int32Array(odds.length);
+  for (let i = 0; i < odds.length; i++) out[i] = lookupPoints(lookup, odds[i]);
+  return out;
+}
+
 // ====================================================
 // ポイント取得関数
 // ====================================================
 
 // オッズからポイントを取得する汎用関数
-function getPointsByOdds(odds: number, table: readonly { max: number; points: number }[]): number {
-  for (const tier of table) {
-    if (odds <= tier.max) return tier.points;
-  }
-  return table[table.length - 1].points;
+export function getPointsByOdds(odds: number, table: readonly OddsTier[]): number {
+  return lookupPoints(lookupFor(table), odds);
 }
 
 // 単勝ポイント（オッズ連動）
 export function getWinPointsByOdds(odds: number): number {
-  return getPointsByOdds(odds, POINT_RULES.win_odds);
+  return lookupPoints(ODDS_LOOKUP.win, odds);
 }
 
 // 複勝ポイント（オッズ連動）
 export function getPlacePointsByOdds(odds: number): number {
-  return getPointsByOdds(odds, POINT_RULES.place_odds);
+  return lookupPoints(ODDS_LOOKUP.place, odds);
 }
 
 // 馬連ポイント（オッズ連動）
 export function getQuinellaPointsByOdds(odds: number): number {
-  return getPointsByOdds(odds, POINT_RULES.quinella_odds);
+  return lookupPoints(ODDS_LOOKUP.quinella, odds);
 }
 
 // ワイドポイント（オッズ連動）
 export function getWidePointsByOdds(odds: number): number {
-  return getPointsByOdds(odds, POINT_RULES.wide_odds);
+  return lookupPoints(ODDS_LOOKUP.wide, odds);
 }
 
 // 三連複ポイント（オッズ連動）
 export function getTrioPointsByOdds(odds: number): number {
-  return getPointsByOdds(odds, POINT_RULES.trio_odds);
+  return lookupPoints(ODDS_LOOKUP.trio, odds);
 }
 
 // △の数から倍率を取得
@@ -250,6 +317,7 @@ export function getWinPoints(popularity: number): number {
         print("   - getWidePointsByOdds(odds)")
         print("   - getTrioPointsByOdds(odds)")
         print("   - getBackMultiplier(backCount)")
+        print("   - scoreMany(oddsArray, betType)")
         return True
     else:
         print("⚠️  置換対象が見つかりません（既に更新済み？）")
@@ -15,6 +15,8 @@ VoteForm.tsx に△（抑え）タブを追加するスクリプト
 
 from pathlib import Path
 
+from patchkit.fingerprint import FingerprintCache
+
 def main():
     script_dir = Path(__file__).parent
     if script_dir.name == "scripts":
@@ -28,6 +30,11 @@ def main():
         print(f"❌ ファイルが見つかりません: {file_path}")
         return False
     
+    cache = FingerprintCache(__file__, root=project_root)
+    if cache.is_applied(file_path):
+        print("⏭️  VoteForm.tsx (適用済み)")
+        return True
+    
     # 新しいVoteForm.tsxの内容
     new_content = '''"use client";
 
@@ -279,6 +286,8 @@ export default function VoteForm({ raceId, entries }: Props) {
 '''
 
     file_path.write_text(new_content, encoding="utf-8")
+    cache.mark_applied(file_path, new_content)
+    cache.save()
     print("✅ VoteForm.tsx を更新しました")
     print("")
     print("📝 変更内容:")
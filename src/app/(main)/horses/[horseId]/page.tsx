@@ -24,60 +24,68 @@ export async function generateMetadata({ params }: Props): Promise<Metadata> {
   };
 }
 
+const DISTANCE_BANDS: { key: string; label: string }[] = [
+  { key: "sprint", label: "〜1400m" },
+  { key: "mile", label: "〜1800m" },
+  { key: "middle", label: "〜2200m" },
+  { key: "long", label: "2201m〜" },
+];
+const SURFACE_LABELS: Record<string, string> = { turf: "芝", dirt: "ダート", obstacle: "障害" };
+
+type Split = { starts: number; wins: number; places: number };
+type FormRun = {
+  entry_id: string;
+  race_id: string;
+  name: string;
+  race_date: string;
+  course_name: string | null;
+  distance: number | null;
+  track_type: string | null;
+  grade: string | null;
+  post_number: number | null;
+  jockey: string | null;
+  odds: number | null;
+  popularity: number | null;
+  finish_position: number | null;
+  last_3f: string | null;
+};
+
 export default async function HorseDetailPage({ params }: Props) {
   const { horseId } = await params;
   const admin = createAdminClient();
 
-  // 馬情報
-  const { data: horse, error } = await admin
-    .from("horses")
-    .select("*")
-    .eq("id", horseId)
-    .single();
+  // 馬情報・戦績（horse_career_stats: 結果登録時に DB 側で集計済みの1行）・出走予定
+  const [{ data: horse, error }, { data: stats }, { data: upcoming }] = await Promise.all([
+    admin.from("horses").select("*").eq("id", horseId).single(),
+    admin.from("horse_career_stats").select("*").eq("horse_id", horseId).maybeSingle(),
+    admin
+      .from("race_entries")
+      .select(`
+        id,
+        post_number,
+        jockey,
+        odds,
+        popularity,
+        is_scratched,
+        races!inner (
+          id, name, race_date, course_name, grade, distance, track_type, status, race_number
+        )
+      `)
+      .eq("horse_id", horseId)
+      .neq("races.status", "finished")
+      .order("created_at", { ascending: false })
+      .limit(5),
+  ]);
 
   if (!horse || error) notFound();
 
-  // 出走履歴（race_entries → races + race_results）
-  const { data: entries } = await admin
-    .from("race_entries")
-    .select(`
-      id,
-      post_number,
-      jockey,
-      odds,
-      popularity,
-      is_scratched,
-      race_id,
-      races (
-        id, name, race_date, course_name, grade, distance, track_type, status, race_number
-      )
-    `)
-    .eq("horse_id", horseId)
-    .order("created_at", { ascending: false });
-
-  // 各出走の結果を取得
-  const entryIds = (entries ?? []).map((e) => e.id);
-  const { data: results } = entryIds.length > 0
-    ? await admin
-        .from("race_results")
-        .select("race_entry_id, finish_position, finish_time, margin, last_3f")
-        .in("race_entry_id", entryIds)
-    : { data: [] };
-
-  const resultMap = new Map(
-    (results ?? []).map((r) => [r.race_entry_id, r])
-  );
-
-  // 統計計算
-  const finishedEntries = (entries ?? []).filter(
-    (e) => resultMap.has(e.id) && !e.is_scratched
-  );
-  const totalRaces = finishedEntries.length;
-  const wins = finishedEntries.filter((e) => resultMap.get(e.id)?.finish_position === 1).length;
-  const places = finishedEntries.filter((e) => {
-    const pos = resultMap.get(e.id)?.finish_position;
-    return pos != null && pos <= 3;
-  }).length;
+  const totalRaces: number = stats?.starts ?? 0;
+  const wins: number = stats?.wins ?? 0;
+  const places: number = stats?.places ?? 0;
+  const recentForm: FormRun[] = stats?.recent_form ?? [];
+  const bySurface: Record<string, Split> = stats?.by_surface ?? {};
+  const byDistance: Record<string, Split> = stats?.by_distance ?? {};
+  const byCourse: Record<string, Split> = stats?.by_course ?? {};
 
   const sexLabel = horse.sex === "牡" ? "♂ 牡" : horse.sex === "牝" ? "♀ 牝" : horse.sex === "セ" ? "セン" : horse.sex ?? "";
 
@@ -112,66 +120,118 @@ export default async function HorseDetailPage({ params }: Props) {
           <StatBox label="複勝圏" value={`${places}回`} color="text-blue-600" />
           <StatBox label="勝率" value={totalRaces > 0 ? `${Math.round((wins / totalRaces) * 100)}%` : "-"} color="text-green-600" />
         </div>
+        {totalRaces > 0 && (
+          <div className="text-xs text-gray-500 text-center mt-2">
+            通算 {wins}-{stats?.seconds ?? 0}-{stats?.thirds ?? 0}-{totalRaces - places}
+          </div>
+        )}
       </div>
 
-      {/* 出走履歴 */}
+      {/* 条件別成績 */}
+      {totalRaces > 0 && (
+        <div className="bg-white rounded-2xl border border-gray-100 p-5 space-y-4">
+          <h2 className="font-bold text-gray-800">📈 条件別成績</h2>
+          <SplitTable
+            title="馬場"
+            rows={Object.entries(bySurface).map(([k, v]) => ({ label: SURFACE_LABELS[k] ?? k, ...v }))}
+          />
+          <SplitTable
+            title="距離"
+            rows={DISTANCE_BANDS.filter((b) => byDistance[b.key]).map((b) => ({ label: b.label, ...byDistance[b.key] }))}
+          />
+          <SplitTable
+            title="競馬場"
+            rows={Object.entries(byCourse)
+              .sort((a, b) => b[1].starts - a[1].starts)
+              .map(([k, v]) => ({ label: k, ...v }))}
+          />
+        </div>
+      )}
+
+      {/* 出走予定 */}
+      {(upcoming ?? []).length > 0 && (
+        <div className="bg-white rounded-2xl border border-gray-100 p-5">
+          <h2 className="font-bold text-gray-800 mb-3">🗓 出走予定</h2>
+          <div className="space-y-2">
+            {(upcoming ?? []).map((entry) => {
+              const race = entry.races as any;
+              return (
+                <Link
+                  key={entry.id}
+                  href={`/races/${race.id}`}
+                  className="flex items-center gap-3 p-3 rounded-xl bg-gray-50 hover:bg-gray-100 transition-colors border border-gray-100"
+                >
+                  <div className={`w-10 h-10 rounded-full flex items-center justify-center text-sm font-black shrink-0 ${
+                    entry.is_scratched ? "bg-gray-200 text-gray-400" : "bg-gray-100 text-gray-400"
+                  }`}>
+                    {entry.is_scratched ? "取" : "未"}
+                  </div>
+                  <div className="flex-1 min-w-0">
+                    <div className="flex items-center gap-2">
+                      {race.grade && <GradeBadge grade={race.grade} />}
+                      <span className="text-sm font-bold text-gray-800 truncate">{race.name}</span>
+                    </div>
+                    <div className="text-xs text-gray-500 mt-0.5">
+                      {race.race_date} {race.course_name} {race.distance}m {race.track_type ?? ""}
+                    </div>
+                  </div>
+                  <div className="text-right shrink-0 text-xs text-gray-600">
+                    {entry.post_number}番 / {entry.jockey}
+                  </div>
+                </Link>
+              );
+            })}
+          </div>
+        </div>
+      )}
+
+      {/* 近走成績 */}
       <div className="bg-white rounded-2xl border border-gray-100 p-5">
-        <h2 className="font-bold text-gray-800 mb-3">📊 出走履歴</h2>
-        {(entries ?? []).length === 0 ? (
+        <h2 className="font-bold text-gray-800 mb-3">📊 近走成績</h2>
+        {recentForm.length === 0 ? (
           <p className="text-sm text-gray-400 text-center py-8">出走データがありません</p>
         ) : (
           <div className="space-y-2">
-            {(entries ?? []).map((entry) => {
-              const race = entry.races as any;
-              if (!race) return null;
-              const result = resultMap.get(entry.id);
-              const pos = result?.finish_position;
+            {recentForm.map((run) => {
+              const pos = run.finish_position;
 
               return (
                 <Link
-                  key={entry.id}
-                  href={`/races/${race.id}`}
+                  key={run.entry_id}
+                  href={`/races/${run.race_id}`}
                   className="flex items-center gap-3 p-3 rounded-xl bg-gray-50 hover:bg-gray-100 transition-colors border border-gray-100"
                 >
                   {/* 着順 */}
                   <div className={`w-10 h-10 rounded-full flex items-center justify-center text-sm font-black shrink-0 ${
                     pos === 1 ? "bg-yellow-100 text-yellow-700"
                     : pos != null && pos <= 3 ? "bg-blue-100 text-blue-700"
-                    : entry.is_scratched ? "bg-gray-200 text-gray-400"
                     : pos != null ? "bg-gray-100 text-gray-600"
                     : "bg-gray-100 text-gray-400"
                   }`}>
-                    {entry.is_scratched ? "取" : pos != null ? `${pos}着` : race.status === "finished" ? "-" : "未"}
+                    {pos != null ? `${pos}着` : "-"}
                   </div>
 
                   {/* レース情報 */}
                   <div className="flex-1 min-w-0">
                     <div className="flex items-center gap-2">
-                      {race.grade && (
-                        <span className={`text-xs font-bold px-1.5 py-0.5 rounded ${
-                          race.grade === "G1" ? "bg-yellow-100 text-yellow-800"
-                          : race.grade === "G2" ? "bg-red-100 text-red-700"
-                          : race.grade === "G3" ? "bg-green-100 text-green-700"
-                          : "bg-gray-100 text-gray-600"
-                        }`}>{race.grade}</span>
-                      )}
-                      <span className="text-sm font-bold text-gray-800 truncate">{race.name}</span>
+                      {run.grade && <GradeBadge grade={run.grade} />}
+                      <span className="text-sm font-bold text-gray-800 truncate">{run.name}</span>
                     </div>
                     <div className="text-xs text-gray-500 mt-0.5">
-                      {race.race_date} {race.course_name} {race.distance}m {race.track_type ?? ""}
+                      {run.race_date} {run.course_name} {run.distance}m {run.track_type ?? ""}
                     </div>
                   </div>
 
                   {/* 詳細 */}
                   <div className="text-right shrink-0">
                     <div className="text-xs text-gray-600">
-                      {entry.post_number}番 / {entry.jockey}
+                      {run.post_number}番 / {run.jockey}
                     </div>
-                    {result?.last_3f && (
-                      <div className="text-xs text-gray-500">上がり {result.last_3f}</div>
+                    {run.last_3f && (
+                      <div className="text-xs text-gray-500">上がり {run.last_3f}</div>
                     )}
-                    {entry.odds && (
-                      <div className="text-xs text-gray-400">{entry.odds}倍 {entry.popularity ? `(${entry.popularity}人気)` : ""}</div>
+                    {run.odds && (
+                      <div className="text-xs text-gray-400">{run.odds}倍 {run.popularity ? `(${run.popularity}人気)` : ""}</div>
                     )}
                   </div>
                 </Link>
@@ -192,3 +252,35 @@ function StatBox({ label, value, color }: { label: string; value: string; color?
     </div>
   );
 }
+
+function GradeBadge({ grade }: { grade: string }) {
+  return (
+    <span className={`text-xs font-bold px-1.5 py-0.5 rounded ${
+      grade === "G1" ? "bg-yellow-100 text-yellow-800"
+      : grade === "G2" ? "bg-red-100 text-red-700"
+      : grade === "G3" ? "bg-green-100 text-green-700"
+      : "bg-gray-100 text-gray-600"
+    }`}>{grade}</span>
+  );
+}
+
+function SplitTable({ title, rows }: { title: string; rows: ({ label: string } & Split)[] }) {
+  if (rows.length === 0) return null;
+  return (
+    <div>
+      <div className="text-xs font-bold text-gray-600 mb-1">{title}</div>
+      <div className="grid grid-cols-[1fr_auto_auto_auto] gap-x-4 gap-y-1 text-xs">
+        {rows.map((r) => (
+          <div key={r.label} className="contents">
+            <span className="text-gray-700">{r.label}</span>
+            <span className="text-gray-500 text-right">{r.starts}戦</span>
+            <span className="text-red-600 text-right">{r.wins}勝</span>
+            <span className="text-blue-600 text-right">
+              複勝率 {Math.round((r.places / r.starts) * 100)}%
+            </span>
+          </div>
+        ))}
+      </div>
+    </div>
+  );
+}
@@ -9,6 +9,7 @@ import {
   formatDateString,
   addDays,
 } from "@/lib/dateUtils";
+import RaceSearchBar from "@/components/races/RaceSearchBar";
 
 type Race = {
   id: string;
@@ -52,6 +53,8 @@ type Props = {
   selectedCourse: string;
   selectedGrade: string;
   searchQuery: string;
+  searchResults?: Race[];
+  searchNextCursor?: string | null;
   venueConditions?: VenueCondition[];
 };
 
@@ -90,6 +93,8 @@ export default function RaceListClient({
   selectedCourse,
   selectedGrade,
   searchQuery,
+  searchResults = [],
+  searchNextCursor = null,
   venueConditions = [],
 }: Props) {
   const router = useRouter();
@@ -121,12 +126,14 @@ export default function RaceListClient({
     course?: string;
     grade?: string;
     q?: string;
+    after?: string;
   }) => {
     const url = new URLSearchParams();
     if (params.date) url.set("date", params.date);
     if (params.course) url.set("course", params.course);
     if (params.grade) url.set("grade", params.grade);
     if (params.q) url.set("q", params.q);
+    if (params.after) url.set("after", params.after);
     return `/races?${url.toString()}`;
   };
 
@@ -251,6 +258,95 @@ export default function RaceListClient({
     );
   };
 
+  // 検索結果の行（全期間が対象なので開催日と競馬場も出す）
+  const renderSearchRow = (race: Race, isLast: boolean) => {
+    const status = getStatusBadge(race);
+    return (
+      <Link
+        key={race.id}
+        href={`/races/${race.id}`}
+        className={`flex items-center gap-2 px-3 py-2.5 hover:bg-surface-2 transition-colors ${
+          !isLast ? "border-b border-line" : ""
+        }`}
+      >
+        <span className="text-[10px] min-w-[64px] text-ink-3 font-data">
+          {new Date(race.race_date + "T00:00:00+09:00").toLocaleDateString("ja-JP", {
+            year: "2-digit",
+            month: "numeric",
+            day: "numeric",
+          })}
+        </span>
+        <span className="text-[10px] min-w-[44px] text-ink-2">
+          {race.course_name}
+          {race.race_number ? `${race.race_number}R` : ""}
+        </span>
+        {race.grade && (
+          <span
+            className="text-[9px] text-white font-black px-1.5 py-0.5 rounded"
+            style={{ background: gradeAccent(race.grade) }}
+          >
+            {race.grade}
+          </span>
+        )}
+        <span className="text-sm flex-1 text-ink truncate">{race.name}</span>
+        <span className={`text-[10px] min-w-[40px] text-right font-medium ${status.className}`}>
+          {status.text}
+        </span>
+      </Link>
+    );
+  };
+
+  if (searchQuery) {
+    return (
+      <div className="space-y-3" style={{ fontFamily: "var(--font-rounded)" }}>
+        <div className="flex items-center justify-between px-1">
+          <h1 className="text-xl font-black text-ink">レース検索</h1>
+          <Link href={buildUrl({ date: selectedDate })} className="text-xs text-ink-2">
+            日付から探す ›
+          </Link>
+        </div>
+
+        <div className="px-4">
+          <RaceSearchBar
+            initialQuery={searchQuery}
+            date=""
+            course={selectedCourse}
+            grade={selectedGrade}
+          />
+        </div>
+
+        <div className="px-4 space-y-2">
+          <p className="text-xs text-ink-3">「{searchQuery}」の検索結果（全期間・関連度順）</p>
+          {searchResults.length > 0 ? (
+            <div className="rounded-2xl border border-line bg-surface overflow-hidden">
+              {searchResults.map((race, i, arr) => renderSearchRow(race, i === arr.length - 1))}
+            </div>
+          ) : (
+            <div className="rounded-2xl border border-line bg-surface p-12 text-center text-ink-3">
+              <div className="text-4xl mb-3">🏇</div>
+              <p>「{searchQuery}」に一致するレースがありません</p>
+            </div>
+          )}
+          {searchNextCursor && (
+            <div className="text-center pt-1">
+              <Link
+                href={buildUrl({
+                  course: selectedCourse,
+                  grade: selectedGrade,
+                  q: searchQuery,
+                  after: searchNextCursor,
+                })}
+                className="text-xs font-medium text-brand-strong"
+              >
+                さらに表示 ›
+              </Link>
+            </div>
+          )}
+        </div>
+      </div>
+    );
+  }
+
   return (
     <div className="space-y-0" style={{ fontFamily: "var(--font-rounded)" }}>
       {/* Header */}
@@ -265,6 +361,11 @@ export default function RaceListClient({
         </span>
       </div>
 
+      {/* Search (全期間) */}
+      <div className="px-4 mb-3">
+        <RaceSearchBar initialQuery="" date="" course="" grade="" />
+      </div>
+
       {/* Week nav + day tabs */}
       <div className="flex items-center justify-center gap-3 mb-3">
         <button
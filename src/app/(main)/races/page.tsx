@@ -3,17 +3,18 @@ export const revalidate = 60;
 import { createClient } from "@/lib/supabase/server";
 import RaceListClient from "./RaceListClient";
 import { getDefaultRaceDate, formatDateString } from "@/lib/dateUtils";
+import { getRaceDates, getRaceDayIndex } from "@/lib/race-day-index";
 
 type Props = {
-  searchParams: Promise<{ date?: string; course?: string; grade?: string; q?: string }>;
+  searchParams: Promise<{ date?: string; course?: string; grade?: string; q?: string; after?: string }>;
 };
 
+const SEARCH_PER_PAGE = 20;
+
 export default async function RaceListPage({ searchParams }: Props) {
   const params = await searchParams;
   const supabase = await createClient();
 
-  const { data: { user } } = await supabase.auth.getUser();
-
   // 投票データの型定義
   type VotePick = { pick_type: string; is_hit: boolean | null };
   type VoteData = {
@@ -22,63 +23,29 @@ export default async function RaceListPage({ searchParams }: Props) {
     vote_picks?: VotePick[];
   };
 
-  const voteMap = new Map<string, VoteData>();
-  const votedRaceIds: string[] = [];
-
-  if (user) {
-    // vote_picks を含めて取得
-    const { data: myVotes } = await supabase
-      .from("votes")
-      .select("race_id, status, earned_points, is_perfect, vote_picks(pick_type, is_hit)")
-      .eq("user_id", user.id);
-      
-    for (const v of myVotes ?? []) {
-      votedRaceIds.push(v.race_id);
-      voteMap.set(v.race_id, {
-        status: v.status,
-        is_perfect: v.is_perfect,
-        vote_picks: v.vote_picks ?? [],
-      });
-    }
-  }
-
-  const { data: dateDays } = await supabase
-    .from("races").select("race_date")
-    .order("race_date", { ascending: false }).limit(100);
-  const uniqueDates = [...new Set(dateDays?.map((d) => d.race_date) ?? [])];
-
-  // 今週のレースが投票可能かチェック
+  // 今週の土日を計算
   const now = new Date();
   const jstNow = new Date(now.getTime() + 9 * 60 * 60 * 1000);
   const jstDay = jstNow.getUTCDay();
-  
-  // 今週の土日を計算
   const daysSinceThisSat = jstDay === 0 ? 1 : jstDay === 6 ? 0 : (jstDay + 1);
   const thisSat = new Date(jstNow);
   thisSat.setUTCDate(thisSat.getUTCDate() - daysSinceThisSat + (jstDay < 6 && jstDay !== 0 ? 6 : 0));
   const thisSatStr = thisSat.toISOString().split("T")[0];
   const thisSunStr = new Date(thisSat.getTime() + 24 * 60 * 60 * 1000).toISOString().split("T")[0];
-  
-  // 今週のレースで投票可能なものがあるかチェック
-  const { data: thisWeekOpenRaces } = await supabase
-    .from("races")
-    .select("id")
-    .in("race_date", [thisSatStr, thisSunStr])
-    .eq("status", "voting_open")
-    .limit(1);
-  
-  const hasThisWeekOpenRaces = (thisWeekOpenRaces?.length ?? 0) > 0;
+
+  // 開催日一覧・その日のレース・競馬場・馬場状態は日別インデックス（プロセス内 LRU、60秒）から引く
+  const [{ data: { user } }, uniqueDates] = await Promise.all([
+    supabase.auth.getUser(),
+    params.q ? Promise.resolve([] as string[]) : getRaceDates(),
+  ]);
 
   let selectedDate: string = params.date ?? "";
-  if (!selectedDate) {
+  if (!selectedDate && !params.q) {
     // 今日の曜日に応じてデフォルト日付を決定
-    const jstNow = new Date(Date.now() + 9 * 60 * 60 * 1000);
-    const todayDay = jstNow.getUTCDay();
-    
-    if (todayDay === 6 && uniqueDates.includes(thisSatStr)) {
+    if (jstDay === 6 && uniqueDates.includes(thisSatStr)) {
       // 土曜日 → 土曜日
       selectedDate = thisSatStr;
-    } else if (todayDay === 0 && uniqueDates.includes(thisSunStr)) {
+    } else if (jstDay === 0 && uniqueDates.includes(thisSunStr)) {
       // 日曜日 → 日曜日
       selectedDate = thisSunStr;
     } else if (uniqueDates.includes(thisSunStr)) {
@@ -87,33 +54,67 @@ export default async function RaceListPage({ searchParams }: Props) {
     } else if (uniqueDates.includes(thisSatStr)) {
       selectedDate = thisSatStr;
     } else {
-        selectedDate = uniqueDates[0] ?? "";
-      }
+      selectedDate = uniqueDates[0] ?? "";
+    }
   }
-  // 馬場状態取得
-  const { data: venueConditions } = await supabase
-    .from("venue_conditions")
-    .select("*")
-    .eq("race_date", selectedDate);
-  let query = supabase.from("races").select("*")
-    .eq("race_date", selectedDate)
-    .order("post_time", { ascending: true });
-  if (params.course) query = query.eq("course_name", params.course);
-  if (params.grade) query = query.eq("grade", params.grade);
-
-  const { data: races } = await query;
-
-  let filteredRaces = races ?? [];
+
+  // キーワード検索は日付に関係なく全期間が対象（DB 関数 search_races: pg_trgm 索引で関連度順）
+  // after: 直前ページ最後の "<score>_<race_date>_<id>"
+  let searchResults: any[] = [];
+  let searchNextCursor: string | null = null;
   if (params.q) {
-    const q = params.q.toLowerCase();
-    filteredRaces = filteredRaces.filter((r) =>
-      r.name.toLowerCase().includes(q) || (r.course_name ?? "").toLowerCase().includes(q)
-    );
+    const [afterScore, afterDate, afterId] = params.after ? params.after.split("_") : [];
+    const { data: hits } = await supabase.rpc("search_races", {
+      p_query: params.q,
+      p_course: params.course || null,
+      p_grade: params.grade || null,
+      p_limit: SEARCH_PER_PAGE + 1,
+      p_after_score: afterId ? afterScore : null,
+      p_after_date: afterId ? afterDate : null,
+      p_after_id: afterId ?? null,
+    });
+    const pageHits = (hits ?? []).slice(0, SEARCH_PER_PAGE);
+    if ((hits?.length ?? 0) > SEARCH_PER_PAGE) {
+      const last = pageHits[pageHits.length - 1];
+      searchNextCursor = `${last.score}_${last.race_date}_${last.id}`;
+    }
+    if (pageHits.length > 0) {
+      const { data: hitRaces } = await supabase
+        .from("races").select("*").in("id", pageHits.map((h: any) => h.id));
+      const byId = new Map((hitRaces ?? []).map((r) => [r.id, r]));
+      searchResults = pageHits.map((h: any) => byId.get(h.id)).filter(Boolean);
+    }
   }
 
-  const { data: allRacesForDay } = await supabase
-    .from("races").select("course_name").eq("race_date", selectedDate);
-  const uniqueCourses = [...new Set(allRacesForDay?.map((r) => r.course_name) ?? [])];
+  // 検索中は日別一覧を出さないので引かない
+  const dayIndex = params.q || !selectedDate ? null : await getRaceDayIndex(selectedDate);
+  const filteredRaces = (dayIndex?.races ?? []).filter((r) =>
+    (!params.course || r.course_name === params.course) && (!params.grade || r.grade === params.grade)
+  );
+  const uniqueCourses = dayIndex?.courses ?? [];
+  const venueConditions = dayIndex?.venueConditions ?? [];
+
+  // 自分の投票は表示するレースの分だけ（vote_picks を含めて取得）
+  const voteMap = new Map<string, VoteData>();
+  const votedRaceIds: string[] = [];
+  const shownRaceIds = (params.q ? searchResults : filteredRaces).map((r) => r.id as string);
+
+  if (user && shownRaceIds.length > 0) {
+    const { data: myVotes } = await supabase
+      .from("votes")
+      .select("race_id, status, earned_points, is_perfect, vote_picks(pick_type, is_hit)")
+      .eq("user_id", user.id)
+      .in("race_id", shownRaceIds);
+
+    for (const v of myVotes ?? []) {
+      votedRaceIds.push(v.race_id);
+      voteMap.set(v.race_id, {
+        status: v.status,
+        is_perfect: v.is_perfect,
+        vote_picks: v.vote_picks ?? [],
+      });
+    }
+  }
 
   // now は上で定義済み
   const isDeadlinePassed = (race: any): boolean => {
@@ -163,7 +164,9 @@ export default async function RaceListPage({ searchParams }: Props) {
       selectedCourse={params.course ?? ""}
       selectedGrade={params.grade ?? ""}
       searchQuery={params.q ?? ""}
-      venueConditions={venueConditions ?? []}
+      searchResults={searchResults}
+      searchNextCursor={searchNextCursor}
+      venueConditions={venueConditions}
     />
   );
 }
@@ -1,7 +1,12 @@
 import { createClient } from "@/lib/supabase/server";
-import { createAdminClient } from "@/lib/admin";
-import { NextResponse } from "next/server";
-
+import { enqueueAccountDeletion, getAccountDeletionJob, runAccountDeletion } from "@/lib/account-deletion";
+import { NextResponse, after } from "next/server";
+
+/**
+ * 退会リクエスト
+ * ジョブを積んでログアウトさせたら即返す。削除本体はレスポンス後（after）に始め、
+ * 終わらなかった分は /api/cron/account-deletion が続きから処理する。
+ */
 export async function POST(request: Request) {
   const supabase = await createClient();
   const { data: { user } } = await supabase.auth.getUser();
@@ -15,53 +20,44 @@ export async function POST(request: Request) {
     return NextResponse.json({ error: "確認テキストが一致しません" }, { status: 400 });
   }
 
-  const admin = createAdminClient();
-
   try {
-    // 1. ユーザーのデータを匿名化/削除
-    // コメントは匿名化（削除すると会話が壊れるため）
-    await admin
-      .from("comments")
-      .update({ is_deleted: true })
-      .eq("user_id", user.id);
-
-    // 2. 投票データは統計用に保持（user_idのみ匿名化）
-    // vote_picks, votesはそのまま（集計精度維持）
-
-    // 3. フォロー関係を削除
-    await admin.from("follows").delete().eq("follower_id", user.id);
-    await admin.from("follows").delete().eq("following_id", user.id);
-
-    // 4. 通知を削除
-    await admin.from("notifications").delete().eq("user_id", user.id);
+    // 何度押されても同じジョブ1件
+    await enqueueAccountDeletion(user.id);
+  } catch (err: any) {
+    console.error("Account deletion error:", err);
+    return NextResponse.json({ error: "退会処理に失敗しました" }, { status: 500 });
+  }
 
-    // 5. ユーザーバッジを削除
-    await admin.from("user_badges").delete().eq("user_id", user.id);
+  await supabase.auth.signOut();
 
-    // 6. 大会エントリーを削除
-    await admin.from("contest_entries").delete().eq("user_id", user.id);
+  after(async () => {
+    try {
+      await runAccountDeletion(user.id);
+    } catch (err) {
+      // 続きは Cron が拾う
+      console.error("Account deletion error:", err);
+    }
+  });
 
-    // 7. プロフィールを匿名化
-    await admin
-      .from("profiles")
-      .update({
-        display_name: "退会済みユーザー",
-        bio: null,
-        avatar_url: null, avatar_emoji: null,
-        is_admin: false,
-      })
-      .eq("id", user.id);
+  return NextResponse.json({ success: true, status: "queued" }, { status: 202 });
+}
 
-    // 8. Supabase Auth からユーザーを削除
-    const { error: deleteError } = await admin.auth.admin.deleteUser(user.id);
-    if (deleteError) {
-      console.error("Auth user deletion failed:", deleteError);
-      // Auth削除に失敗してもプロフィール匿名化は済んでいるので続行
-    }
+/** 自分の退会ジョブの進み具合 */
+export async function GET() {
+  const supabase = await createClient();
+  const { data: { user } } = await supabase.auth.getUser();
 
-    return NextResponse.json({ success: true });
-  } catch (err: any) {
-    console.error("Account deletion error:", err);
-    return NextResponse.json({ error: "退会処理に失敗しました" }, { status: 500 });
+  if (!user) {
+    return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
   }
+
+  const job = await getAccountDeletionJob(user.id);
+  if (!job) return NextResponse.json({ status: "none" });
+  return NextResponse.json({
+    status: job.status,
+    step: job.step,
+    progress: job.progress,
+    requested_at: job.requested_at,
+    finished_at: job.finished_at,
+  });
 }
@@ -1,4 +1,5 @@
 import { createAdminClient, requireAdmin } from "@/lib/admin";
+import { getRateLimitMetrics } from "@/lib/rate-limit";
 import { NextResponse } from "next/server";
 
 export async function GET() {
@@ -82,5 +83,7 @@ export async function GET() {
     pending_inquiries: pendingInquiries ?? 0,
     total_follows: totalFollows ?? 0,
     daily_votes: dailyVotes,
+    // このインスタンスでのレート制限の通過・拒否（拒否の多いキー順）
+    rate_limit: getRateLimitMetrics(20),
   });
 }
@@ -1,6 +1,7 @@
 import { NextResponse } from "next/server";
 import { createClient } from "@/lib/supabase/server";
 import { createAdminClient } from "@/lib/admin";
+import { invalidateRaceDayIndex } from "@/lib/race-day-index";
 
 async function checkAdmin() {
   const supabase = await createClient();
@@ -69,6 +70,7 @@ export async function POST(request: Request) {
       { status: 500 }
     );
   }
+  invalidateRaceDayIndex(race.race_date);
 
   const entryInserts = [];
   for (const entry of entries) {
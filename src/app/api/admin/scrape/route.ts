@@ -1,6 +1,7 @@
 import { NextResponse } from "next/server";
 import { createClient } from "@/lib/supabase/server";
 import { createAdminClient } from "@/lib/admin";
+import { invalidateRaceDayIndex } from "@/lib/race-day-index";
 import { load } from "cheerio";
 import iconv from "iconv-lite";
 
@@ -392,5 +393,6 @@ export async function POST(request: Request) {
     }
   }
 
+  invalidateRaceDayIndex([...new Set(races.map((r: any) => r.race_date as string))]);
   return NextResponse.json({ registered, updated, failed, results });
 }
@@ -15,8 +15,8 @@ export async function POST(request: Request) {
   const supabase = await createClient();
   const { data: { user } } = await supabase.auth.getUser();
   if (!user) return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
-  const rl = rateLimit(`block:${user.id}`, { limit: 30, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`block:${user.id}`, { limit: 30, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
   const body = await request.json();
   const { blocked_id } = body;
   if (!validateUUID(blocked_id).ok) return NextResponse.json({ error: "無効なIDです" }, { status: 400 });
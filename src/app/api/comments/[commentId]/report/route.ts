@@ -17,8 +17,8 @@ export async function POST(request: Request, { params }: Props) {
     return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
   }
 
-  const rl = rateLimit(`report:${user.id}`, { limit: 10, windowMs: 3600_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`report:${user.id}`, { limit: 10, windowMs: 3600_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const body = await request.json();
   const { reason, detail } = body;
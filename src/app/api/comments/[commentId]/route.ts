@@ -12,8 +12,8 @@ export async function PATCH(request: Request, { params }: Props) {
   const { data: { user } } = await supabase.auth.getUser();
   if (!user) return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
 
-  const rl = rateLimit(`comment-edit:${user.id}`, { limit: 20, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`comment-edit:${user.id}`, { limit: 20, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const body = await request.json();
 
@@ -45,8 +45,8 @@ export async function DELETE(request: Request, { params }: Props) {
   const { data: { user } } = await supabase.auth.getUser();
   if (!user) return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
 
-  const rl = rateLimit(`comment-delete:${user.id}`, { limit: 20, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`comment-delete:${user.id}`, { limit: 20, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const { data: comment } = await supabase.from("comments").select("id, user_id").eq("id", commentId).single();
   if (!comment) return NextResponse.json({ error: "コメントが見つかりません" }, { status: 404 });
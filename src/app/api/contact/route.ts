@@ -9,8 +9,8 @@ export async function POST(request: Request) {
 
   // レート制限（未ログインはIP、ログイン済みはuser_id）
   const key = user ? `contact:${user.id}` : `contact:anon`;
-  const rl = rateLimit(key, { limit: 5, windowMs: 3600_000 }); // 1時間5件
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(key, { limit: 5, windowMs: 3600_000 }); // 1時間5件
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const body = await request.json();
 
@@ -0,0 +1,53 @@
+import { NextResponse } from "next/server";
+import { createAdminClient } from "@/lib/admin";
+import { runAccountDeletion } from "@/lib/account-deletion";
+
+export const maxDuration = 60;
+
+// 1回の実行で使う時間（maxDuration に余裕を残す）
+const BUDGET_MS = 45_000;
+
+/**
+ * 退会ジョブの続き
+ * 5分おきに実行（Vercel Cron: "*\/5 * * * *"）
+ * after() で終わりきらなかった・失敗したジョブを古い順に予算いっぱいまで進める。
+ */
+export async function GET(request: Request) {
+  const authHeader = request.headers.get("authorization");
+  if (authHeader !== `Bearer ${process.env.CRON_SECRET}`) {
+    return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+  }
+
+  const startedAt = Date.now();
+  const admin = createAdminClient();
+
+  const { data: jobs, error } = await admin
+    .from("account_deletion_jobs")
+    .select("user_id")
+    .in("status", ["queued", "running"])
+    .order("requested_at", { ascending: true })
+    .limit(50);
+
+  if (error) {
+    return NextResponse.json({ error: error.message }, { status: 500 });
+  }
+
+  const results: { user_id: string; status: string | null; step: string | null }[] = [];
+  for (const { user_id } of jobs ?? []) {
+    const remaining = BUDGET_MS - (Date.now() - startedAt);
+    if (remaining <= 0) break;
+    try {
+      const job = await runAccountDeletion(user_id, remaining);
+      results.push({ user_id, status: job?.status ?? null, step: job?.step ?? null });
+    } catch (err: any) {
+      console.error(`[account-deletion] ${user_id}:`, err.message);
+      results.push({ user_id, status: "error", step: null });
+    }
+  }
+
+  return NextResponse.json({
+    pending: jobs?.length ?? 0,
+    processed: results,
+    elapsed_ms: Date.now() - startedAt,
+  });
+}
@@ -63,43 +63,8 @@ export async function GET(request: Request) {
     .eq("month", prevMonth)
     .eq("status", "active");
 
-  // 前月の月間TOP3にバッジ付与
-  const { data: topEntries } = await admin
-    .from("contest_entries")
-    .select("user_id, total_points, contests!inner(year, month, status)")
-    .eq("contests.year", prevYear)
-    .eq("contests.month", prevMonth)
-    .order("total_points", { ascending: false })
-    .limit(3);
-
-  if (topEntries && topEntries.length > 0) {
-    for (const entry of topEntries) {
-      // monthly_top3 バッジ付与
-      const { data: existing } = await admin
-        .from("user_badges")
-        .select("id")
-        .eq("user_id", entry.user_id)
-        .eq("badge_id", "monthly_top3")
-        .maybeSingle();
-
-      if (!existing) {
-        await admin.from("user_badges").insert({
-          user_id: entry.user_id,
-          badge_id: "monthly_top3",
-          earned_at: new Date().toISOString(),
-        });
-      }
-
-      // 通知
-      await admin.from("notifications").insert({
-        user_id: entry.user_id,
-        type: "contest_result",
-        title: "月間大会結果 🏆",
-        body: `${prevYear}年${prevMonth}月の月間大会でTOP3に入りました！おめでとうございます！`,
-        is_read: false,
-      });
-    }
-  }
+  // 前月の月間TOP3（バッジ・通知）は 0:10 の monthly-reset が
+  // monthly_points のスナップショット確定後に DB 関数 monthly_rollover 内で付与する
 
   return NextResponse.json({
     message: `${contestName} を作成しました`,
@@ -4,7 +4,11 @@ import { createAdminClient } from "@/lib/admin";
 /**
  * 月次ポイントリセット Cron API
  * 毎月1日 0:10 JST に実行（月次大会作成の5分後）
- * Vercel Cron: "10 15 1 * *" (UTC 15:10 = JST 0:10)
+ * Vercel Cron: "10-55/5 15 1 * *" (UTC 15:10 = JST 0:10、失敗時は5分おきに再試行／完了済みなら何もしない)
+ *
+ * ロールオーバー本体は DB 関数 monthly_rollover（supabase/migrations/20261017_monthly_rollover.sql）:
+ *   前月 monthly_points のスナップショット → リセット履歴 → 0 クリア → 月間TOP3 → 今月の大会へ参加登録
+ * を1トランザクションで行う。ここは呼ぶだけなのでユーザー数によらず一定時間で終わる。
  */
 export async function GET(request: Request) {
   // Cron Secret チェック
@@ -13,6 +17,7 @@ export async function GET(request: Request) {
     return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
   }
 
+  const startedAt = Date.now();
   const admin = createAdminClient();
   const now = new Date();
   const jstNow = new Date(now.toLocaleString("en-US", { timeZone: "Asia/Tokyo" }));
@@ -23,110 +28,20 @@ export async function GET(request: Request) {
   const prevMonth = month === 1 ? 12 : month - 1;
   const prevYear = month === 1 ? year - 1 : year;
 
-  // 前月の大会を取得
-  const { data: prevContest } = await admin
-    .from("contests")
-    .select("id")
-    .eq("year", prevYear)
-    .eq("month", prevMonth)
-    .maybeSingle();
+  const { data: stats, error } = await admin.rpc("monthly_rollover", { p_year: year, p_month: month });
+  const elapsedMs = Date.now() - startedAt;
 
-  // 全ユーザーの monthly_points を取得してから contest_entries に記録
-  const { data: profiles } = await admin
-    .from("profiles")
-    .select("id, monthly_points")
-    .gt("monthly_points", 0);
-
-  let recorded = 0;
-
-  if (profiles && profiles.length > 0 && prevContest) {
-    // contest_entries に前月の最終ポイントを記録（upsert）
-    const entries = profiles.map((p) => ({
-      contest_id: prevContest.id,
-      user_id: p.id,
-      total_points: p.monthly_points,
-    }));
-
-    // バッチで upsert（500件ずつ）
-    for (let i = 0; i < entries.length; i += 500) {
-      const batch = entries.slice(i, i + 500);
-      const { error } = await admin
-        .from("contest_entries")
-        .upsert(batch, { onConflict: "contest_id,user_id" });
-      if (error) {
-        console.error(`Contest entries upsert error (batch ${i}):`, error);
-      } else {
-        recorded += batch.length;
-      }
-    }
-  }
-
-  // 全ユーザーの monthly_points をリセット
-  const { error: resetError, count: resetCount } = await admin
-    .from("profiles")
-    .update({ monthly_points: 0 })
-    .gt("monthly_points", 0);
-
-  if (resetError) {
-    console.error("Monthly points reset error:", resetError);
-    return NextResponse.json({ error: resetError.message }, { status: 500 });
-  }
-
-  // ポイント履歴に記録
-  if (profiles && profiles.length > 0) {
-    const txRows = profiles.map((p) => ({
-      user_id: p.id,
-      amount: 0,
-      description: `${prevYear}年${prevMonth}月 月間ポイントリセット（前月: ${p.monthly_points}P）`,
-      reason: "monthly_reset",
-    }));
-
-    // バッチ挿入
-    for (let i = 0; i < txRows.length; i += 500) {
-      await admin.from("points_transactions").insert(txRows.slice(i, i + 500));
-    }
-  }
-
-  // 今月の大会に全アクティブユーザーを参加登録
-  const { data: currentContest } = await admin
-    .from("contests")
-    .select("id")
-    .eq("year", year)
-    .eq("month", month)
-    .eq("status", "active")
-    .maybeSingle();
-
-  let enrolled = 0;
-  if (currentContest) {
-    // 直近30日以内に投票したアクティブユーザーを自動参加
-    const thirtyDaysAgo = new Date(Date.now() - 30 * 24 * 60 * 60 * 1000).toISOString();
-    const { data: activeUsers } = await admin
-      .from("votes")
-      .select("user_id")
-      .gte("created_at", thirtyDaysAgo);
-
-    const uniqueUsers = [...new Set((activeUsers ?? []).map((v) => v.user_id))];
-
-    if (uniqueUsers.length > 0) {
-      const enrollRows = uniqueUsers.map((uid) => ({
-        contest_id: currentContest.id,
-        user_id: uid,
-        total_points: 0,
-      }));
-
-      for (let i = 0; i < enrollRows.length; i += 500) {
-        const { error } = await admin
-          .from("contest_entries")
-          .upsert(enrollRows.slice(i, i + 500), { onConflict: "contest_id,user_id" });
-        if (!error) enrolled += enrollRows.slice(i, i + 500).length;
-      }
-    }
+  if (error) {
+    console.error("Monthly rollover error:", error);
+    return NextResponse.json({ error: error.message, elapsed_ms: elapsedMs }, { status: 500 });
   }
 
+  console.log(`[monthly-reset] ${prevYear}-${prevMonth}`, stats, `${elapsedMs}ms`);
   return NextResponse.json({
-    message: `${prevYear}年${prevMonth}月のポイントをリセットしました`,
-    reset_users: resetCount ?? 0,
-    contest_entries_recorded: recorded,
-    current_contest_enrolled: enrolled,
+    message: stats?.already_done
+      ? `${prevYear}年${prevMonth}月のリセットは完了済みです`
+      : `${prevYear}年${prevMonth}月のポイントをリセットしました`,
+    ...stats,
+    elapsed_ms: elapsedMs,
   });
 }
@@ -1,17 +1,25 @@
-import { NextResponse } from "next/server";
+import { NextResponse, after } from "next/server";
+import { recordErrorReports, flushErrorReports } from "@/lib/error-ingest";
+import { rateLimit, rateLimitResponse } from "@/lib/rate-limit";
+
+// 1リクエストで受け付けるレポート数（クライアントは fingerprint ごとにまとめて送る）
+const MAX_REPORTS = 50;
 
 export async function POST(request: Request) {
   try {
-    const body = await request.json();
+    // sendBeacon の Content-Type に依らず読めるよう text で受ける
+    const body = JSON.parse(await request.text());
+    // { reports: [...] }（まとめ送信）と旧形式の単発 { message, ... } の両方を受ける
+    const reports = Array.isArray(body.reports) ? body.reports : [body];
+
+    const ip = request.headers.get("x-forwarded-for")?.split(",")[0]?.trim() || "unknown";
+    const rl = await rateLimit(`error-report:${ip}`, { limit: 30, windowMs: 60_000 });
+    if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
-    // サーバーログに出力（Vercel Logsで閲覧可能）
-    console.error("[CLIENT_ERROR]", {
-      message: body.message,
-      stack: body.stack,
-      page: body.page,
-      userAgent: body.userAgent,
-      timestamp: new Date().toISOString(),
-    });
+    // fingerprint ごとに件数を足し込み、DB への書き込みはレスポンス後にまとめて
+    if (recordErrorReports(reports.slice(0, MAX_REPORTS))) {
+      after(flushErrorReports);
+    }
 
     return NextResponse.json({ received: true });
   } catch {
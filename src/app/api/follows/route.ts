@@ -13,8 +13,8 @@ export async function POST(request: Request) {
   }
 
   // レート制限
-  const rl = rateLimit(`follows:${user.id}`, { limit: 30, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`follows:${user.id}`, { limit: 30, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const { following_id } = await request.json();
 
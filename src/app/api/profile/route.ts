@@ -14,8 +14,8 @@ export async function PATCH(request: Request) {
   }
 
   // レート制限
-  const rl = rateLimit(`profile:${user.id}`, { limit: 10, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`profile:${user.id}`, { limit: 10, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const body = await request.json();
   const allowedFields = ["display_name", "bio", "gender", "age_group", "horse_racing_exp", "favorite_course"];
@@ -18,8 +18,8 @@ export async function GET(request: Request, { params }: Props) {
   }
 
   // レート制限
-  const rl = rateLimit(`votes:${user.id}`, { limit: 60, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`votes:${user.id}`, { limit: 60, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   // 集計にはAdmin clientを使用（RLSバイパスで全投票を集計）
   const admin = createAdminClient();
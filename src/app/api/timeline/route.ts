@@ -8,75 +8,70 @@ export async function GET(request: Request) {
   const { data: { user } } = await supabase.auth.getUser();
   if (!user) return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
 
-  const rl = rateLimit(`timeline:${user.id}`, { limit: 60, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`timeline:${user.id}`, { limit: 60, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
 
   const { searchParams } = new URL(request.url);
   const cursor = searchParams.get("cursor");
   const filter = searchParams.get("filter") ?? "all";
   const limit = 20;
 
-  const { data: follows } = await supabase.from("follows").select("following_id").eq("follower_id", user.id);
-  const followingIds = follows?.map((f) => f.following_id) ?? [];
-
   const { data: blockedUsers } = await supabase.from("blocks").select("blocked_id").eq("blocker_id", user.id);
   const blockedIds = new Set(blockedUsers?.map((b) => b.blocked_id) ?? []);
-  const targetIds = [user.id, ...followingIds.filter((id) => !blockedIds.has(id))];
+
+  // cursor: 投票は "<ts>_<vote_id>"（同時刻の取りこぼしなし）、コメントは "<ts>"
+  const [cursorTs, cursorVoteId] = cursor ? cursor.split("_") : [null, null];
 
   const admin = createAdminClient();
 
   let voteItems: any[] = [];
 
-  // 的中報告（settled_hit のみ）
-  if (filter === "all" || filter === "hit") {
-    let hitQ = admin.from("votes")
-      .select("id, user_id, race_id, status, earned_points, is_perfect, like_count, copy_count, comment, settled_at, created_at, profiles(display_name, avatar_url, avatar_emoji, rank_id, is_verified), races(name, grade, course_name, race_number, race_date), vote_picks(pick_type, race_entries(post_number, horses(name)))")
-      .in("user_id", targetIds).eq("status", "settled_hit")
-      .order("settled_at", { ascending: false }).limit(limit);
-    if (cursor) hitQ = hitQ.lt("settled_at", cursor);
-    const { data: hits } = await hitQ;
-
-    const hitItems = (hits ?? []).map((v: any) => ({
-      type: "vote_result", id: `vote-${v.id}`, vote_id: v.id, like_count: v.like_count ?? 0, copy_count: v.copy_count ?? 0,
-      user: v.profiles, user_id: v.user_id,
-      race: v.races, race_id: v.race_id, earned_points: v.earned_points,
-      is_perfect: v.is_perfect, status: v.status,
-      picks: formatPicks(v.vote_picks),
-      comment: v.comment ?? null,
-      timestamp: v.settled_at ?? v.created_at,
-    }));
-
-    voteItems = [...voteItems, ...hitItems];
-  }
-
-  // みんなの予想（pending のみ）
-  if (filter === "all" || filter === "vote") {
-    let pendingQ = admin.from("votes")
-      .select("id, user_id, race_id, status, like_count, copy_count, comment, created_at, profiles(display_name, avatar_url, avatar_emoji, rank_id, is_verified), races(name, grade, course_name, race_number, race_date), vote_picks(pick_type, race_entries(post_number, horses(name)))")
-      .in("user_id", targetIds).eq("status", "pending")
-      .order("created_at", { ascending: false }).limit(limit);
-    if (cursor) pendingQ = pendingQ.lt("created_at", cursor);
-    const { data: pending } = await pendingQ;
-
-    const pendingItems = (pending ?? []).map((v: any) => ({
-      type: "vote_submitted", id: `voted-${v.id}`, vote_id: v.id, like_count: v.like_count ?? 0, copy_count: v.copy_count ?? 0,
-      user: v.profiles, user_id: v.user_id,
-      race: v.races, race_id: v.race_id,
-      picks: formatPicks(v.vote_picks),
-      comment: v.comment ?? null,
-      timestamp: v.created_at,
-    }));
-
-    voteItems = [...voteItems, ...pendingItems];
+  // 的中報告（settled_hit）・みんなの予想（pending）は timeline_feed から1回で引く
+  // （投票・精算時にトリガーで自分とフォロワーへ展開済み。owner_id の索引を範囲走査するだけ）
+  const kinds = [
+    ...(filter === "all" || filter === "hit" ? ["vote_result"] : []),
+    ...(filter === "all" || filter === "vote" ? ["vote_submitted"] : []),
+  ];
+  if (kinds.length > 0) {
+    let feedQ = admin.from("timeline_feed")
+      .select("kind, ts, vote_id, votes(id, user_id, race_id, status, earned_points, is_perfect, like_count, copy_count, comment, settled_at, created_at, profiles(display_name, avatar_url, avatar_emoji, rank_id, is_verified), races(name, grade, course_name, race_number, race_date), vote_picks(pick_type, race_entries(post_number, horses(name))))")
+      .eq("owner_id", user.id).in("kind", kinds)
+      .order("ts", { ascending: false }).order("vote_id", { ascending: false }).limit(limit);
+    if (blockedIds.size > 0) feedQ = feedQ.not("actor_id", "in", `(${[...blockedIds].join(",")})`);
+    if (cursorTs && cursorVoteId) {
+      feedQ = feedQ.or(`ts.lt."${cursorTs}",and(ts.eq."${cursorTs}",vote_id.lt.${cursorVoteId})`);
+    } else if (cursorTs) {
+      feedQ = feedQ.lt("ts", cursorTs);
+    }
+    const { data: feed } = await feedQ;
+
+    voteItems = (feed ?? []).filter((f: any) => f.votes).map((f: any) => {
+      const v = f.votes;
+      const base = {
+        vote_id: v.id, like_count: v.like_count ?? 0, copy_count: v.copy_count ?? 0,
+        user: v.profiles, user_id: v.user_id,
+        race: v.races, race_id: v.race_id,
+        picks: formatPicks(v.vote_picks),
+        comment: v.comment ?? null,
+        timestamp: f.ts,
+      };
+      return f.kind === "vote_result"
+        ? { type: "vote_result", id: `vote-${v.id}`, ...base, earned_points: v.earned_points, is_perfect: v.is_perfect, status: v.status }
+        : { type: "vote_submitted", id: `voted-${v.id}`, ...base };
+    });
   }
 
   let commentItems: any[] = [];
   if (filter === "all" || filter === "comment") {
+    const { data: follows } = await supabase.from("follows").select("following_id").eq("follower_id", user.id);
+    const followingIds = follows?.map((f) => f.following_id) ?? [];
+    const targetIds = [user.id, ...followingIds.filter((id) => !blockedIds.has(id))];
+
     let q = supabase.from("comments")
       .select("id, user_id, race_id, body, sentiment, created_at, profiles(display_name, avatar_url, avatar_emoji, rank_id, is_verified), races(name, grade, course_name)")
       .in("user_id", targetIds).is("parent_id", null).eq("is_deleted", false)
       .order("created_at", { ascending: false }).limit(limit);
-    if (cursor) q = q.lt("created_at", cursor);
+    if (cursorTs) q = q.lt("created_at", cursorTs);
     const { data } = await q;
     commentItems = (data ?? []).map((c) => ({
       type: "comment", id: `comment-${c.id}`, comment_id: c.id, user: c.profiles,
@@ -106,7 +101,10 @@ export async function GET(request: Request) {
     }));
   }
 
-  const newCursor = allItems.length === limit ? allItems[allItems.length - 1].timestamp : null;
+  const last = allItems[allItems.length - 1];
+  const newCursor = allItems.length === limit
+    ? (last.vote_id ? `${last.timestamp}_${last.vote_id}` : last.timestamp)
+    : null;
   return NextResponse.json({ items: allItems, next_cursor: newCursor });
 }
 
@@ -7,8 +7,8 @@ export async function GET(request: Request) {
   const supabase = await createClient();
   const { data: { user } } = await supabase.auth.getUser();
   if (!user) return NextResponse.json({ error: "ログインが必要です" }, { status: 401 });
-  const rl = rateLimit(`user-search:${user.id}`, { limit: 30, windowMs: 60_000 });
-  if (!rl.ok) return rateLimitResponse();
+  const rl = await rateLimit(`user-search:${user.id}`, { limit: 30, windowMs: 60_000 });
+  if (!rl.ok) return rateLimitResponse(rl.retryAfterMs);
   const q = new URL(request.url).searchParams.get("q")?.trim();
   if (!q || q.length < 1) return NextResponse.json({ users: [] });
   if (q.length > 50) return NextResponse.json({ error: "検索文字列が長すぎます" }, { status: 400 });
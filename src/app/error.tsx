@@ -1,6 +1,7 @@
 "use client";
 
 import { useEffect } from "react";
+import { reportClientError } from "@/lib/error-logger";
 
 export default function Error({
   error,
@@ -11,18 +12,8 @@ export default function Error({
 }) {
   useEffect(() => {
     console.error("App error:", error);
-    // エラーをAPIに送信（Vercel Logsで閲覧可能）
-    fetch("/api/error-report", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        message: error.message,
-        stack: error.stack,
-        digest: error.digest,
-        page: window.location.pathname,
-        userAgent: navigator.userAgent,
-      }),
-    }).catch(() => {});
+    // エラーをAPIに送信（同じエラーはまとめて数えて送る。Vercel Logs・error_events で閲覧可能）
+    reportClientError(error, { digest: error.digest });
   }, [error]);
 
   return (
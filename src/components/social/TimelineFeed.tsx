@@ -34,7 +34,7 @@ export default function TimelineFeed() {
 
   const fetchItems = async (cursor?: string, isRefresh?: boolean) => {
     const url = cursor
-      ? `/api/timeline?filter=${filter}&cursor=${cursor}`
+      ? `/api/timeline?filter=${filter}&cursor=${encodeURIComponent(cursor)}`
       : `/api/timeline?filter=${filter}`;
     const res = await fetch(url);
     if (res.ok) {
@@ -0,0 +1,95 @@
+import { createAdminClient } from "@/lib/admin";
+
+/**
+ * 退会ジョブ（supabase/migrations/20261017_account_deletion_jobs.sql）
+ *
+ * enqueueAccountDeletion で積み、runAccountDeletion が時間予算の中で
+ * DB 関数 account_deletion_step を繰り返し呼んで進める。最後に Supabase Auth のユーザーを消して done。
+ * 予算切れ・失敗で止まっても、/api/cron/account-deletion が続きから再開する。
+ */
+
+export type AccountDeletionJob = {
+  user_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  step: string;
+  progress: Record<string, number>;
+  attempts: number;
+  last_error: string | null;
+  requested_at: string;
+  updated_at: string;
+  finished_at: string | null;
+  busy?: boolean;
+};
+
+const BATCH_SIZE = 1000;
+// Auth 削除がこれだけ続けて失敗したら failed にして Cron の対象から外す
+const MAX_AUTH_ATTEMPTS = 5;
+
+/** ジョブを積む（既にあれば何もしない） */
+export async function enqueueAccountDeletion(userId: string) {
+  const admin = createAdminClient();
+  const { error } = await admin
+    .from("account_deletion_jobs")
+    .upsert({ user_id: userId }, { onConflict: "user_id", ignoreDuplicates: true });
+  if (error) throw new Error(`退会ジョブの登録に失敗: ${error.message}`);
+}
+
+export async function getAccountDeletionJob(userId: string): Promise<AccountDeletionJob | null> {
+  const { data } = await createAdminClient()
+    .from("account_deletion_jobs")
+    .select("*")
+    .eq("user_id", userId)
+    .maybeSingle();
+  return data;
+}
+
+/** 予算（ミリ秒）の範囲でジョブを進め、最後の状態を返す */
+export async function runAccountDeletion(userId: string, budgetMs = 20_000): Promise<AccountDeletionJob | null> {
+  const admin = createAdminClient();
+  const deadline = Date.now() + budgetMs;
+  let job: AccountDeletionJob | null = null;
+
+  while (Date.now() < deadline) {
+    const { data, error } = await admin.rpc("account_deletion_step", {
+      p_user_id: userId,
+      p_batch: BATCH_SIZE,
+    });
+    if (error) throw new Error(`退会ジョブの処理に失敗: ${error.message}`);
+    job = data as AccountDeletionJob | null;
+
+    // 無い・終わっている・別の実行が処理中
+    if (!job || job.status === "done" || job.status === "failed" || job.busy) return job;
+
+    if (job.step === "auth") {
+      const { error: deleteError } = await admin.auth.admin.deleteUser(userId);
+      // 既に消えている（再実行）なら成功扱い
+      if (deleteError && deleteError.status !== 404) {
+        console.error("Auth user deletion failed:", deleteError);
+        const attempts = job.attempts + 1;
+        const { data: updated } = await admin
+          .from("account_deletion_jobs")
+          .update({
+            attempts,
+            last_error: deleteError.message,
+            status: attempts >= MAX_AUTH_ATTEMPTS ? "failed" : "running",
+            updated_at: new Date().toISOString(),
+          })
+          .eq("user_id", userId)
+          .select("*")
+          .single();
+        return updated;
+      }
+
+      const now = new Date().toISOString();
+      const { data: done } = await admin
+        .from("account_deletion_jobs")
+        .update({ status: "done", step: "done", last_error: null, updated_at: now, finished_at: now })
+        .eq("user_id", userId)
+        .select("*")
+        .single();
+      return done;
+    }
+  }
+
+  return job;
+}
@@ -0,0 +1,62 @@
+// src/lib/constants/ranks.test.ts
+//
+// 実行: `npx vitest run src/lib/constants`
+//
+// 検証する性質:
+//   二分探索の参照表が tier 表の線形走査と同じ結果を返す（境界・範囲外・NaN 含む） / scoreMany が1件ずつと一致
+
+import { describe, it, expect } from "vitest";
+import {
+  POINT_RULES,
+  ODDS_LOOKUP,
+  lookupPoints,
+  scoreMany,
+  getPointsByOdds,
+  type OddsBetType,
+  type OddsTier,
+} from "./ranks";
+
+const linear = (odds: number, table: readonly OddsTier[]) => {
+  for (const tier of table) if (odds <= tier.max) return tier.points;
+  return table[table.length - 1].points;
+};
+
+const TABLES: Record<OddsBetType, readonly OddsTier[]> = {
+  win: POINT_RULES.win_odds,
+  place: POINT_RULES.place_odds,
+  quinella: POINT_RULES.quinella_odds,
+  wide: POINT_RULES.wide_odds,
+  trio: POINT_RULES.trio_odds,
+};
+
+// 境界値の前後と範囲外をまとめて
+const sampleOdds = (table: readonly OddsTier[]) => [
+  0, 1.0, -1, NaN, Infinity, 5000,
+  ...table.filter((t) => Number.isFinite(t.max)).flatMap((t) => [t.max - 0.1, t.max, t.max + 0.05]),
+];
+
+describe("lookupPoints", () => {
+  for (const [bet, table] of Object.entries(TABLES) as [OddsBetType, readonly OddsTier[]][]) {
+    it(`${bet}: 線形走査と一致`, () => {
+      for (const odds of sampleOdds(table)) {
+        expect(lookupPoints(ODDS_LOOKUP[bet], odds)).toBe(linear(odds, table));
+      }
+    });
+  }
+
+  it("引数で渡した表も同じ結果", () => {
+    const custom = [{ max: 2, points: 1 }, { max: 10, points: 5 }, { max: Infinity, points: 9 }];
+    for (const odds of [1, 2, 2.1, 10, 11]) {
+      expect(getPointsByOdds(odds, custom)).toBe(linear(odds, custom));
+    }
+  });
+});
+
+describe("scoreMany", () => {
+  it("1件ずつの参照と一致", () => {
+    const odds = sampleOdds(POINT_RULES.trio_odds);
+    const many = scoreMany(odds, "trio");
+    expect(Array.from(many)).toEqual(odds.map((o) => linear(o, POINT_RULES.trio_odds)));
+    expect(Array.from(scoreMany(odds, POINT_RULES.trio_odds))).toEqual(Array.from(many));
+  });
+});
@@ -0,0 +1,126 @@
+import { createAdminClient } from "@/lib/admin";
+import { ERROR_SAMPLE_RATE, errorFingerprint, type ErrorReport } from "@/lib/error-logger";
+
+/**
+ * クライアントエラーの集計（/api/error-report の受け側）
+ *
+ * 受け取ったレポートはインスタンス内で fingerprint ごとに件数だけ足し込み、
+ * 10秒おき（または fingerprint が溜まったとき）に DB 関数 ingest_error_events で
+ * error_events（fingerprint × 1時間）へまとめて加算する。
+ * エラーが嵐のように来ても、書き込みは「flush 回数 × 1 RPC」で済む。
+ *
+ * エンドポイントは認証なしなので、fingerprint と間引き率はリクエストの値を使わずサーバー側で決め、
+ * 1レポートの件数にも上限をかける。
+ */
+
+const FLUSH_INTERVAL_MS = 10_000;
+const FLUSH_AT_KEYS = 100;
+// flush に失敗し続けても溜め込み過ぎない
+const MAX_PENDING_KEYS = 1_000;
+// 1レポートの件数の上限（間引き後）。クライアントの flush 間隔 5秒 × 20件/秒
+const MAX_COUNT_PER_REPORT = 100;
+
+type Pending = {
+  fingerprint: string;
+  source: string;
+  count: number;
+  message: string;
+  stack: string | null;
+  page: string | null;
+  user_agent: string | null;
+  digest: string | null;
+  first_seen_at: string;
+  last_seen_at: string;
+};
+
+let pending = new Map<string, Pending>();
+let lastFlushAt = Date.now();
+let dropped = 0;
+let flushing: Promise<void> | null = null;
+
+function str(v: unknown, max: number): string | null {
+  return typeof v === "string" && v ? v.slice(0, max) : null;
+}
+
+/**
+ * レポートを足し込む。flush すべき頃合いなら true を返す（呼び出し側で after() などから flush する）
+ */
+export function recordErrorReports(reports: Partial<ErrorReport>[], source = "client"): boolean {
+  const now = new Date().toISOString();
+
+  for (const r of reports) {
+    const message = str(r.message, 1000);
+    if (!message) continue;
+    const stack = str(r.stack, 4000);
+    const fingerprint = errorFingerprint(message, stack ?? undefined);
+    const sampled = Math.min(MAX_COUNT_PER_REPORT, Math.max(1, Math.round(Number(r.count) || 1)));
+    const count = ERROR_SAMPLE_RATE > 0 ? Math.round(sampled / ERROR_SAMPLE_RATE) : sampled;
+
+    const key = `${source}:${fingerprint}`;
+    const p = pending.get(key);
+    if (p) {
+      p.count += count;
+      p.last_seen_at = now;
+      continue;
+    }
+    if (pending.size >= MAX_PENDING_KEYS) {
+      dropped += count;
+      continue;
+    }
+
+    pending.set(key, {
+      fingerprint,
+      source,
+      count,
+      message,
+      stack,
+      page: str(r.page, 300),
+      user_agent: str(r.userAgent, 300),
+      digest: str(r.digest, 100),
+      first_seen_at: now,
+      last_seen_at: now,
+    });
+    // インスタンス内で初めて見たものだけログにも出す（Vercel Logs で追える）
+    console.error("[CLIENT_ERROR]", { fingerprint, message, page: r.page, count });
+  }
+
+  return pending.size >= FLUSH_AT_KEYS || Date.now() - lastFlushAt >= FLUSH_INTERVAL_MS;
+}
+
+/** 溜まった件数を error_events に加算する（同時に呼ばれても1回にまとめる） */
+export function flushErrorReports(): Promise<void> {
+  if (flushing) return flushing;
+
+  flushing = (async () => {
+    const batch = pending;
+    pending = new Map();
+    lastFlushAt = Date.now();
+    if (batch.size === 0) return;
+
+    if (dropped > 0) {
+      console.error(`[error-ingest] dropped ${dropped} reports (pending full)`);
+      dropped = 0;
+    }
+
+    const { error } = await createAdminClient().rpc("ingest_error_events", {
+      p_rows: [...batch.values()],
+    });
+    if (error) {
+      console.error("[error-ingest] flush failed:", error.message);
+      // 次の flush で再送（上限を超える分は捨てる）
+      for (const [key, p] of batch) {
+        const cur = pending.get(key);
+        if (cur) {
+          cur.count += p.count;
+          cur.first_seen_at = p.first_seen_at;
+        } else if (pending.size < MAX_PENDING_KEYS) {
+          pending.set(key, p);
+        }
+      }
+    }
+  })().finally(() => {
+    flushing = null;
+  });
+
+  return flushing;
+}
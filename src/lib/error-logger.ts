@@ -1,44 +1,179 @@
 /**
  * エラーログ収集ユーティリティ
  * Sentryなど外部サービス導入時はここを差し替え
+ *
+ * 同じエラーは fingerprint（正規化したメッセージ＋先頭スタックフレームのハッシュ）でまとめる。
+ *   - サーバー: logError は fingerprint ごとに初回と100回ごとだけ console.error
+ *   - クライアント: reportClientError はキューに積んで件数を数え、5秒ごと／ページを離れるときに
+ *     まとめて /api/error-report へ送る（離脱時は sendBeacon）。NEXT_PUBLIC_ERROR_SAMPLE_RATE で間引く
+ * 受け側の集計・保存は src/lib/error-ingest.ts
  */
 
 type ErrorContext = {
   page?: string;
   action?: string;
   userId?: string;
+  digest?: string;
   extra?: Record<string, any>;
 };
 
+export type ErrorReport = {
+  /** クライアント側のキューのキー。受け側は message / stack から計算し直す */
+  fingerprint: string;
+  message: string;
+  stack?: string;
+  page?: string;
+  digest?: string;
+  userAgent?: string;
+  action?: string;
+  /** この fingerprint を何回見たか（間引き後。受け側で ERROR_SAMPLE_RATE で割り戻す） */
+  count: number;
+};
+
+/** クライアントの間引き率。受け側もリクエストの値ではなくこれで件数を割り戻す */
+export const ERROR_SAMPLE_RATE = Math.min(1, Math.max(0, Number(process.env.NEXT_PUBLIC_ERROR_SAMPLE_RATE ?? "1")));
+
+/** 可変部分（数値・ID・行番号）を潰してから FNV-1a でハッシュ */
+export function errorFingerprint(message: string, stack?: string): string {
+  const msg = message.replace(/[0-9a-f]{8,}(-[0-9a-f]{4,})*/gi, "#").replace(/\d+/g, "#");
+  const frame = (stack ?? "")
+    .split("\n")
+    .map((l) => l.trim())
+    .find((l) => l.startsWith("at ") || l.includes("@"))
+    ?.replace(/\?[^:)]*/g, "")
+    .replace(/:\d+(:\d+)?/g, "") ?? "";
+
+  let h = 0x811c9dc5;
+  for (const ch of `${msg}|${frame}`) {
+    h ^= ch.codePointAt(0)!;
+    h = Math.imul(h, 0x01000193) >>> 0;
+  }
+  return h.toString(16).padStart(8, "0");
+}
+
+function describe(error: unknown) {
+  return {
+    message: error instanceof Error ? error.message : String(error),
+    stack: error instanceof Error ? error.stack : undefined,
+  };
+}
+
+// ============================================================
+// サーバー
+// ============================================================
+
+const LOG_EVERY = 100;
+const LOG_MAX_KEYS = 1_000;
+const logCounts = new Map<string, number>();
+
 export function logError(error: unknown, context?: ErrorContext) {
-  const message = error instanceof Error ? error.message : String(error);
-  const stack = error instanceof Error ? error.stack : undefined;
+  const { message, stack } = describe(error);
+  const fingerprint = errorFingerprint(message, stack);
+
+  const n = (logCounts.get(fingerprint) ?? 0) + 1;
+  logCounts.delete(fingerprint);
+  logCounts.set(fingerprint, n);
+  if (logCounts.size > LOG_MAX_KEYS) logCounts.delete(logCounts.keys().next().value as string);
+
+  // 同じエラーの連発はログを埋めないよう初回と100回ごとだけ
+  if (n !== 1 && n % LOG_EVERY !== 0) return;
 
   // サーバーサイドログ
   console.error("[ERROR]", {
     message,
     stack,
+    fingerprint,
+    count: n,
     ...context,
     timestamp: new Date().toISOString(),
   });
 }
 
+// ============================================================
+// クライアント
+// ============================================================
+
+const FLUSH_DELAY_MS = 5_000;
+const MAX_BATCH = 20;
+// 1ページセッションで送る fingerprint 数の上限（壊れたデプロイで送り続けない）
+const SESSION_MAX_FINGERPRINTS = 50;
+
+const queue = new Map<string, ErrorReport>();
+const seen = new Set<string>();
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+let listening = false;
+
+function flushClientErrors(useBeacon: boolean) {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  if (queue.size === 0) return;
+
+  const reports = [...queue.values()].slice(0, MAX_BATCH);
+  for (const r of reports) queue.delete(r.fingerprint);
+  const body = JSON.stringify({ reports });
+
+  try {
+    if (useBeacon && typeof navigator.sendBeacon === "function") {
+      navigator.sendBeacon("/api/error-report", new Blob([body], { type: "application/json" }));
+    } else {
+      fetch("/api/error-report", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body,
+        keepalive: true,
+      }).catch(() => {});
+    }
+  } catch {
+    // エラー送信自体のエラーは無視
+  }
+
+  if (queue.size > 0) scheduleFlush();
+}
+
+function scheduleFlush() {
+  if (flushTimer) return;
+  flushTimer = setTimeout(() => flushClientErrors(false), FLUSH_DELAY_MS);
+
+  if (!listening) {
+    listening = true;
+    // タブを閉じる・裏に回るときは残りをビーコンで
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "hidden") flushClientErrors(true);
+    });
+    window.addEventListener("pagehide", () => flushClientErrors(true));
+  }
+}
+
 export async function reportClientError(error: unknown, context?: ErrorContext) {
   try {
-    const message = error instanceof Error ? error.message : String(error);
-    const stack = error instanceof Error ? error.stack : undefined;
-
-    await fetch("/api/error-report", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        message,
-        stack,
-        page: context?.page ?? window.location.pathname,
-        userAgent: navigator.userAgent,
-        ...context,
-      }),
+    if (ERROR_SAMPLE_RATE <= 0 || Math.random() >= ERROR_SAMPLE_RATE) return;
+
+    const { message, stack } = describe(error);
+    const fingerprint = errorFingerprint(message, stack);
+
+    const queued = queue.get(fingerprint);
+    if (queued) {
+      queued.count++;
+      return;
+    }
+    if (!seen.has(fingerprint)) {
+      if (seen.size >= SESSION_MAX_FINGERPRINTS) return;
+      seen.add(fingerprint);
+    }
+
+    queue.set(fingerprint, {
+      fingerprint,
+      message: message.slice(0, 1000),
+      stack: stack?.slice(0, 4000),
+      page: context?.page ?? window.location.pathname,
+      digest: context?.digest,
+      action: context?.action,
+      userAgent: navigator.userAgent,
+      count: 1,
     });
+    scheduleFlush();
   } catch {
     // エラー送信自体のエラーは無視
   }
@@ -0,0 +1,120 @@
+import { createAdminClient } from "@/lib/admin";
+
+/**
+ * レース一覧（/races）用の日別インデックス
+ *
+ * 開催日一覧・その日のレース・競馬場・グレード・馬場状態を1回で組み立て、
+ * プロセス内の LRU に日付キーで持つ（TTL はページの revalidate と同じ60秒）。
+ * レースの登録・精算時は invalidateRaceDayIndex() でその日を捨てる。
+ * 別インスタンスのキャッシュは TTL で入れ替わる。
+ */
+
+const TTL_MS = 60_000;
+const MAX_DAYS = 32;
+// 開催日一覧の取得幅（1日あたり最大36R なので約1か月分の開催日になる）
+const DATE_ROWS = 1000;
+
+export type RaceDayIndex = {
+  date: string;
+  /** 開催日（新しい順） */
+  dates: string[];
+  /** その日のレース（発走時刻順） */
+  races: any[];
+  courses: string[];
+  grades: string[];
+  venueConditions: any[];
+  builtAt: number;
+};
+
+type DayData = Omit<RaceDayIndex, "dates">;
+type Entry<T> = { value: Promise<T>; expiresAt: number };
+
+// Map の挿入順で LRU（参照したら末尾へ入れ直す）
+const dayCache = new Map<string, Entry<DayData>>();
+let datesEntry: Entry<string[]> | null = null;
+
+function touch<T>(key: string, entry: Entry<T>, cache: Map<string, Entry<T>>) {
+  cache.delete(key);
+  cache.set(key, entry);
+  while (cache.size > MAX_DAYS) {
+    cache.delete(cache.keys().next().value as string);
+  }
+}
+
+/** 開催日一覧（新しい順）。全日付のインデックスで共有する */
+export function getRaceDates(): Promise<string[]> {
+  const now = Date.now();
+  if (datesEntry && datesEntry.expiresAt > now) return datesEntry.value;
+
+  const value = (async () => {
+    const { data, error } = await createAdminClient()
+      .from("races").select("race_date")
+      .order("race_date", { ascending: false }).limit(DATE_ROWS);
+    if (error) throw error;
+    return [...new Set((data ?? []).map((d) => d.race_date as string))];
+  })();
+  const entry = { value, expiresAt: now + TTL_MS };
+  datesEntry = entry;
+  // 失敗した結果は持たない
+  value.catch(() => {
+    if (datesEntry === entry) datesEntry = null;
+  });
+  return value;
+}
+
+async function buildDay(date: string): Promise<DayData> {
+  const admin = createAdminClient();
+  const [{ data: races, error }, { data: venueConditions }] = await Promise.all([
+    admin.from("races").select("*")
+      .eq("race_date", date)
+      .order("post_time", { ascending: true }),
+    admin.from("venue_conditions").select("*").eq("race_date", date),
+  ]);
+  if (error) throw error;
+
+  const dayRaces = races ?? [];
+  return {
+    date,
+    races: dayRaces,
+    courses: [...new Set(dayRaces.map((r) => r.course_name as string))],
+    grades: [...new Set(dayRaces.map((r) => r.grade as string | null).filter((g): g is string => !!g))],
+    venueConditions: venueConditions ?? [],
+    builtAt: Date.now(),
+  };
+}
+
+function getDay(date: string): Promise<DayData> {
+  const now = Date.now();
+  const hit = dayCache.get(date);
+  if (hit && hit.expiresAt > now) {
+    touch(date, hit, dayCache);
+    return hit.value;
+  }
+
+  const value = buildDay(date);
+  const entry = { value, expiresAt: now + TTL_MS };
+  touch(date, entry, dayCache);
+  value.catch(() => {
+    if (dayCache.get(date) === entry) dayCache.delete(date);
+  });
+  return value;
+}
+
+/** 日別インデックス（同じ日の同時リクエストは1回の組み立てを共有する） */
+export async function getRaceDayIndex(date: string): Promise<RaceDayIndex> {
+  const [dates, day] = await Promise.all([getRaceDates(), getDay(date)]);
+  return { ...day, dates };
+}
+
+/**
+ * レースの登録・更新・精算後に呼ぶ。
+ * 日付を渡せばその日だけ、省略すれば全部を捨てる（開催日一覧は常に捨てる）。
+ */
+export function invalidateRaceDayIndex(dates?: string | string[]) {
+  datesEntry = null;
+  if (dates === undefined) {
+    dayCache.clear();
+    return;
+  }
+  for (const d of Array.isArray(dates) ? dates : [dates]) dayCache.delete(d);
+}
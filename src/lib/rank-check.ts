@@ -1,54 +1,95 @@
 import { createAdminClient } from "@/lib/admin";
 import { RANKS } from "@/lib/constants/ranks";
 
+// RANKS の閾値（昇順）。ランク判定はこの配列の二分探索で行う
+const RANK_THRESHOLDS: readonly number[] = RANKS.map((r) => r.threshold);
+
+// .in() に渡すユーザー数（URL長の上限対策）
+const IN_CHUNK = 200;
+
+/** 累計ポイントで到達できる最高ランクの RANKS インデックス（threshold <= points となる最後の位置）。 */
+export function rankIndexForPoints(points: number): number {
+  let lo = 0;
+  let hi = RANK_THRESHOLDS.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (RANK_THRESHOLDS[mid] <= points) lo = mid + 1;
+    else hi = mid;
+  }
+  return Math.max(lo - 1, 0);
+}
+
 /**
- * ランクアップチェック & 通知
- * ポイント加算後に呼び出す
- * @returns 新しい rank_id（変更があった場合）、なければ null
+ * ランクアップチェック & 通知（まとめて）
+ * 精算で cumulative_points が変わったユーザーを渡す。
+ * プロフィールを一括取得して遷移を判定し、rank_id の更新（新ランクごとに1回）と通知の挿入を一括で行う。
+ * @returns ユーザーID → 新しい rank_id（ランクアップしたユーザーのみ）
  */
-export async function checkRankUp(userId: string): Promise<string | null> {
+export async function checkRankUpBatch(userIds: string[]): Promise<Map<string, string>> {
   const admin = createAdminClient();
+  const rankUps = new Map<string, string>();
+  const ids = [...new Set(userIds)];
 
-  const { data: profile } = await admin
-    .from("profiles")
-    .select("rank_id, cumulative_points")
-    .eq("id", userId)
-    .single();
+  const notifications: {
+    user_id: string; type: string; title: string; body: string; is_read: boolean;
+  }[] = [];
+  // 新しい rank_id → ユーザーID
+  const byRank = new Map<string, string[]>();
 
-  if (!profile) return null;
+  for (let i = 0; i < ids.length; i += IN_CHUNK) {
+    const { data: profiles, error } = await admin
+      .from("profiles")
+      .select("id, rank_id, cumulative_points")
+      .in("id", ids.slice(i, i + IN_CHUNK));
+    if (error) throw error;
 
-  const currentRankIdx = RANKS.findIndex((r) => r.id === profile.rank_id);
-  const points = profile.cumulative_points;
+    for (const profile of profiles ?? []) {
+      const currentRankIdx = RANKS.findIndex((r) => r.id === profile.rank_id);
+      const newRankIdx = rankIndexForPoints(profile.cumulative_points);
 
-  // 現在のポイントで到達できる最高ランクを検索
-  let newRankIdx = 0;
-  for (let i = RANKS.length - 1; i >= 0; i--) {
-    if (points >= RANKS[i].threshold) {
-      newRankIdx = i;
-      break;
+      // ランクアップしていない場合
+      if (newRankIdx <= currentRankIdx) continue;
+
+      const newRank = RANKS[newRankIdx];
+      const oldRank = currentRankIdx >= 0 ? RANKS[currentRankIdx] : RANKS[0];
+
+      rankUps.set(profile.id, newRank.id);
+      if (!byRank.has(newRank.id)) byRank.set(newRank.id, []);
+      byRank.get(newRank.id)!.push(profile.id);
+      notifications.push({
+        user_id: profile.id,
+        type: "rank_up",
+        title: "ランクアップ！🎉",
+        body: `${oldRank.icon} ${oldRank.name} → ${newRank.icon} ${newRank.name} にランクアップしました！`,
+        is_read: false,
+      });
     }
   }
 
-  // ランクアップしていない場合
-  if (newRankIdx <= currentRankIdx) return null;
+  // ランク更新（同じランクに上がったユーザーをまとめて）
+  for (const [rankId, users] of byRank) {
+    for (let i = 0; i < users.length; i += IN_CHUNK) {
+      await admin
+        .from("profiles")
+        .update({ rank_id: rankId })
+        .in("id", users.slice(i, i + IN_CHUNK));
+    }
+  }
 
-  const newRank = RANKS[newRankIdx];
-  const oldRank = currentRankIdx >= 0 ? RANKS[currentRankIdx] : RANKS[0];
+  // 通知作成
+  for (let i = 0; i < notifications.length; i += 1000) {
+    await admin.from("notifications").insert(notifications.slice(i, i + 1000));
+  }
 
-  // ランク更新
-  await admin
-    .from("profiles")
-    .update({ rank_id: newRank.id })
-    .eq("id", userId);
+  return rankUps;
+}
 
-  // 通知作成
-  await admin.from("notifications").insert({
-    user_id: userId,
-    type: "rank_up",
-    title: "ランクアップ！🎉",
-    body: `${oldRank.icon} ${oldRank.name} → ${newRank.icon} ${newRank.name} にランクアップしました！`,
-    is_read: false,
-  });
-
-  return newRank.id;
+/**
+ * ランクアップチェック & 通知
+ * ポイント加算後に呼び出す
+ * @returns 新しい rank_id（変更があった場合）、なければ null
+ */
+export async function checkRankUp(userId: string): Promise<string | null> {
+  const rankUps = await checkRankUpBatch([userId]);
+  return rankUps.get(userId) ?? null;
 }
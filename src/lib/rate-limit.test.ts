@@ -0,0 +1,31 @@
+import { describe, expect, it } from "vitest";
+import { createMemoryStore } from "@/lib/rate-limit";
+
+describe("createMemoryStore", () => {
+  it("limit 回まで通し、経過時間に応じて補充する", async () => {
+    const store = createMemoryStore();
+    const t0 = 1_000_000;
+    for (let i = 0; i < 3; i++) {
+      expect((await store.take("k", 3, 60_000, t0)).ok).toBe(true);
+    }
+    const blocked = await store.take("k", 3, 60_000, t0);
+    expect(blocked.ok).toBe(false);
+    expect(blocked.retryAfterMs).toBe(20_000);
+
+    // 1トークン分（20秒）で1回だけ通る
+    expect((await store.take("k", 3, 60_000, t0 + 20_000)).ok).toBe(true);
+    expect((await store.take("k", 3, 60_000, t0 + 20_000)).ok).toBe(false);
+  });
+
+  it("キー数が上限を超えたら古いものから捨てる", async () => {
+    const store = createMemoryStore(2);
+    await store.take("a", 1, 60_000, 0);
+    await store.take("b", 1, 60_000, 0);
+    await store.take("a", 1, 60_000, 0); // a を最近使ったことにする
+    await store.take("c", 1, 60_000, 0);
+    expect(store.size()).toBe(2);
+    // a は残っているので使い切ったまま、b は捨てられたので満タンから
+    expect((await store.take("a", 1, 60_000, 0)).ok).toBe(false);
+    expect((await store.take("b", 1, 60_000, 0)).ok).toBe(true);
+  });
+});
@@ -1,31 +1,196 @@
-const rateMap = new Map<string, { count: number; resetAt: number }>();
+/**
+ * レート制限（トークンバケット）
+ *
+ * limit 回分のトークンを持ち、windowMs かけて満タンまで連続的に補充する。
+ * 固定窓と違って窓の切り替わり直後にまとめて通ることがない。
+ *
+ * 保存先は差し替え可能:
+ *   - RATE_LIMIT_REDIS_URL（と RATE_LIMIT_REDIS_TOKEN）があれば Redis 互換の REST エンドポイント
+ *     （Upstash / ローカルの serverless-redis-http など）で全インスタンス共通
+ *   - なければプロセス内メモリ（キー数の上限つき LRU）
+ * Redis が落ちている間はメモリにフォールバックする（インスタンス単位の制限にはなる）。
+ */
+
+export type RateLimitResult = { ok: boolean; remaining: number; retryAfterMs: number };
 
 type Options = {
   limit?: number;
   windowMs?: number;
 };
 
-export function rateLimit(key: string, options: Options = {}): { ok: boolean; remaining: number } {
-  const { limit = 30, windowMs = 60_000 } = options;
-  const now = Date.now();
+export type RateLimitStore = {
+  name: string;
+  /** トークンを1つ取る */
+  take(key: string, limit: number, windowMs: number, now: number): Promise<RateLimitResult>;
+};
+
+// ============================================================
+// プロセス内メモリ
+// ============================================================
+
+type Bucket = { tokens: number; updatedAt: number };
+
+const MEMORY_MAX_KEYS = 10_000;
+
+function refill(bucket: Bucket, limit: number, windowMs: number, now: number) {
+  const elapsed = Math.max(0, now - bucket.updatedAt);
+  bucket.tokens = Math.min(limit, bucket.tokens + (elapsed * limit) / windowMs);
+  bucket.updatedAt = now;
+}
+
+/** 1トークン取る（バケットは書き換える） */
+function takeToken(bucket: Bucket, limit: number, windowMs: number, now: number): RateLimitResult {
+  refill(bucket, limit, windowMs, now);
+  if (bucket.tokens >= 1) {
+    bucket.tokens -= 1;
+    return { ok: true, remaining: Math.floor(bucket.tokens), retryAfterMs: 0 };
+  }
+  return { ok: false, remaining: 0, retryAfterMs: Math.ceil(((1 - bucket.tokens) * windowMs) / limit) };
+}
+
+export function createMemoryStore(maxKeys = MEMORY_MAX_KEYS): RateLimitStore & { size(): number } {
+  // Map の挿入順で LRU（触ったキーは末尾へ入れ直し、溢れたら先頭から捨てる）
+  const buckets = new Map<string, Bucket>();
+
+  return {
+    name: "memory",
+    async take(key, limit, windowMs, now) {
+      let bucket = buckets.get(key);
+      if (bucket) {
+        buckets.delete(key);
+      } else {
+        bucket = { tokens: limit, updatedAt: now };
+      }
+      const result = takeToken(bucket, limit, windowMs, now);
+      buckets.set(key, bucket);
+      while (buckets.size > maxKeys) {
+        buckets.delete(buckets.keys().next().value as string);
+      }
+      return result;
+    },
+    size() {
+      return buckets.size;
+    },
+  };
+}
+
+// ============================================================
+// Redis 互換 REST（EVAL で読み書きを1往復・原子的に）
+// ============================================================
 
-  const entry = rateMap.get(key);
-  if (!entry || now > entry.resetAt) {
-    rateMap.set(key, { count: 1, resetAt: now + windowMs });
-    return { ok: true, remaining: limit - 1 };
+// KEYS[1] = バケット, ARGV = limit, windowMs, now → {ok, remaining, retryAfterMs}
+const TOKEN_BUCKET_LUA = `
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local b = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(b[1]) or limit
+local updated = tonumber(b[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - updated) * limit / window)
+local ok = 0
+local retry = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  ok = 1
+else
+  retry = math.ceil((1 - tokens) * window / limit)
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', now)
+redis.call('PEXPIRE', KEYS[1], window)
+return {ok, math.floor(tokens), retry}
+`;
+
+export function createRedisRestStore(url: string, token?: string, prefix = "rl:"): RateLimitStore {
+  return {
+    name: "redis",
+    async take(key, limit, windowMs, now) {
+      const res = await fetch(url, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+        body: JSON.stringify(["EVAL", TOKEN_BUCKET_LUA, "1", prefix + key, String(limit), String(windowMs), String(now)]),
+        cache: "no-store",
+        signal: AbortSignal.timeout(500),
+      });
+      if (!res.ok) throw new Error(`rate-limit store HTTP ${res.status}`);
+      const { result, error } = await res.json();
+      if (error) throw new Error(`rate-limit store: ${error}`);
+      const [ok, remaining, retryAfterMs] = result as number[];
+      return { ok: ok === 1, remaining, retryAfterMs };
+    },
+  };
+}
+
+// ============================================================
+// キーごとの集計（メモリ内・上限つき）
+// ============================================================
+
+export type RateLimitMetric = { allowed: number; blocked: number; lastSeenAt: number };
+
+const METRICS_MAX_KEYS = 2_000;
+const metrics = new Map<string, RateLimitMetric>();
+
+function record(key: string, ok: boolean, now: number) {
+  const m = metrics.get(key) ?? { allowed: 0, blocked: 0, lastSeenAt: now };
+  metrics.delete(key);
+  if (ok) m.allowed++;
+  else m.blocked++;
+  m.lastSeenAt = now;
+  metrics.set(key, m);
+  while (metrics.size > METRICS_MAX_KEYS) {
+    metrics.delete(metrics.keys().next().value as string);
   }
+}
+
+/** このインスタンスで見たキーの通過・拒否数（拒否の多い順） */
+export function getRateLimitMetrics(top = 50): ({ key: string } & RateLimitMetric)[] {
+  return [...metrics.entries()]
+    .map(([key, m]) => ({ key, ...m }))
+    .sort((a, b) => b.blocked - a.blocked || b.allowed - a.allowed)
+    .slice(0, top);
+}
+
+// ============================================================
+// 入口
+// ============================================================
+
+const memoryStore = createMemoryStore();
+let store: RateLimitStore = process.env.RATE_LIMIT_REDIS_URL
+  ? createRedisRestStore(process.env.RATE_LIMIT_REDIS_URL, process.env.RATE_LIMIT_REDIS_TOKEN)
+  : memoryStore;
+
+/** 保存先の差し替え（テスト・別バックエンド用） */
+export function setRateLimitStore(next: RateLimitStore) {
+  store = next;
+}
+
+export async function rateLimit(key: string, options: Options = {}): Promise<RateLimitResult> {
+  const { limit = 30, windowMs = 60_000 } = options;
+  const now = Date.now();
 
-  entry.count++;
-  if (entry.count > limit) {
-    return { ok: false, remaining: 0 };
+  let result: RateLimitResult;
+  try {
+    result = await store.take(key, limit, windowMs, now);
+  } catch (err) {
+    console.error(`[rate-limit] ${store.name} store failed, falling back to memory:`, err);
+    result = await memoryStore.take(key, limit, windowMs, now);
   }
 
-  return { ok: true, remaining: limit - entry.count };
+  record(key, result.ok, now);
+  return result;
 }
 
-export function rateLimitResponse() {
+export function rateLimitResponse(retryAfterMs?: number) {
   return new Response(
     JSON.stringify({ error: "リクエスト回数の上限に達しました。しばらくお待ちください。" }),
-    { status: 429, headers: { "Content-Type": "application/json" } }
+    {
+      status: 429,
+      headers: {
+        "Content-Type": "application/json",
+        ...(retryAfterMs ? { "Retry-After": String(Math.ceil(retryAfterMs / 1000)) } : {}),
+      },
+    }
   );
 }
@@ -1,20 +1,17 @@
 import { SupabaseClient } from "@supabase/supabase-js";
-import { checkAndGrantBadges } from "@/lib/badges";
-import { checkRankUp } from "@/lib/rank-check";
+import { checkAndGrantBadgesBatch, type BadgeExtra } from "@/lib/badges";
+import { checkRankUpBatch } from "@/lib/rank-check";
+import { invalidateRaceDayIndex } from "@/lib/race-day-index";
 import { settleRaceRatingWithSupabase } from "@/lib/rating/supabase-deps";
 import {
-  getWinPointsByOdds,
-  getPlacePointsByOdds,
-  getQuinellaPointsByOdds,
-  getWidePointsByOdds,
-  getTrioPointsByOdds,
-  getBackMultiplier,
-  getDangerPoints,
-  getGradeBonus,
-  getExactaBonus,
-  getTrifectaBonus,
-  POINT_RULES,
-} from "@/lib/constants/ranks";
+  buildRaceContext,
+  scoreVote,
+  streakBonus,
+  weeklyStreakBonus,
+  DEFAULT_POINT_TABLES,
+  type PickUpdate,
+  type PointTables,
+} from "@/lib/services/settle-scoring";
 
 type SettleResult = {
   success: boolean;
@@ -23,10 +20,117 @@ type SettleResult = {
   errors: string[];
 };
 
+export type SettleOptions = {
+  /** 点数表（既定は POINT_RULES）。 */
+  tables?: PointTables;
+  /** settle_race_apply 1回あたりの投票数。 */
+  chunkSize?: number;
+};
+
+// PostgREST の max-rows（既定1000）に収まるページ幅
+const PAGE_SIZE = 1000;
+// .in() に渡すID数（URL長の上限対策）
+const IN_CHUNK = 200;
+
+function chunked<T>(items: T[], size: number): T[][] {
+  const out: T[][] = [];
+  for (let i = 0; i < items.length; i += size) out.push(items.slice(i, i + size));
+  return out;
+}
+
+/** pending の投票を vote_picks 付きで全件取得（max-rows を超える分はページング）。 */
+async function fetchPendingVotes(supabase: SupabaseClient, raceId: string) {
+  const votes: any[] = [];
+  for (let from = 0; ; from += PAGE_SIZE) {
+    const { data, error } = await supabase
+      .from("votes").select("*, vote_picks(*)")
+      .eq("race_id", raceId).eq("status", "pending")
+      .order("id", { ascending: true })
+      .range(from, from + PAGE_SIZE - 1);
+    if (error) throw error;
+    votes.push(...(data ?? []));
+    if (!data || data.length < PAGE_SIZE) return votes;
+  }
+}
+
+/** 同じユーザーの複数投票ぶんのバッジ判定材料をまとめる。 */
+function mergeBadgeExtra(a: BadgeExtra | undefined, b: BadgeExtra): BadgeExtra {
+  if (!a) return b;
+  const maxOf = (x?: number, y?: number) => (x === undefined ? y : y === undefined ? x : Math.max(x, y));
+  return {
+    isPerfect: a.isPerfect || b.isPerfect,
+    isUpset: a.isUpset || b.isUpset,
+    isG1Win: a.isG1Win || b.isG1Win,
+    winOdds: maxOf(a.winOdds, b.winOdds),
+    quinellaOdds: maxOf(a.quinellaOdds, b.quinellaOdds),
+    wideCount: (a.wideCount ?? 0) + (b.wideCount ?? 0),
+    trioOdds: maxOf(a.trioOdds, b.trioOdds),
+  };
+}
+
+/**
+ * 週間大会の連続的中数（このレースを含む）をユーザーごとに返す。
+ * 直前のレースから逆順に見て、的中が途切れたところで止める。
+ */
+async function fetchWeeklyStreaks(
+  supabase: SupabaseClient,
+  contestId: string,
+  raceOrder: number,
+  userIds: string[],
+): Promise<Map<string, number>> {
+  const { data: prevRaces } = await supabase
+    .from("contest_races")
+    .select("race_id, race_order")
+    .eq("contest_id", contestId)
+    .lt("race_order", raceOrder)
+    .order("race_order", { ascending: false });
+  const prevRaceIds = (prevRaces ?? []).map((cr) => cr.race_id);
+
+  // user_id → 的中した過去レース
+  const hitRaces = new Map<string, Set<string>>();
+  if (prevRaceIds.length > 0) {
+    for (const ids of chunked(userIds, IN_CHUNK)) {
+      const { data } = await supabase
+        .from("votes")
+        .select("user_id, race_id")
+        .in("race_id", prevRaceIds)
+        .in("user_id", ids)
+        .eq("status", "settled_hit");
+      for (const v of data ?? []) {
+        if (!hitRaces.has(v.user_id)) hitRaces.set(v.user_id, new Set());
+        hitRaces.get(v.user_id)!.add(v.race_id);
+      }
+    }
+  }
+
+  const streaks = new Map<string, number>();
+  for (const userId of userIds) {
+    const hits = hitRaces.get(userId);
+    let n = 1;
+    if (hits) {
+      for (const raceId of prevRaceIds) {
+        if (!hits.has(raceId)) break;
+        n++;
+      }
+    }
+    streaks.set(userId, n);
+  }
+  return streaks;
+}
+
+/**
+ * レースを精算する。
+ * 採点は全投票ぶんメモリ上で行い（settle-scoring.ts）、書き込みは
+ * settle_race_apply（supabase/migrations/20261017_settle_race_apply.sql）でチャンクごとに一括で行う。
+ * settle_race_apply は pending の投票だけを精算するので、再実行しても二重加算しない。
+ */
 export async function settleRace(
   supabase: SupabaseClient,
-  raceId: string
+  raceId: string,
+  options: SettleOptions = {}
 ): Promise<SettleResult> {
+  const tables = options.tables ?? DEFAULT_POINT_TABLES;
+  const chunkSize = options.chunkSize ?? 1000;
   const errors: string[] = [];
   let settledVotes = 0;
   let totalPointsAwarded = 0;
@@ -39,9 +143,6 @@ export async function settleRace(
     return { success: false, settled_votes: 0, total_points_awarded: 0, errors: ["レースが見つかりません"] };
   }
 
-  // グレードボーナス（このレースの全的中に加算）
-  const gradeBonus = getGradeBonus(race.grade);
-
   // 2. レース結果を取得
   const { data: results, error: resultsErr } = await supabase
     .from("race_results")
@@ -59,561 +160,196 @@ export async function settleRace(
     .select("*")
     .eq("race_id", raceId);
 
-  // 払戻情報をマップ化
-  const payoutMap = new Map<string, { combination: string; payout_amount: number }[]>();
-  for (const p of payouts ?? []) {
-    if (!payoutMap.has(p.bet_type)) payoutMap.set(p.bet_type, []);
-    payoutMap.get(p.bet_type)!.push({ combination: p.combination, payout_amount: p.payout_amount });
-  }
-
-  // 結果情報を整理
-  const winner = results.find((r) => r.finish_position === 1);
-  const winnerEntryId = winner?.race_entry_id;
-  const winnerOdds = winner?.race_entries?.odds ?? 1;
-  const winnerPopularity = winner?.race_entries?.popularity ?? 1;
-
-  const top3 = results.filter((r) => r.finish_position <= 3);
-  const top3EntryIds = top3.map((r) => r.race_entry_id);
-  const top3PostNumbers = top3.map((r) => r.race_entries?.post_number).filter(Boolean).sort((a, b) => a - b);
-
-  // 1着・2着の馬番（馬連用）
-  const first = results.find((r) => r.finish_position === 1);
-  const second = results.find((r) => r.finish_position === 2);
-  const firstPostNum = first?.race_entries?.post_number;
-  const secondPostNum = second?.race_entries?.post_number;
-
-  if (!winnerEntryId) {
+  // 結果・払戻を1回だけ整理（全投票で共有）
+  const ctx = buildRaceContext(race, results, payouts ?? [], tables);
+  if (!ctx) {
     return { success: false, settled_votes: 0, total_points_awarded: 0, errors: ["1着が見つかりません"] };
   }
 
-  // エントリー情報をマップ化
-  const entryMap = new Map<string, { post_number: number; odds: number | null; popularity: number | null }>();
-  for (const r of results) {
-    if (r.race_entries) {
-      entryMap.set(r.race_entry_id, {
-        post_number: r.race_entries.post_number,
-        odds: r.race_entries.odds,
-        popularity: r.race_entries.popularity,
-      });
-    }
-  }
-
   // 4. 全投票を取得（pending のみ）
-  const { data: votes, error: votesErr } = await supabase
-    .from("votes").select("*, vote_picks(*)").eq("race_id", raceId).eq("status", "pending");
-
-  if (votesErr) {
+  let votes: any[];
+  try {
+    votes = await fetchPendingVotes(supabase, raceId);
+  } catch (votesErr: any) {
     return { success: false, settled_votes: 0, total_points_awarded: 0, errors: [votesErr.message] };
   }
 
-  if (!votes || votes.length === 0) {
+  if (votes.length === 0) {
     await supabase.from("races").update({ status: "finished" }).eq("id", raceId);
+    invalidateRaceDayIndex(race.race_date);
     return { success: true, settled_votes: 0, total_points_awarded: 0, errors: [] };
   }
 
-  // 5. 各投票のポイント計算
-  for (const vote of votes) {
-    try {
-      let votePoints = 0;
-      const transactions: { reason: string; amount: number; description: string }[] = [];
-      let anyHit = false;
-      let winHit = false;
-      let allPlaceHit = true;
-      let dangerHit = false;
-
-      // 馬券バッジ用のオッズ記録
-      let hitWinOdds: number | undefined;
-      let hitQuinellaOdds: number | undefined;
-      let hitWideCount = 0;
-      let hitTrioOdds: number | undefined;
-
-      const picks = vote.vote_picks ?? [];
-
-      // 各タイプのpickを取得
-      const winPick = picks.find((p: any) => p.pick_type === "win");
-      const placePicks = picks.filter((p: any) => p.pick_type === "place");
-      const backPicks = picks.filter((p: any) => p.pick_type === "back");
-      const dangerPickItem = picks.find((p: any) => p.pick_type === "danger");
-
-      const backCount = backPicks.length;
-
-      // --- 単勝的中判定（オッズ連動）---
-      if (winPick) {
-        if (winPick.race_entry_id === winnerEntryId) {
-          const basePts = getWinPointsByOdds(winnerOdds);
-          const pts = basePts + gradeBonus;
-          votePoints += pts;
-          winHit = true;
-          anyHit = true;
-          hitWinOdds = winnerOdds; // バッジ用に記録
-
-          const gradeLabel = gradeBonus > 0 ? `（${race.grade}+${gradeBonus}）` : "";
-          transactions.push({
-            reason: "win_hit",
-            amount: pts,
-            description: `単勝的中（${winnerOdds}倍）+${basePts}P${gradeLabel}`,
-          });
-
-          await supabase.from("vote_picks")
-            .update({ is_hit: true, points_earned: pts }).eq("id", winPick.id);
-        } else {
-          await supabase.from("vote_picks")
-            .update({ is_hit: false, points_earned: 0 }).eq("id", winPick.id);
-        }
-      }
-
-      // --- 複勝的中判定（◎が3着以内）---
-      if (winPick && top3EntryIds.includes(winPick.race_entry_id) && !winHit) {
-        // ◎が3着以内だが1着ではない場合（単勝外れ、複勝的中）
-        const winEntryInfo = entryMap.get(winPick.race_entry_id);
-        const winPostNum = winEntryInfo?.post_number;
-        const placePayout = payoutMap.get("place")?.find(p => p.combination === String(winPostNum));
-        const placeOdds = placePayout ? placePayout.payout_amount / 100 : 1.5;
-
-        const basePts = getPlacePointsByOdds(placeOdds);
-        const pts = basePts + gradeBonus;
-        votePoints += pts;
-        anyHit = true;
-
-        const gradeLabel = gradeBonus > 0 ? `（${race.grade}+${gradeBonus}）` : "";
-        transactions.push({
-          reason: "place_hit",
-          amount: pts,
-          description: `複勝的中（◎${winPostNum}番→3着以内、${placeOdds.toFixed(1)}倍）+${basePts}P${gradeLabel}`,
-        });
-      }
-
-      // --- 対抗（○）の的中判定（ポイントなし、is_hitのみ更新）---
-      for (const pp of placePicks) {
-        const isPlaceHit = top3EntryIds.includes(pp.race_entry_id);
-        if (!isPlaceHit) allPlaceHit = false;
-        await supabase.from("vote_picks")
-          .update({ is_hit: isPlaceHit, points_earned: 0 }).eq("id", pp.id);
-      }
-      if (placePicks.length === 0) allPlaceHit = false;
-
-      // --- 馬連的中判定（◎○が1-2着）+ 馬単ボーナス ---
-      if (winPick && placePicks.length > 0 && firstPostNum && secondPostNum) {
-        const winPostNum = entryMap.get(winPick.race_entry_id)?.post_number;
-        
-        for (const pp of placePicks) {
-          const placePostNum = entryMap.get(pp.race_entry_id)?.post_number;
-          
-          // ◎○が1-2着（順不同）
-          const isQuinellaHit = 
-            (winPostNum === firstPostNum && placePostNum === secondPostNum) ||
-            (winPostNum === secondPostNum && placePostNum === firstPostNum);
-          
-          if (isQuinellaHit) {
-            // 馬連払戻からオッズを取得
-            const combo = [winPostNum, placePostNum].sort((a, b) => a! - b!).join("-");
-            const quinellaPayout = payoutMap.get("quinella")?.find(p => 
-              p.combination.replace(/[ー－]/g, "-") === combo
-            );
-            const quinellaOdds = quinellaPayout ? quinellaPayout.payout_amount / 100 : 10;
-
-            let basePts = getQuinellaPointsByOdds(quinellaOdds);
-            
-            // 馬単ボーナス: 1着◎、2着○の順番通りなら2倍
-            const isExactaHit = winPostNum === firstPostNum && placePostNum === secondPostNum;
-            if (isExactaHit) {
-              basePts = Math.floor(basePts * getExactaBonus());
-            }
-            
-            const pts = basePts + gradeBonus;
-            votePoints += pts;
-            anyHit = true;
-            hitQuinellaOdds = quinellaOdds; // バッジ用に記録
-
-            const gradeLabel = gradeBonus > 0 ? `（${race.grade}+${gradeBonus}）` : "";
-            const exactaLabel = isExactaHit ? `【馬単ボーナス×${getExactaBonus()}】` : "";
-            transactions.push({
-              reason: isExactaHit ? "exacta_hit" : "quinella_hit",
-              amount: pts,
-              description: `馬連的中（${quinellaOdds.toFixed(1)}倍）${exactaLabel}+${basePts}P${gradeLabel}`,
-            });
-            break; // 馬連は1回のみ
-          }
-        }
-      }
+  const userIds = [...new Set(votes.map((v) => v.user_id as string))];
 
-      // --- ワイド的中判定（◎○が3着以内）---
-      if (winPick && placePicks.length > 0) {
-        const winInTop3 = top3EntryIds.includes(winPick.race_entry_id);
-        const winPostNum = entryMap.get(winPick.race_entry_id)?.post_number;
-
-        for (const pp of placePicks) {
-          const placeInTop3 = top3EntryIds.includes(pp.race_entry_id);
-          const placePostNum = entryMap.get(pp.race_entry_id)?.post_number;
-
-          if (winInTop3 && placeInTop3 && winPostNum && placePostNum) {
-            // ワイド払戻からオッズを取得
-            const combo = [winPostNum, placePostNum].sort((a, b) => a - b).join("-");
-            const widePayout = payoutMap.get("wide")?.find(p => 
-              p.combination.replace(/[ー－]/g, "-") === combo
-            );
-            const wideOdds = widePayout ? widePayout.payout_amount / 100 : 3;
-
-            const basePts = getWidePointsByOdds(wideOdds);
-            const pts = basePts + gradeBonus;
-            votePoints += pts;
-            anyHit = true;
-            hitWideCount++; // バッジ用にカウント
-
-            const gradeLabel = gradeBonus > 0 ? `（${race.grade}+${gradeBonus}）` : "";
-            transactions.push({
-              reason: "wide_hit",
-              amount: pts,
-              description: `ワイド的中（${wideOdds.toFixed(1)}倍）+${basePts}P${gradeLabel}`,
-            });
-          }
-        }
-      }
-
-      // --- 三連複的中判定（◎○○/◎○△/◎△△が1-2-3着）+ 3連単ボーナス ---
-      if (winPick && top3PostNumbers.length === 3) {
-        const winInTop3 = top3EntryIds.includes(winPick.race_entry_id);
-        
-        if (winInTop3) {
-          // ◎以外の3着以内のエントリーを取得
-          const otherTop3 = top3EntryIds.filter(id => id !== winPick.race_entry_id);
-          
-          // ○で的中した馬
-          const placeHitsInTop3 = placePicks.filter((pp: any) => otherTop3.includes(pp.race_entry_id));
-          // △で的中した馬
-          const backHitsInTop3 = backPicks.filter((bp: any) => otherTop3.includes(bp.race_entry_id));
-
-          // 三連複的中条件: ◎が3着以内 + 残り2頭が○または△で的中
-          const totalHits = placeHitsInTop3.length + backHitsInTop3.length;
-          
-          if (totalHits >= 2) {
-            // 三連複払戻からオッズを取得
-            const trioCombination = top3PostNumbers.join("-");
-            const trioPayout = payoutMap.get("trio")?.find(p => 
-              p.combination.replace(/[ー－]/g, "-").split("-").sort().join("-") === trioCombination
-            );
-            const trioOdds = trioPayout ? trioPayout.payout_amount / 100 : 30;
-
-            let basePts = getTrioPointsByOdds(trioOdds);
-            
-            // 3連単ボーナス判定: 1着◎、2着○、3着○or△の順番通り
-            const winEntryId = winPick.race_entry_id;
-            const secondEntryId = second?.race_entry_id;
-            const thirdResult = results.find((r) => r.finish_position === 3);
-            const thirdEntryId = thirdResult?.race_entry_id;
-            
-            const isWinFirst = winEntryId === first?.race_entry_id;
-            const secondIsPlace = placePicks.some((pp: any) => pp.race_entry_id === secondEntryId);
-            const thirdIsPlace = placePicks.some((pp: any) => pp.race_entry_id === thirdEntryId);
-            const thirdIsBack = backPicks.some((bp: any) => bp.race_entry_id === thirdEntryId);
-            
-            let trifectaBonus = 1.0;
-            let trifectaLabel = "";
-            
-            // 1着◎、2着○、3着○ → 5倍
-            if (isWinFirst && secondIsPlace && thirdIsPlace) {
-              trifectaBonus = getTrifectaBonus("place");
-              trifectaLabel = `【3連単ボーナス×${trifectaBonus}】`;
-            }
-            // 1着◎、2着○、3着△ → 3倍
-            else if (isWinFirst && secondIsPlace && thirdIsBack) {
-              trifectaBonus = getTrifectaBonus("back");
-              trifectaLabel = `【3連単ボーナス×${trifectaBonus}】`;
-            }
-            
-            // 3連単ボーナス適用
-            if (trifectaBonus > 1.0) {
-              basePts = Math.floor(basePts * trifectaBonus);
-            }
-            // △が含まれる場合は倍率適用（3連単ボーナスがない場合のみ）
-            else if (backHitsInTop3.length > 0) {
-              const multiplier = getBackMultiplier(backCount);
-              basePts = Math.floor(basePts * multiplier);
-            }
-
-            const pts = basePts + gradeBonus;
-            votePoints += pts;
-            anyHit = true;
-            hitTrioOdds = trioOdds; // バッジ用に記録
-
-            const gradeLabel = gradeBonus > 0 ? `（${race.grade}+${gradeBonus}）` : "";
-            const backLabel = (backHitsInTop3.length > 0 && trifectaBonus === 1.0) ? `（△${backCount}頭×${getBackMultiplier(backCount)}）` : "";
-            transactions.push({
-              reason: trifectaBonus > 1.0 ? "trifecta_hit" : "trio_hit",
-              amount: pts,
-              description: `三連複的中（${trioOdds.toFixed(1)}倍）${trifectaLabel}+${basePts}P${backLabel}${gradeLabel}`,
-            });
-          }
-        }
-      }
+  // 5. 連続的中・大会の参照データをまとめて取得
+  const streakByUser = new Map<string, number>();
+  for (const ids of chunked(userIds, IN_CHUNK)) {
+    const { data: profiles } = await supabase
+      .from("profiles").select("id, current_streak").in("id", ids);
+    for (const p of profiles ?? []) streakByUser.set(p.id, p.current_streak ?? 0);
+  }
 
-      // --- △（抑え）のis_hit更新 ---
-      for (const bp of backPicks) {
-        const isHit = top3EntryIds.includes(bp.race_entry_id);
-        await supabase.from("vote_picks")
-          .update({ is_hit: isHit, points_earned: 0 }).eq("id", bp.id);
-      }
+  const now = new Date();
+  const yearMonth = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, "0")}`;
+  const { data: contest } = await supabase
+    .from("contests").select("id, min_votes")
+    .eq("year_month", yearMonth).eq("status", "active").eq("type", "monthly").maybeSingle();
 
-      // --- 危険馬的中判定（人気別ポイント）---
-      if (dangerPickItem) {
-        const dangerFinish = results.find((r) => r.race_entry_id === dangerPickItem.race_entry_id);
-        if (dangerFinish && dangerFinish.finish_position > 3) {
-          const dangerPop = entryMap.get(dangerPickItem.race_entry_id)?.popularity ?? 99;
-          const basePts = getDangerPoints(dangerPop);
-          const pts = basePts + gradeBonus;
-          votePoints += pts;
-          dangerHit = true;
-          anyHit = true;
-
-          const gradeLabel = gradeBonus > 0 ? `（${race.grade}+${gradeBonus}）` : "";
-          const popLabel = dangerPop !== 99 ? `${dangerPop}番人気` : "人気不明";
-          transactions.push({
-            reason: "danger_hit",
-            amount: pts,
-            description: `危険馬的中（${popLabel}）+${basePts}P${gradeLabel}`,
-          });
-          await supabase.from("vote_picks")
-            .update({ is_hit: true, points_earned: pts }).eq("id", dangerPickItem.id);
-        } else {
-          await supabase.from("vote_picks")
-            .update({ is_hit: false, points_earned: 0 }).eq("id", dangerPickItem.id);
-        }
-      }
+  const { data: weeklyContestRace } = await supabase
+    .from("contest_races")
+    .select("contest_id, race_order")
+    .eq("race_id", raceId)
+    .maybeSingle();
+
+  let weeklyContestId: string | null = null;
+  if (weeklyContestRace) {
+    const { data: weeklyContest } = await supabase
+      .from("contests")
+      .select("id")
+      .eq("id", weeklyContestRace.contest_id)
+      .eq("type", "weekly")
+      .eq("status", "active")
+      .maybeSingle();
+    weeklyContestId = weeklyContest?.id ?? null;
+  }
 
-      // --- 完全的中ボーナス ---
-      const isPerfect = winHit && allPlaceHit && dangerHit;
-      if (isPerfect) {
-        votePoints += POINT_RULES.perfect;
-        transactions.push({
-          reason: "perfect_bonus",
-          amount: POINT_RULES.perfect,
-          description: `完全的中ボーナス +${POINT_RULES.perfect}P`,
-        });
-      }
+  // 週間大会の連続的中数（過去レースの的中をまとめて取得）
+  const weeklyStreaks = weeklyContestId
+    ? await fetchWeeklyStreaks(supabase, weeklyContestId, weeklyContestRace!.race_order, userIds)
+    : new Map<string, number>();
+
+  // 6. 全投票をメモリ上で採点
+  type VoteRow = {
+    vote_id: string; user_id: string; status: string; earned_points: number; is_perfect: boolean;
+    win_hit: boolean; place_hit_count: number; danger_hit: boolean; new_streak: number;
+    weekly_points: number; weekly_streak_bonus: number; created_at: string;
+  };
+  type TxRow = { vote_id: string; user_id: string; amount: number; reason: string; description: string };
+  type Settled = {
+    row: VoteRow;
+    picks: (PickUpdate & { vote_id: string })[];
+    transactions: TxRow[];
+    badges: BadgeExtra;
+  };
+
+  const settled: Settled[] = [];
+  for (const vote of votes) {
+    try {
+      const score = scoreVote(vote.vote_picks ?? [], ctx, tables);
+      const transactions: TxRow[] = score.transactions.map((tx) => ({
+        vote_id: vote.id, user_id: vote.user_id, ...tx,
+      }));
 
       // --- 連続的中ボーナス ---
-      if (winHit) {
-        const { data: profile } = await supabase
-          .from("profiles").select("current_streak, best_streak")
-          .eq("id", vote.user_id).single();
-
-        const newStreak = (profile?.current_streak ?? 0) + 1;
-
-        if (newStreak > 0 && newStreak % 3 === 0) {
-          votePoints += POINT_RULES.streak3;
+      let newStreak = 0;
+      if (score.winHit) {
+        newStreak = (streakByUser.get(vote.user_id) ?? 0) + 1;
+        const bonus = streakBonus(tables, newStreak);
+        if (bonus > 0) {
+          score.points += bonus;
           transactions.push({
-            reason: "streak_bonus",
-            amount: POINT_RULES.streak3,
-            description: `${newStreak}連続的中ボーナス +${POINT_RULES.streak3}P`,
+            vote_id: vote.id, user_id: vote.user_id,
+            reason: "streak_bonus", amount: bonus,
+            description: `${newStreak}連続的中ボーナス +${bonus}P`,
           });
         }
-
-        await supabase.from("profiles").update({
-          current_streak: newStreak,
-          best_streak: Math.max(newStreak, profile?.best_streak ?? 0),
-        }).eq("id", vote.user_id);
-      } else {
-        await supabase.from("profiles").update({ current_streak: 0 }).eq("id", vote.user_id);
       }
-
-      // 6. 投票ステータスを更新
-      const status = anyHit ? "settled_hit" : "settled_miss";
-      await supabase.from("votes").update({
-        status, earned_points: votePoints, is_perfect: isPerfect,
-        settled_at: new Date().toISOString(),
-      }).eq("id", vote.id);
-
-      // 7. ポイント履歴を登録（エラーチェック追加）
-      if (transactions.length > 0) {
-        const { error: txError } = await supabase.from("points_transactions").insert(
-          transactions.map((tx) => ({
-            user_id: vote.user_id, vote_id: vote.id, race_id: raceId,
-            amount: tx.amount, reason: tx.reason, description: tx.description,
-          }))
-        );
-        
-        if (txError) {
-          console.error(`[settle-race] points_transactions insert error for vote ${vote.id}:`, txError);
-          errors.push(`投票 ${vote.id} のトランザクション登録エラー: ${txError.message}`);
-        }
-      }
-
-      // 8. プロフィールのポイント・的中数を更新
-      const { data: currentProfile } = await supabase
-        .from("profiles")
-        .select("cumulative_points, monthly_points, total_votes, win_hits, place_hits, danger_hits")
-        .eq("id", vote.user_id).single();
-
-      if (currentProfile) {
-        const placeHitCount = placePicks.filter((pp: any) => top3EntryIds.includes(pp.race_entry_id)).length;
-
-        await supabase.from("profiles").update({
-          cumulative_points: currentProfile.cumulative_points + votePoints,
-          monthly_points: currentProfile.monthly_points + votePoints,
-          total_votes: currentProfile.total_votes + 1,
-          win_hits: currentProfile.win_hits + (winHit ? 1 : 0),
-          place_hits: currentProfile.place_hits + placeHitCount,
-          danger_hits: currentProfile.danger_hits + (dangerHit ? 1 : 0),
-        }).eq("id", vote.user_id);
-      }
-
-      // 9. 大会エントリーを更新
-      const now = new Date();
-      const yearMonth = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, "0")}`;
-
-      const { data: contest } = await supabase
-        .from("contests").select("id, min_votes")
-        .eq("year_month", yearMonth).eq("status", "active").eq("type", "monthly").maybeSingle();
-
-      if (contest) {
-        const { data: existing } = await supabase
-          .from("contest_entries").select("id, total_points, vote_count")
-          .eq("contest_id", contest.id).eq("user_id", vote.user_id).maybeSingle();
-
-        if (existing) {
-          const newVoteCount = existing.vote_count + 1;
-          await supabase.from("contest_entries").update({
-            total_points: existing.total_points + votePoints,
-            vote_count: newVoteCount,
-            is_eligible: newVoteCount >= contest.min_votes,
-          }).eq("id", existing.id);
-        } else {
-          await supabase.from("contest_entries").insert({
-            contest_id: contest.id, user_id: vote.user_id,
-            total_points: votePoints, vote_count: 1,
-            is_eligible: 1 >= contest.min_votes,
+      streakByUser.set(vote.user_id, newStreak);
+
+      // --- 週間大会の連続的中ボーナス（到達時のみ加算）---
+      let weeklyBonus = 0;
+      if (weeklyContestId && score.anyHit) {
+        const consecutiveHits = weeklyStreaks.get(vote.user_id) ?? 1;
+        weeklyBonus = weeklyStreakBonus(consecutiveHits);
+        if (weeklyBonus > 0) {
+          transactions.push({
+            vote_id: vote.id, user_id: vote.user_id,
+            reason: "weekly_streak_bonus", amount: weeklyBonus,
+            description: `週間大会 ${consecutiveHits}連続的中ボーナス +${weeklyBonus}P`,
           });
         }
       }
 
-      // 9b. 週間大会エントリーを更新
-      const { data: weeklyContestRace } = await supabase
-        .from("contest_races")
-        .select("contest_id, race_order")
-        .eq("race_id", raceId)
-        .maybeSingle();
-
-      if (weeklyContestRace) {
-        const { data: weeklyContest } = await supabase
-          .from("contests")
-          .select("id")
-          .eq("id", weeklyContestRace.contest_id)
-          .eq("type", "weekly")
-          .eq("status", "active")
-          .maybeSingle();
-
-        if (weeklyContest) {
-          const wcId = weeklyContest.id;
-          const raceOrder = weeklyContestRace.race_order;
-
-          // 連続的中ストリーク計算（現在のレースから逆順にチェック）
-          let consecutiveHits = 0;
-          if (anyHit) {
-            consecutiveHits = 1;
-            const { data: allContestRaces } = await supabase
-              .from("contest_races")
-              .select("race_id, race_order")
-              .eq("contest_id", wcId)
-              .lt("race_order", raceOrder)
-              .order("race_order", { ascending: false });
-
-            if (allContestRaces) {
-              for (const cr of allContestRaces) {
-                const { data: prevVote } = await supabase
-                  .from("votes")
-                  .select("status")
-                  .eq("race_id", cr.race_id)
-                  .eq("user_id", vote.user_id)
-                  .in("status", ["settled_hit", "settled_miss"])
-                  .maybeSingle();
-                if (prevVote?.status === "settled_hit") {
-                  consecutiveHits++;
-                } else {
-                  break;
-                }
-              }
-            }
-          }
-
-          // ストリークボーナス（到達時のみ加算）
-          let newStreakPts = 0;
-          if (consecutiveHits === 2) newStreakPts = 20;
-          else if (consecutiveHits === 3) newStreakPts = 50;
-          else if (consecutiveHits === 4) newStreakPts = 100;
-          else if (consecutiveHits === 5) newStreakPts = 200;
-
-          const weeklyTotalPts = votePoints + newStreakPts;
-
-          const { data: wcEntry } = await supabase
-            .from("contest_entries")
-            .select("id, total_points, vote_count, hit_race_count, streak_bonus, earliest_vote_at")
-            .eq("contest_id", wcId)
-            .eq("user_id", vote.user_id)
-            .maybeSingle();
-
-          if (wcEntry) {
-            await supabase.from("contest_entries").update({
-              total_points: wcEntry.total_points + weeklyTotalPts,
-              vote_count: wcEntry.vote_count + 1,
-              hit_race_count: (wcEntry.hit_race_count ?? 0) + (anyHit ? 1 : 0),
-              streak_bonus: (wcEntry.streak_bonus ?? 0) + newStreakPts,
-              earliest_vote_at: wcEntry.earliest_vote_at ?? vote.created_at,
-              is_eligible: (wcEntry.vote_count + 1) >= 3, // 3レース以上で参加資格
-            }).eq("id", wcEntry.id);
-          } else {
-            await supabase.from("contest_entries").insert({
-              contest_id: wcId, user_id: vote.user_id,
-              total_points: weeklyTotalPts, vote_count: 1,
-              hit_race_count: anyHit ? 1 : 0,
-              streak_bonus: newStreakPts,
-              earliest_vote_at: vote.created_at,
-              is_eligible: false, // 3レース以上で参加資格
-            });
-          }
-
-          if (newStreakPts > 0) {
-            const { error: streakTxError } = await supabase.from("points_transactions").insert({
-              user_id: vote.user_id, vote_id: vote.id, race_id: raceId,
-              amount: newStreakPts, reason: "weekly_streak_bonus",
-              description: `週間大会 ${consecutiveHits}連続的中ボーナス +${newStreakPts}P`,
-            });
-            
-            if (streakTxError) {
-              console.error(`[settle-race] weekly streak bonus insert error for vote ${vote.id}:`, streakTxError);
-            }
-          }
-        }
-      }
-
-      // 10. バッジ自動付与チェック
-      const isUpset = winHit && winnerPopularity >= 10;
-      const isG1Win = winHit && race.grade === "G1";
-      await checkAndGrantBadges(vote.user_id, {
-        isPerfect,
-        isUpset,
-        isG1Win,
-        winOdds: hitWinOdds,
-        quinellaOdds: hitQuinellaOdds,
-        wideCount: hitWideCount,
-        trioOdds: hitTrioOdds,
+      settled.push({
+        row: {
+          vote_id: vote.id,
+          user_id: vote.user_id,
+          status: score.anyHit ? "settled_hit" : "settled_miss",
+          earned_points: score.points,
+          is_perfect: score.isPerfect,
+          win_hit: score.winHit,
+          place_hit_count: score.placeHitCount,
+          danger_hit: score.dangerHit,
+          new_streak: newStreak,
+          weekly_points: score.points + weeklyBonus,
+          weekly_streak_bonus: weeklyBonus,
+          created_at: vote.created_at,
+        },
+        picks: score.pickUpdates.map((p) => ({ ...p, vote_id: vote.id })),
+        transactions,
+        badges: {
+          isPerfect: score.isPerfect,
+          isUpset: score.winHit && ctx.winnerPopularity >= 10,
+          isG1Win: score.winHit && race.grade === "G1",
+          winOdds: score.winOdds,
+          quinellaOdds: score.quinellaOdds,
+          wideCount: score.wideCount,
+          trioOdds: score.trioOdds,
+        },
       });
-
-      // 11. ランクアップチェック & 通知
-      await checkRankUp(vote.user_id);
-
-      settledVotes++;
-      totalPointsAwarded += votePoints;
     } catch (err: any) {
       errors.push(`投票 ${vote.id} のエラー: ${err.message}`);
     }
   }
 
-  // 12. レースステータスを finished に更新
-  await supabase.from("races").update({ status: "finished" }).eq("id", raceId);
+  // 7. 一括書き込み（投票・馬券・ポイント履歴・プロフィール・大会エントリー）
+  const settledAt = new Date().toISOString();
+  const applied: Settled[] = [];
+  for (const chunk of chunked(settled, chunkSize)) {
+    const { data, error } = await supabase.rpc("settle_race_apply", {
+      p_race_id: raceId,
+      p_votes: chunk.map((s) => s.row),
+      p_picks: chunk.flatMap((s) => s.picks),
+      p_transactions: chunk.flatMap((s) => s.transactions),
+      p_settled_at: settledAt,
+      p_monthly_contest_id: contest?.id ?? null,
+      p_monthly_min_votes: contest?.min_votes ?? 0,
+      p_weekly_contest_id: weeklyContestId,
+    });
+    if (error) {
+      console.error(`[settle-race] settle_race_apply error for race ${raceId}:`, error);
+      errors.push(`投票 ${chunk.length}件の一括精算エラー: ${error.message}`);
+      continue;
+    }
+    settledVotes += data?.settled_votes ?? 0;
+    totalPointsAwarded += data?.total_points ?? 0;
+    applied.push(...chunk);
+  }
 
+  // 8. バッジ自動付与チェック（プロフィール更新後、投票者全員ぶんまとめて）
+  const badgeExtras = new Map<string, BadgeExtra>();
+  for (const s of applied) {
+    badgeExtras.set(s.row.user_id, mergeBadgeExtra(badgeExtras.get(s.row.user_id), s.badges));
+  }
+  try {
+    await checkAndGrantBadgesBatch([...badgeExtras.keys()], badgeExtras);
+  } catch (err: any) {
+    errors.push(`バッジ付与のエラー: ${err.message}`);
+  }
 
+  // 9. レースステータスを finished に更新
+  await supabase.from("races").update({ status: "finished" }).eq("id", raceId);
+  invalidateRaceDayIndex(race.race_date);
 
-  // 13. AI予想家の結果を記録
+  // 9b. ランクアップチェック & 通知（累計ポイントが増えたユーザーだけまとめて。失敗しても精算結果には影響させない）
+  try {
+    await checkRankUpBatch(applied.filter((s) => s.row.earned_points > 0).map((s) => s.row.user_id));
+  } catch (err: any) {
+    console.error(`[settle-race] rank-up check failed for race ${raceId}:`, err);
+  }
+
+  // 10. AI予想家の結果を記録
   try {
     const { data: aiPredictions } = await supabase
       .from("ai_predictions")
@@ -621,6 +357,7 @@ export async function settleRace(
       .eq("race_id", raceId);
 
     if (aiPredictions && aiPredictions.length > 0) {
+      const aiResults = [];
       for (const pred of aiPredictions) {
         const honmeiResult = results.find(
           (r: any) => r.race_entries?.post_number === pred.umaban
@@ -637,7 +374,7 @@ export async function settleRace(
         if (isWin) pts = 30;
         else if (isPlace) pts = 10;
 
-        await supabase.from("ai_prediction_results").upsert({
+        aiResults.push({
           prediction_id: pred.id,
           predictor_id: pred.predictor_id,
           race_id: raceId,
@@ -647,8 +384,11 @@ export async function settleRace(
           points: pts,
           honmei_win_odds: winOdds,
           honmei_place_odds: placeOdds,
-          settled_at: new Date().toISOString(),
-        }, { onConflict: "prediction_id" });
+          settled_at: settledAt,
+        });
+      }
+      if (aiResults.length > 0) {
+        await supabase.from("ai_prediction_results").upsert(aiResults, { onConflict: "prediction_id" });
       }
 
       // AI月間成績を更新
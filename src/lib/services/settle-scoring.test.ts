@@ -0,0 +1,86 @@
+// src/lib/services/settle-scoring.test.ts
+//
+// 実行: `npx vitest run src/lib/services`
+//
+// 検証する性質:
+//   scripts/settlesim（NumPy 版のシーズン採点）と scoreVote が投票ごとに一致する
+//   フィクスチャは `python3 scripts/simulate_season.py --write-parity-fixture` で再生成
+
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { describe, it, expect } from "vitest";
+import { buildRaceContext, scoreVote, type PickRow } from "./settle-scoring";
+
+type Row = Record<string, any>;
+
+const fixture: {
+  tables: Record<"races" | "race_entries" | "race_results" | "payouts" | "votes" | "vote_picks", Row[]>;
+  expected: Row[];
+} = JSON.parse(
+  readFileSync(join(process.cwd(), "scripts/settlesim/fixtures/parity.json"), "utf-8"),
+);
+
+const groupBy = (rows: Row[], key: string) => {
+  const out = new Map<string, Row[]>();
+  for (const r of rows) {
+    if (!out.has(r[key])) out.set(r[key], []);
+    out.get(r[key])!.push(r);
+  }
+  return out;
+};
+
+// settle-race と同じ形（race_results に race_entries を埋め込む）で採点する
+function scoreFixture() {
+  const { tables } = fixture;
+  const entries = new Map(tables.race_entries.map((e) => [e.id, e]));
+  const results = groupBy(tables.race_results, "race_id");
+  const payouts = groupBy(tables.payouts, "race_id");
+  const votes = groupBy(tables.votes, "race_id");
+  const picks = groupBy(tables.vote_picks, "vote_id");
+
+  const actual = new Map<string, Row>();
+  for (const race of tables.races) {
+    const raceResults = (results.get(race.id) ?? []).map((r) => ({
+      ...r,
+      race_entries: entries.get(r.race_entry_id) ?? null,
+    }));
+    const ctx = buildRaceContext(race as { grade: string | null }, raceResults, (payouts.get(race.id) ?? []) as any);
+    if (!ctx) continue;
+
+    for (const vote of votes.get(race.id) ?? []) {
+      const s = scoreVote((picks.get(vote.id) ?? []) as PickRow[], ctx);
+      actual.set(vote.id, {
+        vote_id: vote.id,
+        points: s.points,
+        any_hit: s.anyHit,
+        win_hit: s.winHit,
+        danger_hit: s.dangerHit,
+        is_perfect: s.isPerfect,
+        place_hit_count: s.placeHitCount,
+        wide_count: s.wideCount,
+      });
+    }
+  }
+  return actual;
+}
+
+describe("scoreVote と settlesim のパリティ", () => {
+  const actual = scoreFixture();
+
+  it("精算対象の投票が同じ", () => {
+    expect([...actual.keys()].sort()).toEqual(fixture.expected.map((e) => e.vote_id).sort());
+  });
+
+  it("投票ごとのポイントと的中フラグが一致", () => {
+    for (const expected of fixture.expected) {
+      expect(actual.get(expected.vote_id)).toEqual(expected);
+    }
+  });
+
+  it("フィクスチャに的中が一通り含まれる", () => {
+    const rows = fixture.expected;
+    expect(rows.some((r) => r.is_perfect)).toBe(true);
+    expect(rows.some((r) => r.wide_count > 1)).toBe(true);
+    expect(rows.some((r) => r.any_hit && !r.win_hit)).toBe(true);
+  });
+});
@@ -0,0 +1,385 @@
+// src/lib/services/settle-scoring.ts
+//
+// settle-race の採点本体（純関数・DBアクセスなし）。
+//   ・レース結果から RaceContext を1回だけ作り、全投票をメモリ上で採点する
+//   ・書き込みは settle-race.ts 側で一括（settle_race_apply）
+//   ・点数表は引数で受け取る（既定は @/lib/constants/ranks の POINT_RULES）
+
+import { POINT_RULES, getPointsByOdds, type OddsTier } from "@/lib/constants/ranks";
+
+/** 採点に使う点数表。POINT_RULES と同じ形。 */
+export interface PointTables {
+  win_odds: readonly OddsTier[];
+  place_odds: readonly OddsTier[];
+  quinella_odds: readonly OddsTier[];
+  wide_odds: readonly OddsTier[];
+  trio_odds: readonly OddsTier[];
+  back_multiplier: readonly { count: number; multiplier: number }[];
+  exacta_bonus: number;
+  trifecta_bonus: { place_3rd: number; back_3rd: number };
+  danger: Record<number | string, number>;
+  grade_bonus: Record<string, number>;
+  perfect: number;
+  streak3: number;
+}
+
+export const DEFAULT_POINT_TABLES: PointTables = POINT_RULES;
+
+export type PickRow = { id: string; pick_type: string; race_entry_id: string };
+
+export type PointTransaction = { reason: string; amount: number; description: string };
+
+/** vote_picks へ書き戻す1行。 */
+export type PickUpdate = { id: string; is_hit: boolean; points_earned: number };
+
+/** 1投票の採点結果（連続的中ボーナスはプロフィール依存なので含まない）。 */
+export interface VoteScore {
+  points: number;
+  transactions: PointTransaction[];
+  pickUpdates: PickUpdate[];
+  anyHit: boolean;
+  winHit: boolean;
+  dangerHit: boolean;
+  isPerfect: boolean;
+  placeHitCount: number;
+  // 馬券バッジ用
+  winOdds?: number;
+  quinellaOdds?: number;
+  wideCount: number;
+  trioOdds?: number;
+}
+
+/** 1レースぶんの確定情報。全投票で共有する。 */
+export interface RaceContext {
+  grade: string | null;
+  gradeBonus: number;
+  winnerEntryId: string;
+  winnerOdds: number;
+  winnerPopularity: number;
+  firstEntryId?: string;
+  secondEntryId?: string;
+  thirdEntryId?: string;
+  firstPostNum?: number;
+  secondPostNum?: number;
+  top3EntryIds: Set<string>;
+  top3PostNumbers: number[];
+  finishByEntry: Map<string, number>;
+  entryMap: Map<string, { post_number: number; odds: number | null; popularity: number | null }>;
+  // 払戻（bet_type → 正規化した組番 → 倍率）。同じ組番は先勝ち
+  payoutOdds: Map<string, Map<string, number>>;
+}
+
+// ====================================================
+// 点数表の参照
+// ====================================================
+
+function backMultiplier(tables: PointTables, backCount: number): number {
+  if (backCount <= 0) return 1.0;
+  return tables.back_multiplier.find((t) => t.count === backCount)?.multiplier ?? 0.2;
+}
+
+function dangerPoints(tables: PointTables, popularity: number): number {
+  return tables.danger[popularity] ?? tables.danger.default;
+}
+
+export function gradeBonusOf(tables: PointTables, grade: string | null): number {
+  if (!grade) return 0;
+  return tables.grade_bonus[grade] ?? 0;
+}
+
+/** 連続的中ボーナス（3の倍数ごと）。 */
+export function streakBonus(tables: PointTables, newStreak: number): number {
+  return newStreak > 0 && newStreak % 3 === 0 ? tables.streak3 : 0;
+}
+
+// ====================================================
+// レース結果の整理
+// ====================================================
+
+const normalizeCombo = (combination: string) => combination.replace(/[ー－]/g, "-");
+
+// 組番の正規化は従来の find 条件と同じ（三連複は文字列ソート）
+const PAYOUT_KEY: Record<string, (combination: string) => string> = {
+  place: (c) => c,
+  quinella: normalizeCombo,
+  wide: normalizeCombo,
+  trio: (c) => normalizeCombo(c).split("-").sort().join("-"),
+};
+
+/**
+ * race / race_results(race_entries 付き) / payouts から RaceContext を作る。
+ * 1着がいなければ null。
+ */
+export function buildRaceContext(
+  race: { grade: string | null },
+  results: any[],
+  payouts: { bet_type: string; combination: string; payout_amount: number }[],
+  tables: PointTables = DEFAULT_POINT_TABLES,
+): RaceContext | null {
+  const first = results.find((r) => r.finish_position === 1);
+  const second = results.find((r) => r.finish_position === 2);
+  const third = results.find((r) => r.finish_position === 3);
+  if (!first?.race_entry_id) return null;
+
+  const top3 = results.filter((r) => r.finish_position <= 3);
+
+  const entryMap: RaceContext["entryMap"] = new Map();
+  const finishByEntry = new Map<string, number>();
+  for (const r of results) {
+    finishByEntry.set(r.race_entry_id, r.finish_position);
+    if (r.race_entries) {
+      entryMap.set(r.race_entry_id, {
+        post_number: r.race_entries.post_number,
+        odds: r.race_entries.odds,
+        popularity: r.race_entries.popularity,
+      });
+    }
+  }
+
+  const payoutOdds: RaceContext["payoutOdds"] = new Map();
+  for (const p of payouts) {
+    const keyOf = PAYOUT_KEY[p.bet_type];
+    if (!keyOf) continue;
+    if (!payoutOdds.has(p.bet_type)) payoutOdds.set(p.bet_type, new Map());
+    const byCombo = payoutOdds.get(p.bet_type)!;
+    const key = keyOf(p.combination);
+    if (!byCombo.has(key)) byCombo.set(key, p.payout_amount / 100);
+  }
+
+  return {
+    grade: race.grade,
+    gradeBonus: gradeBonusOf(tables, race.grade),
+    winnerEntryId: first.race_entry_id,
+    winnerOdds: first.race_entries?.odds ?? 1,
+    winnerPopularity: first.race_entries?.popularity ?? 1,
+    firstEntryId: first.race_entry_id,
+    secondEntryId: second?.race_entry_id,
+    thirdEntryId: third?.race_entry_id,
+    firstPostNum: first.race_entries?.post_number,
+    secondPostNum: second?.race_entries?.post_number,
+    top3EntryIds: new Set(top3.map((r) => r.race_entry_id)),
+    top3PostNumbers: top3.map((r) => r.race_entries?.post_number).filter(Boolean).sort((a, b) => a - b),
+    finishByEntry,
+    entryMap,
+    payoutOdds,
+  };
+}
+
+// ====================================================
+// 採点
+// ====================================================
+
+/** 1投票ぶんの馬券を採点する（◎単勝・複勝／○／馬連・馬単／ワイド／三連複・三連単／△／⚠️／完全的中）。 */
+export function scoreVote(
+  picks: PickRow[],
+  ctx: RaceContext,
+  tables: PointTables = DEFAULT_POINT_TABLES,
+): VoteScore {
+  const { gradeBonus, top3EntryIds, entryMap } = ctx;
+  const gradeLabel = gradeBonus > 0 ? `（${ctx.grade}+${gradeBonus}）` : "";
+  const payout = (betType: string, key: string) => ctx.payoutOdds.get(betType)?.get(key);
+
+  const score: VoteScore = {
+    points: 0,
+    transactions: [],
+    pickUpdates: [],
+    anyHit: false,
+    winHit: false,
+    dangerHit: false,
+    isPerfect: false,
+    placeHitCount: 0,
+    wideCount: 0,
+  };
+  const hit = (pts: number, tx: PointTransaction) => {
+    score.points += pts;
+    score.anyHit = true;
+    score.transactions.push(tx);
+  };
+
+  const winPick = picks.find((p) => p.pick_type === "win");
+  const placePicks = picks.filter((p) => p.pick_type === "place");
+  const backPicks = picks.filter((p) => p.pick_type === "back");
+  const dangerPick = picks.find((p) => p.pick_type === "danger");
+  const backCount = backPicks.length;
+
+  const winPostNum = winPick ? entryMap.get(winPick.race_entry_id)?.post_number : undefined;
+  const winInTop3 = !!winPick && top3EntryIds.has(winPick.race_entry_id);
+
+  // --- 単勝的中判定（オッズ連動）---
+  if (winPick) {
+    if (winPick.race_entry_id === ctx.winnerEntryId) {
+      const basePts = getPointsByOdds(ctx.winnerOdds, tables.win_odds);
+      const pts = basePts + gradeBonus;
+      score.winHit = true;
+      score.winOdds = ctx.winnerOdds;
+      hit(pts, {
+        reason: "win_hit",
+        amount: pts,
+        description: `単勝的中（${ctx.winnerOdds}倍）+${basePts}P${gradeLabel}`,
+      });
+      score.pickUpdates.push({ id: winPick.id, is_hit: true, points_earned: pts });
+    } else {
+      score.pickUpdates.push({ id: winPick.id, is_hit: false, points_earned: 0 });
+    }
+  }
+
+  // --- 複勝的中判定（◎が3着以内だが1着ではない）---
+  if (winPick && winInTop3 && !score.winHit) {
+    const placeOdds = payout("place", String(winPostNum)) ?? 1.5;
+    const basePts = getPointsByOdds(placeOdds, tables.place_odds);
+    const pts = basePts + gradeBonus;
+    hit(pts, {
+      reason: "place_hit",
+      amount: pts,
+      description: `複勝的中（◎${winPostNum}番→3着以内、${placeOdds.toFixed(1)}倍）+${basePts}P${gradeLabel}`,
+    });
+  }
+
+  // --- 対抗（○）の的中判定（ポイントなし、is_hitのみ）---
+  let allPlaceHit = placePicks.length > 0;
+  for (const pp of placePicks) {
+    const isPlaceHit = top3EntryIds.has(pp.race_entry_id);
+    if (isPlaceHit) score.placeHitCount++;
+    else allPlaceHit = false;
+    score.pickUpdates.push({ id: pp.id, is_hit: isPlaceHit, points_earned: 0 });
+  }
+
+  // --- 馬連的中判定（◎○が1-2着）+ 馬単ボーナス ---
+  if (winPick && placePicks.length > 0 && ctx.firstPostNum && ctx.secondPostNum) {
+    for (const pp of placePicks) {
+      const placePostNum = entryMap.get(pp.race_entry_id)?.post_number;
+      const isExactaHit = winPostNum === ctx.firstPostNum && placePostNum === ctx.secondPostNum;
+      const isQuinellaHit = isExactaHit ||
+        (winPostNum === ctx.secondPostNum && placePostNum === ctx.firstPostNum);
+      if (!isQuinellaHit) continue;
+
+      const combo = [winPostNum!, placePostNum!].sort((a, b) => a - b).join("-");
+      const quinellaOdds = payout("quinella", combo) ?? 10;
+
+      let basePts = getPointsByOdds(quinellaOdds, tables.quinella_odds);
+      // 馬単ボーナス: 1着◎、2着○の順番通り
+      if (isExactaHit) basePts = Math.floor(basePts * tables.exacta_bonus);
+
+      const pts = basePts + gradeBonus;
+      score.quinellaOdds = quinellaOdds;
+      const exactaLabel = isExactaHit ? `【馬単ボーナス×${tables.exacta_bonus}】` : "";
+      hit(pts, {
+        reason: isExactaHit ? "exacta_hit" : "quinella_hit",
+        amount: pts,
+        description: `馬連的中（${quinellaOdds.toFixed(1)}倍）${exactaLabel}+${basePts}P${gradeLabel}`,
+      });
+      break; // 馬連は1回のみ
+    }
+  }
+
+  // --- ワイド的中判定（◎○が3着以内）---
+  if (winPick && winInTop3 && winPostNum) {
+    for (const pp of placePicks) {
+      const placePostNum = entryMap.get(pp.race_entry_id)?.post_number;
+      if (!top3EntryIds.has(pp.race_entry_id) || !placePostNum) continue;
+
+      const combo = [winPostNum, placePostNum].sort((a, b) => a - b).join("-");
+      const wideOdds = payout("wide", combo) ?? 3;
+      const basePts = getPointsByOdds(wideOdds, tables.wide_odds);
+      const pts = basePts + gradeBonus;
+      score.wideCount++;
+      hit(pts, {
+        reason: "wide_hit",
+        amount: pts,
+        description: `ワイド的中（${wideOdds.toFixed(1)}倍）+${basePts}P${gradeLabel}`,
+      });
+    }
+  }
+
+  // --- 三連複的中判定（◎○○/◎○△/◎△△が1-2-3着）+ 3連単ボーナス ---
+  if (winPick && winInTop3 && ctx.top3PostNumbers.length === 3) {
+    // ◎以外の3着以内で、○／△が的中した頭数
+    const isOtherTop3 = (p: PickRow) =>
+      p.race_entry_id !== winPick.race_entry_id && top3EntryIds.has(p.race_entry_id);
+    const placeHitsInTop3 = placePicks.filter(isOtherTop3).length;
+    const backHitsInTop3 = backPicks.filter(isOtherTop3).length;
+
+    if (placeHitsInTop3 + backHitsInTop3 >= 2) {
+      const trioOdds = payout("trio", ctx.top3PostNumbers.join("-")) ?? 30;
+      let basePts = getPointsByOdds(trioOdds, tables.trio_odds);
+
+      // 3連単ボーナス判定: 1着◎、2着○、3着○or△の順番通り
+      const isWinFirst = winPick.race_entry_id === ctx.firstEntryId;
+      const secondIsPlace = placePicks.some((pp) => pp.race_entry_id === ctx.secondEntryId);
+      const thirdIsPlace = placePicks.some((pp) => pp.race_entry_id === ctx.thirdEntryId);
+      const thirdIsBack = backPicks.some((bp) => bp.race_entry_id === ctx.thirdEntryId);
+
+      let trifectaBonus = 1.0;
+      if (isWinFirst && secondIsPlace && thirdIsPlace) trifectaBonus = tables.trifecta_bonus.place_3rd;
+      else if (isWinFirst && secondIsPlace && thirdIsBack) trifectaBonus = tables.trifecta_bonus.back_3rd;
+      const trifectaLabel = trifectaBonus > 1.0 ? `【3連単ボーナス×${trifectaBonus}】` : "";
+
+      if (trifectaBonus > 1.0) {
+        basePts = Math.floor(basePts * trifectaBonus);
+      } else if (backHitsInTop3 > 0) {
+        // △が含まれる場合は倍率適用（3連単ボーナスがない場合のみ）
+        basePts = Math.floor(basePts * backMultiplier(tables, backCount));
+      }
+
+      const pts = basePts + gradeBonus;
+      score.trioOdds = trioOdds;
+      const backLabel = (backHitsInTop3 > 0 && trifectaBonus === 1.0)
+        ? `（△${backCount}頭×${backMultiplier(tables, backCount)}）`
+        : "";
+      hit(pts, {
+        reason: trifectaBonus > 1.0 ? "trifecta_hit" : "trio_hit",
+        amount: pts,
+        description: `三連複的中（${trioOdds.toFixed(1)}倍）${trifectaLabel}+${basePts}P${backLabel}${gradeLabel}`,
+      });
+    }
+  }
+
+  // --- △（抑え）のis_hit ---
+  for (const bp of backPicks) {
+    score.pickUpdates.push({ id: bp.id, is_hit: top3EntryIds.has(bp.race_entry_id), points_earned: 0 });
+  }
+
+  // --- 危険馬的中判定（人気別ポイント）---
+  if (dangerPick) {
+    const finish = ctx.finishByEntry.get(dangerPick.race_entry_id);
+    if (finish !== undefined && finish > 3) {
+      const dangerPop = entryMap.get(dangerPick.race_entry_id)?.popularity ?? 99;
+      const basePts = dangerPoints(tables, dangerPop);
+      const pts = basePts + gradeBonus;
+      score.dangerHit = true;
+      const popLabel = dangerPop !== 99 ? `${dangerPop}番人気` : "人気不明";
+      hit(pts, {
+        reason: "danger_hit",
+        amount: pts,
+        description: `危険馬的中（${popLabel}）+${basePts}P${gradeLabel}`,
+      });
+      score.pickUpdates.push({ id: dangerPick.id, is_hit: true, points_earned: pts });
+    } else {
+      score.pickUpdates.push({ id: dangerPick.id, is_hit: false, points_earned: 0 });
+    }
+  }
+
+  // --- 完全的中ボーナス ---
+  score.isPerfect = score.winHit && allPlaceHit && score.dangerHit;
+  if (score.isPerfect) {
+    score.points += tables.perfect;
+    score.transactions.push({
+      reason: "perfect_bonus",
+      amount: tables.perfect,
+      description: `完全的中ボーナス +${tables.perfect}P`,
+    });
+  }
+
+  return score;
+}
+
+/** 週間大会の連続的中ボーナス（到達時のみ）。 */
+export function weeklyStreakBonus(consecutiveHits: number): number {
+  switch (consecutiveHits) {
+    case 2: return 20;
+    case 3: return 50;
+    case 4: return 100;
+    case 5: return 200;
+    default: return 0;
+  }
+}
@@ -0,0 +1,137 @@
+-- supabase/migrations/20261017_account_deletion_jobs.sql
+-- 退会処理のジョブ化（/api/account/delete は積むだけで即返す）。
+-- 本体は account_deletion_step を繰り返し呼んで進める（src/lib/account-deletion.ts）:
+--   profile → comments → follows_out → follows_in → notifications → user_badges → contest_entries → auth → done
+-- 1回の呼び出しは「今のステップの表から最大 p_batch 行」だけ処理し、ステップと件数を job 行に残す。
+-- 途中で関数がタイムアウトしても、次の呼び出し（レスポンス後の after / 5分おきの Cron）が続きから再開する。
+-- 各ステップは「まだ残っている行」だけを対象にするので何度呼んでも結果は同じ。
+-- auth（Supabase Auth のユーザー削除）だけは Node 側で行う。
+
+create table if not exists account_deletion_jobs (
+  user_id      uuid primary key,                         -- profiles が消えても残す（FK なし）
+  status       text        not null default 'queued',    -- queued | running | done | failed
+  step         text        not null default 'profile',
+  progress     jsonb       not null default '{}'::jsonb, -- {"comments": 1200, "follows_out": 35, ...}
+  attempts     integer     not null default 0,           -- auth 削除の失敗回数
+  last_error   text,
+  requested_at timestamptz not null default now(),
+  updated_at   timestamptz not null default now(),
+  finished_at  timestamptz
+);
+
+create index if not exists idx_account_deletion_jobs_pending
+  on account_deletion_jobs(requested_at) where status in ('queued', 'running');
+
+-- 本人は自分のジョブの進み具合だけ見られる
+alter table account_deletion_jobs enable row level security;
+drop policy if exists "account_deletion_jobs_select_own" on account_deletion_jobs;
+create policy "account_deletion_jobs_select_own" on account_deletion_jobs
+  for select using (user_id = auth.uid());
+
+create or replace function account_deletion_step(
+  p_user_id uuid,
+  p_batch   integer default 1000
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_steps text[] := array['profile', 'comments', 'follows_out', 'follows_in',
+                          'notifications', 'user_badges', 'contest_entries', 'auth'];
+  v_job   account_deletion_jobs%rowtype;
+  v_n     integer := 0;
+  v_next  text;
+begin
+  -- 同じジョブを同時に進めない（処理中なら何もせず今の状態を返す）
+  select * into v_job
+  from account_deletion_jobs
+  where user_id = p_user_id
+  for update skip locked;
+  if not found then
+    select * into v_job from account_deletion_jobs where user_id = p_user_id;
+    if not found then
+      return null;
+    end if;
+    return to_jsonb(v_job) || jsonb_build_object('busy', true);
+  end if;
+
+  -- auth は Node 側の担当
+  if v_job.status in ('done', 'failed') or v_job.step = 'auth' then
+    return to_jsonb(v_job);
+  end if;
+
+  case v_job.step
+    when 'profile' then
+      update profiles set
+        display_name = '退会済みユーザー',
+        bio          = null,
+        avatar_url   = null,
+        avatar_emoji = null,
+        is_admin     = false
+      where id = p_user_id;
+      get diagnostics v_n = row_count;
+
+    -- コメントは匿名化（削除すると会話が壊れるため）
+    when 'comments' then
+      update comments set is_deleted = true
+      where id in (
+        select id from comments
+        where user_id = p_user_id and is_deleted = false
+        limit p_batch
+      );
+      get diagnostics v_n = row_count;
+
+    when 'follows_out' then
+      delete from follows
+      where ctid = any(array(select ctid from follows where follower_id = p_user_id limit p_batch));
+      get diagnostics v_n = row_count;
+
+    when 'follows_in' then
+      delete from follows
+      where ctid = any(array(select ctid from follows where following_id = p_user_id limit p_batch));
+      get diagnostics v_n = row_count;
+
+    when 'notifications' then
+      delete from notifications
+      where ctid = any(array(select ctid from notifications where user_id = p_user_id limit p_batch));
+      get diagnostics v_n = row_count;
+
+    when 'user_badges' then
+      delete from user_badges
+      where ctid = any(array(select ctid from user_badges where user_id = p_user_id limit p_batch));
+      get diagnostics v_n = row_count;
+
+    when 'contest_entries' then
+      delete from contest_entries
+      where ctid = any(array(select ctid from contest_entries where user_id = p_user_id limit p_batch));
+      get diagnostics v_n = row_count;
+  end case;
+
+  -- 1行ものの profile と、バッチに満たなかった（＝残りが無い）ステップは次へ
+  if v_job.step = 'profile' or v_n < p_batch then
+    v_next := v_steps[array_position(v_steps, v_job.step) + 1];
+  else
+    v_next := v_job.step;
+  end if;
+
+  update account_deletion_jobs set
+    status     = 'running',
+    step       = v_next,
+    progress   = progress || jsonb_build_object(
+                   v_job.step, coalesce((progress ->> v_job.step)::integer, 0) + v_n),
+    updated_at = now()
+  where user_id = p_user_id
+  returning * into v_job;
+
+  return to_jsonb(v_job);
+end;
+$$;
+
+-- サーバー（adminClient = service_role）からのみ
+revoke all on function account_deletion_step(uuid, integer) from public, anon, authenticated;
+grant execute on function account_deletion_step(uuid, integer) to service_role;
+
+-- 各ステップの「残り」を索引で引く（comments / follows / notifications は add_indexes.sql にある）
+create index if not exists idx_user_badges_user_id on user_badges(user_id);
+create index if not exists idx_contest_entries_user_id on contest_entries(user_id);
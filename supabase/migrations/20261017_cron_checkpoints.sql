@@ -0,0 +1,22 @@
+-- supabase/migrations/20261017_cron_checkpoints.sql
+-- Cron ジョブの進捗（チェックポイント）。
+-- 同じ期間のジョブが再試行で何度起動されても、完了済みなら何もせず記録した結果を返すために使う
+-- （現状の利用者は monthly_rollover。20261017_monthly_rollover.sql）。
+--   job    : ジョブ名（例: 'monthly-reset'）
+--   period : 実行単位（例: 前月 '2026-09'）。同じ job+period は1行
+--   phase  : ジョブ内の段階（'done' なら完了済み）
+--   stats  : 件数など
+
+create table if not exists cron_checkpoints (
+  job         text        not null,
+  period      text        not null,
+  phase       text        not null,
+  stats       jsonb       not null default '{}'::jsonb,
+  started_at  timestamptz not null default now(),
+  updated_at  timestamptz not null default now(),
+  finished_at timestamptz,
+  primary key (job, period)
+);
+
+-- service_role からのみ読み書きする（ポリシーなし＝anon / authenticated は不可）
+alter table cron_checkpoints enable row level security;
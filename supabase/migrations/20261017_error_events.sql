@@ -0,0 +1,59 @@
+-- supabase/migrations/20261017_error_events.sql
+-- クライアントエラーの集計（/api/error-report → src/lib/error-ingest.ts から rpc で加算）。
+-- 1件ごとに行を作らず、fingerprint × 1時間の行に件数を足し込む。
+-- 内容（メッセージ・スタック・ページ）はその時間帯で最初に来たものを代表として残す。
+
+create table if not exists error_events (
+  fingerprint   text        not null,
+  bucket        timestamptz not null,            -- date_trunc('hour', last_seen_at)
+  source        text        not null default 'client',
+  count         bigint      not null default 0,
+  message       text        not null,
+  stack         text,
+  page          text,
+  user_agent    text,
+  digest        text,
+  first_seen_at timestamptz not null,
+  last_seen_at  timestamptz not null,
+  primary key (fingerprint, bucket, source)
+);
+
+-- 管理画面での「直近で多いエラー」
+create index if not exists idx_error_events_bucket on error_events(bucket desc, count desc);
+
+-- service_role 以外からは見えない（ポリシーなし）
+alter table error_events enable row level security;
+
+-- p_rows: [{fingerprint, source, count, message, stack, page, user_agent, digest, first_seen_at, last_seen_at}, ...]
+create or replace function ingest_error_events(p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  v_count integer;
+begin
+  insert into error_events as e (
+    fingerprint, bucket, source, count, message, stack, page, user_agent, digest, first_seen_at, last_seen_at
+  )
+  select r.fingerprint,
+         date_trunc('hour', r.last_seen_at),
+         coalesce(r.source, 'client'),
+         r.count,
+         r.message, r.stack, r.page, r.user_agent, r.digest,
+         r.first_seen_at, r.last_seen_at
+  from jsonb_to_recordset(p_rows) as r(
+    fingerprint text, source text, count bigint, message text, stack text, page text,
+    user_agent text, digest text, first_seen_at timestamptz, last_seen_at timestamptz
+  )
+  where r.fingerprint is not null and r.message is not null
+  on conflict (fingerprint, bucket, source) do update set
+    count         = e.count + excluded.count,
+    first_seen_at = least(e.first_seen_at, excluded.first_seen_at),
+    last_seen_at  = greatest(e.last_seen_at, excluded.last_seen_at);
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+revoke all on function ingest_error_events(jsonb) from public, anon, authenticated;
+grant execute on function ingest_error_events(jsonb) to service_role;
@@ -0,0 +1,243 @@
+-- supabase/migrations/20261017_horse_career_stats.sql
+-- 馬カルテ（/horses/[horseId]）用の戦績プロジェクション。
+-- これまではページ表示のたびに race_entries 全件＋race_results を引いてコンポーネントで集計していた。
+-- 馬ごとに1行へ集計済みの値を持ち、結果の登録・削除時にその馬の行だけ作り直す。
+--   starts / wins / seconds / thirds / places（3着以内）
+--   by_distance : {"sprint"|"mile"|"middle"|"long": {starts, wins, places}}（〜1400 / 〜1800 / 〜2200 / 2201〜）
+--   by_surface  : {"<track_type>": {starts, wins, places}}
+--   by_course   : {"<course_name>": {starts, wins, places}}
+--   recent_form : 直近10走（新しい順）。出走履歴の表示に必要な列を持つ
+-- 出走数は結果のある非取消の出走（中止などで着順が無いものも1戦に数える）。
+
+create table if not exists horse_career_stats (
+  horse_id     uuid primary key references horses(id) on delete cascade,
+  starts       integer not null default 0,
+  wins         integer not null default 0,
+  seconds      integer not null default 0,
+  thirds       integer not null default 0,
+  places       integer not null default 0,
+  by_distance  jsonb   not null default '{}'::jsonb,
+  by_surface   jsonb   not null default '{}'::jsonb,
+  by_course    jsonb   not null default '{}'::jsonb,
+  recent_form  jsonb   not null default '[]'::jsonb,
+  last_race_date date,
+  updated_at   timestamptz not null default now()
+);
+
+alter table horse_career_stats enable row level security;
+drop policy if exists "horse_career_stats_select_all" on horse_career_stats;
+create policy "horse_career_stats_select_all" on horse_career_stats
+  for select using (true);
+
+-- 集計の起点（馬ごとの出走）
+create index if not exists idx_race_entries_horse_id on race_entries(horse_id);
+create index if not exists idx_race_results_race_entry_id on race_results(race_entry_id);
+
+-- ============================================================
+-- 指定した馬の行を作り直す（出走が無くなった馬は行を消す）
+-- ============================================================
+create or replace function refresh_horse_career_stats(p_horse_ids uuid[])
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_count integer;
+begin
+  if p_horse_ids is null or cardinality(p_horse_ids) = 0 then
+    return 0;
+  end if;
+
+  drop table if exists _hcs_runs;
+  create temp table _hcs_runs on commit drop as
+  select re.horse_id, re.id as entry_id, re.post_number, re.jockey, re.odds, re.popularity,
+         r.id as race_id, r.name, r.race_date, r.post_time, r.course_name, r.distance, r.track_type, r.grade,
+         rr.finish_position, rr.finish_time, rr.margin, rr.last_3f,
+         case
+           when r.distance <= 1400 then 'sprint'
+           when r.distance <= 1800 then 'mile'
+           when r.distance <= 2200 then 'middle'
+           else 'long'
+         end as dist_band
+  from race_entries re
+  join race_results rr on rr.race_entry_id = re.id
+  join races r on r.id = re.race_id
+  where re.horse_id = any(p_horse_ids)
+    and not coalesce(re.is_scratched, false);
+
+  delete from horse_career_stats s
+  where s.horse_id = any(p_horse_ids)
+    and not exists (select 1 from _hcs_runs x where x.horse_id = s.horse_id);
+
+  with splits as (
+    select horse_id, axis, jsonb_object_agg(k, jsonb_build_object('starts', n, 'wins', w, 'places', p)) as j
+    from (
+      select horse_id, 'distance' as axis, dist_band as k, count(*) as n,
+             count(*) filter (where finish_position = 1) as w,
+             count(*) filter (where finish_position between 1 and 3) as p
+      from _hcs_runs where distance is not null group by horse_id, dist_band
+      union all
+      select horse_id, 'surface', track_type, count(*),
+             count(*) filter (where finish_position = 1),
+             count(*) filter (where finish_position between 1 and 3)
+      from _hcs_runs where track_type is not null group by horse_id, track_type
+      union all
+      select horse_id, 'course', course_name, count(*),
+             count(*) filter (where finish_position = 1),
+             count(*) filter (where finish_position between 1 and 3)
+      from _hcs_runs where course_name is not null group by horse_id, course_name
+    ) g
+    group by horse_id, axis
+  ),
+  totals as (
+    select horse_id,
+           count(*) as starts,
+           count(*) filter (where finish_position = 1) as wins,
+           count(*) filter (where finish_position = 2) as seconds,
+           count(*) filter (where finish_position = 3) as thirds,
+           count(*) filter (where finish_position between 1 and 3) as places,
+           max(race_date) as last_race_date
+    from _hcs_runs
+    group by horse_id
+  )
+  insert into horse_career_stats (
+    horse_id, starts, wins, seconds, thirds, places,
+    by_distance, by_surface, by_course, recent_form, last_race_date, updated_at
+  )
+  select t.horse_id, t.starts, t.wins, t.seconds, t.thirds, t.places,
+         coalesce((select j from splits s where s.horse_id = t.horse_id and s.axis = 'distance'), '{}'::jsonb),
+         coalesce((select j from splits s where s.horse_id = t.horse_id and s.axis = 'surface'), '{}'::jsonb),
+         coalesce((select j from splits s where s.horse_id = t.horse_id and s.axis = 'course'), '{}'::jsonb),
+         coalesce((
+           select jsonb_agg(to_jsonb(f) - 'horse_id' - 'post_time' - 'dist_band'
+                            order by f.race_date desc, f.post_time desc nulls last)
+           from (
+             select * from _hcs_runs x
+             where x.horse_id = t.horse_id
+             order by x.race_date desc, x.post_time desc nulls last
+             limit 10
+           ) f
+         ), '[]'::jsonb),
+         t.last_race_date,
+         now()
+  from totals t
+  on conflict (horse_id) do update set
+    starts         = excluded.starts,
+    wins           = excluded.wins,
+    seconds        = excluded.seconds,
+    thirds         = excluded.thirds,
+    places         = excluded.places,
+    by_distance    = excluded.by_distance,
+    by_surface     = excluded.by_surface,
+    by_course      = excluded.by_course,
+    recent_form    = excluded.recent_form,
+    last_race_date = excluded.last_race_date,
+    updated_at     = excluded.updated_at;
+  get diagnostics v_count = row_count;
+
+  drop table _hcs_runs;
+  return v_count;
+end;
+$$;
+
+revoke all on function refresh_horse_career_stats(uuid[]) from public, anon, authenticated;
+grant execute on function refresh_horse_career_stats(uuid[]) to service_role;
+
+-- ============================================================
+-- 結果の登録・差し替え（文単位：1レース分の insert を1回で処理）
+-- ============================================================
+create or replace function horse_career_stats_results_changed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_horses uuid[];
+begin
+  if tg_op = 'INSERT' then
+    select array_agg(distinct re.horse_id) into v_horses
+    from new_rows n join race_entries re on re.id = n.race_entry_id;
+  elsif tg_op = 'UPDATE' then
+    select array_agg(distinct re.horse_id) into v_horses
+    from (select race_entry_id from new_rows union select race_entry_id from old_rows) n
+    join race_entries re on re.id = n.race_entry_id;
+  else
+    select array_agg(distinct re.horse_id) into v_horses
+    from old_rows o join race_entries re on re.id = o.race_entry_id;
+  end if;
+
+  perform refresh_horse_career_stats(v_horses);
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_horse_career_results_insert on race_results;
+create trigger trg_horse_career_results_insert
+  after insert on race_results
+  referencing new table as new_rows
+  for each statement
+  execute function horse_career_stats_results_changed();
+
+drop trigger if exists trg_horse_career_results_update on race_results;
+create trigger trg_horse_career_results_update
+  after update on race_results
+  referencing old table as old_rows new table as new_rows
+  for each statement
+  execute function horse_career_stats_results_changed();
+
+drop trigger if exists trg_horse_career_results_delete on race_results;
+create trigger trg_horse_career_results_delete
+  after delete on race_results
+  referencing old table as old_rows
+  for each statement
+  execute function horse_career_stats_results_changed();
+
+-- 出走の取消・差し替え（出走馬の再登録で race_entries ごと消えた場合もここで拾う）
+create or replace function horse_career_stats_entries_changed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_horses uuid[];
+begin
+  if tg_op = 'UPDATE' then
+    -- オッズ更新などは素通り（取消・馬の付け替えだけ拾う）
+    select array_agg(distinct h.horse_id) into v_horses
+    from new_rows n
+    join old_rows o on o.id = n.id
+    cross join lateral unnest(array[n.horse_id, o.horse_id]) as h(horse_id)
+    where h.horse_id is not null
+      and (n.is_scratched is distinct from o.is_scratched or n.horse_id is distinct from o.horse_id);
+  else
+    select array_agg(distinct horse_id) into v_horses
+    from old_rows
+    where horse_id is not null;
+  end if;
+
+  perform refresh_horse_career_stats(v_horses);
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_horse_career_entries_update on race_entries;
+create trigger trg_horse_career_entries_update
+  after update on race_entries
+  referencing old table as old_rows new table as new_rows
+  for each statement
+  execute function horse_career_stats_entries_changed();
+
+drop trigger if exists trg_horse_career_entries_delete on race_entries;
+create trigger trg_horse_career_entries_delete
+  after delete on race_entries
+  referencing old table as old_rows
+  for each statement
+  execute function horse_career_stats_entries_changed();
+
+-- ============================================================
+-- 既存データの取り込み（初回のみ）
+-- ============================================================
+select refresh_horse_career_stats(array(select distinct horse_id from race_entries where horse_id is not null));
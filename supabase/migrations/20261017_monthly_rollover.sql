@@ -0,0 +1,151 @@
+-- supabase/migrations/20261017_monthly_rollover.sql
+-- 月次ロールオーバー（/api/cron/monthly-reset から rpc で呼ぶ）。
+-- これまで Node 側でプロフィールを読み出して組み立てていた処理を、1回の呼び出し＝1トランザクションで行う:
+--   1) 前月の monthly_points を前月大会の contest_entries にスナップショット
+--   2) リセット履歴（points_transactions, reason='monthly_reset'）
+--   3) monthly_points を 0 に
+--   4) 前月大会の TOP3 に monthly_top3 バッジと通知（スナップショット確定後）
+--   5) 直近30日の投票者を今月の大会へ参加登録（既存エントリーは触らない）
+-- 完了すると cron_checkpoints に phase='done' と件数を残し、同じ月の再実行は何もせずそれを返す。
+-- 途中で失敗すれば全部ロールバックされるので、Cron の再起動でそのままやり直せる。
+
+create or replace function monthly_rollover(
+  p_year  integer,   -- 新しい月（JST）
+  p_month integer
+) returns jsonb
+language plpgsql
+as $$
+declare
+  v_prev_year    integer := case when p_month = 1 then p_year - 1 else p_year end;
+  v_prev_month   integer := case when p_month = 1 then 12 else p_month - 1 end;
+  v_period       text    := format('%s-%s', v_prev_year, lpad(v_prev_month::text, 2, '0'));
+  v_label        text    := format('%s年%s月 月間ポイントリセット', v_prev_year, v_prev_month);
+  v_prev_contest uuid;
+  v_cur_contest  uuid;
+  v_stats        jsonb;
+  v_reset        integer;
+  v_recorded     integer;
+  v_tx           integer;
+  v_top3         integer := 0;
+  v_enrolled     integer := 0;
+begin
+  -- 同じ月の同時実行を直列化し、完了済みなら前回の結果を返す
+  perform pg_advisory_xact_lock(hashtext('monthly-reset:' || v_period));
+
+  select stats into v_stats
+  from cron_checkpoints
+  where job = 'monthly-reset' and period = v_period and phase = 'done';
+  if found then
+    return v_stats || jsonb_build_object('already_done', true);
+  end if;
+
+  select id into v_prev_contest
+  from contests
+  where year = v_prev_year and month = v_prev_month and type = 'monthly'
+  limit 1;
+
+  select id into v_cur_contest
+  from contests
+  where year = p_year and month = p_month and type = 'monthly' and status = 'active'
+  limit 1;
+
+  -- 1)〜3) リセット前の値をロックして読み、その値でスナップショットと履歴を書く
+  with before_reset as (
+    select id, monthly_points
+    from profiles
+    where monthly_points > 0
+    for update
+  ),
+  reset as (
+    update profiles p set monthly_points = 0
+    from before_reset b
+    where p.id = b.id
+    returning b.id as user_id, b.monthly_points
+  ),
+  snap as (
+    insert into contest_entries (contest_id, user_id, total_points)
+    select v_prev_contest, user_id, monthly_points
+    from reset
+    where v_prev_contest is not null
+    on conflict (contest_id, user_id) do update set
+      total_points = excluded.total_points
+    returning 1
+  ),
+  tx as (
+    insert into points_transactions (user_id, amount, description, reason)
+    select user_id, 0, format('%s（前月: %sP）', v_label, monthly_points), 'monthly_reset'
+    from reset
+    returning 1
+  )
+  select (select count(*) from reset), (select count(*) from snap), (select count(*) from tx)
+    into v_reset, v_recorded, v_tx;
+
+  -- 4) 前月の月間TOP3
+  if v_prev_contest is not null then
+    with top3 as (
+      select user_id
+      from contest_entries
+      where contest_id = v_prev_contest
+      order by total_points desc
+      limit 3
+    ),
+    badge as (
+      insert into user_badges (user_id, badge_id, earned_at)
+      select t.user_id, 'monthly_top3', now()
+      from top3 t
+      where not exists (
+        select 1 from user_badges ub where ub.user_id = t.user_id and ub.badge_id = 'monthly_top3'
+      )
+      returning 1
+    ),
+    notif as (
+      insert into notifications (user_id, type, title, body, is_read)
+      select user_id, 'contest_result', '月間大会結果 🏆',
+             format('%s年%s月の月間大会でTOP3に入りました！おめでとうございます！', v_prev_year, v_prev_month),
+             false
+      from top3
+      returning 1
+    )
+    select count(*) into v_top3 from notif;
+  end if;
+
+  -- 5) 今月の大会に直近30日の投票者を参加登録
+  if v_cur_contest is not null then
+    insert into contest_entries (contest_id, user_id, total_points)
+    select v_cur_contest, v.user_id, 0
+    from (
+      select distinct user_id
+      from votes
+      where created_at >= now() - interval '30 days'
+    ) v
+    on conflict (contest_id, user_id) do nothing;
+    get diagnostics v_enrolled = row_count;
+  end if;
+
+  v_stats := jsonb_build_object(
+    'period',                   v_period,
+    'reset_users',              v_reset,
+    'contest_entries_recorded', v_recorded,
+    'transactions',             v_tx,
+    'monthly_top3',             v_top3,
+    'current_contest_enrolled', v_enrolled
+  );
+
+  insert into cron_checkpoints (job, period, phase, stats, finished_at)
+  values ('monthly-reset', v_period, 'done', v_stats, now())
+  on conflict (job, period) do update set
+    phase       = 'done',
+    stats       = excluded.stats,
+    updated_at  = now(),
+    finished_at = now();
+
+  return v_stats;
+end;
+$$;
+
+-- Cron（adminClient = service_role）からのみ
+revoke all on function monthly_rollover(integer, integer) from public, anon, authenticated;
+grant execute on function monthly_rollover(integer, integer) to service_role;
+
+-- 直近30日の投票者の抽出
+create index if not exists idx_votes_created_at on votes(created_at);
@@ -0,0 +1,101 @@
+-- supabase/migrations/20261017_race_search.sql
+-- レース検索（/races?q=...）。
+-- これまでは選択日のレースを全件読んで JS で name.includes(q) していたので、その日の中しか探せなかった。
+-- races に正規化済みの検索文字列（レース名＋競馬場名＋競馬場のよみ）を持たせて pg_trgm の GIN 索引を張り、
+-- 全期間を1回の索引走査で探して関連度順に返す。
+--   正規化: NFKC（全角英数・半角カナ → 標準形）→ 小文字 → カタカナ → ひらがな → 異体字（髙→高 など）→ 空白・記号除去
+--   「ありまきねん」のような読みでの検索は races に読みの列が無いので対象外（競馬場名だけ読みを持つ）
+
+create extension if not exists pg_trgm;
+
+-- 検索用の正規化（索引側・クエリ側で同じ関数を通す）
+create or replace function race_search_normalize(t text)
+returns text
+language sql
+immutable
+parallel safe
+as $$
+  select regexp_replace(
+    translate(
+      lower(normalize(coalesce(t, ''), NFKC)),
+      'ァアィイゥウェエォオカガキギクグケゲコゴサザシジスズセゼソゾタダチヂッツヅテデトドナニヌネノハバパヒビピフブプヘベペホボポマミムメモャヤュユョヨラリルレロヮワヰヱヲンヴヵヶ'
+        || '髙﨑德櫻澤邊邉齋齊',
+      'ぁあぃいぅうぇえぉおかがきぎくぐけげこごさざしじすずせぜそぞただちぢっつづてでとどなにぬねのはばぱひびぴふぶぷへべぺほぼぽまみむめもゃやゅゆょよらりるれろゎわゐゑをんゔゕゖ'
+        || '高崎徳桜沢辺辺斎斉'
+    ),
+    '[[:space:]・()\[\]「」『』【】〔〕,.、。!?''"/-]+', '', 'g'
+  )
+$$;
+
+-- 競馬場のよみ（「なかやま」「ちゅうきょう」でも引けるように）
+create or replace function race_course_reading(course text)
+returns text
+language sql
+immutable
+parallel safe
+as $$
+  select case course
+    when '札幌' then 'さっぽろ'
+    when '函館' then 'はこだて'
+    when '福島' then 'ふくしま'
+    when '新潟' then 'にいがた'
+    when '東京' then 'とうきょう'
+    when '中山' then 'なかやま'
+    when '中京' then 'ちゅうきょう'
+    when '京都' then 'きょうと'
+    when '阪神' then 'はんしん'
+    when '小倉' then 'こくら'
+    else ''
+  end
+$$;
+
+alter table races
+  add column if not exists search_text text
+  generated always as (
+    race_search_normalize(name) || ' ' || race_search_normalize(course_name) || ' ' || race_course_reading(course_name)
+  ) stored;
+
+-- 部分一致（LIKE '%q%'）と単語類似度（q <% search_text）の両方に効く
+create index if not exists idx_races_search_trgm on races using gin (search_text gin_trgm_ops);
+
+-- ============================================================
+-- 検索 RPC
+-- ============================================================
+-- 並び: score（部分一致なら +1、表記ゆれは単語類似度）→ 開催日の新しい順 → id
+-- ページング: 直前ページ最後の (score, race_date, id) を渡すキーセット。score は numeric で返すのでそのまま往復できる。
+-- 返すのは id と score だけ。表示用の列は呼び出し側が races から id で引く（1ページ分なので主キー検索）。
+create or replace function search_races(
+  p_query       text,
+  p_course      text    default null,
+  p_grade       text    default null,
+  p_limit       integer default 20,
+  p_after_score numeric default null,
+  p_after_date  date    default null,
+  p_after_id    uuid    default null
+) returns table (id uuid, race_date date, score numeric)
+language sql
+stable
+as $$
+  with q as (
+    select t, '%' || replace(replace(replace(t, '\', '\\'), '%', '\%'), '_', '\_') || '%' as pat
+    from (select race_search_normalize(p_query) as t) n
+  ),
+  hits as (
+    select r.id, r.race_date,
+           round(((case when r.search_text like q.pat then 1 else 0 end)
+                  + word_similarity(q.t, r.search_text))::numeric, 4) as score
+    from races r, q
+    where q.t <> ''
+      and (r.search_text like q.pat or q.t <% r.search_text)
+      and (p_course is null or r.course_name = p_course)
+      and (p_grade is null or r.grade = p_grade)
+  )
+  select h.id, h.race_date, h.score
+  from hits h
+  where p_after_id is null
+     or (h.score, h.race_date, h.id) < (p_after_score, p_after_date, p_after_id)
+  order by h.score desc, h.race_date desc, h.id desc
+  limit least(greatest(p_limit, 1), 100)
+$$;
+
+grant execute on function search_races(text, text, text, integer, numeric, date, uuid) to anon, authenticated;
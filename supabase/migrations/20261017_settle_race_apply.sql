@@ -0,0 +1,129 @@
+-- supabase/migrations/20261017_settle_race_apply.sql
+-- settleRace の一括書き込み。採点は JS（src/lib/services/settle-scoring.ts）でメモリ上に済ませ、
+-- 結果を jsonb で受け取って集合演算で書く（投票・馬券ごとの UPDATE 往復をなくす）。
+--   ・1回の呼び出し＝1トランザクション（チャンク単位で全部書けるか、何も書かないか）
+--   ・冪等：status='pending' から遷移した投票の分だけ加算する（再実行・チャンク再送で二重加算しない）
+--   ・プロフィール／大会エントリーは読んで書くのではなく加算で更新する（同時精算でも取りこぼさない）
+
+create or replace function settle_race_apply(
+  p_race_id            uuid,
+  p_votes              jsonb,              -- [{vote_id, user_id, status, earned_points, is_perfect, win_hit, place_hit_count, danger_hit, new_streak, weekly_points, weekly_streak_bonus, created_at}]
+  p_picks              jsonb,              -- [{id, vote_id, is_hit, points_earned}]
+  p_transactions       jsonb,              -- [{vote_id, user_id, amount, reason, description}]
+  p_settled_at         timestamptz default now(),
+  p_monthly_contest_id uuid    default null,
+  p_monthly_min_votes  integer default 0,
+  p_weekly_contest_id  uuid    default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+  v_settled integer;
+  v_points  bigint;
+begin
+  with x as (
+    select * from jsonb_to_recordset(p_votes) as x(
+      vote_id uuid, user_id uuid, status text, earned_points integer, is_perfect boolean,
+      win_hit boolean, place_hit_count integer, danger_hit boolean, new_streak integer,
+      weekly_points integer, weekly_streak_bonus integer, created_at timestamptz
+    )
+  ),
+  -- 1) 投票：pending のものだけ確定させ、確定した行を以降の基準にする
+  settled as (
+    update votes v set
+      status        = x.status,
+      earned_points = x.earned_points,
+      is_perfect    = x.is_perfect,
+      settled_at    = p_settled_at
+    from x
+    where v.id = x.vote_id and v.race_id = p_race_id and v.status = 'pending'
+    returning x.*
+  ),
+  -- 2) 馬券の的中・獲得ポイント
+  picks as (
+    update vote_picks vp set
+      is_hit        = y.is_hit,
+      points_earned = y.points_earned
+    from jsonb_to_recordset(p_picks) as y(id uuid, vote_id uuid, is_hit boolean, points_earned integer)
+    where vp.id = y.id and y.vote_id in (select vote_id from settled)
+    returning 1
+  ),
+  -- 3) ポイント履歴
+  tx as (
+    insert into points_transactions (user_id, vote_id, race_id, amount, reason, description)
+    select t.user_id, t.vote_id, p_race_id, t.amount, t.reason, t.description
+    from jsonb_to_recordset(p_transactions) as t(vote_id uuid, user_id uuid, amount integer, reason text, description text)
+    where t.vote_id in (select vote_id from settled)
+    returning 1
+  ),
+  -- 4) プロフィールの累計・的中数・連続的中
+  per_user as (
+    select user_id,
+           sum(earned_points)                  as points,
+           count(*)                            as votes,
+           count(*) filter (where win_hit)     as win_hits,
+           sum(place_hit_count)                as place_hits,
+           count(*) filter (where danger_hit)  as danger_hits,
+           max(new_streak)                     as new_streak,
+           sum(weekly_points)                  as weekly_points,
+           count(*) filter (where status = 'settled_hit') as hit_races,
+           sum(weekly_streak_bonus)            as weekly_streak_bonus,
+           min(created_at)                     as earliest_vote_at
+    from settled
+    group by user_id
+  ),
+  prof as (
+    update profiles p set
+      cumulative_points = p.cumulative_points + d.points,
+      monthly_points    = p.monthly_points + d.points,
+      total_votes       = p.total_votes + d.votes,
+      win_hits          = p.win_hits + d.win_hits,
+      place_hits        = p.place_hits + d.place_hits,
+      danger_hits       = p.danger_hits + d.danger_hits,
+      current_streak    = d.new_streak,
+      best_streak       = greatest(p.best_streak, d.new_streak)
+    from per_user d
+    where p.id = d.user_id
+    returning 1
+  ),
+  -- 5) 月間大会エントリー
+  monthly as (
+    insert into contest_entries (contest_id, user_id, total_points, vote_count, is_eligible)
+    select p_monthly_contest_id, user_id, points, votes, votes >= p_monthly_min_votes
+    from per_user
+    where p_monthly_contest_id is not null
+    on conflict (contest_id, user_id) do update set
+      total_points = contest_entries.total_points + excluded.total_points,
+      vote_count   = contest_entries.vote_count + excluded.vote_count,
+      is_eligible  = contest_entries.vote_count + excluded.vote_count >= p_monthly_min_votes
+    returning 1
+  ),
+  -- 6) 週間大会エントリー（3レース以上で参加資格）
+  weekly as (
+    insert into contest_entries (contest_id, user_id, total_points, vote_count, hit_race_count, streak_bonus, earliest_vote_at, is_eligible)
+    select p_weekly_contest_id, user_id, weekly_points, votes, hit_races, weekly_streak_bonus, earliest_vote_at, votes >= 3
+    from per_user
+    where p_weekly_contest_id is not null
+    on conflict (contest_id, user_id) do update set
+      total_points     = contest_entries.total_points + excluded.total_points,
+      vote_count       = contest_entries.vote_count + excluded.vote_count,
+      hit_race_count   = coalesce(contest_entries.hit_race_count, 0) + excluded.hit_race_count,
+      streak_bonus     = coalesce(contest_entries.streak_bonus, 0) + excluded.streak_bonus,
+      earliest_vote_at = coalesce(contest_entries.earliest_vote_at, excluded.earliest_vote_at),
+      is_eligible      = contest_entries.vote_count + excluded.vote_count >= 3
+    returning 1
+  )
+  select count(*), coalesce(sum(earned_points), 0)
+    into v_settled, v_points
+  from settled;
+
+  return jsonb_build_object('settled_votes', v_settled, 'total_points', v_points);
+end;
+$$;
+
+-- 精算は service_role（adminClient）からのみ
+revoke all on function settle_race_apply(uuid, jsonb, jsonb, jsonb, timestamptz, uuid, integer, uuid) from public, anon, authenticated;
+grant execute on function settle_race_apply(uuid, jsonb, jsonb, jsonb, timestamptz, uuid, integer, uuid) to service_role;
+
+-- pending 投票のページング取得（race_id, status, id 順）
+create index if not exists idx_votes_race_status on votes (race_id, status, id);
@@ -0,0 +1,170 @@
+-- supabase/migrations/20261017_timeline_feed.sql
+-- ホームタイムラインの投票フィード（ユーザーごとに事前展開）。
+-- これまで /api/timeline はリクエストごとに votes を .in("user_id", 自分+フォロー全員) で引いていた。
+-- 投票の作成・精算時に「作者本人とフォロワー」の行をここへ書いておき（fan-out）、
+-- 読み出しは owner_id の索引を1回範囲走査するだけにする。
+--   kind = 'vote_submitted' : みんなの予想（pending の間だけ。ts = created_at）
+--   kind = 'vote_result'    : 的中報告（settled_hit。ts = settled_at）
+-- 中身（表示名・馬券・いいね数）は持たず votes を参照する。投票が消えれば cascade で消える。
+-- fan-out は votes / follows のトリガーで行うので、投票 API・精算 RPC・管理画面のどこから書いても漏れない。
+
+create table if not exists timeline_feed (
+  owner_id uuid        not null references profiles(id) on delete cascade,  -- フィードを見る人
+  kind     text        not null,
+  vote_id  uuid        not null references votes(id) on delete cascade,
+  actor_id uuid        not null,                                             -- 投票した人
+  ts       timestamptz not null,
+  primary key (owner_id, kind, vote_id)
+);
+
+-- 読み出し: owner_id ごとに (ts, vote_id) の降順キーセット
+create index if not exists idx_timeline_feed_owner_ts on timeline_feed(owner_id, ts desc, vote_id desc);
+-- 精算時に vote_submitted を全フォロワー分まとめて消す
+create index if not exists idx_timeline_feed_vote on timeline_feed(vote_id);
+-- アンフォロー時に相手の行を消す
+create index if not exists idx_timeline_feed_owner_actor on timeline_feed(owner_id, actor_id);
+
+alter table timeline_feed enable row level security;
+drop policy if exists "timeline_feed_select_own" on timeline_feed;
+create policy "timeline_feed_select_own" on timeline_feed
+  for select using (owner_id = auth.uid());
+
+-- ============================================================
+-- fan-out（文単位トリガー：精算 RPC の一括 UPDATE も1回で展開）
+-- ============================================================
+
+-- 投票作成 → 作者とフォロワーへ vote_submitted
+create or replace function timeline_fanout_vote_insert()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into timeline_feed (owner_id, kind, vote_id, actor_id, ts)
+  select r.owner_id, 'vote_submitted', n.id, n.user_id, n.created_at
+  from new_votes n
+  cross join lateral (
+    select n.user_id as owner_id
+    union
+    select f.follower_id from follows f where f.following_id = n.user_id
+  ) r
+  where n.status = 'pending'
+  on conflict do nothing;
+  return null;
+end;
+$$;
+
+-- ステータス変更（精算・再精算）→ 合わなくなった行を外し、新しいステータスの行を作者とフォロワーへ
+create or replace function timeline_fanout_vote_update()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  delete from timeline_feed t
+  using new_votes n
+  join old_votes o on o.id = n.id
+  where t.vote_id = n.id
+    and o.status is distinct from n.status
+    and ((t.kind = 'vote_submitted' and n.status <> 'pending')
+      or (t.kind = 'vote_result' and n.status <> 'settled_hit'));
+
+  insert into timeline_feed (owner_id, kind, vote_id, actor_id, ts)
+  select r.owner_id,
+         case n.status when 'pending' then 'vote_submitted' else 'vote_result' end,
+         n.id, n.user_id,
+         case n.status when 'pending' then n.created_at else coalesce(n.settled_at, n.created_at) end
+  from new_votes n
+  join old_votes o on o.id = n.id
+  cross join lateral (
+    select n.user_id as owner_id
+    union
+    select f.follower_id from follows f where f.following_id = n.user_id
+  ) r
+  where n.status in ('pending', 'settled_hit')
+    and o.status is distinct from n.status
+  on conflict do nothing;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_timeline_vote_insert on votes;
+create trigger trg_timeline_vote_insert
+  after insert on votes
+  referencing new table as new_votes
+  for each statement
+  execute function timeline_fanout_vote_insert();
+
+drop trigger if exists trg_timeline_vote_update on votes;
+create trigger trg_timeline_vote_update
+  after update on votes
+  referencing old table as old_votes new table as new_votes
+  for each statement
+  execute function timeline_fanout_vote_update();
+
+-- フォロー → 相手の直近の投票を取り込む / アンフォロー → 相手の行を消す
+create or replace function timeline_follow_changed()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'INSERT' then
+    insert into timeline_feed (owner_id, kind, vote_id, actor_id, ts)
+    select new.follower_id, x.kind, x.id, x.user_id, x.ts
+    from (
+      (select 'vote_submitted' as kind, v.id, v.user_id, v.created_at as ts
+       from votes v
+       where v.user_id = new.following_id and v.status = 'pending'
+       order by v.created_at desc
+       limit 200)
+      union all
+      (select 'vote_result', v.id, v.user_id, coalesce(v.settled_at, v.created_at)
+       from votes v
+       where v.user_id = new.following_id and v.status = 'settled_hit'
+       order by v.settled_at desc nulls last
+       limit 200)
+    ) x
+    on conflict do nothing;
+    return new;
+  end if;
+
+  delete from timeline_feed
+  where owner_id = old.follower_id and actor_id = old.following_id;
+  return old;
+end;
+$$;
+
+drop trigger if exists trg_timeline_follow on follows;
+create trigger trg_timeline_follow
+  after insert or delete on follows
+  for each row
+  execute function timeline_follow_changed();
+
+-- ============================================================
+-- 既存データの取り込み（初回のみ）
+-- ============================================================
+insert into timeline_feed (owner_id, kind, vote_id, actor_id, ts)
+select r.owner_id, 'vote_submitted', v.id, v.user_id, v.created_at
+from votes v
+cross join lateral (
+  select v.user_id as owner_id
+  union
+  select f.follower_id from follows f where f.following_id = v.user_id
+) r
+where v.status = 'pending'
+on conflict do nothing;
+
+insert into timeline_feed (owner_id, kind, vote_id, actor_id, ts)
+select r.owner_id, 'vote_result', v.id, v.user_id, coalesce(v.settled_at, v.created_at)
+from votes v
+cross join lateral (
+  select v.user_id as owner_id
+  union
+  select f.follower_id from follows f where f.following_id = v.user_id
+) r
+where v.status = 'settled_hit'
+on conflict do nothing;
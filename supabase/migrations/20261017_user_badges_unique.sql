@@ -0,0 +1,17 @@
+-- supabase/migrations/20261017_user_badges_unique.sql
+-- user_badges の (user_id, badge_id) を一意にする。
+-- checkAndGrantBadgesBatch（src/lib/badges.ts）は upsert ... on conflict (user_id, badge_id) do nothing で
+-- 一括挿入するので、この一意インデックスが要る（並行して付与されても重複行を作らず、チャンク全体も失敗しない）。
+-- 既に重複している行は最初に獲得したものだけ残す。
+
+delete from user_badges ub
+using (
+  select ctid,
+         row_number() over (partition by user_id, badge_id order by earned_at, ctid) as rn
+  from user_badges
+) dup
+where ub.ctid = dup.ctid
+  and dup.rn > 1;
+
+create unique index if not exists user_badges_user_badge_unique
+  on user_badges(user_id, badge_id);
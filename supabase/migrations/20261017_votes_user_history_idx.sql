@@ -0,0 +1,4 @@
+-- supabase/migrations/20261017_votes_user_history_idx.sql
+-- 予想履歴（/mypage/votes）のキーセットページング用。
+-- user_id で絞って (created_at, id) の降順にカーソルから範囲走査する。
+create index if not exists idx_votes_user_created_id on votes(user_id, created_at desc, id desc);